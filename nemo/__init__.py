@@ -29,7 +29,8 @@ from .package_info import (
     __version__,
 )
 
+# Subpackages are imported on first access (PEP 562), `import nemo` does not import torch or the collections
 if "NEMO_PACKAGE_BUILDING" not in os.environ:
-    from nemo import core
-    from nemo import utils
-    from nemo import collections
+    from nemo.utils.lazy_import import lazy_attributes
+
+    __getattr__, __dir__ = lazy_attributes(__name__, dict.fromkeys(('collections', 'core', 'utils')))
@@ -11,3 +11,8 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+
+from nemo.utils.lazy_import import lazy_attributes
+
+# Collections are imported on first access
+__getattr__, __dir__ = lazy_attributes(__name__, dict.fromkeys(('asr', 'common', 'cv', 'nlp', 'tts')))
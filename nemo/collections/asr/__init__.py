@@ -12,8 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from nemo.collections.asr import data, losses, models, modules
 from nemo.package_info import __version__
+from nemo.utils.lazy_import import lazy_attributes
 
 # Set collection version equal to NeMo version.
 __version = __version__
@@ -23,3 +23,8 @@ __author__ = "NVIDIA Corporation"
 
 # Set collection name.
 __description__ = "Automatic Speech Recognition collection"
+
+# Submodules are imported on first access
+__getattr__, __dir__ = lazy_attributes(
+    __name__, dict.fromkeys(('data', 'losses', 'metrics', 'models', 'modules', 'parts'))
+)
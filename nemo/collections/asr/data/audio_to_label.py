@@ -16,6 +16,7 @@ from typing import Dict, List, Optional
 import torch
 
 from nemo.collections.asr.parts import collections
+from nemo.collections.common.parts.collate import stack_lengths
 from nemo.core.classes import Dataset
 from nemo.core.neural_types import AudioSignal, LabelsType, LengthsType, NeuralType
 from nemo.utils import logging
@@ -55,6 +56,8 @@ target_label_n, "offset": offset_in_sec_n}
             Defaults to True.
         
         time_length (int): max seconds to consider in a batch # Pass this only for speaker recognition task
+        manifest_index (str): Optional directory of a compiled manifest index (see scripts/build_manifest_index.py).
+            Used instead of parsing the json manifests if it is up to date with them. Defaults to None.
     """
 
     @property
@@ -84,10 +87,14 @@ target_label_n, "offset": offset_in_sec_n}
         trim: bool = False,
         load_audio: bool = True,
         time_length: Optional[int] = 8,
+        manifest_index: Optional[str] = None,
     ):
         super().__init__()
-        self.collection = collections.ASRSpeechLabel(
-            manifests_files=manifest_filepath.split(','), min_duration=min_duration, max_duration=max_duration,
+        self.collection = collections.make_speech_label_collection(
+            manifests_files=manifest_filepath.split(','),
+            manifest_index_dir=manifest_index,
+            min_duration=min_duration,
+            max_duration=max_duration,
         )
 
         self.featurizer = featurizer
@@ -116,40 +123,32 @@ target_label_n, "offset": offset_in_sec_n}
                 assumes the signals are 1d torch tensors (i.e. mono audio).
         """
         fixed_length = self.featurizer.sample_rate * self.time_length
-        _, audio_lengths, _, tokens_lengths = zip(*batch)
-
-        has_audio = audio_lengths[0] is not None
-        fixed_length = int(min(fixed_length, max(audio_lengths)))
-
-        audio_signal, tokens, new_audio_lengths = [], [], []
-        for sig, sig_len, tokens_i, _ in batch:
-            if has_audio:
-                sig_len = sig_len.item()
-                chunck_len = sig_len - fixed_length
-
-                if chunck_len < 0:
-                    repeat = fixed_length // sig_len
-                    rem = fixed_length % sig_len
-                    sub = sig[-rem:] if rem > 0 else torch.tensor([])
-                    rep_sig = torch.cat(repeat * [sig])
-                    signal = torch.cat((rep_sig, sub))
-                    new_audio_lengths.append(torch.tensor(fixed_length))
-                else:
-                    start_idx = torch.randint(0, chunck_len, (1,)) if chunck_len else torch.tensor(0)
-                    end_idx = start_idx + fixed_length
-                    signal = sig[start_idx:end_idx]
-                    new_audio_lengths.append(torch.tensor(fixed_length))
+        signals, audio_lengths, tokens, tokens_lengths = zip(*batch)
 
-                audio_signal.append(signal)
-            tokens.append(tokens_i)
-
-        if has_audio:
-            audio_signal = torch.stack(audio_signal)
-            audio_lengths = torch.stack(new_audio_lengths)
-        else:
-            audio_signal, audio_lengths = None, None
         tokens = torch.stack(tokens)
-        tokens_lengths = torch.stack(tokens_lengths)
+        tokens_lengths = stack_lengths(tokens_lengths)
+        if audio_lengths[0] is None:
+            return None, None, tokens, tokens_lengths
+
+        audio_lengths = stack_lengths(audio_lengths)
+        fixed_length = int(min(fixed_length, audio_lengths.max()))
+
+        # Preallocate the batch and copy either a random crop or a tiled repetition of each signal into its row.
+        audio_signal = torch.empty(len(batch), fixed_length, dtype=signals[0].dtype)
+        for row, sig, sig_len in zip(audio_signal, signals, audio_lengths.tolist()):
+            chunck_len = sig_len - fixed_length
+
+            if chunck_len < 0:
+                repeat = fixed_length // sig_len
+                rem = fixed_length % sig_len
+                row.narrow(0, 0, repeat * sig_len).view(repeat, sig_len).copy_(sig[:sig_len].expand(repeat, sig_len))
+                if rem > 0:
+                    row.narrow(0, repeat * sig_len, rem).copy_(sig[sig_len - rem : sig_len])
+            else:
+                start_idx = torch.randint(0, chunck_len, (1,)).item() if chunck_len else 0
+                row.copy_(sig.narrow(0, start_idx, fixed_length))
+
+        audio_lengths = torch.full((len(batch),), fixed_length, dtype=torch.long)
 
         return audio_signal, audio_lengths, tokens, tokens_lengths
 
@@ -163,45 +162,31 @@ target_label_n, "offset": offset_in_sec_n}
             fixed_length (Optional[int]): length of input signal to be considered
         """
         slice_length = self.featurizer.sample_rate * self.time_length
-        _, audio_lengths, _, tokens_lengths = zip(*batch)
-        slice_length = min(slice_length, max(audio_lengths))
+        signals, audio_lengths, tokens, _ = zip(*batch)
+        audio_lengths = stack_lengths(audio_lengths)
+        slice_length = int(min(slice_length, audio_lengths.max()))
         shift = 1 * self.featurizer.sample_rate
-        has_audio = audio_lengths[0] is not None
-
-        audio_signal, num_slices, tokens, audio_lengths = [], [], [], []
-        for sig, sig_len, tokens_i, _ in batch:
-            if has_audio:
-                sig_len = sig_len.item()
-                slices = sig_len // slice_length
-                if slices <= 0:
-
-                    repeat = slice_length // sig_len
-                    rem = slice_length % sig_len
-                    sub = sig[-rem:] if rem > 0 else torch.tensor([])
-                    rep_sig = torch.cat(repeat * [sig])
-                    signal = torch.cat((rep_sig, sub))
-                    audio_signal.append(signal)
-                    num_slices.append(1)  # single embedding
-                    tokens.extend([tokens_i] * 1)
-                    audio_lengths.extend([slice_length] * 1)
-                else:
-                    slices = (sig_len - slice_length) // shift + 1
-                    for slice_id in range(slices):
-                        start_idx = slice_id * shift
-                        end_idx = start_idx + slice_length
-                        signal = sig[start_idx:end_idx]
-                        audio_signal.append(signal)
-
-                    num_slices.append(slices)
-                    tokens.extend([tokens_i] * slices)
-                    audio_lengths.extend([slice_length] * slices)
-
-        if has_audio:
-            audio_signal = torch.stack(audio_signal)
-            audio_lengths = torch.tensor(audio_lengths)
-        else:
-            audio_signal, audio_lengths = None, None
-        tokens = torch.stack(tokens)
+
+        audio_signal, num_slices = [], []
+        for sig, sig_len in zip(signals, audio_lengths.tolist()):
+            if sig_len // slice_length <= 0:
+                repeat = slice_length // sig_len
+                rem = slice_length % sig_len
+                signal = torch.empty(1, slice_length, dtype=sig.dtype)
+                signal[0, : repeat * sig_len].view(repeat, sig_len).copy_(sig[:sig_len].expand(repeat, sig_len))
+                if rem > 0:
+                    signal[0, repeat * sig_len :].copy_(sig[sig_len - rem : sig_len])
+                audio_signal.append(signal)
+                num_slices.append(1)  # single embedding
+            else:
+                # Overlapping windows of `slice_length` samples every `shift` samples, as a view of the signal.
+                slices = sig[:sig_len].unfold(0, slice_length, shift)
+                audio_signal.append(slices)
+                num_slices.append(slices.size(0))
+
+        audio_signal = torch.cat(audio_signal)
+        audio_lengths = torch.full((audio_signal.size(0),), slice_length, dtype=torch.long)
+        tokens = torch.stack(tokens).repeat_interleave(torch.tensor(num_slices))
         tokens_lengths = torch.tensor(num_slices)  # each embedding length
 
         return audio_signal, audio_lengths, tokens, tokens_lengths
@@ -20,7 +20,10 @@ import torch
 import webdataset as wd
 
 from nemo.collections.asr.parts import collections, parsers
+from nemo.collections.asr.parts.feature_cache import AudioCache, FeatureCache
 from nemo.collections.asr.parts.features import WaveformFeaturizer
+from nemo.collections.asr.parts.shard_index import balance_shards, load_shard_index
+from nemo.collections.common.parts.collate import collate_audio_tokens
 from nemo.core.classes import Dataset, IterableDataset
 from nemo.core.neural_types import *
 from nemo.utils import logging
@@ -43,36 +46,7 @@ def _speech_collate_fn(batch, pad_id):
                encoded tokens, and encoded tokens length.  This collate func
                assumes the signals are 1d torch tensors (i.e. mono audio).
     """
-    _, audio_lengths, _, tokens_lengths = zip(*batch)
-    max_audio_len = 0
-    has_audio = audio_lengths[0] is not None
-    if has_audio:
-        max_audio_len = max(audio_lengths).item()
-    max_tokens_len = max(tokens_lengths).item()
-
-    audio_signal, tokens = [], []
-    for sig, sig_len, tokens_i, tokens_i_len in batch:
-        if has_audio:
-            sig_len = sig_len.item()
-            if sig_len < max_audio_len:
-                pad = (0, max_audio_len - sig_len)
-                sig = torch.nn.functional.pad(sig, pad)
-            audio_signal.append(sig)
-        tokens_i_len = tokens_i_len.item()
-        if tokens_i_len < max_tokens_len:
-            pad = (0, max_tokens_len - tokens_i_len)
-            tokens_i = torch.nn.functional.pad(tokens_i, pad, value=pad_id)
-        tokens.append(tokens_i)
-
-    if has_audio:
-        audio_signal = torch.stack(audio_signal)
-        audio_lengths = torch.stack(audio_lengths)
-    else:
-        audio_signal, audio_lengths = None, None
-    tokens = torch.stack(tokens)
-    tokens_lengths = torch.stack(tokens_lengths)
-
-    return audio_signal, audio_lengths, tokens, tokens_lengths
+    return collate_audio_tokens(batch, pad_id=pad_id)
 
 
 class _AudioTextDataset(Dataset):
@@ -100,6 +74,12 @@ class _AudioTextDataset(Dataset):
         eos_id: Id of end of sequence symbol to append if not None
         load_audio: Boolean flag indicate whether do or not load audio
         add_misc: True if add additional info dict.
+        manifest_index: Optional directory of a compiled manifest index (see scripts/build_manifest_index.py).
+            Used instead of parsing the json manifests if it is up to date with them.
+        feature_cache: Optional `FeatureCache`. If set, items hold cached log-mel features of shape [T, D] instead
+            of audio, and audio is only decoded to fill the cache on a miss. Ignored if `augmentor` is set.
+        resample_type: Resampling method of loaded audio, see `AudioSegment`. Defaults to 'kaiser_best'.
+        audio_cache: Optional `AudioCache` of decoded and resampled audio.
     """
 
     @property
@@ -134,18 +114,33 @@ class _AudioTextDataset(Dataset):
         pad_id: int = 0,
         load_audio: bool = True,
         add_misc: bool = False,
+        manifest_index: Optional[str] = None,
+        feature_cache: Optional[FeatureCache] = None,
+        resample_type: str = 'kaiser_best',
+        audio_cache: Optional[AudioCache] = None,
     ):
         self.parser = parser
 
-        self.collection = collections.ASRAudioText(
+        self.collection = collections.make_audio_text_collection(
             manifests_files=manifest_filepath.split(','),
+            manifest_index_dir=manifest_index,
             parser=parser,
             min_duration=min_duration,
             max_duration=max_duration,
             max_number=max_utts,
         )
 
-        self.featurizer = WaveformFeaturizer(sample_rate=sample_rate, int_values=int_values, augmentor=augmentor)
+        self.featurizer = WaveformFeaturizer(
+            sample_rate=sample_rate,
+            int_values=int_values,
+            augmentor=augmentor,
+            resample_type=resample_type,
+            audio_cache=audio_cache,
+        )
+        if feature_cache is not None and augmentor is not None:
+            logging.warning("Feature cache is disabled since audio augmentation is configured.")
+            feature_cache = None
+        self.feature_cache = feature_cache
         self.trim = trim
         self.eos_id = eos_id
         self.bos_id = bos_id
@@ -161,9 +156,15 @@ class _AudioTextDataset(Dataset):
             if offset is None:
                 offset = 0
 
-            features = self.featurizer.process(
-                sample.audio_file, offset=offset, duration=sample.duration, trim=self.trim, orig_sr=sample.orig_sr,
-            )
+            def load_samples():
+                return self.featurizer.process(
+                    sample.audio_file, offset=offset, duration=sample.duration, trim=self.trim, orig_sr=sample.orig_sr,
+                )
+
+            if self.feature_cache is not None:
+                features = self.feature_cache.get(sample.audio_file, offset, sample.duration, load_samples)
+            else:
+                features = load_samples()
             f, fl = features, torch.tensor(features.shape[0]).long()
         else:
             f, fl = None, None
@@ -225,6 +226,12 @@ class AudioToCharDataset(_AudioTextDataset):
         eos_id: Id of end of sequence symbol to append if not None
         load_audio: Boolean flag indicate whether do or not load audio
         add_misc: True if add additional info dict.
+        manifest_index: Optional directory of a compiled manifest index (see scripts/build_manifest_index.py).
+            Used instead of parsing the json manifests if it is up to date with them.
+        feature_cache: Optional `FeatureCache`. If set, items hold cached log-mel features of shape [T, D] instead
+            of audio, and audio is only decoded to fill the cache on a miss. Ignored if `augmentor` is set.
+        resample_type: Resampling method of loaded audio, see `AudioSegment`. Defaults to 'kaiser_best'.
+        audio_cache: Optional `AudioCache` of decoded and resampled audio.
     """
 
     @property
@@ -263,6 +270,10 @@ class AudioToCharDataset(_AudioTextDataset):
         load_audio: bool = True,
         parser: Union[str, Callable] = 'en',
         add_misc: bool = False,
+        manifest_index: Optional[str] = None,
+        feature_cache: Optional[FeatureCache] = None,
+        resample_type: str = 'kaiser_best',
+        audio_cache: Optional[AudioCache] = None,
     ):
         self.labels = labels
 
@@ -285,6 +296,10 @@ class AudioToCharDataset(_AudioTextDataset):
             pad_id=pad_id,
             load_audio=load_audio,
             add_misc=add_misc,
+            manifest_index=manifest_index,
+            feature_cache=feature_cache,
+            resample_type=resample_type,
+            audio_cache=audio_cache,
         )
 
 
@@ -319,6 +334,10 @@ class AudioToBPEDataset(_AudioTextDataset):
         trim: bool = False,
         load_audio: bool = True,
         add_misc: bool = False,
+        manifest_index: Optional[str] = None,
+        feature_cache: Optional[FeatureCache] = None,
+        resample_type: str = 'kaiser_best',
+        audio_cache: Optional[AudioCache] = None,
     ):
         if hasattr(tokenizer, 'bos_token'):
             bos_id = tokenizer.bos_id
@@ -336,6 +355,9 @@ class AudioToBPEDataset(_AudioTextDataset):
             pad_id = 0
 
         class TokenizerWrapper:
+            # Tokenizers never fail to tokenize a transcript, see `IndexedAudioText`
+            can_fail = False
+
             def __init__(self, tokenizer):
                 self._tokenizer = tokenizer
 
@@ -358,6 +380,10 @@ class AudioToBPEDataset(_AudioTextDataset):
             trim=trim,
             load_audio=load_audio,
             add_misc=add_misc,
+            manifest_index=manifest_index,
+            feature_cache=feature_cache,
+            resample_type=resample_type,
+            audio_cache=audio_cache,
         )
 
 
@@ -480,6 +506,11 @@ class _TarredAudioToTextDataset(IterableDataset):
     Additionally, please note that the len() of this DataLayer is assumed to be the length of the manifest
     after filtering. An incorrect manifest length may lead to some DataLoader issues down the line.
 
+    With a shard index (`shard_index`), none of the above restrictions apply: shards are assigned to the data loader
+    workers of all ranks by duration, every worker yields exactly the same number of samples after filtering, and
+    len() is the exact number of samples of this rank per epoch. The number of shards must then be at least
+    `world_size * num_workers`.
+
     Args:
         audio_tar_filepaths: Either a list of audio tarball filepaths, or a
             string (can be brace-expandable).
@@ -521,6 +552,15 @@ class _TarredAudioToTextDataset(IterableDataset):
             Defaults to None.
         global_rank (int): Worker rank, used for partitioning shards. Defaults to 0.
         world_size (int): Total number of processes, used for partitioning shards. Defaults to 0.
+        manifest_index (str): Optional directory of a compiled manifest index (see scripts/build_manifest_index.py).
+            Used instead of parsing the json manifest if it is up to date with it. Defaults to None.
+        resample_type (str): Resampling method of loaded audio, see `AudioSegment`. Defaults to 'kaiser_best'.
+        shard_index (str): Optional sample index of the shards written by scripts/convert_to_tarred_audio_dataset.py.
+            If set, shards are balanced by duration between all data loader workers of all ranks, and every worker
+            yields the same number of samples, see `shard_equalize`. Defaults to None.
+        shard_equalize (str): With `shard_index`, whether workers with more samples drop their last samples ('drop')
+            or workers with fewer samples repeat their first samples ('pad'). Defaults to 'drop'.
+        num_workers (int): With `shard_index`, number of data loader workers of every rank. Defaults to 0.
     """
 
     def __init__(
@@ -542,9 +582,15 @@ class _TarredAudioToTextDataset(IterableDataset):
         pad_id: int = 0,
         global_rank: int = 0,
         world_size: int = 0,
+        manifest_index: Optional[str] = None,
+        resample_type: str = 'kaiser_best',
+        shard_index: Optional[str] = None,
+        shard_equalize: str = 'drop',
+        num_workers: int = 0,
     ):
-        self.collection = collections.ASRAudioText(
+        self.collection = collections.make_audio_text_collection(
             manifests_files=manifest_filepath.split(','),
+            manifest_index_dir=manifest_index,
             parser=parser,
             min_duration=min_duration,
             max_duration=max_duration,
@@ -552,7 +598,9 @@ class _TarredAudioToTextDataset(IterableDataset):
             index_by_file_id=True,  # Must set this so the manifest lines can be indexed by file ID
         )
 
-        self.featurizer = WaveformFeaturizer(sample_rate=sample_rate, int_values=int_values, augmentor=augmentor)
+        self.featurizer = WaveformFeaturizer(
+            sample_rate=sample_rate, int_values=int_values, augmentor=augmentor, resample_type=resample_type
+        )
         self.trim = trim
         self.eos_id = eos_id
         self.bos_id = bos_id
@@ -572,8 +620,15 @@ class _TarredAudioToTextDataset(IterableDataset):
                 if bkey in audio_tar_filepaths:
                     audio_tar_filepaths = audio_tar_filepaths.replace(bkey, "}")
 
+        self._balanced = shard_index is not None
+        if self._balanced:
+            if isinstance(audio_tar_filepaths, str):
+                audio_tar_filepaths = list(braceexpand.braceexpand(audio_tar_filepaths))
+            self._setup_balanced_shards(
+                audio_tar_filepaths, shard_index, shard_equalize, global_rank, max(world_size, 1), max(num_workers, 1)
+            )
         # Check for distributed and partition shards accordingly
-        if world_size > 1:
+        elif world_size > 1:
             if isinstance(audio_tar_filepaths, str):
                 # Brace expand
                 audio_tar_filepaths = list(braceexpand.braceexpand(audio_tar_filepaths))
@@ -592,15 +647,88 @@ class _TarredAudioToTextDataset(IterableDataset):
             )
 
         # Put together WebDataset
-        self._dataset = (
-            wd.Dataset(audio_tar_filepaths)
-            .shuffle(shuffle_n)
-            .rename(audio='wav', key='__key__')
-            .to_tuple('audio', 'key')
-            .pipe(self._filter)
-            .map(f=self._build_sample)
+        if self._balanced:
+            dataset = wd.Dataset(audio_tar_filepaths, shard_selection=self._select_worker_shards)
+        else:
+            dataset = wd.Dataset(audio_tar_filepaths)
+        dataset = dataset.shuffle(shuffle_n).rename(audio='wav', key='__key__').to_tuple('audio', 'key')
+        dataset = dataset.pipe(self._filter)
+        if self._balanced:
+            dataset = dataset.pipe(self._equalize)
+        self._dataset = dataset.map(f=self._build_sample)
+
+    def _setup_balanced_shards(
+        self,
+        audio_tar_filepaths: List[str],
+        shard_index: str,
+        shard_equalize: str,
+        global_rank: int,
+        world_size: int,
+        num_workers: int,
+    ):
+        """Assigns shards to the workers of this rank with `balance_shards` and computes the number of samples every
+        worker yields, from the samples of the shard index that are kept by the manifest filters."""
+        if shard_equalize not in ('drop', 'pad'):
+            raise ValueError(f"shard_equalize must be 'drop' or 'pad', got {shard_equalize}")
+
+        index = load_shard_index(shard_index)
+        counts, durations = [], []
+        for path in audio_tar_filepaths:
+            shard = index.get(os.path.basename(path))
+            if shard is None:
+                raise ValueError(f"Shard {path} is missing from shard index {shard_index}")
+            kept = [d for file_id, d in zip(shard.file_ids, shard.durations) if file_id in self.collection.mapping]
+            counts.append(len(kept))
+            durations.append(sum(kept))
+
+        slots = balance_shards(durations, world_size * num_workers)
+        slot_counts = [sum(counts[i] for i in slot) for slot in slots]
+        if shard_equalize == 'pad' and min(slot_counts) == 0 and max(slot_counts) > 0:
+            raise ValueError("Cannot pad a data loader worker without samples, use shard_equalize='drop'.")
+        self._num_workers = num_workers
+        self._samples_per_worker = min(slot_counts) if shard_equalize == 'drop' else max(slot_counts)
+
+        rank_slots = range(global_rank * num_workers, (global_rank + 1) * num_workers)
+        self._worker_shards = [[audio_tar_filepaths[i] for i in slots[slot]] for slot in rank_slots]
+        self._worker_counts = [slot_counts[slot] for slot in rank_slots]
+        logging.info(
+            f"Balanced {len(audio_tar_filepaths)} shards between {world_size} rank(s) x {num_workers} worker(s): "
+            f"{min(slot_counts)} to {max(slot_counts)} samples per worker, {self._samples_per_worker} used "
+            f"('{shard_equalize}'), {self._samples_per_worker * num_workers} samples per rank and epoch"
         )
 
+    def _worker_id(self) -> int:
+        worker_info = torch.utils.data.get_worker_info()
+        num_workers = worker_info.num_workers if worker_info is not None else 1
+        if num_workers != self._num_workers:
+            raise RuntimeError(
+                f"Tarred dataset was balanced for {self._num_workers} data loader worker(s) per rank, "
+                f"but is loaded by {num_workers}. Set `num_workers` of the dataset to that of the data loader."
+            )
+        return worker_info.id if worker_info is not None else 0
+
+    def _select_worker_shards(self, urls):
+        return list(self._worker_shards[self._worker_id()])
+
+    def _equalize(self, iterator):
+        """Yields exactly `_samples_per_worker` samples, dropping the last ones or repeating the first ones."""
+        target = self._samples_per_worker
+        num_repeats = max(target - self._worker_counts[self._worker_id()], 0)
+        first_samples = []
+        num_samples = 0
+        for sample in iterator:
+            if num_samples == target:
+                return
+            if len(first_samples) < num_repeats:
+                first_samples.append(sample)
+            yield sample
+            num_samples += 1
+
+        if num_samples < target and not first_samples:
+            raise RuntimeError("Shards have fewer samples than listed in the shard index.")
+        for i in range(target - num_samples):
+            yield first_samples[i % len(first_samples)]
+
     def _filter(self, iterator):
         """This function is used to remove samples that have been filtered out by ASRAudioText already.
         Otherwise, we would get a KeyError as _build_sample attempts to find the manifest entry for a sample
@@ -672,6 +800,8 @@ class _TarredAudioToTextDataset(IterableDataset):
         return self._dataset.__iter__()
 
     def __len__(self):
+        if self._balanced:
+            return self._samples_per_worker * self._num_workers
         return len(self.collection)
 
 
@@ -745,6 +875,15 @@ class TarredAudioToCharDataset(_TarredAudioToTextDataset):
             Defaults to None.
         global_rank (int): Worker rank, used for partitioning shards. Defaults to 0.
         world_size (int): Total number of processes, used for partitioning shards. Defaults to 0.
+        manifest_index (str): Optional directory of a compiled manifest index (see scripts/build_manifest_index.py).
+            Used instead of parsing the json manifest if it is up to date with it. Defaults to None.
+        resample_type (str): Resampling method of loaded audio, see `AudioSegment`. Defaults to 'kaiser_best'.
+        shard_index (str): Optional sample index of the shards written by scripts/convert_to_tarred_audio_dataset.py.
+            If set, shards are balanced by duration between all data loader workers of all ranks, and every worker
+            yields the same number of samples, see `shard_equalize`. Defaults to None.
+        shard_equalize (str): With `shard_index`, whether workers with more samples drop their last samples ('drop')
+            or workers with fewer samples repeat their first samples ('pad'). Defaults to 'drop'.
+        num_workers (int): With `shard_index`, number of data loader workers of every rank. Defaults to 0.
     """
 
     def __init__(
@@ -770,6 +909,11 @@ class TarredAudioToCharDataset(_TarredAudioToTextDataset):
         pad_id: int = 0,
         global_rank: int = 0,
         world_size: int = 0,
+        manifest_index: Optional[str] = None,
+        resample_type: str = 'kaiser_best',
+        shard_index: Optional[str] = None,
+        shard_equalize: str = 'drop',
+        num_workers: int = 0,
     ):
         self.labels = labels
 
@@ -795,6 +939,11 @@ class TarredAudioToCharDataset(_TarredAudioToTextDataset):
             pad_id=pad_id,
             global_rank=global_rank,
             world_size=world_size,
+            manifest_index=manifest_index,
+            resample_type=resample_type,
+            shard_index=shard_index,
+            shard_equalize=shard_equalize,
+            num_workers=num_workers,
         )
 
 
@@ -856,6 +1005,15 @@ class TarredAudioToBPEDataset(_TarredAudioToTextDataset):
             Defaults to None.
         global_rank (int): Worker rank, used for partitioning shards. Defaults to 0.
         world_size (int): Total number of processes, used for partitioning shards. Defaults to 0.
+        manifest_index (str): Optional directory of a compiled manifest index (see scripts/build_manifest_index.py).
+            Used instead of parsing the json manifest if it is up to date with it. Defaults to None.
+        resample_type (str): Resampling method of loaded audio, see `AudioSegment`. Defaults to 'kaiser_best'.
+        shard_index (str): Optional sample index of the shards written by scripts/convert_to_tarred_audio_dataset.py.
+            If set, shards are balanced by duration between all data loader workers of all ranks, and every worker
+            yields the same number of samples, see `shard_equalize`. Defaults to None.
+        shard_equalize (str): With `shard_index`, whether workers with more samples drop their last samples ('drop')
+            or workers with fewer samples repeat their first samples ('pad'). Defaults to 'drop'.
+        num_workers (int): With `shard_index`, number of data loader workers of every rank. Defaults to 0.
     """
 
     def __init__(
@@ -874,6 +1032,11 @@ class TarredAudioToBPEDataset(_TarredAudioToTextDataset):
         add_misc: bool = False,
         global_rank: int = 0,
         world_size: int = 0,
+        manifest_index: Optional[str] = None,
+        resample_type: str = 'kaiser_best',
+        shard_index: Optional[str] = None,
+        shard_equalize: str = 'drop',
+        num_workers: int = 0,
     ):
         if hasattr(tokenizer, 'bos_token'):
             bos_id = tokenizer.bos_id
@@ -891,6 +1054,9 @@ class TarredAudioToBPEDataset(_TarredAudioToTextDataset):
             pad_id = 0
 
         class TokenizerWrapper:
+            # Tokenizers never fail to tokenize a transcript, see `IndexedAudioText`
+            can_fail = False
+
             def __init__(self, tokenizer):
                 self._tokenizer = tokenizer
 
@@ -916,4 +1082,9 @@ class TarredAudioToBPEDataset(_TarredAudioToTextDataset):
             pad_id=pad_id,
             global_rank=global_rank,
             world_size=world_size,
+            manifest_index=manifest_index,
+            resample_type=resample_type,
+            shard_index=shard_index,
+            shard_equalize=shard_equalize,
+            num_workers=num_workers,
         )
@@ -0,0 +1,175 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import torch
+
+from nemo.utils import logging
+
+__all__ = ['DurationBucketBatchSampler', 'get_collection_durations', 'padding_efficiency']
+
+
+def get_collection_durations(collection) -> np.ndarray:
+    """Returns the durations of all entries of an ASR collection (`AudioText`, `SpeechLabel` or their indexed
+    variants) without materializing entries when the collection exposes them as an array."""
+    durations = getattr(collection, 'durations', None)
+    if durations is None:
+        durations = [entry.duration for entry in collection]
+    return np.asarray(durations, dtype=np.float64)
+
+
+def padding_efficiency(batches: Sequence[Sequence[int]], durations: np.ndarray) -> float:
+    """Fraction of the padded audio of `batches` which is actual audio, i.e. sum of durations divided by the sum
+    over batches of batch size times the longest duration in the batch."""
+    useful, padded = 0.0, 0.0
+    for batch in batches:
+        batch_durations = durations[batch]
+        useful += batch_durations.sum()
+        padded += len(batch) * batch_durations.max()
+    return useful / padded if padded > 0 else 1.0
+
+
+class DurationBucketBatchSampler(torch.utils.data.Sampler):
+    """Batch sampler which groups utterances of similar duration to reduce padding.
+
+    Utterances are assigned to buckets by duration. Within each bucket they are (optionally) shuffled and packed
+    into batches whose padded duration, i.e. batch size times the longest utterance, does not exceed
+    `max_batch_duration` seconds, so short utterances form large batches and long ones small batches. The
+    batches of all buckets are then shuffled together.
+
+    The batch list only depends on `seed` and the epoch, so every distributed rank builds the same list and takes
+    every `world_size`-th batch. The list is truncated (`drop_last=True`) or padded with repeated batches so that
+    all ranks run the same number of steps. Since the sampler shards batches itself, Lightning's automatic
+    `DistributedSampler` must be disabled with `Trainer(replace_sampler_ddp=False)` when training on several GPUs.
+
+    The epoch is only changed by `set_epoch`, iterating again without it repeats the batches of the same epoch.
+    `EncDecCTCModel` sets it at the start of every training epoch.
+
+    Args:
+        durations: Duration in seconds of every dataset item, see `get_collection_durations`.
+        max_batch_duration: Maximum padded duration of a batch, in seconds.
+        bucket_boundaries: Sorted upper duration boundaries of the buckets. Defaults to `num_buckets` buckets with
+            an equal number of utterances each.
+        num_buckets: Number of buckets to use if `bucket_boundaries` is None.
+        batch_size: Optional upper bound on the number of utterances in a batch.
+        shuffle: Whether to shuffle utterances within buckets and batches across buckets.
+        drop_last: Whether to drop trailing batches so that the number of batches divides the world size. If
+            False, batches are repeated from the start of the epoch instead.
+        seed: Random seed, must be identical on all ranks.
+        global_rank: Rank of this process.
+        world_size: Total number of processes.
+    """
+
+    def __init__(
+        self,
+        durations: Sequence[float],
+        max_batch_duration: float,
+        bucket_boundaries: Optional[List[float]] = None,
+        num_buckets: int = 10,
+        batch_size: Optional[int] = None,
+        shuffle: bool = True,
+        drop_last: bool = False,
+        seed: int = 0,
+        global_rank: int = 0,
+        world_size: int = 1,
+    ):
+        self.durations = np.asarray(durations, dtype=np.float64)
+        if len(self.durations) == 0:
+            raise ValueError("Cannot bucket an empty dataset.")
+        if max_batch_duration <= 0:
+            raise ValueError(f"`max_batch_duration` must be positive, got {max_batch_duration}.")
+
+        if bucket_boundaries is None:
+            quantiles = np.linspace(0.0, 1.0, num_buckets + 1)[1:-1]
+            bucket_boundaries = np.unique(np.quantile(self.durations, quantiles)).tolist()
+        elif list(bucket_boundaries) != sorted(bucket_boundaries):
+            raise ValueError(f"`bucket_boundaries` must be sorted, got {bucket_boundaries}.")
+
+        self.max_batch_duration = max_batch_duration
+        self.bucket_boundaries = list(bucket_boundaries)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.seed = seed
+        self.global_rank = global_rank
+        self.world_size = max(world_size, 1)
+        self.epoch = 0
+
+        # Items longer than `max_batch_duration` still go through, alone in their batch.
+        self._buckets = np.digitize(self.durations, self.bucket_boundaries, right=True)
+        self._cache: Dict[int, List[List[int]]] = {}
+
+    def set_epoch(self, epoch: int):
+        self.epoch = epoch
+
+    def _make_batches(self, rng: np.random.RandomState) -> List[List[int]]:
+        batches = []
+        for bucket in np.unique(self._buckets):
+            indices = np.flatnonzero(self._buckets == bucket)
+            if self.shuffle:
+                rng.shuffle(indices)
+            else:
+                indices = indices[np.argsort(self.durations[indices], kind='stable')]
+
+            batch, longest = [], 0.0
+            for index in indices.tolist():
+                duration = self.durations[index]
+                new_longest = max(longest, duration)
+                full = self.batch_size is not None and len(batch) >= self.batch_size
+                if batch and (full or (len(batch) + 1) * new_longest > self.max_batch_duration):
+                    batches.append(batch)
+                    batch, new_longest = [], duration
+                batch.append(index)
+                longest = new_longest
+
+            if batch:
+                batches.append(batch)
+
+        if self.shuffle:
+            order = rng.permutation(len(batches))
+            batches = [batches[i] for i in order]
+
+        return batches
+
+    def _epoch_batches(self, epoch: int) -> List[List[int]]:
+        """Batches of this rank for `epoch`, cached since `__len__` and `__iter__` both need them."""
+        if epoch not in self._cache:
+            batches = self._make_batches(np.random.RandomState(self.seed + epoch))
+
+            remainder = len(batches) % self.world_size
+            if remainder:
+                if self.drop_last and len(batches) >= self.world_size:
+                    batches = batches[: len(batches) - remainder]
+                else:
+                    batches = batches + batches[: self.world_size - remainder]
+
+            rank_batches = batches[self.global_rank :: self.world_size]
+            logging.info(
+                "Duration bucketing epoch %d: %d batches on rank %d (%d buckets), padding efficiency %.1f%%",
+                epoch,
+                len(rank_batches),
+                self.global_rank,
+                len(self.bucket_boundaries) + 1,
+                100.0 * padding_efficiency(rank_batches, self.durations),
+            )
+            self._cache = {epoch: rank_batches}
+
+        return self._cache[epoch]
+
+    def __iter__(self) -> Iterator[List[int]]:
+        return iter(self._epoch_batches(self.epoch))
+
+    def __len__(self) -> int:
+        return len(self._epoch_batches(self.epoch))
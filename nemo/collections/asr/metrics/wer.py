@@ -12,7 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import List
+from typing import List, Optional
 
 import editdistance
 import torch
@@ -20,7 +20,7 @@ from pytorch_lightning.metrics import TensorMetric
 
 from nemo.utils import logging
 
-__all__ = ['word_error_rate', 'WER']
+__all__ = ['word_error_rate', 'ctc_greedy_decode', 'unpad_targets', 'WER']
 
 
 def word_error_rate(hypotheses: List[str], references: List[str], use_cer=False) -> float:
@@ -59,6 +59,61 @@ def word_error_rate(hypotheses: List[str], references: List[str], use_cer=False)
     return wer
 
 
+def _unpad_to_lists(ids: torch.Tensor, keep: torch.Tensor) -> List[List[int]]:
+    """Gathers the kept ids of every row of a [B, T] tensor into python lists with a single device to host copy."""
+    counts = keep.sum(dim=1)
+    flat = torch.cat([counts, ids[keep]]).cpu().tolist()
+    batch_size = ids.shape[0]
+    result, start = [], batch_size
+    for count in flat[:batch_size]:
+        result.append(flat[start : start + count])
+        start += count
+    return result
+
+
+def _lengths_to_mask(lengths: torch.Tensor, max_len: int) -> torch.Tensor:
+    return torch.arange(max_len, device=lengths.device).unsqueeze(0) < lengths.long().unsqueeze(1)
+
+
+def ctc_greedy_decode(
+    predictions: torch.Tensor, blank_id: int, predictions_len: Optional[torch.Tensor] = None, batch_dim_index: int = 0,
+) -> List[List[int]]:
+    """
+    Collapses repeated labels and removes blanks from a batch of greedy CTC predictions.
+
+    The collapse is done with tensor ops on the device of `predictions`, only the surviving ids are copied to
+    the host.
+
+    Args:
+        predictions: Tensor of argmax label ids, [B, T] (or [T, B] with `batch_dim_index=1`).
+        blank_id: Index of the CTC blank label.
+        predictions_len: Optional number of valid frames per utterance. Frames past it (padding) are ignored.
+        batch_dim_index: Index of the batch dimension.
+
+    Returns:
+        A list with the decoded label ids of every utterance.
+    """
+    predictions = predictions.detach().long()
+    if batch_dim_index != 0:
+        predictions = predictions.transpose(0, batch_dim_index)
+
+    # A label is emitted if it is not blank and differs from the previous frame.
+    keep = predictions != blank_id
+    keep[:, 1:] &= predictions[:, 1:] != predictions[:, :-1]
+    if predictions_len is not None:
+        keep &= _lengths_to_mask(predictions_len.to(predictions.device), predictions.shape[1])
+
+    return _unpad_to_lists(predictions, keep)
+
+
+def unpad_targets(targets: torch.Tensor, target_lengths: torch.Tensor, batch_dim_index: int = 0) -> List[List[int]]:
+    """Returns the first `target_lengths[i]` ids of every row of a padded targets tensor as python lists."""
+    targets = targets.detach().long()
+    if batch_dim_index != 0:
+        targets = targets.transpose(0, batch_dim_index)
+    return _unpad_to_lists(targets, _lengths_to_mask(target_lengths.to(targets.device), targets.shape[1]))
+
+
 class WER(TensorMetric):
     """
     This metric computes numerator and denominator for Overall Word Error Rate (WER) between prediction and reference texts.
@@ -98,49 +153,45 @@ class WER(TensorMetric):
         super(WER, self).__init__(name="WER")
         self.batch_dim_index = batch_dim_index
         self.blank_id = len(vocabulary)
+        self.vocabulary = list(vocabulary)
         self.labels_map = dict([(i, vocabulary[i]) for i in range(len(vocabulary))])
         self.use_cer = use_cer
         self.ctc_decode = ctc_decode
         self.log_prediction = log_prediction
 
-    def ctc_decoder_predictions_tensor(self, predictions: torch.Tensor) -> List[str]:
+    def ctc_decoder_predictions_tensor(
+        self, predictions: torch.Tensor, predictions_len: Optional[torch.Tensor] = None
+    ) -> List[str]:
         """
         Decodes a sequence of labels to words
+
+        Args:
+            predictions: Greedy label ids of shape [B, T].
+            predictions_len: Optional valid lengths of the predictions, padding frames are not decoded.
         """
-        hypotheses = []
-        # Drop predictions to CPU
-        prediction_cpu_tensor = predictions.long().cpu()
-        # iterate over batch
-        for ind in range(prediction_cpu_tensor.shape[self.batch_dim_index]):
-            prediction = prediction_cpu_tensor[ind].detach().numpy().tolist()
-            # CTC decoding procedure
-            decoded_prediction = []
-            previous = self.blank_id
-            for p in prediction:
-                if (p != previous or previous == self.blank_id) and p != self.blank_id:
-                    decoded_prediction.append(p)
-                previous = p
-            hypothesis = ''.join([self.labels_map[c] for c in decoded_prediction])
-            hypotheses.append(hypothesis)
-        return hypotheses
-
-    def forward(self, predictions: torch.Tensor, targets: torch.Tensor, target_lengths: torch.Tensor) -> torch.Tensor:
+        decoded = ctc_greedy_decode(
+            predictions, self.blank_id, predictions_len=predictions_len, batch_dim_index=self.batch_dim_index
+        )
+        return [self.decode_ids_to_str(ids) for ids in decoded]
+
+    def decode_ids_to_str(self, ids: List[int]) -> str:
+        """Converts a sequence of (already collapsed) label ids to text."""
+        return ''.join([self.vocabulary[c] for c in ids])
+
+    def forward(
+        self,
+        predictions: torch.Tensor,
+        targets: torch.Tensor,
+        target_lengths: torch.Tensor,
+        predictions_lengths: Optional[torch.Tensor] = None,
+    ) -> torch.Tensor:
         words = 0.0
         scores = 0.0
-        references = []
         with torch.no_grad():
-            # prediction_cpu_tensor = tensors[0].long().cpu()
-            targets_cpu_tensor = targets.long().cpu()
-            tgt_lenths_cpu_tensor = target_lengths.long().cpu()
-
-            # iterate over batch
-            for ind in range(targets_cpu_tensor.shape[self.batch_dim_index]):
-                tgt_len = tgt_lenths_cpu_tensor[ind].item()
-                target = targets_cpu_tensor[ind][:tgt_len].numpy().tolist()
-                reference = ''.join([self.labels_map[c] for c in target])
-                references.append(reference)
+            targets = unpad_targets(targets, target_lengths, batch_dim_index=self.batch_dim_index)
+            references = [''.join([self.vocabulary[c] for c in target]) for target in targets]
             if self.ctc_decode:
-                hypotheses = self.ctc_decoder_predictions_tensor(predictions)
+                hypotheses = self.ctc_decoder_predictions_tensor(predictions, predictions_len=predictions_lengths)
             else:
                 raise NotImplementedError("Implement me if you need non-CTC decode on predictions")
 
@@ -12,12 +12,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import List
+from typing import List, Optional
 
 import editdistance
 import torch
 from pytorch_lightning.metrics import TensorMetric
 
+from nemo.collections.asr.metrics.wer import ctc_greedy_decode, unpad_targets
 from nemo.collections.common.tokenizers.tokenizer_spec import TokenizerSpec
 from nemo.utils import logging
 
@@ -68,44 +69,39 @@ class WERBPE(TensorMetric):
         self.ctc_decode = ctc_decode
         self.log_prediction = log_prediction
 
-    def ctc_decoder_predictions_tensor(self, predictions: torch.Tensor) -> List[str]:
+    def ctc_decoder_predictions_tensor(
+        self, predictions: torch.Tensor, predictions_len: Optional[torch.Tensor] = None
+    ) -> List[str]:
         """
         Decodes a sequence of labels to words
+
+        Args:
+            predictions: Greedy label ids of shape [B, T].
+            predictions_len: Optional valid lengths of the predictions, padding frames are not decoded.
         """
-        hypotheses = []
-        # Drop predictions to CPU
-        prediction_cpu_tensor = predictions.long().cpu()
-        # iterate over batch
-        for ind in range(prediction_cpu_tensor.shape[self.batch_dim_index]):
-            prediction = prediction_cpu_tensor[ind].detach().numpy().tolist()
-            # CTC decoding procedure
-            decoded_prediction = []
-            previous = self.blank_id
-            for p in prediction:
-                if (p != previous or previous == self.blank_id) and p != self.blank_id:
-                    decoded_prediction.append(p)
-                previous = p
-            hypothesis = self.tokenizer.ids_to_text(decoded_prediction)
-            hypotheses.append(hypothesis)
-        return hypotheses
-
-    def forward(self, predictions: torch.Tensor, targets: torch.Tensor, target_lengths: torch.Tensor) -> torch.Tensor:
+        decoded = ctc_greedy_decode(
+            predictions, self.blank_id, predictions_len=predictions_len, batch_dim_index=self.batch_dim_index
+        )
+        return [self.decode_ids_to_str(ids) for ids in decoded]
+
+    def decode_ids_to_str(self, ids: List[int]) -> str:
+        """Converts a sequence of (already collapsed) token ids to text."""
+        return self.tokenizer.ids_to_text(ids)
+
+    def forward(
+        self,
+        predictions: torch.Tensor,
+        targets: torch.Tensor,
+        target_lengths: torch.Tensor,
+        predictions_lengths: Optional[torch.Tensor] = None,
+    ) -> torch.Tensor:
         words = 0.0
         scores = 0.0
-        references = []
         with torch.no_grad():
-            # prediction_cpu_tensor = tensors[0].long().cpu()
-            targets_cpu_tensor = targets.long().cpu()
-            tgt_lenths_cpu_tensor = target_lengths.long().cpu()
-
-            # iterate over batch
-            for ind in range(targets_cpu_tensor.shape[self.batch_dim_index]):
-                tgt_len = tgt_lenths_cpu_tensor[ind].item()
-                target = targets_cpu_tensor[ind][:tgt_len].numpy().tolist()
-                reference = self.tokenizer.ids_to_text(target)
-                references.append(reference)
+            targets = unpad_targets(targets, target_lengths, batch_dim_index=self.batch_dim_index)
+            references = [self.tokenizer.ids_to_text(target) for target in targets]
             if self.ctc_decode:
-                hypotheses = self.ctc_decoder_predictions_tensor(predictions)
+                hypotheses = self.ctc_decoder_predictions_tensor(predictions, predictions_len=predictions_lengths)
             else:
                 raise NotImplementedError("Implement me if you need non-CTC decode on predictions")
 
@@ -173,6 +173,11 @@ class EncDecCTCModelBPE(EncDecCTCModel):
                 add_misc=config.get('add_misc', False),
                 global_rank=self.global_rank,
                 world_size=self.world_size,
+                manifest_index=config.get('manifest_index', None),
+                resample_type=config.get('resample_type', 'kaiser_best'),
+                shard_index=config.get('tarred_shard_index', None),
+                shard_equalize=config.get('tarred_shard_equalize', 'drop'),
+                num_workers=config.get('num_workers', 0),
             )
             shuffle = False
         else:
@@ -192,6 +197,20 @@ class EncDecCTCModelBPE(EncDecCTCModel):
                 trim=config.get('trim_silence', True),
                 load_audio=config.get('load_audio', True),
                 add_misc=config.get('add_misc', False),
+                manifest_index=config.get('manifest_index', None),
+                feature_cache=self._setup_feature_cache(config),
+                resample_type=config.get('resample_type', 'kaiser_best'),
+                audio_cache=self._setup_audio_cache(config),
+            )
+
+        batch_sampler = self._setup_bucketing_batch_sampler(dataset, config, shuffle)
+        if batch_sampler is not None:
+            return torch.utils.data.DataLoader(
+                dataset=dataset,
+                batch_sampler=batch_sampler,
+                collate_fn=dataset.collate_fn,
+                num_workers=config.get('num_workers', 0),
+                pin_memory=config.get('pin_memory', False),
             )
 
         return torch.utils.data.DataLoader(
@@ -211,8 +230,10 @@ class EncDecCTCModelBPE(EncDecCTCModel):
         else:
             audio_eltype = AudioSignal()
         return {
-            "input_signal": NeuralType(('B', 'T'), audio_eltype),
-            "input_signal_length": NeuralType(tuple('B'), LengthsType()),
+            "input_signal": NeuralType(('B', 'T'), audio_eltype, optional=True),
+            "input_signal_length": NeuralType(tuple('B'), LengthsType(), optional=True),
+            "processed_signal": NeuralType(('B', 'D', 'T'), SpectrogramType(), optional=True),
+            "processed_signal_length": NeuralType(tuple('B'), LengthsType(), optional=True),
         }
 
     @property
@@ -223,31 +244,10 @@ class EncDecCTCModelBPE(EncDecCTCModel):
             "greedy_predictions": NeuralType(('B', 'T'), LabelsType()),
         }
 
-    def _setup_transcribe_dataloader(self, config: Dict) -> 'torch.utils.data.DataLoader':
-        """
-        Setup function for a temporary data loader which wraps the provided audio file.
-
-        Args:
-            config: A python dictionary which contains the following keys:
-            paths2audio_files: (a list) of paths to audio files. The files should be relatively short fragments. \
-                Recommended length per file is between 5 and 25 seconds.
-            batch_size: (int) batch size to use during inference. \
-                Bigger will result in better throughput performance but would use more memory.
-            temp_dir: (str) A temporary directory where the audio manifest is temporarily
-                stored.
-
-        Returns:
-            A pytorch DataLoader for the given audio file(s).
-        """
-        dl_config = {
-            'manifest_filepath': os.path.join(config['temp_dir'], 'manifest.json'),
-            'sample_rate': self.preprocessor._sample_rate,
-            'batch_size': min(config['batch_size'], len(config['paths2audio_files'])),
-            'shuffle': False,
-        }
-
-        temporary_datalayer = self._setup_dataloader_from_config(config=DictConfig(dl_config))
-        return temporary_datalayer
+    def _beam_search_vocabulary(self):
+        # SentencePiece pieces start words with '▁', WordPiece tokens continue words with '##'
+        tokens = self.tokenizer.ids_to_tokens(list(range(self._wer.blank_id)))
+        return tokens, 'sentencepiece' if self.tokenizer_type == 'bpe' else 'wordpiece'
 
     def change_vocabulary(self, new_tokenizer_dir: str, new_tokenizer_type: str):
         """
@@ -299,6 +299,9 @@ class EncDecCTCModelBPE(EncDecCTCModel):
         del self.loss
         self.loss = CTCLoss(num_classes=self.decoder.num_classes_with_blank - 1, zero_infinity=True)
         self._wer = WERBPE(tokenizer=self.tokenizer, batch_dim_index=0, use_cer=False, ctc_decode=True)
+        if self._beam_search is not None:
+            self._beam_search.close()
+            self._beam_search = None
 
         # Update config
         OmegaConf.set_struct(self._cfg.decoder, False)
@@ -12,23 +12,29 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import copy
-import json
-import os
-import tempfile
+import itertools
+from concurrent.futures import ThreadPoolExecutor
 from math import ceil
-from typing import Dict, List, Optional, Union
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
+import numpy as np
 import torch
 from omegaconf import DictConfig, OmegaConf
 from pytorch_lightning import Trainer
 
 from nemo.collections.asr.data.audio_to_text import AudioToCharDataset, TarredAudioToCharDataset
+from nemo.collections.asr.data.samplers import DurationBucketBatchSampler, get_collection_durations
 from nemo.collections.asr.losses.ctc import CTCLoss
 from nemo.collections.asr.metrics.wer import WER
 from nemo.collections.asr.models.asr_model import ASRModel
+from nemo.collections.asr.modules import AudioToMelSpectrogramPreprocessor
+from nemo.collections.asr.parts.ctc_beam_search import CTCBeamSearchDecoder
+from nemo.collections.asr.parts.feature_cache import AudioCache, FeatureCache
 from nemo.collections.asr.parts.perturb import process_augmentations
+from nemo.collections.asr.parts.segment import AudioSegment
+from nemo.collections.common.parts.collate import pad_and_stack, stack_lengths
 from nemo.core.classes.common import PretrainedModelInfo, typecheck
-from nemo.core.neural_types import AudioSignal, LabelsType, LengthsType, LogprobsType, NeuralType
+from nemo.core.neural_types import AudioSignal, LabelsType, LengthsType, LogprobsType, NeuralType, SpectrogramType
 from nemo.utils import logging
 
 __all__ = ['EncDecCTCModel', 'JasperNet', 'QuartzNet']
@@ -99,20 +105,37 @@ class EncDecCTCModel(ASRModel):
             self.spec_augmentation = EncDecCTCModel.from_config_dict(self._cfg.spec_augment)
         else:
             self.spec_augmentation = None
+        if hasattr(self._cfg, 'audio_augment') and self._cfg.audio_augment is not None:
+            self.audio_augmentation = EncDecCTCModel.from_config_dict(self._cfg.audio_augment)
+        else:
+            self.audio_augmentation = None
 
         # Setup metric objects
         self._wer = WER(vocabulary=self.decoder.vocabulary, batch_dim_index=0, use_cer=False, ctc_decode=True)
 
-    def transcribe(self, paths2audio_files: List[str], batch_size: int = 4) -> List[str]:
+        # CTC beam search decoder, built on first use by `transcribe(..., decoding='beam')`
+        self._beam_search = None
+
+    def transcribe(
+        self,
+        paths2audio_files: List[Union[str, np.ndarray, bytes]],
+        batch_size: int = 4,
+        decoding: str = 'greedy',
+        num_workers: int = 0,
+    ) -> List[str]:
         """
-        Uses greedy decoding to transcribe audio files. Use this method for debugging and prototyping.
+        Uses greedy or beam search decoding to transcribe audio. Use this method for debugging and prototyping.
 
         Args:
 
-            paths2audio_files: (a list) of paths to audio files. The files should be relatively short fragments. \
-        Recommended length per file is between 5 and 25 seconds.
+            paths2audio_files: (a list) of audio inputs: paths to audio files, numpy arrays of samples, \
+        or raw 16-bit little-endian mono PCM bytes. Arrays and bytes must be sampled at the model sample rate. \
+        The inputs should be relatively short fragments. Recommended length per input is between 5 and 25 seconds.
             batch_size: (int) batch size to use during inference. \
         Bigger will result in better throughput performance but would use more memory.
+            decoding: (str) `greedy` or `beam`. Beam search is configured by `setup_beam_search`, \
+        by default from the `beam_search` section of the model config.
+            num_workers: (int) number of threads loading audio files, 0 loads them in the calling thread.
 
         Returns:
 
@@ -120,34 +143,127 @@ class EncDecCTCModel(ASRModel):
         """
         if paths2audio_files is None or len(paths2audio_files) == 0:
             return {}
-        # We will store transcriptions here
-        hypotheses = []
+        return list(
+            self.transcribe_generator(
+                paths2audio_files, batch_size=batch_size, decoding=decoding, num_workers=num_workers
+            )
+        )
+
+    def transcribe_generator(
+        self,
+        audio: Iterable[Union[str, np.ndarray, bytes]],
+        batch_size: int = 4,
+        decoding: str = 'greedy',
+        num_workers: int = 0,
+        sort_window: int = 16,
+    ) -> Iterator[str]:
+        """
+        Streaming version of `transcribe` which yields transcriptions in input order as they are decoded.
+
+        Inputs are consumed `sort_window` batches at a time. Every window is loaded, sorted by length and batched
+        in memory, so that utterances of similar length are padded together, without writing a manifest or
+        building a dataloader.
+
+        Args:
+
+            audio: iterable of paths, numpy arrays or raw PCM bytes, see `transcribe`.
+            batch_size: (int) batch size to use during inference.
+            decoding: (str) `greedy` or `beam`.
+            num_workers: (int) number of threads loading audio files.
+            sort_window: (int) number of batches sorted together.
+
+        Returns:
+
+            A generator of transcriptions in the same order as the inputs.
+        """
+        if decoding not in ('greedy', 'beam'):
+            raise ValueError(f"`decoding` must be either `greedy` or `beam`, got {decoding}")
+        if decoding == 'beam' and self._beam_search is None:
+            self.setup_beam_search()
+
         # Model's mode and device
         mode = self.training
         device = next(self.parameters()).device
+        pool = ThreadPoolExecutor(max_workers=num_workers) if num_workers > 0 else None
         try:
             # Switch model to evaluation mode
             self.eval()
-            # Work in tmp directory - will store manifest file there
-            with tempfile.TemporaryDirectory() as tmpdir:
-                with open(os.path.join(tmpdir, 'manifest.json'), 'w') as fp:
-                    for audio_file in paths2audio_files:
-                        entry = {'audio_filepath': audio_file, 'duration': 100000, 'text': 'nothing'}
-                        fp.write(json.dumps(entry) + '\n')
-
-                config = {'paths2audio_files': paths2audio_files, 'batch_size': batch_size, 'temp_dir': tmpdir}
-
-                temporary_datalayer = self._setup_transcribe_dataloader(config)
-                for test_batch in temporary_datalayer:
-                    _, _, greedy_predictions = self.forward(
-                        input_signal=test_batch[0].to(device), input_signal_length=test_batch[1].to(device)
-                    )
-                    hypotheses += self._wer.ctc_decoder_predictions_tensor(greedy_predictions)
-                    del test_batch
+            audio = iter(audio)
+            while True:
+                window = list(itertools.islice(audio, batch_size * sort_window))
+                if not window:
+                    break
+                if pool is not None:
+                    signals = list(pool.map(self._load_transcribe_audio, window))
+                else:
+                    signals = [self._load_transcribe_audio(item) for item in window]
+                del window
+
+                hypotheses = [None] * len(signals)
+                order = sorted(range(len(signals)), key=lambda i: signals[i].size(0), reverse=True)
+                for start in range(0, len(order), batch_size):
+                    indices = order[start : start + batch_size]
+                    batch = [signals[i] for i in indices]
+                    input_signal = pad_and_stack(batch).to(device)
+                    input_signal_length = stack_lengths([signal.size(0) for signal in batch]).to(device)
+                    with torch.no_grad():
+                        log_probs, encoded_len, greedy_predictions = self.forward(
+                            input_signal=input_signal, input_signal_length=input_signal_length
+                        )
+                    if decoding == 'beam':
+                        beams = self._beam_search.decode_batch(log_probs, encoded_len)
+                        texts = [self._wer.decode_ids_to_str(hyps[0][0]) if hyps else '' for hyps in beams]
+                    else:
+                        texts = self._wer.ctc_decoder_predictions_tensor(
+                            greedy_predictions, predictions_len=encoded_len
+                        )
+                    for index, text in zip(indices, texts):
+                        hypotheses[index] = text
+                    del input_signal, log_probs, greedy_predictions
+
+                del signals
+                yield from hypotheses
         finally:
+            if pool is not None:
+                pool.shutdown()
             # set mode back to its original value
             self.train(mode=mode)
-        return hypotheses
+
+    def _load_transcribe_audio(self, audio: Union[str, np.ndarray, bytes]) -> torch.Tensor:
+        """Loads a `transcribe` input as a 1d float tensor at the model sample rate, trimming silence as the
+        ASR datasets do by default."""
+        sample_rate = self.preprocessor._sample_rate
+        if isinstance(audio, str):
+            segment = AudioSegment.from_file(audio, target_sr=sample_rate, trim=True)
+        else:
+            if isinstance(audio, (bytes, bytearray, memoryview)):
+                audio = np.frombuffer(audio, dtype='<i2')
+            segment = AudioSegment(np.asarray(audio), sample_rate, trim=True)
+        return torch.as_tensor(segment.samples, dtype=torch.float32)
+
+    def setup_beam_search(self, beam_search_cfg: Optional[Union[DictConfig, Dict]] = None):
+        """
+        Sets up the CTC prefix beam search decoder used by `transcribe(..., decoding='beam')`.
+
+        Args:
+
+            beam_search_cfg: Arguments of `CTCBeamSearchDecoder`: beam_width, cutoff_prob, cutoff_top_n, \
+        lm_path (word-level ARPA language model), alpha, beta and num_workers (decoding processes). \
+        Defaults to the `beam_search` section of the model config, if any.
+        """
+        if beam_search_cfg is None:
+            beam_search_cfg = self._cfg.beam_search if 'beam_search' in self._cfg else {}
+        if isinstance(beam_search_cfg, DictConfig):
+            beam_search_cfg = OmegaConf.to_container(beam_search_cfg, resolve=True)
+
+        if self._beam_search is not None:
+            self._beam_search.close()
+        vocabulary, word_boundary = self._beam_search_vocabulary()
+        self._beam_search = CTCBeamSearchDecoder(vocabulary, word_boundary=word_boundary, **beam_search_cfg)
+
+    def _beam_search_vocabulary(self):
+        """Text of every non-blank label and how words are delimited, see `CTCPrefixBeamSearch`."""
+        return self.decoder.vocabulary, 'space'
 
     def change_vocabulary(self, new_vocabulary: List[str]):
         """
@@ -180,6 +296,9 @@ class EncDecCTCModel(ASRModel):
             del self.loss
             self.loss = CTCLoss(num_classes=self.decoder.num_classes_with_blank - 1, zero_infinity=True)
             self._wer = WER(vocabulary=self.decoder.vocabulary, batch_dim_index=0, use_cer=False, ctc_decode=True)
+            if self._beam_search is not None:
+                self._beam_search.close()
+                self._beam_search = None
 
             # Update config
             OmegaConf.set_struct(self._cfg.decoder, False)
@@ -227,6 +346,11 @@ class EncDecCTCModel(ASRModel):
                 add_misc=config.get('add_misc', False),
                 global_rank=self.global_rank,
                 world_size=self.world_size,
+                manifest_index=config.get('manifest_index', None),
+                resample_type=config.get('resample_type', 'kaiser_best'),
+                shard_index=config.get('tarred_shard_index', None),
+                shard_equalize=config.get('tarred_shard_equalize', 'drop'),
+                num_workers=config.get('num_workers', 0),
             )
             shuffle = False
         else:
@@ -250,6 +374,20 @@ class EncDecCTCModel(ASRModel):
                 load_audio=config.get('load_audio', True),
                 parser=config.get('parser', 'en'),
                 add_misc=config.get('add_misc', False),
+                manifest_index=config.get('manifest_index', None),
+                feature_cache=self._setup_feature_cache(config),
+                resample_type=config.get('resample_type', 'kaiser_best'),
+                audio_cache=self._setup_audio_cache(config),
+            )
+
+        batch_sampler = self._setup_bucketing_batch_sampler(dataset, config, shuffle)
+        if batch_sampler is not None:
+            return torch.utils.data.DataLoader(
+                dataset=dataset,
+                batch_sampler=batch_sampler,
+                collate_fn=dataset.collate_fn,
+                num_workers=config.get('num_workers', 0),
+                pin_memory=config.get('pin_memory', False),
             )
 
         return torch.utils.data.DataLoader(
@@ -262,6 +400,90 @@ class EncDecCTCModel(ASRModel):
             pin_memory=config.get('pin_memory', False),
         )
 
+    def _setup_feature_cache(self, config: Dict) -> Optional[FeatureCache]:
+        """
+        Creates a persistent feature cache if `feature_cache_dir` is set in the dataset config. Items of the dataset
+        are then log-mel features read from the cache (computed and stored on a miss) instead of decoded audio, and
+        the preprocessor is skipped. Use scripts/precompute_asr_features.py to fill the cache ahead of training.
+        The cache is not used with audio augmentation.
+        """
+        cache_dir = config.get('feature_cache_dir', None)
+        if cache_dir is None:
+            return None
+        if not isinstance(self.preprocessor, AudioToMelSpectrogramPreprocessor):
+            logging.warning(f"Feature cache is only supported for {AudioToMelSpectrogramPreprocessor.__name__}.")
+            return None
+
+        return FeatureCache(
+            cache_dir,
+            preprocessor_params=OmegaConf.to_container(self._cfg.preprocessor.params, resolve=True),
+            sample_rate=config['sample_rate'],
+            int_values=config.get('int_values', False),
+            trim=config.get('trim_silence', True),
+            resample_type=config.get('resample_type', 'kaiser_best'),
+            audio_dtype=config.get('audio_cache_dtype', 'int16') if config.get('audio_cache_dir') else None,
+        )
+
+    def _setup_audio_cache(self, config: Dict) -> Optional[AudioCache]:
+        """
+        Creates a persistent cache of decoded and resampled audio if `audio_cache_dir` is set in the dataset config.
+        Audio is stored with `audio_cache_dtype` (int16 by default, or float16) before trimming and augmentation.
+        """
+        cache_dir = config.get('audio_cache_dir', None)
+        if cache_dir is None:
+            return None
+
+        return AudioCache(
+            cache_dir,
+            sample_rate=config['sample_rate'],
+            int_values=config.get('int_values', False),
+            resample_type=config.get('resample_type', 'kaiser_best'),
+            dtype=config.get('audio_cache_dtype', 'int16'),
+        )
+
+    def _setup_bucketing_batch_sampler(
+        self, dataset: 'torch.utils.data.Dataset', config: Dict, shuffle: bool
+    ) -> Optional[DurationBucketBatchSampler]:
+        """
+        Creates a duration bucketing batch sampler if `max_batch_duration` is set in the dataset config.
+
+        Relevant config keys:
+            max_batch_duration: (float) Maximum padded audio duration of a batch in seconds. Replaces `batch_size`,
+                which becomes an upper bound on the number of utterances per batch.
+            bucket_boundaries: (list) Optional sorted upper duration boundaries of the buckets in seconds.
+            num_buckets: (int) Number of equally populated buckets if `bucket_boundaries` is not set. Defaults to 10.
+            bucketing_seed: (int) Seed of the per-epoch shuffling, identical on all ranks. Defaults to 0.
+
+        Returns:
+            A `DurationBucketBatchSampler`, or None if bucketing is not configured.
+        """
+        if config.get('max_batch_duration', None) is None:
+            return None
+
+        if isinstance(dataset, torch.utils.data.IterableDataset):
+            logging.warning("Duration bucketing is not supported for tarred datasets, ignoring `max_batch_duration`.")
+            return None
+
+        if self.world_size > 1 and getattr(self._trainer, 'replace_sampler_ddp', False):
+            logging.warning(
+                "Duration bucketing shards batches across ranks itself. "
+                "Please set `trainer.replace_sampler_ddp=False` when training on multiple GPUs."
+            )
+
+        bucket_boundaries = config.get('bucket_boundaries', None)
+        return DurationBucketBatchSampler(
+            durations=get_collection_durations(dataset.collection),
+            max_batch_duration=config['max_batch_duration'],
+            bucket_boundaries=list(bucket_boundaries) if bucket_boundaries is not None else None,
+            num_buckets=config.get('num_buckets', 10),
+            batch_size=config.get('batch_size', None),
+            shuffle=shuffle,
+            drop_last=config.get('drop_last', False),
+            seed=config.get('bucketing_seed', 0),
+            global_rank=self.global_rank,
+            world_size=self.world_size,
+        )
+
     def setup_training_data(self, train_data_config: Optional[Union[DictConfig, Dict]]):
         if 'shuffle' not in train_data_config:
             train_data_config['shuffle'] = True
@@ -309,8 +531,10 @@ class EncDecCTCModel(ASRModel):
         else:
             audio_eltype = AudioSignal()
         return {
-            "input_signal": NeuralType(('B', 'T'), audio_eltype),
-            "input_signal_length": NeuralType(tuple('B'), LengthsType()),
+            "input_signal": NeuralType(('B', 'T'), audio_eltype, optional=True),
+            "input_signal_length": NeuralType(tuple('B'), LengthsType(), optional=True),
+            "processed_signal": NeuralType(('B', 'D', 'T'), SpectrogramType(), optional=True),
+            "processed_signal_length": NeuralType(tuple('B'), LengthsType(), optional=True),
         }
 
     @property
@@ -322,24 +546,73 @@ class EncDecCTCModel(ASRModel):
         }
 
     @typecheck()
-    def forward(self, input_signal, input_signal_length):
-        processed_signal, processed_signal_len = self.preprocessor(
-            input_signal=input_signal, length=input_signal_length,
-        )
+    def forward(
+        self, input_signal=None, input_signal_length=None, processed_signal=None, processed_signal_length=None
+    ):
+        has_input_signal = input_signal is not None and input_signal_length is not None
+        has_processed_signal = processed_signal is not None and processed_signal_length is not None
+        if has_input_signal == has_processed_signal:
+            raise ValueError(
+                f"{self} expects either `input_signal` with `input_signal_length` (audio) or `processed_signal` "
+                "with `processed_signal_length` (features), but not both."
+            )
+
+        if has_input_signal:
+            # Noise and reverberation are not applied during evaluation/testing
+            if self.audio_augmentation is not None and self.training:
+                input_signal, input_signal_length = self.audio_augmentation(
+                    input_signal=input_signal, length=input_signal_length
+                )
+            processed_signal, processed_signal_length = self.preprocessor(
+                input_signal=input_signal, length=input_signal_length,
+            )
+        else:
+            # Cached features are stored in half precision
+            processed_signal = processed_signal.float()
         # Spec augment is not applied during evaluation/testing
         if self.spec_augmentation is not None and self.training:
             processed_signal = self.spec_augmentation(input_spec=processed_signal)
-        encoded, encoded_len = self.encoder(audio_signal=processed_signal, length=processed_signal_len)
+        encoded, encoded_len = self.encoder(audio_signal=processed_signal, length=processed_signal_length)
         log_probs = self.decoder(encoder_output=encoded)
         greedy_predictions = log_probs.argmax(dim=-1, keepdim=False)
         return log_probs, encoded_len, greedy_predictions
 
+    def forward_streaming(
+        self, processed_signal: torch.Tensor, state: Optional[list] = None, flush: bool = False
+    ) -> Tuple[torch.Tensor, list]:
+        """
+        Computes CTC log probabilities incrementally over consecutive chunks of preprocessed features, see
+        `ConvASREncoder.forward_streaming`. Only supported by convolutional encoders, in evaluation mode.
+
+        Args:
+            processed_signal: Next chunk of features [B, D, T] of the preprocessor.
+            state: State returned by the previous call, or None to start a new stream.
+            flush: Whether this is the last chunk of the stream.
+
+        Returns:
+            The log probabilities [B, T_enc, V + 1] of the encoded frames which became available, and the state.
+        """
+        encoded, state = self.encoder.forward_streaming(processed_signal, state=state, flush=flush)
+        if encoded.size(-1) == 0:
+            return encoded.new_zeros(encoded.size(0), 0, self.decoder.num_classes_with_blank), state
+        return self.decoder(encoder_output=encoded), state
+
+    def _forward_batch(self, signal: torch.Tensor, signal_len: torch.Tensor):
+        # Datasets with a feature cache return features [B, T, D] instead of audio [B, T]
+        if signal.dim() == 3:
+            return self.forward(processed_signal=signal.transpose(1, 2), processed_signal_length=signal_len)
+        return self.forward(input_signal=signal, input_signal_length=signal_len)
+
     # PTL-specific methods
+    def on_train_epoch_start(self):
+        # Lightning only sets the epoch of distributed samplers, duration bucketing reshuffles per epoch as well
+        batch_sampler = getattr(self._train_dl, 'batch_sampler', None)
+        if isinstance(batch_sampler, DurationBucketBatchSampler):
+            batch_sampler.set_epoch(self.current_epoch)
+
     def training_step(self, batch, batch_nb):
         audio_signal, audio_signal_len, transcript, transcript_len = batch
-        log_probs, encoded_len, predictions = self.forward(
-            input_signal=audio_signal, input_signal_length=audio_signal_len
-        )
+        log_probs, encoded_len, predictions = self._forward_batch(audio_signal, audio_signal_len)
         loss_value = self.loss(
             log_probs=log_probs, targets=transcript, input_lengths=encoded_len, target_lengths=transcript_len
         )
@@ -352,20 +625,18 @@ class EncDecCTCModel(ASRModel):
             row_log_interval = 1
 
         if (batch_nb + 1) % row_log_interval == 0:
-            wer_num, wer_denom = self._wer(predictions, transcript, transcript_len)
+            wer_num, wer_denom = self._wer(predictions, transcript, transcript_len, predictions_lengths=encoded_len)
             tensorboard_logs.update({'training_batch_wer': wer_num / wer_denom})
 
         return {'loss': loss_value, 'log': tensorboard_logs}
 
     def validation_step(self, batch, batch_idx, dataloader_idx=0):
         audio_signal, audio_signal_len, transcript, transcript_len = batch
-        log_probs, encoded_len, predictions = self.forward(
-            input_signal=audio_signal, input_signal_length=audio_signal_len
-        )
+        log_probs, encoded_len, predictions = self._forward_batch(audio_signal, audio_signal_len)
         loss_value = self.loss(
             log_probs=log_probs, targets=transcript, input_lengths=encoded_len, target_lengths=transcript_len
         )
-        wer_num, wer_denom = self._wer(predictions, transcript, transcript_len)
+        wer_num, wer_denom = self._wer(predictions, transcript, transcript_len, predictions_lengths=encoded_len)
         return {'val_loss': loss_value, 'val_wer_num': wer_num, 'val_wer_denom': wer_denom}
 
     def test_step(self, batch, batch_idx, dataloader_idx=0):
@@ -381,34 +652,6 @@ class EncDecCTCModel(ASRModel):
         if self._test_dl is not None:
             return self._test_dl
 
-    def _setup_transcribe_dataloader(self, config: Dict) -> 'torch.utils.data.DataLoader':
-        """
-        Setup function for a temporary data loader which wraps the provided audio file.
-
-        Args:
-            config: A python dictionary which contains the following keys:
-            paths2audio_files: (a list) of paths to audio files. The files should be relatively short fragments. \
-                Recommended length per file is between 5 and 25 seconds.
-            batch_size: (int) batch size to use during inference. \
-                Bigger will result in better throughput performance but would use more memory.
-            temp_dir: (str) A temporary directory where the audio manifest is temporarily
-                stored.
-
-        Returns:
-            A pytorch DataLoader for the given audio file(s).
-        """
-        dl_config = {
-            'manifest_filepath': os.path.join(config['temp_dir'], 'manifest.json'),
-            'sample_rate': self.preprocessor._sample_rate,
-            'labels': self.decoder.vocabulary,
-            'batch_size': min(config['batch_size'], len(config['paths2audio_files'])),
-            'trim_silence': True,
-            'shuffle': False,
-        }
-
-        temporary_datalayer = self._setup_dataloader_from_config(config=DictConfig(dl_config))
-        return temporary_datalayer
-
 
 class JasperNet(EncDecCTCModel):
     pass
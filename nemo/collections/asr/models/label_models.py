@@ -106,6 +106,7 @@ class EncDecSpeakerLabelModel(ModelPT):
             trim=config.get('trim_silence', True),
             load_audio=config.get('load_audio', True),
             time_length=config.get('time_length', 8),
+            manifest_index=config.get('manifest_index', None),
         )
 
         return torch.utils.data.DataLoader(
@@ -13,6 +13,7 @@
 # limitations under the License.
 
 from nemo.collections.asr.modules.audio_preprocessing import (
+    AudioAugmentation,
     AudioToMelSpectrogramPreprocessor,
     AudioToMFCCPreprocessor,
     CropOrPadSpectrogramAugmentation,
@@ -18,8 +18,14 @@ from abc import ABC, abstractmethod
 import torch
 from packaging import version
 
+from nemo.collections.asr.parts.augmentation_bank import (
+    AudioBank,
+    BatchedImpulsePerturbation,
+    BatchedNoisePerturbation,
+)
+from nemo.collections.asr.parts.batched_perturb import BatchedSpeedPerturbation, BatchedTimeStretchPerturbation
 from nemo.collections.asr.parts.features import FilterbankFeatures
-from nemo.collections.asr.parts.spectr_augment import SpecAugment, SpecCutout
+from nemo.collections.asr.parts.spectr_augment import BatchedSpecAugment, BatchedSpecCutout, SpecAugment, SpecCutout
 from nemo.core.classes import NeuralModule, typecheck
 from nemo.core.neural_types import (
     AudioSignal,
@@ -49,6 +55,7 @@ __all__ = [
     'AudioToMFCCPreprocessor',
     'SpectrogramAugmentation',
     'CropOrPadSpectrogramAugmentation',
+    'AudioAugmentation',
 ]
 
 
@@ -418,6 +425,14 @@ class SpectrogramAugmentation(NeuralModule):
         rect_time (int): maximum size of cut rectangles along the time
             dimension
             Defaults to 25.
+        rng: random.Random instance the masks are drawn with, or which seeds
+            the generators of the batched implementation.
+            Defaults to None (random seed).
+        batched (bool): whether to sample and build masks for the whole batch
+            with tensor operations on the device of the input
+            (BatchedSpecAugment and BatchedSpecCutout), instead of loops over
+            the batch on the host (SpecAugment and SpecCutout).
+            Defaults to True.
     """
 
     def save_to(self, save_path: str):
@@ -449,19 +464,43 @@ class SpectrogramAugmentation(NeuralModule):
         rect_time=5,
         rect_freq=20,
         rng=None,
+        batched=True,
     ):
         super().__init__()
 
+        # The batched implementation draws masks with torch generators seeded from rng
+        seed = rng.randrange(2 ** 63) if batched and rng is not None else None
+
         if rect_masks > 0:
-            self.spec_cutout = SpecCutout(rect_masks=rect_masks, rect_time=rect_time, rect_freq=rect_freq, rng=rng,)
+            if batched:
+                self.spec_cutout = BatchedSpecCutout(
+                    rect_masks=rect_masks, rect_time=rect_time, rect_freq=rect_freq, seed=seed,
+                )
+            else:
+                self.spec_cutout = SpecCutout(
+                    rect_masks=rect_masks, rect_time=rect_time, rect_freq=rect_freq, rng=rng,
+                )
             # self.spec_cutout.to(self._device)
         else:
             self.spec_cutout = lambda x: x
 
         if freq_masks + time_masks > 0:
-            self.spec_augment = SpecAugment(
-                freq_masks=freq_masks, time_masks=time_masks, freq_width=freq_width, time_width=time_width, rng=rng,
-            )
+            if batched:
+                self.spec_augment = BatchedSpecAugment(
+                    freq_masks=freq_masks,
+                    time_masks=time_masks,
+                    freq_width=freq_width,
+                    time_width=time_width,
+                    seed=seed + 1 if seed is not None else None,
+                )
+            else:
+                self.spec_augment = SpecAugment(
+                    freq_masks=freq_masks,
+                    time_masks=time_masks,
+                    freq_width=freq_width,
+                    time_width=time_width,
+                    rng=rng,
+                )
         else:
             self.spec_augment = lambda x: x
 
@@ -472,6 +511,170 @@ class SpectrogramAugmentation(NeuralModule):
         return augmented_spec
 
 
+class AudioAugmentation(NeuralModule):
+    """
+    Batched speed, room impulse response and noise augmentation of raw
+    audio. Every utterance of a batch is speed perturbed with probability
+    `speed_prob` and time-stretched with probability `time_stretch_prob`
+    (see nemo.collections.asr.parts.batched_perturb), convolved with a
+    random impulse response with probability `rir_prob`, then mixed with
+    a random noise window with probability `noise_prob`, from noise and
+    impulse response clips decoded once into AudioBanks (see
+    nemo.collections.asr.parts.augmentation_bank). All perturbations are
+    tensor operations on the device of the batch.
+    The module can be run by a model on the training device, or on CPU
+    tensors by the collate function of a data loader.
+    Args:
+        sample_rate (int): sample rate of the audio.
+            Defaults to 16000.
+        speed_prob (float): probability of speed perturbing an utterance.
+            Defaults to 0.0.
+        time_stretch_prob (float): probability of time-stretching an
+            utterance.
+            Defaults to 0.0.
+        min_speed_rate (float): minimum rate of speed perturbation and time
+            stretching.
+            Defaults to 0.9.
+        max_speed_rate (float): maximum rate of speed perturbation and time
+            stretching.
+            Defaults to 1.1.
+        num_rates (int): number of discrete rates between `min_speed_rate`
+            and `max_speed_rate`.
+            Defaults to 5.
+        time_stretch_n_fft (int): fft size of time stretching.
+            Defaults to 512.
+        noise_manifest (str): manifest of the noise clips.
+            Defaults to None (no noise).
+        noise_prob (float): probability of adding noise to an utterance.
+            Defaults to 1.0.
+        min_snr_db (float): minimum signal to noise ratio.
+            Defaults to 10.
+        max_snr_db (float): maximum signal to noise ratio.
+            Defaults to 50.
+        max_gain_db (float): maximum gain applied to the noise.
+            Defaults to 300.
+        max_noise_duration (float): noise clips are cut to their first
+            `max_noise_duration` seconds, if set.
+            Defaults to None.
+        rir_manifest (str): manifest of the room impulse responses.
+            Defaults to None (no reverberation).
+        rir_prob (float): probability of convolving an utterance with an
+            impulse response.
+            Defaults to 0.5.
+        bank_dir (str): directory the decoded clips are saved to and
+            memory-mapped from, shared between processes and runs.
+            Defaults to None (decoded in memory by every process).
+        resample_type (str): resampling method of the clips.
+            Defaults to 'kaiser_best'.
+        seed (int): seed of the generators.
+            Defaults to None (random seed).
+    """
+
+    def save_to(self, save_path: str):
+        pass
+
+    @classmethod
+    def restore_from(cls, restore_path: str):
+        pass
+
+    @property
+    def input_types(self):
+        """Returns definitions of module input types
+        """
+        return {
+            "input_signal": NeuralType(('B', 'T'), AudioSignal(freq=self._sample_rate)),
+            "length": NeuralType(tuple('B'), LengthsType()),
+        }
+
+    @property
+    def output_types(self):
+        """Returns definitions of module output types
+        """
+        return {
+            "augmented_signal": NeuralType(('B', 'T'), AudioSignal(freq=self._sample_rate)),
+            "augmented_length": NeuralType(tuple('B'), LengthsType()),
+        }
+
+    def __init__(
+        self,
+        sample_rate=16000,
+        speed_prob=0.0,
+        time_stretch_prob=0.0,
+        min_speed_rate=0.9,
+        max_speed_rate=1.1,
+        num_rates=5,
+        time_stretch_n_fft=512,
+        noise_manifest=None,
+        noise_prob=1.0,
+        min_snr_db=10,
+        max_snr_db=50,
+        max_gain_db=300.0,
+        max_noise_duration=None,
+        rir_manifest=None,
+        rir_prob=0.5,
+        bank_dir=None,
+        resample_type='kaiser_best',
+        seed=None,
+    ):
+        super().__init__()
+        self._sample_rate = sample_rate
+        rates = dict(min_speed_rate=min_speed_rate, max_speed_rate=max_speed_rate, num_rates=num_rates)
+
+        if speed_prob > 0:
+            self.speed_perturbation = BatchedSpeedPerturbation(
+                sample_rate, prob=speed_prob, seed=seed + 2 if seed is not None else None, **rates
+            )
+        else:
+            self.speed_perturbation = None
+
+        if time_stretch_prob > 0:
+            self.time_stretch_perturbation = BatchedTimeStretchPerturbation(
+                n_fft=time_stretch_n_fft, prob=time_stretch_prob, seed=seed + 3 if seed is not None else None, **rates,
+            )
+        else:
+            self.time_stretch_perturbation = None
+
+        if rir_manifest is not None:
+            rir_bank = AudioBank(
+                rir_manifest, sample_rate, bank_dir=bank_dir, resample_type=resample_type, impulse=True
+            )
+            self.rir_perturbation = BatchedImpulsePerturbation(rir_bank, prob=rir_prob, seed=seed)
+        else:
+            self.rir_perturbation = None
+
+        if noise_manifest is not None:
+            noise_bank = AudioBank(
+                noise_manifest,
+                sample_rate,
+                bank_dir=bank_dir,
+                max_duration=max_noise_duration,
+                resample_type=resample_type,
+            )
+            self.noise_perturbation = BatchedNoisePerturbation(
+                noise_bank,
+                prob=noise_prob,
+                min_snr_db=min_snr_db,
+                max_snr_db=max_snr_db,
+                max_gain_db=max_gain_db,
+                seed=seed + 1 if seed is not None else None,
+            )
+        else:
+            self.noise_perturbation = None
+
+    @typecheck()
+    def forward(self, input_signal, length):
+        augmented_signal = input_signal
+        if self.speed_perturbation is not None:
+            augmented_signal, length = self.speed_perturbation(augmented_signal, length)
+        if self.time_stretch_perturbation is not None:
+            augmented_signal, length = self.time_stretch_perturbation(augmented_signal, length)
+        if self.rir_perturbation is not None:
+            augmented_signal = self.rir_perturbation(augmented_signal, length)
+        if self.noise_perturbation is not None:
+            augmented_signal = self.noise_perturbation(augmented_signal, length)
+        return augmented_signal, length
+
+
 class CropOrPadSpectrogramAugmentation(NeuralModule):
     """
     Pad or Crop the incoming Spectrogram to a certain shape.
@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 
 import torch
 import torch.nn as nn
@@ -22,6 +23,7 @@ from nemo.collections.asr.parts.jasper import (
     JasperBlock,
     MaskedConv1d,
     StatsPoolLayer,
+    get_pad_mask,
     init_weights,
     jasper_activations,
 )
@@ -37,6 +39,7 @@ from nemo.core.neural_types import (
     SpectrogramType,
 )
 from nemo.utils import logging
+from nemo.utils.export_utils import default_inference_replacements, replace_modules
 
 __all__ = ['ConvASRDecoder', 'ConvASREncoder', 'ConvASRDecoderClassification']
 
@@ -47,6 +50,10 @@ class ConvASREncoder(NeuralModule, Exportable):
     Based on these papers:
         https://arxiv.org/pdf/1904.03288.pdf
         https://arxiv.org/pdf/1910.10261.pdf
+
+    With `share_conv_mask` (default), the padding mask of masked convolutions is computed once per sequence length
+    and shared by all blocks. Outputs are identical to computing the mask in every convolution
+    (`share_conv_mask=False`).
     """
 
     def _prepare_for_export(self):
@@ -116,6 +123,7 @@ class ConvASREncoder(NeuralModule, Exportable):
         conv_mask=True,
         frame_splicing=1,
         init_mode='xavier_uniform',
+        share_conv_mask=True,
     ):
         super().__init__()
         if isinstance(jasper, ListConfig):
@@ -125,6 +133,7 @@ class ConvASREncoder(NeuralModule, Exportable):
         feat_in = feat_in * frame_splicing
 
         self.__feat_in = feat_in
+        self.share_conv_mask = share_conv_mask
 
         residual_panes = []
         encoder_layers = []
@@ -179,12 +188,98 @@ class ConvASREncoder(NeuralModule, Exportable):
 
     @typecheck()
     def forward(self, audio_signal, length=None):
-        s_input, length = self.encoder(([audio_signal], length))
+        if length is None or not self.share_conv_mask:
+            s_input, length = self.encoder(([audio_signal], length))
+        else:
+            s_input = [audio_signal]
+            pad_mask = get_pad_mask(length.to(dtype=torch.long), audio_signal.size(2))
+            for block in self.encoder:
+                s_input, length, pad_mask = block.forward_with_pad_mask(s_input, length, pad_mask)
         if length is None:
             return s_input[-1]
 
         return s_input[-1], length
 
+    def init_streaming_state(self) -> List[Dict[str, list]]:
+        """Creates the per-block caches of a new stream for `forward_streaming`. The encoder must be in evaluation
+        mode."""
+        return [block.init_streaming_state() for block in self.encoder]
+
+    def forward_streaming(
+        self, audio_signal: torch.Tensor, state: Optional[List[Dict[str, list]]] = None, flush: bool = False
+    ) -> Tuple[torch.Tensor, List[Dict[str, list]]]:
+        """Encodes the next chunk of a stream of features.
+
+        The features of a long utterance can be fed in chunks of any size, e.g. as they are produced by
+        `AudioToMelSpectrogramPreprocessor`. Every convolution keeps its left context in `state`, so each chunk
+        is only processed once, and outputs are emitted as soon as their right context has been received, i.e.
+        `streaming_lookahead` feature frames after their input. Concatenating the outputs of all chunks, the last
+        one with `flush=True`, gives the offline encoder output up to the encoded length. Models with
+        squeeze-and-excitation are approximated by restricting its context to past frames.
+
+        Args:
+            audio_signal: Next chunk of features of shape [B, D, T]. Streams of a batch must have equal length.
+            state: Caches returned by the previous call, or None to start a new stream.
+            flush: Whether this is the last chunk of the stream.
+
+        Returns:
+            The next chunk of encoded frames [B, D_enc, T_enc] and the updated state.
+        """
+        if state is None:
+            state = self.init_streaming_state()
+
+        xs = [audio_signal]
+        for block, block_state in zip(self.encoder, state):
+            xs = block.forward_streaming(xs, block_state, flush=flush)
+
+        return xs[-1], state
+
+    @property
+    def streaming_lookahead(self) -> int:
+        """Number of future feature frames needed by `forward_streaming` before emitting an encoded frame."""
+        lookahead, stride = 0, 1
+        for block in self.encoder:
+            for layer in block.mconv:
+                conv = layer.conv if isinstance(layer, MaskedConv1d) else layer
+                if isinstance(conv, nn.Conv1d):
+                    lookahead += conv.padding[0] * stride
+                    stride *= conv.stride[0]
+        return lookahead
+
+    def prepare_for_inference(self, fuse_separable: bool = False, verify: bool = True, tolerance: float = 1e-4):
+        """Optimizes the encoder for inference, in place: batch norms are folded into the preceding convolutions
+        and dropout is removed (see `JasperBlock.fuse_for_inference`). The encoder is put in evaluation mode and
+        should not be trained afterwards.
+
+        Args:
+            fuse_separable: Whether to also merge depthwise and pointwise convolutions. This takes kernel size times
+                more multiply-adds and only matches the original encoder on batches without padding.
+            verify: Whether to check that the optimized encoder matches the original one on `input_example`.
+            tolerance: Maximum error relative to the largest output of the original encoder.
+
+        Returns:
+            The encoder.
+        """
+        self.eval()
+        if verify:
+            audio_signal = self.input_example()[0]
+            length = torch.full((audio_signal.size(0),), audio_signal.size(2), device=audio_signal.device)
+            with torch.no_grad():
+                expected, expected_len = self.forward(audio_signal=audio_signal, length=length)
+
+        num_folded = sum(block.fuse_for_inference(fuse_separable=fuse_separable) for block in self.encoder)
+        replace_modules(self, default_inference_replacements)
+        logging.info(f"Folded {num_folded} batch norms into convolutions")
+
+        if verify:
+            with torch.no_grad():
+                encoded, encoded_len = self.forward(audio_signal=audio_signal, length=length)
+            error = ((encoded - expected).abs().max() / expected.abs().max().clamp(min=1e-12)).item()
+            if not torch.equal(encoded_len, expected_len) or error > tolerance:
+                raise ValueError(f"Optimized encoder does not match the original one, relative error: {error:.2e}")
+
+        return self
+
 
 class ConvASRDecoder(NeuralModule, Exportable):
     """Simple ASR Decoder for use with CTC-based models such as JasperNet and QuartzNet
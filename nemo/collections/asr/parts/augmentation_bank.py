@@ -0,0 +1,279 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Pre-decoded noise and room impulse response banks, and batched perturbations drawing from them.
+
+`NoisePerturbation` and `ImpulsePerturbation` decode a noise or impulse response file per utterance. An
+`AudioBank` decodes and resamples all clips of a manifest once into a single float32 array. With `bank_dir`, the
+array is saved as `<bank_dir>/<kind>_<hash>.npy` with the clip boundaries in `<kind>_<hash>.index.npy` and opened
+memory-mapped, so that all data loading processes and ranks of a node share the same pages and later runs do not
+decode anything.
+
+`BatchedNoisePerturbation` and `BatchedImpulsePerturbation` perturb a whole padded batch [B, T] with tensor
+operations on the device of the batch, on the host at collate time or on the training device, with seeded torch
+generators.
+"""
+
+import hashlib
+import json
+import math
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+import torch
+
+from nemo.collections.asr.parts import collections, parsers
+from nemo.collections.asr.parts.segment import AudioSegment
+from nemo.collections.asr.parts.spectr_augment import _BatchedMasking
+from nemo.utils import logging
+
+__all__ = ['AudioBank', 'BatchedImpulsePerturbation', 'BatchedNoisePerturbation']
+
+
+def _impulse_response(samples: np.ndarray) -> np.ndarray:
+    """Impulse response normalized and shifted to its peak, as in `ImpulsePerturbation` with `shift_impulse`."""
+    low, high = samples.min(), samples.max()
+    samples = (samples - low) / (high - low)
+    return samples[np.argmax(np.abs(samples)) :]
+
+
+class AudioBank:
+    """Audio clips of a manifest (noise or room impulse responses), decoded and resampled once into one array.
+
+    Args:
+        manifest_path: Manifest of the clips, in the format of the noise manifests of `NoisePerturbation`.
+        sample_rate: Sample rate the clips are resampled to.
+        bank_dir: Directory the decoded bank is saved to and memory-mapped from. If None, the bank is decoded in
+            memory by every process.
+        max_duration: Clips are cut to their first `max_duration` seconds, if set.
+        resample_type: Resampling method, see `AudioSegment`.
+        impulse: Whether the clips are room impulse responses, which are stored normalized and shifted to their peak.
+        max_spectra_bytes: Memory budget of the impulse response spectra cached by `spectra` on every device.
+    """
+
+    def __init__(
+        self,
+        manifest_path: str,
+        sample_rate: int,
+        bank_dir: Optional[str] = None,
+        max_duration: Optional[float] = None,
+        resample_type: str = 'kaiser_best',
+        impulse: bool = False,
+        max_spectra_bytes: int = 2 ** 28,
+    ):
+        self.sample_rate = sample_rate
+        self.impulse = impulse
+        self.max_spectra_bytes = max_spectra_bytes
+        self._tensors = {}
+        self._spectra = {}
+
+        config = {
+            'manifest': os.path.abspath(manifest_path),
+            'mtime': os.path.getmtime(manifest_path),
+            'sample_rate': sample_rate,
+            'max_duration': max_duration,
+            'resample_type': resample_type,
+            'impulse': impulse,
+        }
+        build_args = (manifest_path, sample_rate, max_duration, resample_type, impulse)
+        if bank_dir is None:
+            self.samples, index = self._build(*build_args)
+        else:
+            config_hash = hashlib.sha1(json.dumps(config, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+            prefix = os.path.join(bank_dir, f"{'impulse' if impulse else 'noise'}_{config_hash}")
+            if not os.path.exists(f'{prefix}.index.npy'):
+                os.makedirs(bank_dir, exist_ok=True)
+                samples, index = self._build(*build_args)
+                # The index is written last, a bank without index is incomplete
+                self._save(f'{prefix}.npy', samples)
+                self._save(f'{prefix}.index.npy', index)
+                logging.info(f"Saved audio bank of {manifest_path} to {prefix}.npy")
+            # Copy-on-write mapping, so that tensors can share the pages without copies
+            self.samples = np.load(f'{prefix}.npy', mmap_mode='c')
+            index = np.load(f'{prefix}.index.npy')
+
+        self.offsets, self.lengths = np.ascontiguousarray(index[:, 0]), np.ascontiguousarray(index[:, 1])
+        if len(self.lengths) == 0:
+            raise ValueError(f"Audio bank of {manifest_path} has no audio.")
+
+    @staticmethod
+    def _build(manifest_path, sample_rate, max_duration, resample_type, impulse) -> Tuple[np.ndarray, np.ndarray]:
+        manifest = collections.ASRAudioText(manifest_path, parser=parsers.make_parser([]))
+        max_samples = int(max_duration * sample_rate) if max_duration is not None else None
+
+        clips = []
+        for item in manifest:
+            segment = AudioSegment.from_file(
+                item.audio_file, target_sr=sample_rate, offset=item.offset or 0, resample_type=resample_type
+            )
+            samples = segment.samples[:max_samples]
+            if impulse:
+                samples = _impulse_response(samples)
+            if len(samples) > 0:
+                clips.append(samples.astype(np.float32))
+
+        lengths = np.array([len(clip) for clip in clips], dtype=np.int64)
+        offsets = np.cumsum(lengths) - lengths
+        samples = np.concatenate(clips) if clips else np.zeros(0, dtype=np.float32)
+        return samples, np.stack([offsets, lengths], axis=1)
+
+    @staticmethod
+    def _save(path: str, array: np.ndarray):
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.save(f, array)
+        os.replace(tmp_path, path)
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    @property
+    def max_length(self) -> int:
+        return int(self.lengths.max())
+
+    def clip(self, idx: int) -> np.ndarray:
+        return self.samples[self.offsets[idx] : self.offsets[idx] + self.lengths[idx]]
+
+    def tensors(self, device: torch.device) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+        """Samples, clip offsets and clip lengths as tensors on `device`, copied to a device once."""
+        tensors = self._tensors.get(device)
+        if tensors is None:
+            tensors = tuple(torch.from_numpy(array).to(device) for array in (self.samples, self.offsets, self.lengths))
+            self._tensors[device] = tensors
+        return tensors
+
+    def spectra(self, n_fft: int, device: torch.device) -> Optional[torch.Tensor]:
+        """Real FFTs [len(self), n_fft // 2 + 1] of all clips, cached on `device`, or None if over the budget."""
+        spectra = self._spectra.get((n_fft, device))
+        if spectra is None:
+            size = len(self) * (n_fft // 2 + 1) * 8
+            used = sum(s.numel() * 8 for (_, d), s in self._spectra.items() if d == device)
+            if used + size > self.max_spectra_bytes:
+                return None
+            spectra = self.clip_spectra(torch.arange(len(self), device=device), n_fft)
+            self._spectra[(n_fft, device)] = spectra
+        return spectra
+
+    def clip_spectra(self, clips: torch.Tensor, n_fft: int) -> torch.Tensor:
+        """Real FFTs [len(clips), n_fft // 2 + 1] of the clips with indices `clips`."""
+        samples, offsets, lengths = self.tensors(clips.device)
+        positions = torch.arange(min(self.max_length, n_fft), device=clips.device)
+        valid = positions < lengths[clips, None]
+        padded = samples[(offsets[clips, None] + positions).clamp(max=len(samples) - 1)] * valid
+        return torch.fft.rfft(padded, n=n_fft)
+
+    def __getstate__(self):
+        # Device copies are not pickled into data loader workers
+        state = self.__dict__.copy()
+        state['_tensors'] = {}
+        state['_spectra'] = {}
+        return state
+
+
+class _BatchedPerturbation(_BatchedMasking):
+    """Base of the batched perturbations, applied to every utterance of a batch with probability `prob`."""
+
+    def __init__(self, bank: AudioBank, prob: float = 1.0, seed: Optional[int] = None):
+        super().__init__(seed=seed)
+        self.bank = bank
+        self.prob = prob
+
+
+class BatchedNoisePerturbation(_BatchedPerturbation):
+    """Adds a random window of a random noise clip of `bank` to every utterance at a random SNR, like
+    `NoisePerturbation`. Noise clips shorter than an utterance are looped.
+
+    Args:
+        bank: Noise clips.
+        prob: Probability of perturbing an utterance.
+        min_snr_db: Minimum signal to noise ratio.
+        max_snr_db: Maximum signal to noise ratio.
+        max_gain_db: Maximum gain applied to the noise.
+        seed: Seed of the generators, random if None.
+    """
+
+    def __init__(
+        self,
+        bank: AudioBank,
+        prob: float = 1.0,
+        min_snr_db: float = 10,
+        max_snr_db: float = 50,
+        max_gain_db: float = 300.0,
+        seed: Optional[int] = None,
+    ):
+        super().__init__(bank, prob=prob, seed=seed)
+        self.min_snr_db = min_snr_db
+        self.max_snr_db = max_snr_db
+        self.max_gain_db = max_gain_db
+
+    @staticmethod
+    def _power_db(signal, length):
+        return 10 * torch.log10(signal.pow(2).sum(dim=1) / length.clamp(min=1) + 1e-20)
+
+    @torch.no_grad()
+    def forward(self, signal, length):
+        batch_size, max_len = signal.shape
+        samples, offsets, lengths = self.bank.tensors(signal.device)
+
+        # (apply, clip, start, snr) of every utterance
+        uniform = torch.rand(batch_size, 4, generator=self._generator(signal.device), device=signal.device)
+        clips = (uniform[:, 1] * len(self.bank)).long()
+        start = (uniform[:, 2] * lengths[clips]).long()
+
+        positions = torch.arange(max_len, device=signal.device)
+        valid = positions < length[:, None]
+        noise = samples[offsets[clips, None] + (start[:, None] + positions) % lengths[clips, None]]
+        noise = noise.to(signal.dtype) * valid
+
+        snr_db = self.min_snr_db + uniform[:, 3] * (self.max_snr_db - self.min_snr_db)
+        gain_db = self._power_db(signal, length) - self._power_db(noise, length) - snr_db
+        gain = 10.0 ** (gain_db.clamp(max=self.max_gain_db) / 20.0)
+        gain = gain.masked_fill(uniform[:, 0] >= self.prob, 0)
+        return signal + noise * gain[:, None].to(signal.dtype)
+
+
+class BatchedImpulsePerturbation(_BatchedPerturbation):
+    """Convolves every utterance with a random room impulse response of `bank` by FFT, like
+    `ImpulsePerturbation` with `shift_impulse`. Spectra of the impulse responses are computed once per FFT size
+    while they fit the memory budget of the bank, otherwise for the drawn impulse responses only.
+
+    Args:
+        bank: Room impulse responses, with `impulse` set.
+        prob: Probability of perturbing an utterance.
+        seed: Seed of the generators, random if None.
+    """
+
+    def __init__(self, bank: AudioBank, prob: float = 0.5, seed: Optional[int] = None):
+        if not bank.impulse:
+            raise ValueError("BatchedImpulsePerturbation expects an AudioBank of impulse responses.")
+        super().__init__(bank, prob=prob, seed=seed)
+
+    @torch.no_grad()
+    def forward(self, signal, length):
+        batch_size, max_len = signal.shape
+
+        # (apply, clip) of every utterance
+        uniform = torch.rand(batch_size, 2, generator=self._generator(signal.device), device=signal.device)
+        clips = (uniform[:, 1] * len(self.bank)).long()
+
+        # Power of two FFT sizes keep the number of cached spectra small
+        n_fft = 2 ** math.ceil(math.log2(max_len + self.bank.max_length - 1))
+        spectra = self.bank.spectra(n_fft, signal.device)
+        spectra = spectra[clips] if spectra is not None else self.bank.clip_spectra(clips, n_fft)
+
+        reverberant = torch.fft.irfft(torch.fft.rfft(signal.float(), n=n_fft) * spectra, n=n_fft)[:, :max_len]
+        valid = torch.arange(max_len, device=signal.device) < length[:, None]
+        reverberant = reverberant.to(signal.dtype) * valid
+        return torch.where((uniform[:, 0] < self.prob)[:, None], reverberant, signal)
@@ -0,0 +1,220 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Batched torch versions of `SpeedPerturbation` and `TimeStretchPerturbation`.
+
+Both draw one of `num_rates` discrete rates per utterance of a padded batch [B, T] and process the utterances of
+every drawn rate together, on the device of the batch: speed perturbation resamples with windowed sinc kernels
+built once per rate, time stretching runs a phase vocoder on `torch.stft` frames without loops over time. Rates are
+drawn on the host, so that grouping utterances by rate does not synchronize with the device.
+"""
+
+import math
+from abc import ABC, abstractmethod
+from typing import Dict, Tuple
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+from nemo.collections.asr.parts.spectr_augment import _BatchedMasking
+
+__all__ = ['BatchedSpeedPerturbation', 'BatchedTimeStretchPerturbation', 'resample_sinc']
+
+_SINC_KERNELS: Dict[Tuple[int, int, torch.device, torch.dtype], Tuple[torch.Tensor, int]] = {}
+
+
+def _sinc_kernel(orig: int, new: int, device: torch.device, dtype: torch.dtype) -> Tuple[torch.Tensor, int]:
+    """Hann windowed sinc kernels [new, 1, K] of the `new` output phases of a resampling by `new / orig`, and the
+    padding they need on the left, cached per (orig, new, device, dtype)."""
+    key = (orig, new, device, dtype)
+    if key not in _SINC_KERNELS:
+        lowpass_filter_width = 6
+        base_freq = min(orig, new) * 0.99
+        width = math.ceil(lowpass_filter_width * orig / base_freq)
+
+        positions = torch.arange(-width, width + orig, dtype=torch.float64) / orig
+        t = (positions - torch.arange(new, dtype=torch.float64).unsqueeze(1) / new) * base_freq
+        t = t.clamp(-lowpass_filter_width, lowpass_filter_width)
+        window = torch.cos(t * math.pi / lowpass_filter_width / 2) ** 2
+        t = t * math.pi
+        sinc = torch.where(t == 0, torch.ones_like(t), torch.sin(t) / t)
+        kernel = (sinc * window * base_freq / orig).unsqueeze(1)
+        _SINC_KERNELS[key] = (kernel.to(device=device, dtype=dtype), width)
+    return _SINC_KERNELS[key]
+
+
+def resample_sinc(signal: torch.Tensor, orig_sr: int, target_sr: int) -> torch.Tensor:
+    """Resamples a batch [B, T] to `ceil(T * target_sr / orig_sr)` samples with windowed sinc kernels, as a strided
+    convolution producing all output phases at once."""
+    gcd = math.gcd(int(orig_sr), int(target_sr))
+    orig, new = int(orig_sr) // gcd, int(target_sr) // gcd
+    if orig == new:
+        return signal
+
+    kernel, width = _sinc_kernel(orig, new, signal.device, signal.dtype)
+    batch_size, length = signal.shape
+    padded = F.pad(signal.unsqueeze(1), (width, width + orig))
+    resampled = F.conv1d(padded, kernel, stride=orig).transpose(1, 2).reshape(batch_size, -1)
+    return resampled[:, : math.ceil(new * length / orig)]
+
+
+class _BatchedRatePerturbation(_BatchedMasking, ABC):
+    """Base of the batched speed and time-stretch perturbations, with a host generator drawing rates."""
+
+    def __init__(self, min_speed_rate=0.9, max_speed_rate=1.1, num_rates=5, prob=1.0, seed=None):
+        super().__init__(seed=seed)
+        if min(min_speed_rate, max_speed_rate) <= 0.0:
+            raise ValueError("Minimum sampling rate modifier must be > 0.")
+        if num_rates <= 0:
+            raise ValueError("Batched perturbations need a positive number of discrete rates `num_rates`.")
+        self.rates = np.linspace(min_speed_rate, max_speed_rate, num_rates, endpoint=True).tolist()
+        self.prob = prob
+
+    def max_augmentation_length(self, length):
+        return length * max(self.rates)
+
+    def _draw_rates(self, batch_size):
+        """Rate of every utterance of the batch, 1.0 for utterances that are not perturbed."""
+        uniform = torch.rand(batch_size, 2, generator=self._generator(torch.device('cpu')))
+        return [
+            self.rates[min(int(choice * len(self.rates)), len(self.rates) - 1)] if apply < self.prob else 1.0
+            for apply, choice in uniform.tolist()
+        ]
+
+    @abstractmethod
+    def _new_length(self, length, rate):
+        """Length of an utterance of `length` samples (int or tensor) perturbed by `rate`."""
+
+    @abstractmethod
+    def _perturb(self, signal, rate):
+        """Perturbs the utterances [B, T] of one rate."""
+
+    @torch.no_grad()
+    def forward(self, signal, length):
+        """Perturbs a padded batch [B, T] with lengths [B], returns the perturbed batch and lengths."""
+        rates = self._draw_rates(signal.shape[0])
+        new_length = torch.stack([self._new_length(length[i], rate) for i, rate in enumerate(rates)])
+        max_len = max(self._new_length(signal.shape[1], rate) for rate in rates)
+        output = signal.new_zeros(signal.shape[0], max_len)
+
+        for rate in sorted(set(rates)):
+            rows = torch.tensor([i for i, r in enumerate(rates) if r == rate], device=signal.device)
+            perturbed = signal[rows] if rate == 1.0 else self._perturb(signal[rows], rate)
+            output[rows, : perturbed.shape[1]] = perturbed[:, :max_len]
+
+        # Keep the padding silent
+        output = output * (torch.arange(max_len, device=signal.device) < new_length[:, None])
+        return output, new_length
+
+
+class BatchedSpeedPerturbation(_BatchedRatePerturbation):
+    """Batched version of SpeedPerturbation: resamples every utterance from `sr` to `int(sr * rate)` for a random
+    discrete rate, which changes speed and pitch. The sinc kernels of every rate are built once.
+
+    Args:
+        sr: Original sampling rate.
+        min_speed_rate: Minimum sampling rate modifier.
+        max_speed_rate: Maximum sampling rate modifier.
+        num_rates: Number of discrete rates, a positive integer.
+        prob: Probability of perturbing an utterance.
+        seed: Seed of the generator, random if None.
+    """
+
+    def __init__(self, sr, min_speed_rate=0.9, max_speed_rate=1.1, num_rates=5, prob=1.0, seed=None):
+        super().__init__(
+            min_speed_rate=min_speed_rate, max_speed_rate=max_speed_rate, num_rates=num_rates, prob=prob, seed=seed
+        )
+        self.sr = sr
+
+    def _new_length(self, length, rate):
+        if rate == 1.0:
+            return length
+        new_sr = int(self.sr * rate)
+        gcd = math.gcd(self.sr, new_sr)
+        orig, new = self.sr // gcd, new_sr // gcd
+        if torch.is_tensor(length):
+            return (length * new + orig - 1) // orig
+        return math.ceil(new * length / orig)
+
+    def _perturb(self, signal, rate):
+        return resample_sinc(signal, self.sr, int(self.sr * rate))
+
+
+class BatchedTimeStretchPerturbation(_BatchedRatePerturbation):
+    """Batched version of TimeStretchPerturbation: time-stretches every utterance by a random discrete rate while
+    preserving pitch, with a phase vocoder vectorized over the batch and the frames.
+
+    Args:
+        min_speed_rate: Minimum sampling rate modifier.
+        max_speed_rate: Maximum sampling rate modifier.
+        num_rates: Number of discrete rates, a positive integer.
+        n_fft: Number of fft filters when speeding up, doubled when slowing down.
+        prob: Probability of perturbing an utterance.
+        seed: Seed of the generator, random if None.
+    """
+
+    def __init__(self, min_speed_rate=0.9, max_speed_rate=1.1, num_rates=5, n_fft=512, prob=1.0, seed=None):
+        super().__init__(
+            min_speed_rate=min_speed_rate, max_speed_rate=max_speed_rate, num_rates=num_rates, prob=prob, seed=seed
+        )
+        self.n_fft = int(n_fft)
+        self._windows = {}
+
+    def _new_length(self, length, rate):
+        if rate == 1.0:
+            return length
+        if torch.is_tensor(length):
+            return torch.round(length / rate).long()
+        return int(round(length / rate))
+
+    def _window(self, n_fft, device, dtype):
+        key = (n_fft, device, dtype)
+        if key not in self._windows:
+            self._windows[key] = torch.hann_window(n_fft, device=device, dtype=dtype)
+        return self._windows[key]
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state['_windows'] = {}
+        return state
+
+    def _perturb(self, signal, rate):
+        # Larger frames when slowing down, as in TimeStretchPerturbation
+        n_fft = self.n_fft if rate >= 1.0 else 2 * self.n_fft
+        hop_length = n_fft // 2
+        window = self._window(n_fft, signal.device, signal.dtype)
+
+        stft = torch.stft(signal, n_fft, hop_length=hop_length, window=window, return_complex=True)
+        num_frames = stft.shape[-1]
+
+        # Interpolate magnitudes and accumulate phase advances at fractional frames, as librosa's phase vocoder
+        steps = torch.arange(0, num_frames, rate, device=signal.device, dtype=torch.float64)
+        frames = steps.long()
+        alpha = (steps - frames).to(signal.dtype)
+        stft = F.pad(stft, (0, 2))
+        left, right = stft[..., frames], stft[..., frames + 1]
+
+        magnitude = (1 - alpha) * left.abs() + alpha * right.abs()
+        phi_advance = torch.linspace(0, math.pi * hop_length, n_fft // 2 + 1, device=signal.device, dtype=signal.dtype)
+        phi_advance = phi_advance.unsqueeze(-1)
+        dphase = right.angle() - left.angle() - phi_advance
+        dphase = dphase - 2.0 * math.pi * torch.round(dphase / (2.0 * math.pi))
+        advance = torch.cumsum(phi_advance + dphase, dim=-1)
+        phase = stft[..., :1].angle() + F.pad(advance[..., :-1], (1, 0))
+        stretched = torch.polar(magnitude, phase)
+
+        return torch.istft(
+            stretched, n_fft, hop_length=hop_length, window=window, length=self._new_length(signal.shape[1], rate)
+        )
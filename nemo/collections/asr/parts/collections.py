@@ -12,14 +12,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import abc
 import collections
+import collections.abc
 import json
 import os
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Union
 
+import numpy as np
 import pandas as pd
 
-from nemo.collections.asr.parts import manifest, parsers
+from nemo.collections.asr.parts import manifest, manifest_index, parsers
 from nemo.utils import logging
 
 
@@ -202,6 +205,218 @@ class ASRAudioText(AudioText):
         super().__init__(ids, audio_files, durations, texts, offsets, speakers, orig_srs, *args, **kwargs)
 
 
+class _IndexedCollection(collections.abc.Sequence):
+    """Lazy list of entities backed by a memory-mapped `ManifestIndex`.
+
+    Only the positions of the selected index rows are held in memory, entities are materialized on access.
+    """
+
+    OUTPUT_TYPE = None  # Single element output type.
+
+    def __init__(self, index: manifest_index.ManifestIndex, rows: np.ndarray):
+        self._index = index
+        # Halve the per-process footprint of the row positions whenever they fit.
+        self._rows = rows.astype(np.int32) if len(index) < np.iinfo(np.int32).max else rows
+
+    def __len__(self):
+        return len(self._rows)
+
+    @property
+    def durations(self) -> np.ndarray:
+        """Durations of all entries, without materializing them."""
+        return np.asarray(self._index.durations)[self._rows]
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        return self._entity(int(self._rows[idx]))
+
+    @abc.abstractmethod
+    def _entity(self, row: int):
+        pass
+
+    @staticmethod
+    def _select_rows(
+        durations: np.ndarray,
+        min_duration: Optional[float],
+        max_duration: Optional[float],
+        max_number: Optional[int],
+        valid: Optional[np.ndarray] = None,
+    ):
+        """Vectorized equivalent of the filtering loops of `AudioText` and `SpeechLabel`.
+
+        Returns:
+            Selected rows, total duration of the rows which were filtered out and their count.
+        """
+        durations = np.asarray(durations)
+        keep = np.ones(len(durations), dtype=np.bool_)
+        if min_duration is not None:
+            keep &= durations >= min_duration
+        if max_duration is not None:
+            keep &= durations <= max_duration
+        if valid is not None:
+            keep &= np.asarray(valid)
+
+        rows = np.flatnonzero(keep)
+        scanned = len(durations)
+        if max_number and len(rows) >= max_number:
+            rows = rows[:max_number]
+            scanned = rows[-1] + 1
+
+        filtered = ~keep[:scanned]
+        return rows, float(durations[:scanned][filtered].sum()), int(filtered.sum())
+
+
+class _FileIdMapping:
+    """Read-only `file_id -> position` mapping over an `IndexedAudioText`, mirroring `AudioText.mapping`.
+
+    Lookups binary search the index's sorted file ids instead of holding a dict with one key per utterance.
+    """
+
+    def __init__(self, index: manifest_index.ManifestIndex, rows: np.ndarray):
+        self._index = index
+        self._rows = rows  # Must be sorted ascending.
+
+    def _lookup(self, file_id: str) -> Optional[int]:
+        order = self._index.file_id_order
+        lo, hi = 0, len(order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._index.file_id(order[mid]) < file_id:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        # Duplicate file ids are kept in manifest order, the last selected one wins as in `AudioText`.
+        position = None
+        while lo < len(order) and self._index.file_id(order[lo]) == file_id:
+            row = order[lo]
+            candidate = int(np.searchsorted(self._rows, row))
+            if candidate < len(self._rows) and self._rows[candidate] == row:
+                position = candidate
+            lo += 1
+
+        return position
+
+    def __contains__(self, file_id: str) -> bool:
+        return self._lookup(file_id) is not None
+
+    def __getitem__(self, file_id: str) -> int:
+        position = self._lookup(file_id)
+        if position is None:
+            raise KeyError(file_id)
+        return position
+
+    def get(self, file_id: str, default: Optional[int] = None) -> Optional[int]:
+        position = self._lookup(file_id)
+        return default if position is None else position
+
+    def __len__(self):
+        return len(self._rows)
+
+
+class IndexedAudioText(_IndexedCollection):
+    """`AudioText` equivalent reading entries lazily from a compiled manifest index."""
+
+    OUTPUT_TYPE = AudioText.OUTPUT_TYPE
+
+    def __init__(
+        self,
+        index: manifest_index.ManifestIndex,
+        parser: Callable[[str], Optional[List[int]]],
+        min_duration: Optional[float] = None,
+        max_duration: Optional[float] = None,
+        max_number: Optional[int] = None,
+        do_sort_by_duration: bool = False,
+        index_by_file_id: bool = False,
+    ):
+        """Instantiates audio-text collection over a manifest index with the same filters as `AudioText`.
+
+        If the index holds tokens produced by a parser with the same `fingerprint` as `parser`, they are read
+        directly from the index. Otherwise transcripts are tokenized on access, after one pass over all of them to
+        find those which fail to parse, unless the parser sets `can_fail = False`. In all cases, entries which fail
+        to parse are filtered out as in `AudioText`.
+
+        Args:
+            index: Opened `ManifestIndex` of kind 'audio_text'.
+            parser: Instance of `CharParser` (or any callable) to convert string to tokens.
+            min_duration: Minimum duration to keep entry with (default: None).
+            max_duration: Maximum duration to keep entry with (default: None).
+            max_number: Maximum number of samples to collect.
+            do_sort_by_duration: True if sort samples list by duration. Not compatible with index_by_file_id.
+            index_by_file_id: If True, exposes a `mapping` from filename base (ID) to index in data.
+        """
+        self._parser = parser
+        self._use_index_tokens = index.has_tokens_for(parser)
+        if self._use_index_tokens:
+            parsed = index.tokens_ok
+        else:
+            logging.info("Manifest index %s has no tokens for this parser, tokenizing on access.", index.index_dir)
+            parsed = None
+            if getattr(parser, 'can_fail', True):
+                texts = (index.texts[row] for row in range(len(index)))
+                parsed = np.fromiter((parser(text) is not None for text in texts), dtype=np.bool_, count=len(index))
+
+        durations = np.asarray(index.durations)
+        rows, duration_filtered, num_filtered = self._select_rows(
+            durations, min_duration, max_duration, max_number, parsed
+        )
+
+        if do_sort_by_duration:
+            if index_by_file_id:
+                logging.warning("Tried to sort dataset by duration, but cannot since index_by_file_id is set.")
+            else:
+                rows = rows[np.argsort(durations[rows], kind='stable')]
+
+        super().__init__(index, rows)
+
+        if index_by_file_id:
+            self.mapping = _FileIdMapping(index, self._rows)
+
+        logging.info("Dataset loaded with %d files totalling %.2f hours", len(rows), durations[rows].sum() / 3600)
+        logging.info("%d files were filtered totalling %.2f hours", num_filtered, duration_filtered / 3600)
+
+    def _entity(self, row: int):
+        index = self._index
+        text = index.texts[row]
+        if self._use_index_tokens:
+            text_tokens = index.text_tokens(row)
+        else:
+            text_tokens = self._parser(text)
+
+        offset = float(index.offsets[row])
+        orig_sr = int(index.orig_srs[row])
+        return self.OUTPUT_TYPE(
+            int(index.ids[row]),
+            index.audio_files[row],
+            float(index.durations[row]),
+            text_tokens,
+            None if np.isnan(offset) else offset,
+            text,
+            json.loads(index.speakers[row]),
+            None if orig_sr < 0 else orig_sr,
+        )
+
+
+def make_audio_text_collection(
+    manifests_files: Union[str, List[str]], manifest_index_dir: Optional[str] = None, **kwargs
+) -> Union[ASRAudioText, IndexedAudioText]:
+    """Returns `IndexedAudioText` if `manifest_index_dir` is an up to date index of `manifests_files`, otherwise
+    parses the manifests into `ASRAudioText`.
+
+    Args:
+        manifests_files: Either single string file or list of such - manifests to yield items from.
+        manifest_index_dir: Optional directory built by `scripts/build_manifest_index.py`.
+        **kwargs: Kwargs to pass to `IndexedAudioText` or `ASRAudioText` constructor.
+    """
+    if manifest_index_dir is not None:
+        index = manifest_index.open_manifest_index(manifest_index_dir, manifests_files, kind='audio_text')
+        if index is not None:
+            return IndexedAudioText(index, **kwargs)
+
+    return ASRAudioText(manifests_files, **kwargs)
+
+
 class SpeechLabel(_Collection):
     """List of audio-label correspondence with preprocessing."""
 
@@ -275,7 +490,7 @@ class ASRSpeechLabel(SpeechLabel):
         """
         audio_files, durations, labels, offsets = [], [], [], []
 
-        for item in manifest.item_iter(manifests_files, parse_func=self.__parse_item):
+        for item in manifest.item_iter(manifests_files, parse_func=self.parse_item):
             audio_files.append(item['audio_file'])
             durations.append(item['duration'])
             labels.append(item['label'])
@@ -283,7 +498,8 @@ class ASRSpeechLabel(SpeechLabel):
 
         super().__init__(audio_files, durations, labels, offsets, *args, **kwargs)
 
-    def __parse_item(self, line: str, manifest_file: str) -> Dict[str, Any]:
+    @staticmethod
+    def parse_item(line: str, manifest_file: str) -> Dict[str, Any]:
         item = json.loads(line)
 
         # Audio file
@@ -319,3 +535,72 @@ class ASRSpeechLabel(SpeechLabel):
         )
 
         return item
+
+
+class IndexedSpeechLabel(_IndexedCollection):
+    """`SpeechLabel` equivalent reading entries lazily from a compiled manifest index."""
+
+    OUTPUT_TYPE = SpeechLabel.OUTPUT_TYPE
+
+    def __init__(
+        self,
+        index: manifest_index.ManifestIndex,
+        min_duration: Optional[float] = None,
+        max_duration: Optional[float] = None,
+        max_number: Optional[int] = None,
+        do_sort_by_duration: bool = False,
+    ):
+        """Instantiates audio-label collection over a manifest index with the same filters as `SpeechLabel`.
+
+        Args:
+            index: Opened `ManifestIndex` of kind 'speech_label'.
+            min_duration: Minimum duration to keep entry with (default: None).
+            max_duration: Maximum duration to keep entry with (default: None).
+            max_number: Maximum number of samples to collect.
+            do_sort_by_duration: True if sort samples list by duration.
+        """
+        durations = np.asarray(index.durations)
+        rows, duration_filtered, _ = self._select_rows(durations, min_duration, max_duration, max_number)
+
+        if do_sort_by_duration:
+            rows = rows[np.argsort(durations[rows], kind='stable')]
+
+        super().__init__(index, rows)
+
+        self._labels = [json.loads(index.label_vocab[i]) for i in range(len(index.label_vocab))]
+        label_ids = np.unique(np.asarray(index.label_ids)[rows])
+        self.uniq_labels = sorted(self._labels[label_id] for label_id in label_ids)
+
+        logging.info(
+            "Filtered duration for loading collection is %f.", duration_filtered,
+        )
+        logging.info("# {} files loaded accounting to # {} labels".format(len(rows), len(self.uniq_labels)))
+
+    def _entity(self, row: int):
+        index = self._index
+        offset = float(index.offsets[row])
+        return self.OUTPUT_TYPE(
+            index.audio_files[row],
+            float(index.durations[row]),
+            self._labels[index.label_ids[row]],
+            None if np.isnan(offset) else offset,
+        )
+
+
+def make_speech_label_collection(
+    manifests_files: Union[str, List[str]], manifest_index_dir: Optional[str] = None, **kwargs
+) -> Union[ASRSpeechLabel, IndexedSpeechLabel]:
+    """Returns `IndexedSpeechLabel` if `manifest_index_dir` is an up to date index of `manifests_files`, otherwise
+    parses the manifests into `ASRSpeechLabel`.
+
+    Args:
+        manifests_files: Either single string file or list of such - manifests to yield items from.
+        manifest_index_dir: Optional directory built by `scripts/build_manifest_index.py`.
+        **kwargs: Kwargs to pass to `IndexedSpeechLabel` or `ASRSpeechLabel` constructor.
+    """
+    if manifest_index_dir is not None:
+        index = manifest_index.open_manifest_index(manifest_index_dir, manifests_files, kind='speech_label')
+        if index is not None:
+            return IndexedSpeechLabel(index, **kwargs)
+
+    return ASRSpeechLabel(manifests_files, **kwargs)
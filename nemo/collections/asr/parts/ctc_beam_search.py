@@ -0,0 +1,452 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""CPU CTC prefix beam search with an optional word-level n-gram language model."""
+
+import heapq
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+
+from nemo.utils import logging
+
+__all__ = ['NGramLanguageModel', 'CTCPrefixBeamSearch', 'CTCBeamSearchDecoder']
+
+NEG_INF = float('-inf')
+LOG_10 = math.log(10.0)
+WORD_BOUNDARIES = ('space', 'sentencepiece', 'wordpiece')
+
+
+def _logsumexp(a: float, b: float) -> float:
+    if a == NEG_INF:
+        return b
+    if b == NEG_INF:
+        return a
+    if a > b:
+        return a + math.log1p(math.exp(b - a))
+    return b + math.log1p(math.exp(a - b))
+
+
+class NGramLanguageModel:
+    """Word-level backoff n-gram language model read from an ARPA file.
+
+    The model is stored as a compact trie: for every order `n` there are flat arrays of the n-grams' log
+    probabilities and backoff weights, sorted by the int64 key `parent * vocab_size + word`, where `parent` is the
+    index of the (n-1)-gram context in the arrays of order n-1. Children are found by binary search, so memory is a
+    few bytes per n-gram rather than a python object per n-gram.
+
+    Args:
+        arpa_path: Path to the ARPA file.
+        unk_logprob: Log10 probability of out-of-vocabulary words. Defaults to the `<unk>` unigram if the model has
+            one, and -100 otherwise (as KenLM).
+    """
+
+    BOS, EOS, UNK = '<s>', '</s>', '<unk>'
+
+    def __init__(self, arpa_path: str, unk_logprob: Optional[float] = None):
+        self.arpa_path = arpa_path
+        ngrams = self._read_arpa(arpa_path)
+        self.order = len(ngrams)
+        self._vocab: Dict[str, int] = {words[0]: i for i, (words, _, _) in enumerate(ngrams[0])}
+        self._vocab_size = len(self._vocab)
+        self._keys, self._logprobs, self._backoffs = [], [], []
+
+        for n, entries in enumerate(ngrams, start=1):
+            words = np.array([[self._vocab.get(word, -1) for word in entry[0]] for entry in entries], dtype=np.int64)
+            words = words.reshape(len(entries), n)
+            logprobs = np.array([entry[1] for entry in entries], dtype=np.float32)
+            backoffs = np.array([entry[2] for entry in entries], dtype=np.float32)
+
+            parents, valid = self._vectorized_context_lookup(words[:, :-1])
+            valid &= words[:, -1] >= 0
+            if not valid.all():
+                logging.warning(f"Ignoring {(~valid).sum()} {n}-grams of {arpa_path} with unknown contexts.")
+
+            keys = parents[valid] * self._vocab_size + words[valid, -1]
+            order = np.argsort(keys, kind='stable')
+            self._keys.append(keys[order])
+            self._logprobs.append(logprobs[valid][order] * LOG_10)
+            self._backoffs.append(backoffs[valid][order] * LOG_10)
+
+        if unk_logprob is not None:
+            self.unk_logprob = unk_logprob * LOG_10
+        elif self.UNK in self._vocab:
+            self.unk_logprob = float(self._logprobs[0][self._vocab[self.UNK]])
+        else:
+            self.unk_logprob = -100.0 * LOG_10
+
+        self._context_cache: Dict[Tuple[int, ...], int] = {}
+        logging.info(
+            "Loaded %d-gram language model from %s with %d words", self.order, arpa_path, self._vocab_size,
+        )
+
+    @staticmethod
+    def _read_arpa(arpa_path: str) -> List[List[Tuple[List[str], float, float]]]:
+        ngrams, order = [], None
+        with open(arpa_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('ngram ') or line == '\\data\\':
+                    continue
+                if line == '\\end\\':
+                    break
+                if line.startswith('\\') and line.endswith('-grams:'):
+                    order = int(line[1 : -len('-grams:')])
+                    ngrams.append([])
+                    continue
+                if order is None:
+                    continue
+
+                fields = line.split()
+                backoff = float(fields[order + 1]) if len(fields) > order + 1 else 0.0
+                ngrams[-1].append((fields[1 : order + 1], float(fields[0]), backoff))
+
+        if not ngrams:
+            raise ValueError(f"{arpa_path} does not contain any n-grams, is it an ARPA file?")
+        return ngrams
+
+    def _vectorized_context_lookup(self, contexts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Index of every context row in the arrays of its order (0 for the empty context) and a validity mask."""
+        nodes = np.zeros(len(contexts), dtype=np.int64)
+        valid = np.ones(len(contexts), dtype=np.bool_)
+        for level in range(contexts.shape[1]):
+            keys = self._keys[level]
+            if len(keys) == 0:
+                return nodes, np.zeros_like(valid)
+            query = nodes * self._vocab_size + contexts[:, level]
+            found = np.minimum(np.searchsorted(keys, query), len(keys) - 1)
+            valid &= (contexts[:, level] >= 0) & (keys[found] == query)
+            nodes = np.where(valid, found, 0)
+        return nodes, valid
+
+    def _child(self, level: int, parent: int, word_id: int) -> int:
+        keys = self._keys[level]
+        key = parent * self._vocab_size + word_id
+        index = int(np.searchsorted(keys, key))
+        return index if index < len(keys) and keys[index] == key else -1
+
+    def _context_node(self, context: Tuple[int, ...]) -> int:
+        node = self._context_cache.get(context)
+        if node is None:
+            node = 0
+            for level, word_id in enumerate(context):
+                node = self._child(level, node, word_id)
+                if node < 0:
+                    break
+            if len(self._context_cache) > 1000000:
+                self._context_cache.clear()
+            self._context_cache[context] = node
+        return node
+
+    def word_id(self, word: str) -> int:
+        """Index of `word` in the vocabulary, -1 if it is out of vocabulary."""
+        return self._vocab.get(word, -1)
+
+    def initial_state(self) -> Tuple[int, ...]:
+        bos = self.word_id(self.BOS)
+        return (bos,) if bos >= 0 and self.order > 1 else ()
+
+    def score(self, state: Tuple[int, ...], word_id: int) -> Tuple[float, Tuple[int, ...]]:
+        """Natural log probability of a word given the previous words, with Katz backoff.
+
+        Args:
+            state: Previous word ids, most recent last, as returned by `initial_state` or `score`.
+            word_id: Id of the scored word, as returned by `word_id`.
+
+        Returns:
+            Log probability and the state after the word.
+        """
+        if word_id < 0:
+            return self.unk_logprob, ()
+
+        backoff = 0.0
+        for start in range(len(state) + 1):
+            context = state[start:]
+            node = self._context_node(context)
+            if node < 0:
+                continue
+            child = self._child(len(context), node, word_id)
+            if child >= 0:
+                logprob = float(self._logprobs[len(context)][child]) + backoff
+                break
+            if context:
+                backoff += float(self._backoffs[len(context) - 1][node])
+        else:
+            logprob = self.unk_logprob
+
+        return logprob, (state + (word_id,))[max(0, len(state) + 2 - self.order) :]
+
+    def final_score(self, state: Tuple[int, ...]) -> float:
+        """Log probability of the end of sentence token given the previous words."""
+        eos = self.word_id(self.EOS)
+        return self.score(state, eos)[0] if eos >= 0 else 0.0
+
+
+class CTCPrefixBeamSearch:
+    """CTC prefix beam search over the log probabilities of a single utterance.
+
+    Every prefix (collapsed label sequence) keeps the probability of all alignments ending in blank and of all
+    alignments ending in its last label, so that repeated labels are only emitted through a blank. At every frame
+    only the labels making up `cutoff_prob` of the probability mass (and at most `cutoff_top_n` of them) are
+    considered, and only the `beam_width` best prefixes are kept.
+
+    With a language model, a prefix is scored as `log P_ctc + alpha * log P_lm + beta * num_words`, where the
+    language model is queried whenever a word is completed according to `word_boundary`.
+
+    Args:
+        vocabulary: Text of every label, without the blank.
+        beam_width: Number of prefixes kept after every frame.
+        cutoff_prob: Cumulative probability of the labels considered at every frame.
+        cutoff_top_n: Maximum number of labels considered at every frame.
+        language_model: Optional `NGramLanguageModel`.
+        alpha: Weight of the language model.
+        beta: Word insertion bonus.
+        word_boundary: How words are delimited in the label sequence. `space` for character vocabularies where the
+            ' ' label separates words, `sentencepiece` for pieces starting new words with '▁', `wordpiece` for
+            pieces continuing words with '##'.
+        blank_id: Index of the blank label. Defaults to `len(vocabulary)`.
+    """
+
+    def __init__(
+        self,
+        vocabulary: Sequence[str],
+        beam_width: int = 16,
+        cutoff_prob: float = 1.0,
+        cutoff_top_n: int = 40,
+        language_model: Optional[NGramLanguageModel] = None,
+        alpha: float = 0.5,
+        beta: float = 1.0,
+        word_boundary: str = 'space',
+        blank_id: Optional[int] = None,
+    ):
+        if word_boundary not in WORD_BOUNDARIES:
+            raise ValueError(f"`word_boundary` must be one of {WORD_BOUNDARIES}, got {word_boundary}.")
+
+        self.vocabulary = list(vocabulary)
+        self.blank_id = len(self.vocabulary) if blank_id is None else blank_id
+        self.beam_width = beam_width
+        self.cutoff_prob = cutoff_prob
+        self.cutoff_top_n = cutoff_top_n
+        self.language_model = language_model
+        self.alpha = alpha
+        self.beta = beta
+        self.word_boundary = word_boundary
+
+    def _candidates(self, frame: np.ndarray) -> List[int]:
+        num_labels = len(frame)
+        if self.cutoff_top_n >= num_labels and self.cutoff_prob >= 1.0:
+            return list(range(num_labels))
+
+        top_n = min(self.cutoff_top_n, num_labels)
+        candidates = np.argpartition(-frame, top_n - 1)[:top_n]
+        candidates = candidates[np.argsort(-frame[candidates])]
+        if self.cutoff_prob < 1.0:
+            cumulative = np.cumsum(np.exp(frame[candidates]))
+            candidates = candidates[: int(np.searchsorted(cumulative, self.cutoff_prob)) + 1]
+        return candidates.tolist()
+
+    def _split_piece(self, label: int) -> Tuple[bool, str]:
+        """Whether a label starts a new word, and its text within the word."""
+        text = self.vocabulary[label]
+        if self.word_boundary == 'space':
+            return (True, '') if text == ' ' else (False, text)
+        if self.word_boundary == 'sentencepiece':
+            return (True, text[1:]) if text.startswith('▁') else (False, text)
+        return (False, text[2:]) if text.startswith('##') else (True, text)
+
+    def _extend_lm(self, lm_info: Tuple, label: int) -> Tuple:
+        state, lm_score, num_words, word = lm_info
+        starts_word, piece = self._split_piece(label)
+        if starts_word and word:
+            logprob, state = self.language_model.score(state, self.language_model.word_id(word))
+            lm_score, num_words, word = lm_score + logprob, num_words + 1, ''
+        return state, lm_score, num_words, word + piece
+
+    def _finalize_lm(self, lm_info: Tuple) -> Tuple[float, int]:
+        state, lm_score, num_words, word = lm_info
+        if word:
+            logprob, state = self.language_model.score(state, self.language_model.word_id(word))
+            lm_score, num_words = lm_score + logprob, num_words + 1
+        return lm_score + self.language_model.final_score(state), num_words
+
+    def decode(self, log_probs: np.ndarray) -> List[Tuple[List[int], float]]:
+        """Runs the beam search.
+
+        Args:
+            log_probs: Array of shape [T, V + 1] with the log probabilities of every label and the blank.
+
+        Returns:
+            Up to `beam_width` (label ids, score) hypotheses, best first.
+        """
+        blank_id, use_lm = self.blank_id, self.language_model is not None
+        # prefix -> (log prob of alignments ending in blank, log prob of alignments ending in the last label)
+        beams: Dict[Tuple[int, ...], Tuple[float, float]] = {(): (0.0, NEG_INF)}
+        lm_infos = {(): (self.language_model.initial_state(), 0.0, 0, '')} if use_lm else {}
+
+        def prefix_score(item):
+            prefix, (p_blank, p_label) = item
+            score = _logsumexp(p_blank, p_label)
+            if use_lm:
+                _, lm_score, num_words, _ = lm_infos[prefix]
+                score += self.alpha * lm_score + self.beta * num_words
+            return score
+
+        for frame in np.asarray(log_probs, dtype=np.float32):
+            candidates = self._candidates(frame)
+            frame = frame.tolist()
+            next_beams: Dict[Tuple[int, ...], Tuple[float, float]] = {}
+
+            for prefix, (p_blank, p_label) in beams.items():
+                p_total = _logsumexp(p_blank, p_label)
+                last = prefix[-1] if prefix else None
+                for label in candidates:
+                    p = frame[label]
+                    if label == blank_id:
+                        n_blank, n_label = next_beams.get(prefix, (NEG_INF, NEG_INF))
+                        next_beams[prefix] = (_logsumexp(n_blank, p_total + p), n_label)
+                        continue
+
+                    extended = prefix + (label,)
+                    if label == last:
+                        # A repeated label only extends the prefix through a blank, otherwise it collapses.
+                        if p_label > NEG_INF:
+                            n_blank, n_label = next_beams.get(prefix, (NEG_INF, NEG_INF))
+                            next_beams[prefix] = (n_blank, _logsumexp(n_label, p_label + p))
+                        if p_blank == NEG_INF:
+                            continue
+                        p_extend = p_blank + p
+                    else:
+                        p_extend = p_total + p
+                    n_blank, n_label = next_beams.get(extended, (NEG_INF, NEG_INF))
+                    next_beams[extended] = (n_blank, _logsumexp(n_label, p_extend))
+
+                    if use_lm and extended not in lm_infos:
+                        lm_infos[extended] = self._extend_lm(lm_infos[prefix], label)
+
+            beams = dict(heapq.nlargest(self.beam_width, next_beams.items(), key=prefix_score))
+            if use_lm:
+                lm_infos = {prefix: lm_infos[prefix] for prefix in beams}
+
+        hypotheses = []
+        for prefix, (p_blank, p_label) in beams.items():
+            score = _logsumexp(p_blank, p_label)
+            if use_lm:
+                lm_score, num_words = self._finalize_lm(lm_infos[prefix])
+                score += self.alpha * lm_score + self.beta * num_words
+            hypotheses.append((list(prefix), score))
+
+        hypotheses.sort(key=lambda hypothesis: hypothesis[1], reverse=True)
+        return hypotheses
+
+
+_worker_search: Optional[CTCPrefixBeamSearch] = None
+
+
+def _init_worker(search: CTCPrefixBeamSearch):
+    global _worker_search
+    _worker_search = search
+    # Each worker decodes a single utterance at a time, avoid oversubscribing cores with intra-op threads.
+    torch.set_num_threads(1)
+
+
+def _decode_in_worker(log_probs: np.ndarray) -> List[Tuple[List[int], float]]:
+    return _worker_search.decode(log_probs)
+
+
+class CTCBeamSearchDecoder:
+    """Batch front-end of `CTCPrefixBeamSearch` which decodes the utterances of a batch in a process pool.
+
+    Args:
+        vocabulary: Text of every label, without the blank.
+        beam_width: Number of prefixes kept after every frame.
+        cutoff_prob: Cumulative probability of the labels considered at every frame.
+        cutoff_top_n: Maximum number of labels considered at every frame.
+        lm_path: Optional path to a word-level ARPA language model.
+        alpha: Weight of the language model.
+        beta: Word insertion bonus.
+        word_boundary: One of `space`, `sentencepiece` or `wordpiece`, see `CTCPrefixBeamSearch`.
+        num_workers: Number of worker processes. With 0 or 1, utterances are decoded in the calling process. The
+            language model is loaded once and shared with the workers when the pool starts.
+    """
+
+    def __init__(
+        self,
+        vocabulary: Sequence[str],
+        beam_width: int = 16,
+        cutoff_prob: float = 1.0,
+        cutoff_top_n: int = 40,
+        lm_path: Optional[str] = None,
+        alpha: float = 0.5,
+        beta: float = 1.0,
+        word_boundary: str = 'space',
+        num_workers: int = 0,
+    ):
+        language_model = NGramLanguageModel(lm_path) if lm_path is not None else None
+        self.search = CTCPrefixBeamSearch(
+            vocabulary,
+            beam_width=beam_width,
+            cutoff_prob=cutoff_prob,
+            cutoff_top_n=cutoff_top_n,
+            language_model=language_model,
+            alpha=alpha,
+            beta=beta,
+            word_boundary=word_boundary,
+        )
+        self.num_workers = num_workers
+        self._pool = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.num_workers, initializer=_init_worker, initargs=(self.search,)
+            )
+        return self._pool
+
+    def decode_batch(
+        self, log_probs: torch.Tensor, log_probs_length: Optional[torch.Tensor] = None
+    ) -> List[List[Tuple[List[int], float]]]:
+        """Decodes a batch of CTC log probabilities.
+
+        Args:
+            log_probs: Tensor of shape [B, T, V + 1], on any device.
+            log_probs_length: Optional number of valid frames of every utterance.
+
+        Returns:
+            For every utterance, its hypotheses as (label ids, score), best first.
+        """
+        log_probs = log_probs.detach().float().cpu().numpy()
+        if log_probs_length is None:
+            lengths = [log_probs.shape[1]] * log_probs.shape[0]
+        else:
+            lengths = log_probs_length.detach().cpu().tolist()
+        utterances = [utterance[:length] for utterance, length in zip(log_probs, lengths)]
+
+        if self.num_workers > 1 and len(utterances) > 1:
+            chunksize = max(1, len(utterances) // (4 * self.num_workers))
+            return list(self._get_pool().map(_decode_in_worker, utterances, chunksize=chunksize))
+        return [self.search.decode(utterance) for utterance in utterances]
+
+    def close(self):
+        """Shuts down the worker processes, if any."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_pool'] = None
+        return state
@@ -0,0 +1,310 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""On-disk caches of decoded audio (`AudioCache`) and of the log-mel features computed by
+`AudioToMelSpectrogramPreprocessor` (`FeatureCache`).
+
+Every utterance (audio file, offset, duration) is stored as a `.npy` file under a directory named after a hash of
+the cache configuration:
+
+    <cache_dir>/<config hash>/config.json
+    <cache_dir>/<config hash>/<key[:2]>/<key>.npy
+
+Features are stored as float16 arrays of shape [T, D] holding only the valid frames, audio as int16 or float16
+arrays of samples at the target sample rate. Changing any parameter of the preprocessor or of audio loading
+therefore selects a new, empty cache.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+import torch
+
+from nemo.utils import logging
+
+__all__ = ['AudioCache', 'FeatureCache', 'audio_config_hash', 'features_config_hash']
+
+FEATURE_CACHE_VERSION = 1
+AUDIO_CACHE_VERSION = 1
+
+
+def features_config_hash(
+    preprocessor_params: Dict[str, Any],
+    sample_rate: int,
+    int_values: bool,
+    trim: bool,
+    resample_type: str = 'kaiser_best',
+    audio_dtype: Optional[str] = None,
+) -> str:
+    """Hash of everything that determines cached features: the preprocessor parameters (without dither, which is
+    not applied to cached features) and how audio is loaded, including the storage type of the `AudioCache` audio
+    is read from, if any."""
+    params = {key: value for key, value in preprocessor_params.items() if key != 'dither'}
+    config = {
+        'version': FEATURE_CACHE_VERSION,
+        'preprocessor': params,
+        'sample_rate': sample_rate,
+        'int_values': int_values,
+        'trim': trim,
+        'resample_type': resample_type,
+        'audio_dtype': audio_dtype,
+    }
+    return _config_hash(config)
+
+
+def audio_config_hash(sample_rate: int, int_values: bool, resample_type: str, dtype: str) -> str:
+    """Hash of everything that determines cached audio: the target sample rate, how audio is decoded and resampled
+    and the storage type."""
+    config = {
+        'version': AUDIO_CACHE_VERSION,
+        'sample_rate': sample_rate,
+        'int_values': int_values,
+        'resample_type': resample_type,
+        'dtype': dtype,
+    }
+    return _config_hash(config)
+
+
+def _config_hash(config: Dict[str, Any]) -> str:
+    return hashlib.sha1(json.dumps(config, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16]
+
+
+class _UtteranceCache:
+    """Base of the caches of this module: one `.npy` file per utterance under `<cache_dir>/<config_hash>`, see the
+    module docstring. Entries are written atomically, so several data loader workers or processes can fill the same
+    cache."""
+
+    def __init__(self, cache_dir: str, config_hash: str, config: Dict[str, Any]):
+        self.config_hash = config_hash
+        self.cache_dir = os.path.join(cache_dir, self.config_hash)
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        config_path = os.path.join(self.cache_dir, 'config.json')
+        if not os.path.exists(config_path):
+            self._atomic_write(config_path, lambda f: f.write(json.dumps(config, indent=2, default=str).encode()))
+
+    @staticmethod
+    def key(audio_file: str, offset: Optional[float], duration: Optional[float]) -> str:
+        """Cache key of an utterance."""
+        offset = float(offset or 0.0)
+        duration = float(duration or 0.0)
+        name = f"{os.path.abspath(audio_file)}|{offset:.6f}|{duration:.6f}"
+        return hashlib.sha1(name.encode('utf-8')).hexdigest()
+
+    def path(self, audio_file: str, offset: Optional[float], duration: Optional[float]) -> str:
+        key = self.key(audio_file, offset, duration)
+        return os.path.join(self.cache_dir, key[:2], key + '.npy')
+
+    def _load_array(self, audio_file: str, offset: Optional[float], duration: Optional[float]) -> Optional[np.ndarray]:
+        path = self.path(audio_file, offset, duration)
+        try:
+            return np.load(path)
+        except FileNotFoundError:
+            return None
+        except (ValueError, OSError) as e:
+            logging.warning(f"Ignoring unreadable cache entry {path}: {e}")
+            return None
+
+    def _save_array(self, audio_file: str, offset: Optional[float], duration: Optional[float], array: np.ndarray):
+        path = self.path(audio_file, offset, duration)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._atomic_write(path, lambda f: np.save(f, array))
+
+    @staticmethod
+    def _atomic_write(path: str, write):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+class FeatureCache(_UtteranceCache):
+    """Persistent cache of the features of `AudioToMelSpectrogramPreprocessor`, see the module docstring.
+
+    Features are computed on CPU, without dither, by a preprocessor built from `preprocessor_params` on first use.
+    Entries are written atomically, so several data loader workers or processes can fill the same cache.
+
+    Args:
+        cache_dir: Root directory of the cache.
+        preprocessor_params: Parameters of `AudioToMelSpectrogramPreprocessor`, e.g. `model.preprocessor.params`.
+        sample_rate: Sample rate audio is loaded at.
+        int_values: Whether audio is loaded as integers.
+        trim: Whether silence is trimmed from loaded audio.
+        resample_type: Resampling method of loaded audio, see `AudioSegment`.
+        audio_dtype: Storage type of the `AudioCache` audio is read from, or None if audio is not cached.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        preprocessor_params: Dict[str, Any],
+        sample_rate: int,
+        int_values: bool = False,
+        trim: bool = False,
+        resample_type: str = 'kaiser_best',
+        audio_dtype: Optional[str] = None,
+    ):
+        self.preprocessor_params = dict(preprocessor_params)
+        self._preprocessor = None
+        config = {
+            'preprocessor': self.preprocessor_params,
+            'sample_rate': sample_rate,
+            'int_values': int_values,
+            'trim': trim,
+            'resample_type': resample_type,
+            'audio_dtype': audio_dtype,
+        }
+        config_hash = features_config_hash(
+            self.preprocessor_params, sample_rate, int_values, trim, resample_type, audio_dtype
+        )
+        super().__init__(cache_dir, config_hash, config)
+
+    def load(self, audio_file: str, offset: Optional[float], duration: Optional[float]) -> Optional[torch.Tensor]:
+        """Cached float16 features [T, D] of an utterance, or None if they are not cached."""
+        features = self._load_array(audio_file, offset, duration)
+        return torch.from_numpy(features) if features is not None else None
+
+    def save(self, audio_file: str, offset: Optional[float], duration: Optional[float], features: torch.Tensor):
+        """Stores features [T, D] of an utterance."""
+        self._save_array(audio_file, offset, duration, features.numpy().astype(np.float16))
+
+    def compute(self, samples: torch.Tensor) -> torch.Tensor:
+        """Features [T, D] (float16, valid frames only) of a 1d waveform."""
+        if self._preprocessor is None:
+            # Imported here as modules depend on parts
+            from nemo.collections.asr.modules.audio_preprocessing import AudioToMelSpectrogramPreprocessor
+
+            params = dict(self.preprocessor_params, dither=0.0)
+            self._preprocessor = AudioToMelSpectrogramPreprocessor(**params).eval()
+
+        with torch.no_grad():
+            features, length = self._preprocessor.get_features(
+                samples.float().unsqueeze(0), torch.tensor([samples.size(0)])
+            )
+        return features[0, :, : int(length[0])].t().to(dtype=torch.float16).contiguous()
+
+    def get(self, audio_file: str, offset: Optional[float], duration: Optional[float], load_samples) -> torch.Tensor:
+        """Cached features of an utterance, computed from `load_samples()` and stored on a cache miss."""
+        features = self.load(audio_file, offset, duration)
+        if features is None:
+            features = self.compute(load_samples())
+            self.save(audio_file, offset, duration, features)
+        return features
+
+
+class AudioCache(_UtteranceCache):
+    """Persistent cache of decoded and resampled audio, see the module docstring.
+
+    Audio is stored before silence trimming and augmentation, so the cache can be shared by datasets with different
+    `trim` and augmentation settings. int16 storage (default) quantizes samples to 16 bits, float16 keeps about 11
+    bits of mantissa, both take 2 bytes per sample. Hits, misses and the time spent loading and decoding are counted
+    per process, see `stats`.
+
+    Args:
+        cache_dir: Root directory of the cache.
+        sample_rate: Sample rate audio is resampled to.
+        int_values: Whether audio is loaded as integers.
+        resample_type: Resampling method of `AudioSegment`.
+        dtype: Storage type of samples, 'int16' or 'float16'.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        sample_rate: int,
+        int_values: bool = False,
+        resample_type: str = 'kaiser_best',
+        dtype: str = 'int16',
+    ):
+        if dtype not in ('int16', 'float16'):
+            raise ValueError(f"Unsupported audio cache dtype: {dtype}, use 'int16' or 'float16'.")
+        self.dtype = dtype
+        config = {
+            'sample_rate': sample_rate,
+            'int_values': int_values,
+            'resample_type': resample_type,
+            'dtype': dtype,
+        }
+        super().__init__(cache_dir, audio_config_hash(sample_rate, int_values, resample_type, dtype), config)
+
+        self.hits = 0
+        self.misses = 0
+        self.load_time = 0.0
+        self.decode_time = 0.0
+
+    def load(self, audio_file: str, offset: Optional[float], duration: Optional[float]) -> Optional[np.ndarray]:
+        """Cached float32 samples of an utterance, or None if they are not cached."""
+        samples = self._load_array(audio_file, offset, duration)
+        return self._decode(samples) if samples is not None else None
+
+    def save(self, audio_file: str, offset: Optional[float], duration: Optional[float], samples: np.ndarray):
+        """Stores float samples of an utterance."""
+        self._save_array(audio_file, offset, duration, self._encode(samples))
+
+    def get(
+        self,
+        audio_file: str,
+        offset: Optional[float],
+        duration: Optional[float],
+        load_samples: Callable[[], np.ndarray],
+    ) -> np.ndarray:
+        """Cached samples of an utterance, decoded with `load_samples()` and stored on a cache miss. On a miss,
+        samples are quantized as in the cache, so that results do not depend on the cache state."""
+        start = time.perf_counter()
+        samples = self.load(audio_file, offset, duration)
+        if samples is not None:
+            self.hits += 1
+            self.load_time += time.perf_counter() - start
+            return samples
+
+        start = time.perf_counter()
+        stored = self._encode(load_samples())
+        self._save_array(audio_file, offset, duration, stored)
+        self.misses += 1
+        self.decode_time += time.perf_counter() - start
+        return self._decode(stored)
+
+    def _encode(self, samples: np.ndarray) -> np.ndarray:
+        if self.dtype == 'int16':
+            return np.clip(np.round(samples * 2 ** 15), -(2 ** 15), 2 ** 15 - 1).astype(np.int16)
+        return samples.astype(np.float16)
+
+    @staticmethod
+    def _decode(samples: np.ndarray) -> np.ndarray:
+        if samples.dtype == np.int16:
+            return samples.astype(np.float32) * np.float32(1.0 / 2 ** 15)
+        return samples.astype(np.float32)
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """Hit rate of the cache and mean time in seconds per utterance of cache hits (`load_time`) and of misses,
+        i.e. decoding, resampling and storing (`decode_time`), in this process."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups > 0 else 0.0,
+            'load_time': self.load_time / self.hits if self.hits > 0 else 0.0,
+            'decode_time': self.decode_time / self.misses if self.misses > 0 else 0.0,
+        }
@@ -33,6 +33,7 @@
 # SOFTWARE.
 # This file contains code artifacts adapted from https://github.com/ryanleary/patter
 import math
+from typing import Optional
 
 import librosa
 import numpy as np
@@ -43,6 +44,7 @@ from librosa.util import tiny
 from torch.autograd import Variable
 from torch_stft import STFT
 
+from nemo.collections.asr.parts.feature_cache import AudioCache
 from nemo.collections.asr.parts.perturb import AudioAugmentor
 from nemo.collections.asr.parts.segment import AudioSegment
 from nemo.utils import logging
@@ -96,24 +98,60 @@ def splice_frames(x, frame_splicing):
 
 
 class WaveformFeaturizer(object):
-    def __init__(self, sample_rate=16000, int_values=False, augmentor=None):
+    """Loads audio files as float tensors at `sample_rate`, with optional augmentation.
+
+    Args:
+        sample_rate: Sample rate audio is resampled to.
+        int_values: Whether to load samples as 32-bit integers.
+        augmentor: Optional `AudioAugmentor` applied to loaded audio.
+        resample_type: Resampling method, see `AudioSegment`. 'polyphase' is much faster than the librosa methods.
+        audio_cache: Optional `AudioCache` of decoded and resampled audio. Audio given as file-like objects (e.g. from
+            tarred datasets) is not cached.
+    """
+
+    def __init__(
+        self,
+        sample_rate=16000,
+        int_values=False,
+        augmentor=None,
+        resample_type='kaiser_best',
+        audio_cache: Optional[AudioCache] = None,
+    ):
         self.augmentor = augmentor if augmentor is not None else AudioAugmentor()
         self.sample_rate = sample_rate
         self.int_values = int_values
+        self.resample_type = resample_type
+        self.audio_cache = audio_cache
 
     def max_augmentation_length(self, length):
         return self.augmentor.max_augmentation_length(length)
 
     def process(self, file_path, offset=0, duration=0, trim=False, orig_sr=None):
-        audio = AudioSegment.from_file(
-            file_path,
-            target_sr=self.sample_rate,
-            int_values=self.int_values,
-            offset=offset,
-            duration=duration,
-            trim=trim,
-            orig_sr=orig_sr,
-        )
+        if self.audio_cache is None or not isinstance(file_path, str):
+            audio = AudioSegment.from_file(
+                file_path,
+                target_sr=self.sample_rate,
+                int_values=self.int_values,
+                offset=offset,
+                duration=duration,
+                trim=trim,
+                orig_sr=orig_sr,
+                resample_type=self.resample_type,
+            )
+            return self.process_segment(audio)
+
+        def load_samples():
+            return AudioSegment.from_file(
+                file_path,
+                target_sr=self.sample_rate,
+                int_values=self.int_values,
+                offset=offset,
+                duration=duration,
+                resample_type=self.resample_type,
+            ).samples
+
+        samples = self.audio_cache.get(file_path, offset, duration, load_samples)
+        audio = AudioSegment(samples, self.sample_rate, trim=trim, orig_sr=orig_sr)
         return self.process_segment(audio)
 
     def process_segment(self, audio_segment):
@@ -129,8 +167,9 @@ class WaveformFeaturizer(object):
 
         sample_rate = input_config.get("sample_rate", 16000)
         int_values = input_config.get("int_values", False)
+        resample_type = input_config.get("resample_type", 'kaiser_best')
 
-        return cls(sample_rate=sample_rate, int_values=int_values, augmentor=aa)
+        return cls(sample_rate=sample_rate, int_values=int_values, augmentor=aa, resample_type=resample_type)
 
 
 class FeaturizerFactory(object):
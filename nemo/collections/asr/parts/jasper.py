@@ -13,12 +13,15 @@
 # limitations under the License.
 
 
-from typing import Callable, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
 from torch import Tensor
 
+from nemo.utils.export_utils import fuse_conv_bn_1d, fuse_depthwise_pointwise_1d
+
 jasper_activations = {
     "hardtanh": nn.Hardtanh,
     "relu": nn.ReLU,
@@ -66,6 +69,73 @@ def get_same_padding(kernel_size, stride, dilation):
     return kernel_size // 2
 
 
+def get_pad_mask(lens: Tensor, max_len: int) -> Tensor:
+    """Padding mask [B, 1, T] of sequences of lengths `lens` padded to `max_len`, True on padded frames."""
+    return (torch.arange(max_len, device=lens.device).unsqueeze(0) >= lens.unsqueeze(1)).unsqueeze(1)
+
+
+class StreamingConvCache:
+    """Left context of a convolution which is run over consecutive chunks of a stream.
+
+    Positions are counted in the zero padded input of the equivalent offline convolution, i.e. the first real
+    input frame is at position `padding`.
+    """
+
+    def __init__(self):
+        # Inputs which are still needed by future outputs, starting at position `buffer_start`
+        self.buffer = None
+        self.buffer_start = 0
+        self.num_outputs = 0
+
+
+def conv1d_streaming(
+    conv: nn.Conv1d, x: Tensor, cache: StreamingConvCache, flush: bool = False, heads: int = -1
+) -> Tensor:
+    """Runs `conv` over the next chunk of a stream, emitting every output frame whose receptive field is
+    available. Concatenating the outputs of all chunks, the last one with `flush=True`, gives the output of
+    `conv` over the whole stream.
+
+    Args:
+        conv: Convolution with "same" padding, its padding is applied at the start and at the end of the stream.
+        x: Next input chunk of shape [B, C, T], T may be 0.
+        cache: State of the stream, updated in place.
+        flush: Whether `x` is the last chunk of the stream.
+        heads: Number of heads of a `MaskedConv1d` with shared depthwise weights.
+
+    Returns:
+        Output chunk of shape [B, C_out, T_out].
+    """
+    kernel_size, stride, dilation, padding = conv.kernel_size[0], conv.stride[0], conv.dilation[0], conv.padding[0]
+    span = dilation * (kernel_size - 1)
+
+    if cache.buffer is None:
+        cache.buffer = x.new_zeros(x.size(0), x.size(1), padding)
+    chunks = [cache.buffer, x]
+    if flush:
+        chunks.append(x.new_zeros(x.size(0), x.size(1), padding))
+    buffer = torch.cat(chunks, dim=-1)
+
+    first = cache.num_outputs * stride - cache.buffer_start
+    available = buffer.size(-1) - first - span
+    num_outputs = (available - 1) // stride + 1 if available > 0 else 0
+
+    if num_outputs > 0:
+        window = buffer[..., first : first + (num_outputs - 1) * stride + span + 1]
+        if heads != -1:
+            window = window.reshape(-1, heads, window.size(-1))
+        out = F.conv1d(window, conv.weight, conv.bias, stride, 0, dilation, conv.groups)
+        if heads != -1:
+            out = out.reshape(x.size(0), -1, out.size(-1))
+    else:
+        out = x.new_zeros(x.size(0), conv.out_channels if heads == -1 else x.size(1), 0)
+
+    cache.num_outputs += num_outputs
+    consumed = min(cache.num_outputs * stride - cache.buffer_start, buffer.size(-1))
+    cache.buffer = buffer[..., consumed:]
+    cache.buffer_start += consumed
+    return out
+
+
 class StatsPoolLayer(nn.Module):
     def __init__(self, feat_in, pool_mode='xvector'):
         super().__init__()
@@ -158,6 +228,13 @@ class MaskedConv1d(nn.Module):
             lens + 2 * self.conv.padding[0] - self.conv.dilation[0] * (self.conv.kernel_size[0] - 1) - 1
         ) // self.conv.stride[0] + 1
 
+    @property
+    def preserves_length(self) -> bool:
+        """Whether outputs have the length of inputs, i.e. the padding mask of inputs also applies to outputs."""
+        return self.conv.stride[0] == 1 and 2 * self.conv.padding[0] == self.conv.dilation[0] * (
+            self.conv.kernel_size[0] - 1
+        )
+
     def forward(self, x, lens):
         if self.use_mask:
             lens = lens.to(dtype=torch.long)
@@ -167,6 +244,19 @@ class MaskedConv1d(nn.Module):
             # del mask
             lens = self.get_seq_len(lens)
 
+        return self._conv_forward(x), lens
+
+    def forward_with_pad_mask(self, x: Tensor, lens: Tensor, pad_mask: Tensor) -> Tuple[Tensor, Tensor]:
+        """Same as `forward`, with the padding mask of `lens` (see `get_pad_mask`) computed by the caller."""
+        if self.use_mask:
+            lens = lens.to(dtype=torch.long)
+            x = x.masked_fill(pad_mask, 0)
+            if not self.preserves_length:
+                lens = self.get_seq_len(lens)
+
+        return self._conv_forward(x), lens
+
+    def _conv_forward(self, x):
         sh = x.shape
         if self.heads != -1:
             x = x.view(-1, self.heads, sh[-1])
@@ -176,7 +266,12 @@ class MaskedConv1d(nn.Module):
         if self.heads != -1:
             out = out.view(sh[0], self.real_out_channels, -1)
 
-        return out, lens
+        return out
+
+    def forward_streaming(self, x: Tensor, cache: StreamingConvCache, flush: bool = False) -> Tensor:
+        """Streaming counterpart of `forward`, see `conv1d_streaming`. No masking is needed since all frames of
+        a stream are valid."""
+        return conv1d_streaming(self.conv, x, cache, flush=flush, heads=self.heads)
 
 
 class GroupShuffle(nn.Module):
@@ -256,6 +351,35 @@ class SqueezeExcite(nn.Module):
 
         return x * y
 
+    def forward_streaming(self, x: Tensor, cache: Dict[str, Tensor]) -> Tensor:
+        """Streaming approximation of `forward`.
+
+        The context of every frame is restricted to the past: the average of all previous frames for global
+        context, or of the previous `context_window` frames otherwise. Outputs therefore differ from the offline
+        module, which also looks at future frames.
+        """
+        if self.context_window > 0:
+            # Average of the last `context_window` frames, `history` holds the previous context_window - 1 frames
+            history = cache.get('history')
+            frames = x if history is None else torch.cat([history, x], dim=-1)
+            ends = torch.arange(frames.size(-1) - x.size(-1) + 1, frames.size(-1) + 1, device=x.device)
+            cumsum = F.pad(frames.cumsum(dim=-1), [1, 0])
+            starts = (ends - self.context_window).clamp(min=0)
+            y = (cumsum[..., ends] - cumsum[..., starts]) / (ends - starts).to(x.dtype)
+            cache['history'] = frames[..., frames.size(-1) - min(self.context_window - 1, frames.size(-1)) :]
+        else:
+            # Running average of all frames of the stream so far
+            total = cache.get('total', 0.0) + x.cumsum(dim=-1)
+            count = cache.get('count', 0) + torch.arange(1, x.size(-1) + 1, device=x.device)
+            y = total / count.to(x.dtype)
+            if x.size(-1) > 0:
+                cache['total'], cache['count'] = total[..., -1:], int(count[-1])
+
+        y = self.fc(y.transpose(1, -1)).transpose(1, -1)
+        y = torch.sigmoid(y)
+
+        return x * y
+
 
 class Swish(nn.Module):
     def forward(self, x):
@@ -520,6 +644,65 @@ class JasperBlock(nn.Module):
         layers = [activation, nn.Dropout(p=drop_prob)]
         return layers
 
+    def fuse_for_inference(self, fuse_separable: bool = False) -> int:
+        """Folds every batch norm into the preceding convolution, in place. The block has to be in evaluation mode
+        and should not be trained afterwards. Removed layers are replaced by nn.Identity, so that layer indices
+        (and streaming states) are unchanged.
+
+        Args:
+            fuse_separable: Whether to also merge depthwise and pointwise convolutions into a single convolution.
+                The input of the pointwise convolution is then not masked, so outputs only match on batches
+                without padding.
+
+        Returns:
+            The number of folded batch norms.
+        """
+        if self.training:
+            raise RuntimeError("Batch norms can only be folded in evaluation mode.")
+
+        num_folded = 0
+        for layers in [self.mconv] + (list(self.res) if self.res is not None else []):
+            if fuse_separable:
+                for i in range(len(layers) - 1):
+                    depthwise, pointwise = self._inner_conv(layers[i]), self._inner_conv(layers[i + 1])
+                    if depthwise is None or pointwise is None:
+                        continue
+                    fused = fuse_depthwise_pointwise_1d(depthwise, pointwise)
+                    if fused is not None:
+                        self._set_inner_conv(layers, i, fused)
+                        layers[i + 1] = nn.Identity()
+
+            for i, layer in enumerate(layers):
+                if not isinstance(layer, nn.BatchNorm1d):
+                    continue
+                j = i - 1
+                while j >= 0 and isinstance(layers[j], nn.Identity):
+                    j -= 1
+                conv = self._inner_conv(layers[j]) if j >= 0 else None
+                if conv is not None:
+                    self._set_inner_conv(layers, j, fuse_conv_bn_1d(conv, layer))
+                    layers[i] = nn.Identity()
+                    num_folded += 1
+
+        return num_folded
+
+    @staticmethod
+    def _inner_conv(layer: nn.Module) -> Optional[nn.Conv1d]:
+        # Convolutions with heads share weights between channels, their outputs can not be rescaled per channel
+        if isinstance(layer, MaskedConv1d):
+            return layer.conv if layer.heads == -1 else None
+        if isinstance(layer, nn.Conv1d):
+            return layer
+        return None
+
+    @staticmethod
+    def _set_inner_conv(layers: nn.ModuleList, index: int, conv: nn.Conv1d):
+        if isinstance(layers[index], MaskedConv1d):
+            layers[index].conv = conv
+            layers[index].real_out_channels = conv.out_channels
+        else:
+            layers[index] = conv
+
     def forward(self, input_: Tuple[List[Tensor], Optional[Tensor]]):
         # type: (Tuple[List[Tensor], Optional[Tensor]]) -> Tuple[List[Tensor], Optional[Tensor]] # nopep8
         lens_orig = None
@@ -527,16 +710,36 @@ class JasperBlock(nn.Module):
         if len(input_) == 2:
             xs, lens_orig = input_
 
+        out, lens, _ = self._forward(xs, lens_orig, None)
+        return out, lens
+
+    def forward_with_pad_mask(
+        self, xs: List[Tensor], lens: Tensor, pad_mask: Tensor
+    ) -> Tuple[List[Tensor], Tensor, Tensor]:
+        """Same as `forward`, with the padding mask of the last input (see `get_pad_mask`) shared between all masked
+        convolutions instead of recomputing it in each of them. The mask is only recomputed when a convolution
+        changes the length, and is returned with the outputs and their lengths."""
+        return self._forward(xs, lens, pad_mask)
+
+    def _forward(
+        self, xs: List[Tensor], lens_orig: Optional[Tensor], pad_mask_orig: Optional[Tensor]
+    ) -> Tuple[List[Tensor], Optional[Tensor], Optional[Tensor]]:
         # compute forward convolutions
         out = xs[-1]
 
         lens = lens_orig
+        pad_mask = pad_mask_orig
         for i, l in enumerate(self.mconv):
             # if we're doing masked convolutions, we need to pass in and
             # possibly update the sequence lengths
             # if (i % 4) == 0 and self.conv_mask:
             if isinstance(l, MaskedConv1d):
-                out, lens = l(out, lens)
+                if pad_mask is None:
+                    out, lens = l(out, lens)
+                else:
+                    out, lens = l.forward_with_pad_mask(out, lens, pad_mask)
+                    if not l.preserves_length:
+                        pad_mask = get_pad_mask(lens, out.size(2))
             else:
                 out = l(out)
 
@@ -544,9 +747,16 @@ class JasperBlock(nn.Module):
         if self.res is not None:
             for i, layer in enumerate(self.res):
                 res_out = xs[i]
+                res_pad_mask = pad_mask_orig
+                if res_pad_mask is not None and res_pad_mask.size(2) != res_out.size(2):
+                    # Dense residual from an input of another length
+                    res_pad_mask = get_pad_mask(lens_orig, res_out.size(2))
                 for j, res_layer in enumerate(layer):
                     if isinstance(res_layer, MaskedConv1d):
-                        res_out, _ = res_layer(res_out, lens_orig)
+                        if res_pad_mask is None:
+                            res_out, _ = res_layer(res_out, lens_orig)
+                        else:
+                            res_out, _ = res_layer.forward_with_pad_mask(res_out, lens_orig, res_pad_mask)
                     else:
                         res_out = res_layer(res_out)
 
@@ -558,9 +768,83 @@ class JasperBlock(nn.Module):
         # compute the output
         out = self.mout(out)
         if self.res is not None and self.dense_residual:
-            return xs + [out], lens
+            return xs + [out], lens, pad_mask
+
+        return [out], lens, pad_mask
+
+    def init_streaming_state(self) -> Dict[str, list]:
+        """Creates the caches used by `forward_streaming` for a new stream."""
+        if self.training:
+            raise RuntimeError("Streaming is only supported in evaluation mode.")
+        if any(isinstance(layer, nn.GroupNorm) for layer in self.modules()):
+            raise ValueError("Streaming requires frame-wise normalization, i.e. batch normalization.")
+
+        def cache(layer):
+            if isinstance(layer, (MaskedConv1d, nn.Conv1d)):
+                return StreamingConvCache()
+            return {} if isinstance(layer, SqueezeExcite) else None
+
+        return {
+            'mconv': [cache(layer) for layer in self.mconv],
+            'res': [[cache(layer) for layer in res] for res in self.res] if self.res is not None else [],
+            'res_queue': [None] * (len(self.res) if self.res is not None else 0),
+        }
+
+    def forward_streaming(self, xs: List[Tensor], state: Dict[str, list], flush: bool = False) -> List[Tensor]:
+        """Streaming counterpart of `forward` for a single stream (or a batch of streams of equal length).
+
+        Every input of `xs` is the next chunk of the corresponding input stream of `forward`. Convolutions keep
+        their left context in `state` and only emit the frames whose right context has been received, so the
+        block output lags behind its input by the accumulated padding of its convolutions. The residual branches
+        are ahead of the main branch and their outputs are queued until the main branch catches up.
 
-        return [out], lens
+        Args:
+            xs: Next chunk of every input, each of shape [B, C_i, T_i].
+            state: Caches of the stream, as returned by `init_streaming_state`.
+            flush: Whether these are the last chunks of the stream.
+
+        Returns:
+            The next chunk of every output of `forward`.
+        """
+        out = xs[-1]
+        for layer, cache in zip(self.mconv, state['mconv']):
+            out = self._layer_streaming(layer, out, cache, flush)
+
+        if self.res is not None:
+            for i, layer in enumerate(self.res):
+                res_out = xs[i]
+                for res_layer, cache in zip(layer, state['res'][i]):
+                    res_out = self._layer_streaming(res_layer, res_out, cache, flush)
+
+                queue = state['res_queue'][i]
+                if queue is not None:
+                    res_out = torch.cat([queue, res_out], dim=-1)
+                res_out, state['res_queue'][i] = res_out[..., : out.size(-1)], res_out[..., out.size(-1) :]
+
+                if self.residual_mode == 'add' or self.residual_mode == 'stride_add':
+                    out = out + res_out
+                else:
+                    out = torch.max(out, res_out)
+
+        if out.size(-1) > 0:
+            out = self.mout(out)
+        if self.res is not None and self.dense_residual:
+            return xs + [out]
+
+        return [out]
+
+    @staticmethod
+    def _layer_streaming(layer: nn.Module, x: Tensor, cache, flush: bool) -> Tensor:
+        if isinstance(layer, MaskedConv1d):
+            return layer.forward_streaming(x, cache, flush=flush)
+        if isinstance(layer, nn.Conv1d):
+            return conv1d_streaming(layer, x, cache, flush=flush)
+        if x.size(-1) == 0:
+            # All other layers are frame-wise and keep the number of channels
+            return x
+        if isinstance(layer, SqueezeExcite):
+            return layer.forward_streaming(x, cache)
+        return layer(x)
 
 
 # Register swish activation function
@@ -62,7 +62,7 @@ def item_iter(
         manifests_files = [manifests_files]
 
     if parse_func is None:
-        parse_func = __parse_item
+        parse_func = parse_item
 
     k = -1
     for manifest_file in manifests_files:
@@ -75,7 +75,7 @@ def item_iter(
                 yield item
 
 
-def __parse_item(line: str, manifest_file: str) -> Dict[str, Any]:
+def parse_item(line: str, manifest_file: str) -> Dict[str, Any]:
     item = json.loads(line)
 
     # Audio file
@@ -0,0 +1,387 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Compiled, memory-mapped manifest index.
+
+Parsing a json manifest builds one python object per field per utterance, in every dataloader worker and every
+distributed rank. A manifest index is a directory of flat numpy arrays produced once (see
+`scripts/build_manifest_index.py`) and opened with `mmap_mode='r'`, so all processes on a node share the same
+page cache pages and no per-utterance python objects are created until an item is actually requested.
+
+Layout of an index directory::
+
+    meta.json                   format version, kind, item count, source manifests (size, mtime, sha1)
+    ids.npy                     int64, running line number over all source manifests
+    durations.npy               float64
+    offsets.npy                 float64, NaN if the manifest line has no offset
+    orig_srs.npy                int64, -1 if the manifest line has no orig_sample_rate
+    audio_files.{data,offsets}  string table of audio file paths
+    file_id_order.npy           int64, rows sorted by audio file basename (without extension)
+
+    # kind == 'audio_text'
+    texts.{data,offsets}        string table of raw transcripts
+    speakers.{data,offsets}     string table of json-encoded speaker values
+    tokens.{data,offsets}.npy   optional int32 pre-tokenized transcripts, with tokens_ok.npy marking parse failures
+
+    # kind == 'speech_label'
+    label_ids.npy               int32 index into label_vocab
+    label_vocab.{data,offsets}  string table of json-encoded labels
+"""
+
+import hashlib
+import json
+import os
+from array import array
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+import numpy as np
+
+from nemo.utils import logging
+
+__all__ = ['ManifestIndex', 'StringTable', 'build_manifest_index', 'open_manifest_index']
+
+INDEX_FORMAT_VERSION = 1
+KINDS = ('audio_text', 'speech_label')
+_META_FILE = 'meta.json'
+_OPTIONAL_ARRAYS = ('tokens.data', 'tokens.offsets', 'tokens_ok')
+
+
+class StringTable:
+    """Read-only sequence of strings stored as one utf-8 byte buffer and an int64 offsets array."""
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        self._data = data
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, idx: int) -> str:
+        start, end = self._offsets[idx], self._offsets[idx + 1]
+        return self._data[start:end].tobytes().decode('utf-8')
+
+
+class _StringTableWriter:
+    def __init__(self):
+        self._data = bytearray()
+        self._offsets = array('q', [0])
+
+    def append(self, value: str):
+        self._data += value.encode('utf-8')
+        self._offsets.append(len(self._data))
+
+    def arrays(self, name: str) -> Dict[str, np.ndarray]:
+        return {
+            f'{name}.data': np.frombuffer(bytes(self._data), dtype=np.uint8),
+            f'{name}.offsets': np.frombuffer(self._offsets, dtype=np.int64),
+        }
+
+
+def _file_id(audio_file: str) -> str:
+    file_id, _ = os.path.splitext(os.path.basename(audio_file))
+    return file_id
+
+
+def _manifest_stat(manifest_file: str) -> Dict[str, Any]:
+    path = os.path.abspath(os.path.expanduser(manifest_file))
+    stat = os.stat(path)
+    return {'path': path, 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+def _sha1(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _iter_manifest_lines(manifests_files: List[str], sources: List[Dict[str, Any]]) -> Iterator[str]:
+    """Yields decoded manifest lines while hashing each manifest into its `sources` record."""
+    for manifest_file, source in zip(manifests_files, sources):
+        digest = hashlib.sha1()
+        with open(source['path'], 'rb') as f:
+            for line in f:
+                digest.update(line)
+                yield line.decode('utf-8'), manifest_file
+        source['sha1'] = digest.hexdigest()
+
+
+def build_manifest_index(
+    manifests_files: Union[str, List[str]],
+    index_dir: str,
+    kind: str = 'audio_text',
+    parser: Optional[Callable[[str], Optional[List[int]]]] = None,
+    parse_func: Optional[Callable[[str, Optional[str]], Dict[str, Any]]] = None,
+) -> str:
+    """Compiles json manifests into a memory-mappable index directory.
+
+    Args:
+        manifests_files: Either single string file or list of such - manifests to index, in order.
+        index_dir: Output directory. Created if it does not exist, existing index files are overwritten.
+        kind: Either 'audio_text' (ASR transcripts) or 'speech_label' (classification labels).
+        parser: Optional text parser (e.g. `CharParser`) used to pre-tokenize transcripts. Only used for
+            'audio_text'. The parser's `fingerprint` is recorded so that datasets with a different parser fall
+            back to tokenizing on the fly.
+        parse_func: Optional manifest line parser, as in `manifest.item_iter`. Defaults to the parser used by
+            `ASRAudioText` or `ASRSpeechLabel` depending on `kind`.
+
+    Returns:
+        Path to the index directory.
+    """
+    # Imported here to avoid a circular import, `collections` depends on this module.
+    from nemo.collections.asr.parts import collections, manifest
+
+    if kind not in KINDS:
+        raise ValueError(f"Unknown manifest index kind `{kind}`, expected one of {KINDS}.")
+
+    if isinstance(manifests_files, str):
+        manifests_files = [manifests_files]
+
+    if parse_func is None:
+        parse_func = manifest.parse_item if kind == 'audio_text' else collections.ASRSpeechLabel.parse_item
+
+    os.makedirs(index_dir, exist_ok=True)
+    sources = [_manifest_stat(manifest_file) for manifest_file in manifests_files]
+
+    ids, durations, offsets, orig_srs = array('q'), array('d'), array('d'), array('q')
+    audio_files, texts, speakers = _StringTableWriter(), _StringTableWriter(), _StringTableWriter()
+    file_ids = []
+    tokens, token_offsets, tokens_ok = array('i'), array('q', [0]), array('b')
+    label_ids, label_vocab = array('i'), {}
+
+    for k, (line, manifest_file) in enumerate(_iter_manifest_lines(manifests_files, sources)):
+        item = parse_func(line, manifest_file)
+
+        ids.append(k)
+        durations.append(float(item['duration']))
+        offsets.append(float('nan') if item['offset'] is None else float(item['offset']))
+        orig_srs.append(-1 if item.get('orig_sr') is None else int(item['orig_sr']))
+        audio_files.append(item['audio_file'])
+        file_ids.append(_file_id(item['audio_file']))
+
+        if kind == 'audio_text':
+            texts.append(item['text'])
+            speakers.append(json.dumps(item['speaker']))
+            if parser is not None:
+                text_tokens = parser(item['text'])
+                tokens_ok.append(text_tokens is not None)
+                tokens.extend(text_tokens or [])
+                token_offsets.append(len(tokens))
+        else:
+            label = json.dumps(item['label'])
+            label_ids.append(label_vocab.setdefault(label, len(label_vocab)))
+
+    num_items = len(ids)
+    file_id_order = sorted(range(num_items), key=file_ids.__getitem__)
+    arrays = {
+        'ids': np.frombuffer(ids, dtype=np.int64),
+        'durations': np.frombuffer(durations, dtype=np.float64),
+        'offsets': np.frombuffer(offsets, dtype=np.float64),
+        'orig_srs': np.frombuffer(orig_srs, dtype=np.int64),
+        'file_id_order': np.asarray(file_id_order, dtype=np.int64),
+        **audio_files.arrays('audio_files'),
+    }
+
+    parser_fingerprint = None
+    if kind == 'audio_text':
+        arrays.update(texts.arrays('texts'))
+        arrays.update(speakers.arrays('speakers'))
+        if parser is not None:
+            parser_fingerprint = getattr(parser, 'fingerprint', None)
+            arrays['tokens.data'] = np.frombuffer(tokens, dtype=np.int32)
+            arrays['tokens.offsets'] = np.frombuffer(token_offsets, dtype=np.int64)
+            arrays['tokens_ok'] = np.frombuffer(tokens_ok, dtype=np.bool_)
+    else:
+        arrays['label_ids'] = np.frombuffer(label_ids, dtype=np.int32)
+        vocab = _StringTableWriter()
+        for label in label_vocab:
+            vocab.append(label)
+        arrays.update(vocab.arrays('label_vocab'))
+
+    meta = {
+        'version': INDEX_FORMAT_VERSION,
+        'kind': kind,
+        'num_items': num_items,
+        'manifests': sources,
+        'parser_fingerprint': parser_fingerprint,
+    }
+    _write_index(index_dir, arrays, meta)
+
+    logging.info("Built manifest index with %d entries in %s", num_items, index_dir)
+    return index_dir
+
+
+def _write_index(index_dir: str, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]):
+    """Writes the arrays and meta.json of an index, replacing an existing index in place.
+
+    Everything is written to temporary files first. The old meta.json is removed before any file of the old index
+    is replaced and the new one is moved into place last, so an interrupted build never looks like a valid index.
+    Processes which mapped the old arrays keep reading them.
+    """
+    suffix = f'.{os.getpid()}.tmp'
+    paths = {os.path.join(index_dir, f'{name}.npy'): array for name, array in arrays.items()}
+    for path, array in paths.items():
+        with open(path + suffix, 'wb') as f:
+            np.save(f, array)
+
+    meta_path = os.path.join(index_dir, _META_FILE)
+    with open(meta_path + suffix, 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+    # Optional arrays of a previous build must not outlive it
+    for name in _OPTIONAL_ARRAYS:
+        path = os.path.join(index_dir, f'{name}.npy')
+        if path not in paths and os.path.exists(path):
+            os.remove(path)
+    for path in paths:
+        os.replace(path + suffix, path)
+    os.replace(meta_path + suffix, meta_path)
+
+
+class ManifestIndex:
+    """Read-only view over an index directory produced by `build_manifest_index`.
+
+    All arrays are memory-mapped, so forked dataloader workers share the same physical pages. When pickled (e.g.
+    for spawned workers) only the directory path is serialized and the arrays are re-mapped on unpickling.
+    """
+
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+        with open(os.path.join(index_dir, _META_FILE), 'r') as f:
+            self.meta = json.load(f)
+
+        if self.meta.get('version') != INDEX_FORMAT_VERSION:
+            raise ValueError(
+                f"Manifest index {index_dir} has format version {self.meta.get('version')}, "
+                f"expected {INDEX_FORMAT_VERSION}. Please rebuild it."
+            )
+
+        self._map()
+
+    def _load(self, name: str) -> np.ndarray:
+        return np.load(os.path.join(self.index_dir, f'{name}.npy'), mmap_mode='r')
+
+    def _load_strings(self, name: str) -> StringTable:
+        return StringTable(self._load(f'{name}.data'), self._load(f'{name}.offsets'))
+
+    def _map(self):
+        self.ids = self._load('ids')
+        self.durations = self._load('durations')
+        self.offsets = self._load('offsets')
+        self.orig_srs = self._load('orig_srs')
+        self.audio_files = self._load_strings('audio_files')
+        self.file_id_order = self._load('file_id_order')
+
+        if self.kind == 'audio_text':
+            self.texts = self._load_strings('texts')
+            self.speakers = self._load_strings('speakers')
+            if os.path.exists(os.path.join(self.index_dir, 'tokens_ok.npy')):
+                self.tokens = self._load('tokens.data')
+                self.token_offsets = self._load('tokens.offsets')
+                self.tokens_ok = self._load('tokens_ok')
+            else:
+                self.tokens, self.token_offsets, self.tokens_ok = None, None, None
+        else:
+            self.label_ids = self._load('label_ids')
+            self.label_vocab = self._load_strings('label_vocab')
+
+    def __getstate__(self):
+        return {'index_dir': self.index_dir, 'meta': self.meta}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._map()
+
+    def __len__(self) -> int:
+        return self.meta['num_items']
+
+    @property
+    def kind(self) -> str:
+        return self.meta['kind']
+
+    @property
+    def parser_fingerprint(self) -> Optional[str]:
+        return self.meta.get('parser_fingerprint')
+
+    def has_tokens_for(self, parser: Callable) -> bool:
+        """True if the index holds transcripts pre-tokenized by a parser equivalent to `parser`."""
+        fingerprint = getattr(parser, 'fingerprint', None)
+        return self.tokens is not None and fingerprint is not None and fingerprint == self.parser_fingerprint
+
+    def text_tokens(self, row: int) -> List[int]:
+        return self.tokens[self.token_offsets[row] : self.token_offsets[row + 1]].tolist()
+
+    def file_id(self, row: int) -> str:
+        return _file_id(self.audio_files[row])
+
+    def is_valid_for(self, manifests_files: Union[str, List[str]]) -> bool:
+        """Checks that the index was built from exactly these manifests and that none of them changed since.
+
+        A manifest is considered unchanged if its size matches and either its mtime or its sha1 matches, so a
+        plain `touch` or copy does not force a rebuild but any content change does.
+        """
+        if isinstance(manifests_files, str):
+            manifests_files = [manifests_files]
+
+        sources = self.meta['manifests']
+        if len(sources) != len(manifests_files):
+            return False
+
+        for manifest_file, source in zip(manifests_files, sources):
+            path = os.path.abspath(os.path.expanduser(manifest_file))
+            if path != source['path'] or not os.path.exists(path):
+                return False
+
+            stat = os.stat(path)
+            if stat.st_size != source['size']:
+                return False
+
+            if stat.st_mtime != source['mtime'] and _sha1(path) != source['sha1']:
+                return False
+
+        return True
+
+
+def open_manifest_index(
+    index_dir: str, manifests_files: Union[str, List[str]], kind: str = 'audio_text'
+) -> Optional[ManifestIndex]:
+    """Opens a manifest index if it exists, has the right kind and is up to date with `manifests_files`.
+
+    Returns:
+        `ManifestIndex`, or None (with a warning) if the index is missing or stale, in which case callers should
+        fall back to parsing the json manifests.
+    """
+    if not os.path.exists(os.path.join(index_dir, _META_FILE)):
+        logging.warning(f"Manifest index {index_dir} does not exist, falling back to parsing json manifests.")
+        return None
+
+    index = ManifestIndex(index_dir)
+    if index.kind != kind:
+        logging.warning(
+            f"Manifest index {index_dir} is of kind `{index.kind}` but `{kind}` is required, "
+            f"falling back to parsing json manifests."
+        )
+        return None
+
+    if not index.is_valid_for(manifests_files):
+        logging.warning(
+            f"Manifest index {index_dir} is out of date with {manifests_files}, falling back to parsing json "
+            f"manifests. Rebuild it with scripts/build_manifest_index.py."
+        )
+        return None
+
+    return index
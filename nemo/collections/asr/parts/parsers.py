@@ -11,6 +11,8 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import hashlib
+import json
 import string
 from typing import List, Optional
 
@@ -60,6 +62,19 @@ class CharParser:
         self._labels_map = {label: index for index, label in enumerate(labels)}
         self._special_labels = set([label for label in labels if len(label) > 1])
 
+    @property
+    def fingerprint(self) -> str:
+        """Stable hash of everything that affects tokenization, used to validate pre-tokenized manifest indexes."""
+        config = [
+            type(self).__name__,
+            list(self._labels),
+            self._unk_id,
+            self._blank_id,
+            self._do_normalize,
+            self._do_lowercase,
+        ]
+        return hashlib.sha1(json.dumps(config).encode('utf-8')).hexdigest()
+
     def __call__(self, text: str) -> Optional[List[int]]:
         if self._do_normalize:
             text = self._normalize(text)
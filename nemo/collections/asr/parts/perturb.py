@@ -33,6 +33,7 @@
 # SOFTWARE.
 # This file contains code artifacts adapted from https://github.com/ryanleary/patter
 import copy
+import functools
 import io
 import os
 import random
@@ -49,7 +50,7 @@ from scipy import signal
 from torch.utils.data import IterableDataset
 
 from nemo.collections.asr.parts import collections, parsers
-from nemo.collections.asr.parts.segment import AudioSegment
+from nemo.collections.asr.parts.segment import AudioSegment, resample_polyphase
 from nemo.utils import logging
 
 try:
@@ -292,12 +293,12 @@ class ImpulsePerturbation(Perturbation):
             tarred_audio=self._tarred_audio,
             audio_dataset=self._data_iterator,
         )
+        low, high = impulse.samples.min(), impulse.samples.max()
+        impulse_norm = (impulse.samples - low) / (high - low)
         if not self._shift_impulse:
-            impulse_norm = (impulse.samples - min(impulse.samples)) / (max(impulse.samples) - min(impulse.samples))
             data._samples = signal.fftconvolve(data._samples, impulse_norm, "same")
         else:
             # Find peak and shift peak to left
-            impulse_norm = (impulse.samples - min(impulse.samples)) / (max(impulse.samples) - min(impulse.samples))
             max_ind = np.argmax(np.abs(impulse_norm))
 
             impulse_resp = impulse_norm[max_ind:]
@@ -552,42 +553,134 @@ class RirAndNoisePerturbation(Perturbation):
         bg_perturber.perturb_with_input_noise(data, noise, data_rms=data_rms)
 
 
+def _alaw_quantize(pcm: np.ndarray) -> np.ndarray:
+    """G.711 A-law encoding and decoding of int32 samples in the 16-bit range, as in the ITU reference g711.c."""
+    pcm = pcm >> 3
+    negative = pcm < 0
+    pcm = np.where(negative, -pcm - 1, pcm)
+    # Segment 0 and 1 share a step size, then the step size doubles with every segment
+    seg = np.clip(np.floor(np.log2(np.maximum(pcm, 1))).astype(np.int32) - 4, 0, 7)
+    seg = np.where(pcm >= 0x1000, 8, seg)
+    mantissa = np.where(seg < 2, pcm >> 1, pcm >> np.minimum(seg, 7)) & 0xF
+    mantissa = np.where(seg >= 8, 0xF, mantissa)
+    seg = np.minimum(seg, 7)
+
+    decoded = (mantissa << 4) + np.where(seg == 0, 8, 0x108)
+    decoded = np.where(seg > 1, decoded << np.maximum(seg - 1, 0), decoded)
+    return np.where(negative, -decoded, decoded)
+
+
+def _ulaw_quantize(pcm: np.ndarray) -> np.ndarray:
+    """G.711 mu-law encoding and decoding of int32 samples in the 16-bit range, as in the ITU reference g711.c."""
+    pcm = pcm >> 2
+    negative = pcm < 0
+    magnitude = np.minimum(np.where(negative, -pcm, pcm), 8159) + 0x21
+    seg = np.clip(np.floor(np.log2(magnitude)).astype(np.int32) - 5, 0, 7)
+    mantissa = np.where(magnitude >= 0x2000, 0xF, (magnitude >> (seg + 1)) & 0xF)
+
+    decoded = (((mantissa << 3) + 0x84) << seg) - 0x84
+    return np.where(negative, -decoded, decoded)
+
+
+@functools.lru_cache(maxsize=None)
+def _g711_table(law: str) -> np.ndarray:
+    """Decoded float value of every 16-bit sample after G.711 companding, built once per process."""
+    pcm = np.arange(-(2 ** 15), 2 ** 15, dtype=np.int32)
+    quantized = _alaw_quantize(pcm) if law == 'alaw' else _ulaw_quantize(pcm)
+    return (quantized / 2 ** 15).astype(np.float32)
+
+
+@functools.lru_cache(maxsize=None)
+def _telephone_band_filter(sample_rate: int) -> np.ndarray:
+    """Second-order sections of the 300 - 3400 Hz band-pass filter of the telephone channel."""
+    return signal.butter(4, [300, 3400], btype='bandpass', fs=sample_rate, output='sos')
+
+
+def g711_companding(samples: np.ndarray, law: str = 'alaw') -> np.ndarray:
+    """Applies G.711 A-law ('alaw') or mu-law ('ulaw') encoding and decoding to float samples in [-1, 1]."""
+    if law not in ('alaw', 'ulaw'):
+        raise ValueError(f"Unknown G.711 law {law}, expected 'alaw' or 'ulaw'.")
+    pcm = np.clip(np.round(samples * 2 ** 15), -(2 ** 15), 2 ** 15 - 1).astype(np.int32)
+    return _g711_table(law)[pcm + 2 ** 15]
+
+
 class TranscodePerturbation(Perturbation):
-    def __init__(self, rng=None):
+    def __init__(self, rng=None, codecs=None, use_sox=False, band_limit=True, bit_depth=None):
         """
-        Audio codec augmentation. This implementation uses sox to transcode audio with low rate audio codecs,
-        so users need to make sure that the installed sox version supports the codecs used here (G711 and amr-nb).
+        Audio codec augmentation.
+
+        By default audio goes through the narrowband telephone channel in-process on numpy buffers: resampling to
+        8 kHz, optional band-limiting to 300 - 3400 Hz, G.711 companding (A-law for 'g711', mu-law for 'g711_ulaw')
+        and optional bit-depth reduction, then resampling back.
+        With `use_sox`, audio is transcoded by sox subprocesses instead, which also supports the amr-nb codec, so
+        users need to make sure that the installed sox version supports the codecs used (G711 and amr-nb).
 
+        Args:
+            rng: numpy RandomState or random.Random instance.
+            codecs: Codecs drawn from, by default ['g711', 'g711_ulaw'], or ['g711', 'amr-nb'] with `use_sox`.
+            use_sox: Whether to transcode with sox subprocesses.
+            band_limit: Whether to band-limit the in-process telephone channel.
+            bit_depth: If set, the in-process telephone channel output is quantized to `bit_depth` bits.
         """
         self._rng = np.random.RandomState() if rng is None else rng
-        self._codecs = ["g711", "amr-nb"]
+        self._use_sox = use_sox
+        self._band_limit = band_limit
+        self._bit_depth = bit_depth
+        if codecs is None:
+            codecs = ["g711", "amr-nb"] if use_sox else ["g711", "g711_ulaw"]
+        supported = ("g711", "amr-nb") if use_sox else ("g711", "g711_ulaw")
+        for codec in codecs:
+            if codec not in supported:
+                raise ValueError(f"Codec {codec} is not supported with use_sox={use_sox}, supported: {supported}")
+        self._codecs = list(codecs)
 
     def perturb(self, data):
         att_factor = 0.8
         max_level = np.max(np.abs(data._samples))
         norm_factor = att_factor / max_level
         norm_samples = norm_factor * data._samples
+
+        codec = self._choice(self._codecs)
+        if self._use_sox:
+            new_samples = self._transcode_sox(norm_samples, data.sample_rate, codec)
+        else:
+            new_samples = self._transcode_telephone(norm_samples, data.sample_rate, codec)
+        data._samples = new_samples[0 : data._samples.shape[0]]
+
+    def _choice(self, options):
+        # Uniform choice with the methods of both numpy RandomState and random.Random
+        return options[min(int(self._rng.uniform(0, len(options))), len(options) - 1)]
+
+    def _transcode_telephone(self, samples, sample_rate, codec):
+        narrowband = resample_polyphase(samples, sample_rate, 8000)
+        if self._band_limit:
+            narrowband = signal.sosfilt(_telephone_band_filter(8000), narrowband).astype(np.float32)
+        narrowband = g711_companding(narrowband, 'ulaw' if codec == 'g711_ulaw' else 'alaw')
+        if self._bit_depth is not None:
+            levels = 2 ** (self._bit_depth - 1)
+            narrowband = np.round(narrowband * levels) / levels
+        return resample_polyphase(narrowband, 8000, sample_rate)
+
+    def _transcode_sox(self, samples, sample_rate, codec):
         orig_f = NamedTemporaryFile(suffix=".wav")
-        sf.write(orig_f.name, norm_samples.transpose(), 16000)
+        sf.write(orig_f.name, samples.transpose(), sample_rate)
 
-        codec_ind = random.randint(0, len(self._codecs) - 1)
-        if self._codecs[codec_ind] == "amr-nb":
+        if codec == "amr-nb":
             transcoded_f = NamedTemporaryFile(suffix="_amr.wav")
             rates = list(range(0, 8))
-            rate = rates[random.randint(0, len(rates) - 1)]
+            rate = self._choice(rates)
             _ = subprocess.check_output(
-                f"sox {orig_f.name} -V0 -C {rate} -t amr-nb - | sox -t amr-nb - -V0 -b 16 -r 16000 {transcoded_f.name}",
+                f"sox {orig_f.name} -V0 -C {rate} -t amr-nb - | "
+                f"sox -t amr-nb - -V0 -b 16 -r {sample_rate} {transcoded_f.name}",
                 shell=True,
             )
-        elif self._codecs[codec_ind] == "g711":
+        elif codec == "g711":
             transcoded_f = NamedTemporaryFile(suffix="_g711.wav")
             _ = subprocess.check_output(
                 f"sox {orig_f.name} -V0  -r 8000 -c 1 -e a-law {transcoded_f.name}", shell=True
             )
 
-        new_data = AudioSegment.from_file(transcoded_f.name, target_sr=16000)
-        data._samples = new_data._samples[0 : data._samples.shape[0]]
-        return
+        return AudioSegment.from_file(transcoded_f.name, target_sr=sample_rate)._samples
 
 
 perturbation_types = {
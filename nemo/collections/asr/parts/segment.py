@@ -33,13 +33,32 @@
 # SOFTWARE.
 # This file contains code artifacts adapted from https://github.com/ryanleary/patter
 
+import math
 import random
+from functools import lru_cache
 
 import librosa
 import numpy as np
+import scipy.signal
 import soundfile as sf
 
 
+@lru_cache(maxsize=32)
+def _polyphase_filter(up: int, down: int) -> np.ndarray:
+    """Anti-aliasing filter of `scipy.signal.resample_poly` for the given factors, designed once per process."""
+    max_rate = max(up, down)
+    return scipy.signal.firwin(2 * 10 * max_rate + 1, 1.0 / max_rate, window=('kaiser', 5.0)).astype(np.float32)
+
+
+def resample_polyphase(samples: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+    """Resamples the last axis of `samples` with a polyphase filter, reusing the filter of every pair of rates.
+    Much faster than the default `kaiser_best` resampling of librosa, at a slightly lower stopband attenuation."""
+    gcd = math.gcd(int(orig_sr), int(target_sr))
+    up, down = int(target_sr) // gcd, int(orig_sr) // gcd
+    resampled = scipy.signal.resample_poly(samples, up, down, axis=-1, window=_polyphase_filter(up, down))
+    return resampled.astype(np.float32)
+
+
 class AudioSegment(object):
     """Monaural audio segment abstraction.
     :param samples: Audio samples [num_samples x num_channels].
@@ -49,13 +68,19 @@ class AudioSegment(object):
     :raises TypeError: If the sample data type is not float or int.
     """
 
-    def __init__(self, samples, sample_rate, target_sr=None, trim=False, trim_db=60, orig_sr=None):
+    def __init__(
+        self, samples, sample_rate, target_sr=None, trim=False, trim_db=60, orig_sr=None, resample_type='kaiser_best'
+    ):
         """Create audio segment from samples.
         Samples are convert float32 internally, with int scaled to [-1, 1].
+        Resampling to `target_sr` uses librosa with `resample_type`, or `resample_polyphase` for 'polyphase'.
         """
         samples = self._convert_samples_to_float32(samples)
         if target_sr is not None and target_sr != sample_rate:
-            samples = librosa.core.resample(samples, sample_rate, target_sr)
+            if resample_type == 'polyphase':
+                samples = resample_polyphase(samples, sample_rate, target_sr)
+            else:
+                samples = librosa.core.resample(samples, sample_rate, target_sr, res_type=resample_type)
             sample_rate = target_sr
         if trim:
             samples, _ = librosa.effects.trim(samples, trim_db)
@@ -110,7 +135,15 @@ class AudioSegment(object):
 
     @classmethod
     def from_file(
-        cls, audio_file, target_sr=None, int_values=False, offset=0, duration=0, trim=False, orig_sr=None,
+        cls,
+        audio_file,
+        target_sr=None,
+        int_values=False,
+        offset=0,
+        duration=0,
+        trim=False,
+        orig_sr=None,
+        resample_type='kaiser_best',
     ):
         """
         Load a file supported by librosa and return as an AudioSegment.
@@ -119,6 +152,7 @@ class AudioSegment(object):
         :param int_values: if true, load samples as 32-bit integers
         :param offset: offset in seconds when loading audio
         :param duration: duration in seconds when loading audio
+        :param resample_type: resampling method, see `__init__`
         :return: numpy array of samples
         """
         with sf.SoundFile(audio_file, 'r') as f:
@@ -132,10 +166,12 @@ class AudioSegment(object):
                 samples = f.read(dtype=dtype)
 
         samples = samples.transpose()
-        return cls(samples, sample_rate, target_sr=target_sr, trim=trim, orig_sr=orig_sr)
+        return cls(samples, sample_rate, target_sr=target_sr, trim=trim, orig_sr=orig_sr, resample_type=resample_type)
 
     @classmethod
-    def segment_from_file(cls, audio_file, target_sr=None, n_segments=0, trim=False, orig_sr=None):
+    def segment_from_file(
+        cls, audio_file, target_sr=None, n_segments=0, trim=False, orig_sr=None, resample_type='kaiser_best'
+    ):
         """Grabs n_segments number of samples from audio_file randomly from the
         file as opposed to at a specified offset.
 
@@ -152,7 +188,7 @@ class AudioSegment(object):
                 samples = f.read(dtype='float32')
 
         samples = samples.transpose()
-        return cls(samples, sample_rate, target_sr=target_sr, trim=trim, orig_sr=orig_sr)
+        return cls(samples, sample_rate, target_sr=target_sr, trim=trim, orig_sr=orig_sr, resample_type=resample_type)
 
     @property
     def samples(self):
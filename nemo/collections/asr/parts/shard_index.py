@@ -0,0 +1,120 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Sample index of a tarred audio dataset, and balancing of its shards between data loading processes.
+
+The index is a json file written next to the shards by `scripts/convert_to_tarred_audio_dataset.py`::
+
+    {
+        "version": 1,
+        "shards": [
+            {
+                "path": "audio_0.tar",
+                "file_ids": ["utt_a", "utt_b", ...],
+                "durations": [3.2, 11.5, ...],
+                "offsets": [512, 103424, ...],
+                "sizes": [102400, 368000, ...]
+            },
+            ...
+        ]
+    }
+
+where file ids are the names of the audio files in the shard without extension, as in the tarred manifest, and
+the optional offsets and sizes locate the data of every member in the tar file, in bytes.
+
+With the index, a tarred dataset knows the samples of every shard before reading any of them. Shards are assigned
+to the data loading slots (every data loader worker of every rank) so that slots get about the same duration of
+audio, and every slot then yields the same number of samples, so that all ranks run the same number of steps.
+"""
+
+import heapq
+import json
+import os
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+__all__ = ['ShardInfo', 'balance_shards', 'load_shard_index', 'write_shard_index']
+
+SHARD_INDEX_VERSION = 1
+
+
+class ShardInfo(NamedTuple):
+    """Samples of a shard, as file ids, durations in seconds and optionally data offsets and sizes in bytes."""
+
+    path: str
+    file_ids: List[str]
+    durations: List[float]
+    offsets: Optional[List[int]] = None
+    sizes: Optional[List[int]] = None
+
+
+def write_shard_index(path: str, shards: Sequence[ShardInfo]):
+    """Writes the sample index of tarred audio shards, with shard paths relative to the index directory."""
+    index_dir = os.path.dirname(os.path.abspath(path))
+    entries = []
+    for shard in shards:
+        entry = {
+            'path': os.path.relpath(os.path.abspath(shard.path), index_dir),
+            'file_ids': list(shard.file_ids),
+            'durations': [float(duration) for duration in shard.durations],
+        }
+        if shard.offsets is not None:
+            entry['offsets'] = [int(offset) for offset in shard.offsets]
+            entry['sizes'] = [int(size) for size in shard.sizes]
+        entries.append(entry)
+
+    with open(path, 'w') as f:
+        json.dump({'version': SHARD_INDEX_VERSION, 'shards': entries}, f)
+
+
+def load_shard_index(path: str) -> Dict[str, ShardInfo]:
+    """Reads a sample index written by `write_shard_index`, keyed by shard file name."""
+    with open(path, 'r') as f:
+        index = json.load(f)
+    if index.get('version') != SHARD_INDEX_VERSION:
+        raise ValueError(f"Unsupported shard index version {index.get('version')} in {path}")
+
+    shards = {}
+    for shard in index['shards']:
+        name = os.path.basename(shard['path'])
+        if name in shards:
+            raise ValueError(f"Shard file name {name} appears twice in shard index {path}")
+        shards[name] = ShardInfo(
+            shard['path'], shard['file_ids'], shard['durations'], shard.get('offsets'), shard.get('sizes')
+        )
+    return shards
+
+
+def balance_shards(durations: Sequence[float], num_slots: int) -> List[List[int]]:
+    """Assigns items (shards, or utterances when building shards) to `num_slots` slots so that the total durations
+    of the slots are close to each other, by giving the longest remaining item to the slot with the least audio.
+    The assignment is deterministic, so that all processes compute the same one.
+
+    Args:
+        durations: Duration of every item.
+        num_slots: Number of slots, at most the number of items.
+
+    Returns:
+        The indices of the items of every slot, in ascending order.
+    """
+    if num_slots > len(durations):
+        raise ValueError(f"Cannot balance {len(durations)} items between {num_slots} slots.")
+
+    slots = [[] for _ in range(num_slots)]
+    # (total duration, number of items, slot)
+    heap = [(0.0, 0, slot) for slot in range(num_slots)]
+    for item in sorted(range(len(durations)), key=lambda i: (-durations[i], i)):
+        total, count, slot = heapq.heappop(heap)
+        slots[slot].append(item)
+        heapq.heappush(heap, (total + durations[item], count + 1, slot))
+    return [sorted(slot) for slot in slots]
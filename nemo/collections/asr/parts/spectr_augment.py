@@ -127,3 +127,158 @@ class SpecCutout(nn.Module):
         x = x.masked_fill(mask.type(torch.bool).to(device=x.device), 0)
 
         return x
+
+
+class _BatchedMasking(nn.Module):
+    """Base of the batched augmentations, holds seeded torch generators per device."""
+
+    def __init__(self, seed=None):
+        super().__init__()
+        self._seed = seed
+        self._generators = {}
+
+    def _generator(self, device):
+        generator = self._generators.get(device)
+        if generator is None:
+            generator = torch.Generator(device=device)
+            if self._seed is None:
+                generator.seed()
+            else:
+                # Data loader workers each draw a different, reproducible sequence
+                worker_info = torch.utils.data.get_worker_info()
+                generator.manual_seed(self._seed + (worker_info.id if worker_info is not None else 0))
+            self._generators[device] = generator
+        return generator
+
+    def __getstate__(self):
+        # Generators are not copied or pickled, copies recreate them from the seed
+        state = self.__dict__.copy()
+        state['_generators'] = {}
+        return state
+
+    @staticmethod
+    def _segments(start, width, start_range, max_width, positions):
+        """Mask [B, M, len(positions)] of M segments per sample, from uniform samples `start` and `width` [B, M].
+        Like `int(rng.uniform(0, start_range))` and `int(rng.uniform(0, max_width))` in SpecAugment. Nothing is
+        masked if segments are wider than the input (negative `start_range`)."""
+        if start_range < 0:
+            return torch.zeros(start.shape + positions.shape, dtype=torch.bool, device=positions.device)
+        start = (start * start_range).long().unsqueeze(-1)
+        width = (width * max_width).long().unsqueeze(-1)
+        return (positions >= start) & (positions < start + width)
+
+
+class BatchedSpecAugment(_BatchedMasking):
+    """
+    Batched version of SpecAugment: all masks are sampled at once by a (seeded) torch generator
+    on the device of the input and built by broadcasting, without Python loops over the batch
+    or host to device copies. Masks are distributed as in SpecAugment.
+
+    params:
+    freq_masks - how many frequency segments should be cut
+    time_masks - how many time segments should be cut
+    freq_width - maximum number of frequencies to be cut in one segment
+    time_width - maximum number of time steps to be cut in one segment.
+        Can be a positive integer or a float value in the range [0, 1].
+        If positive integer value, defines maximum number of time steps
+        to be cut in one segment.
+        If a float value, defines maximum percentage of timesteps that
+        are cut adaptively.
+    seed - seed of the generators, random if None
+    """
+
+    def __init__(self, freq_masks=0, time_masks=0, freq_width=10, time_width=10, seed=None):
+        super().__init__(seed=seed)
+
+        self.freq_masks = freq_masks
+        self.time_masks = time_masks
+
+        self.freq_width = freq_width
+        self.time_width = time_width
+
+        if isinstance(time_width, int):
+            self.adaptive_temporal_width = False
+        else:
+            if time_width > 1.0 or time_width < 0.0:
+                raise ValueError('If `time_width` is a float value, must be in range [0, 1]')
+
+            self.adaptive_temporal_width = True
+
+    @torch.no_grad()
+    def forward(self, x):
+        batch_size, num_freqs, num_frames = x.shape
+
+        if self.adaptive_temporal_width:
+            time_width = max(1, int(num_frames * self.time_width))
+        else:
+            time_width = self.time_width
+
+        # (start, width) of the frequency masks, then of the time masks
+        uniform = torch.rand(
+            batch_size, self.freq_masks + self.time_masks, 2, generator=self._generator(x.device), device=x.device
+        )
+        freq_uniform, time_uniform = uniform[:, : self.freq_masks], uniform[:, self.freq_masks :]
+
+        freq_mask = self._segments(
+            freq_uniform[..., 0],
+            freq_uniform[..., 1],
+            num_freqs - self.freq_width,
+            self.freq_width,
+            torch.arange(num_freqs, device=x.device),
+        ).any(dim=1)
+        time_mask = self._segments(
+            time_uniform[..., 0],
+            time_uniform[..., 1],
+            num_frames - time_width,
+            time_width,
+            torch.arange(num_frames, device=x.device),
+        ).any(dim=1)
+
+        return x.masked_fill(freq_mask.unsqueeze(2) | time_mask.unsqueeze(1), 0)
+
+
+class BatchedSpecCutout(_BatchedMasking):
+    """
+    Batched version of SpecCutout, see BatchedSpecAugment.
+    Rectangles are distributed as in SpecCutout.
+
+    params:
+    rect_masks - how many rectangular masks should be cut
+    rect_freq - maximum size of cut rectangles along the frequency dimension
+    rect_time - maximum size of cut rectangles along the time dimension
+    seed - seed of the generators, random if None
+    """
+
+    def __init__(self, rect_masks=0, rect_time=5, rect_freq=20, seed=None):
+        super().__init__(seed=seed)
+
+        self.rect_masks = rect_masks
+        self.rect_time = rect_time
+        self.rect_freq = rect_freq
+
+    @torch.no_grad()
+    def forward(self, x):
+        batch_size, num_freqs, num_frames = x.shape
+
+        # (frequency start, time start, frequency width, time width) of every rectangle
+        uniform = torch.rand(batch_size, self.rect_masks, 4, generator=self._generator(x.device), device=x.device)
+
+        # As in SpecCutout, widths along frequency are drawn up to rect_time and along time up to rect_freq
+        in_freqs = self._segments(
+            uniform[..., 0],
+            uniform[..., 2],
+            num_freqs - self.rect_freq,
+            self.rect_time,
+            torch.arange(num_freqs, device=x.device),
+        )
+        in_frames = self._segments(
+            uniform[..., 1],
+            uniform[..., 3],
+            num_frames - self.rect_time,
+            self.rect_freq,
+            torch.arange(num_frames, device=x.device),
+        )
+        # [B, F, M] x [B, M, T]: number of rectangles covering every bin
+        mask = torch.bmm(in_freqs.transpose(1, 2).float(), in_frames.float()) > 0
+
+        return x.masked_fill(mask, 0)
@@ -12,9 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import nemo.collections.common.callbacks
-from nemo.collections.common import losses, parts, tokenizers
 from nemo.package_info import __version__
+from nemo.utils.lazy_import import lazy_attributes
 
 # Set collection version equal to NeMo version.
 __version = __version__
@@ -24,3 +23,8 @@ __author__ = "NVIDIA Corporation"
 
 # Set collection name.
 __description__ = "Common collection"
+
+# Submodules are imported on first access
+__getattr__, __dir__ = lazy_attributes(
+    __name__, dict.fromkeys(('callbacks', 'losses', 'metrics', 'parts', 'tokenizers'))
+)
@@ -0,0 +1,96 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from typing import Optional, Sequence, Tuple, Union
+
+import torch
+
+__all__ = ['pad_and_stack', 'stack_lengths', 'collate_audio_tokens']
+
+
+def pad_and_stack(
+    tensors: Sequence[torch.Tensor],
+    max_len: Optional[int] = None,
+    pad_value: Union[int, float] = 0,
+    pin_memory: bool = False,
+) -> torch.Tensor:
+    """Stacks tensors of different lengths along their first dimension into a single padded batch.
+
+    The padded output is allocated once and every tensor is copied into its row, instead of padding each tensor
+    into a new tensor and stacking those.
+
+    Args:
+        tensors: Tensors of shape [T_i, ...], with identical trailing dimensions and dtype.
+        max_len: Length of the time dimension of the output. Defaults to the longest tensor. Longer tensors are
+            truncated.
+        pad_value: Value of the padded positions.
+        pin_memory: Whether to allocate the output in pinned memory.
+
+    Returns:
+        Tensor of shape [B, max_len, ...].
+    """
+    if max_len is None:
+        max_len = max(tensor.size(0) for tensor in tensors)
+
+    first = tensors[0]
+    out = torch.full(
+        (len(tensors), max_len) + tuple(first.shape[1:]), pad_value, dtype=first.dtype, pin_memory=pin_memory
+    )
+    for row, tensor in zip(out, tensors):
+        length = min(tensor.size(0), max_len)
+        row.narrow(0, 0, length).copy_(tensor.narrow(0, 0, length))
+
+    return out
+
+
+def stack_lengths(lengths: Sequence[Union[int, torch.Tensor]]) -> torch.Tensor:
+    """Converts a sequence of python ints or 0-d tensors into a 1-d LongTensor without per-item `.item()` calls."""
+    if isinstance(lengths[0], torch.Tensor):
+        return torch.stack(list(lengths)).long()
+    return torch.tensor(lengths, dtype=torch.long)
+
+
+def collate_audio_tokens(
+    batch: Sequence[Tuple[Optional[torch.Tensor], Optional[torch.Tensor], torch.Tensor, torch.Tensor]],
+    pad_id: int,
+    pin_memory: bool = False,
+) -> Tuple[Optional[torch.Tensor], Optional[torch.Tensor], torch.Tensor, torch.Tensor]:
+    """Collates a batch of (audio, audio length, tokens, tokens length) tuples into padded tensors.
+
+    Audio may be None for every item (datasets which do not load audio), tokens may be 0-d tensors (labels).
+
+    Args:
+        batch: Sequence of (signal, signal length, tokens, tokens length) tuples, with 1-d signals.
+        pad_id: Value used to pad tokens. Audio is padded with zeros.
+        pin_memory: Whether to allocate the padded audio and tokens in pinned memory.
+
+    Returns:
+        Padded audio [B, T] (or None), audio lengths [B] (or None), tokens [B, U] (or [B] for 0-d tokens) and
+        token lengths [B].
+    """
+    signals, audio_lengths, tokens, tokens_lengths = zip(*batch)
+
+    audio_signal = None
+    if audio_lengths[0] is not None:
+        audio_lengths = stack_lengths(audio_lengths)
+        audio_signal = pad_and_stack(signals, max_len=int(audio_lengths.max()), pin_memory=pin_memory)
+    else:
+        audio_lengths = None
+
+    tokens_lengths = stack_lengths(tokens_lengths)
+    if tokens[0].dim() == 0:
+        tokens = torch.stack(tokens)
+    else:
+        tokens = pad_and_stack(tokens, max_len=int(tokens_lengths.max()), pad_value=pad_id, pin_memory=pin_memory)
+
+    return audio_signal, audio_lengths, tokens, tokens_lengths
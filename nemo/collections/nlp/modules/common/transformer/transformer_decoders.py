@@ -16,11 +16,12 @@ import copy
 
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
 
 from nemo.collections.common.parts import form_attention_mask
 from nemo.collections.nlp.modules.common.transformer.transformer_modules import MultiHeadAttention, PositionWiseFF
 
-__all__ = ["TransformerDecoder"]
+__all__ = ["TransformerDecoder", "TransformerDecoderCache"]
 
 
 class TransformerDecoderBlock(nn.Module):
@@ -59,13 +60,100 @@ class TransformerDecoderBlock(nn.Module):
         )
         self.third_sub_layer = PositionWiseFF(hidden_size, inner_size, ffn_dropout, hidden_act)
 
-    def forward(self, decoder_query, decoder_mask, decoder_keys, encoder_states, encoder_mask):
-        self_attn_output = self.first_sub_layer(decoder_query, decoder_keys, decoder_keys, decoder_mask)
-        enc_dec_attn_output = self.second_sub_layer(self_attn_output, encoder_states, encoder_states, encoder_mask)
+    def forward(
+        self,
+        decoder_query,
+        decoder_mask,
+        decoder_keys,
+        encoder_states,
+        encoder_mask,
+        self_keys_values=None,
+        encoder_keys_values=None,
+    ):
+        """
+        Args:
+            self_keys_values: projected keys and values of the self-attention
+                (see MultiHeadAttention.project_keys_values) used instead of
+                decoder_keys if not None
+            encoder_keys_values: projected keys and values of the
+                encoder-decoder attention used instead of encoder_states
+                if not None
+        """
+        if self_keys_values is None:
+            self_keys_values = self.first_sub_layer.project_keys_values(decoder_keys, decoder_keys)
+        if encoder_keys_values is None:
+            encoder_keys_values = self.second_sub_layer.project_keys_values(encoder_states, encoder_states)
+
+        self_attn_output = self.first_sub_layer.attend(decoder_query, *self_keys_values, decoder_mask)
+        enc_dec_attn_output = self.second_sub_layer.attend(self_attn_output, *encoder_keys_values, encoder_mask)
         output_states = self.third_sub_layer(enc_dec_attn_output)
         return output_states
 
 
+class TransformerDecoderCache:
+    """
+    Cached attention keys and values of TransformerDecoder for incremental
+    decoding. Keys and values of the self-attention of every layer are
+    preallocated for max_length positions and written as positions are
+    decoded, so every step only projects the new positions. Keys and values
+    of the encoder-decoder attention are projected once from the encoder
+    states. Created by TransformerDecoder.init_cache.
+
+    Args:
+        self_keys_values: for every layer, preallocated keys and values of
+            the self-attention (B x num_heads x max_length x head_size)
+        encoder_keys_values: for every layer, projected keys and values of
+            the encoder-decoder attention (B x num_heads x L_enc x head_size)
+    """
+
+    def __init__(self, self_keys_values, encoder_keys_values):
+        self.self_keys_values = self_keys_values
+        self.encoder_keys_values = encoder_keys_values
+        self.length = 0
+
+    @property
+    def max_length(self):
+        return self.self_keys_values[0][0].size(2)
+
+    def append(self, layer, key, value):
+        """
+        Writes keys and values of new positions of layer after the cached
+        positions, returns keys and values of all positions.
+        """
+        start, end = self.length, self.length + key.size(2)
+        if end > self.max_length:
+            raise ValueError(f"Cannot decode more than {self.max_length} positions with this cache.")
+        cached_key, cached_value = self.self_keys_values[layer]
+        cached_key[:, :, start:end] = key
+        cached_value[:, :, start:end] = value
+        return cached_key[:, :, :end], cached_value[:, :, :end]
+
+    def select(self, indices):
+        """
+        Keeps the batch elements with indices, in this order, e.g. to repeat
+        every source sequence for the hypotheses of beam search or to remove
+        finished sequences from the batch.
+        """
+        self.self_keys_values = [
+            tuple(t.index_select(0, indices) for t in keys_values) for keys_values in self.self_keys_values
+        ]
+        self.encoder_keys_values = [
+            tuple(t.index_select(0, indices) for t in keys_values) for keys_values in self.encoder_keys_values
+        ]
+
+    def reorder(self, indices):
+        """
+        Reorders the decoded positions of the batch elements in place,
+        element i continues the decoded positions of element indices[i].
+        Encoder keys and values are unchanged, so indices must map the
+        hypotheses of a source sequence to hypotheses of the same source
+        sequence.
+        """
+        for key, value in self.self_keys_values:
+            key[:, :, : self.length] = key[:, :, : self.length].index_select(0, indices)
+            value[:, :, : self.length] = value[:, :, : self.length].index_select(0, indices)
+
+
 class TransformerDecoder(nn.Module):
     def __init__(self, num_layers, hidden_size, **kwargs):
         super().__init__()
@@ -80,8 +168,30 @@ class TransformerDecoder(nn.Module):
             memory_states = decoder_states
         return memory_states
 
+    def init_cache(self, encoder_states, max_length):
+        """
+        Creates a TransformerDecoderCache for incremental decoding of up to
+        max_length positions conditioned on encoder_states (B x L_enc x H).
+        """
+        attention = self.layers[0].first_sub_layer
+        batch_size = encoder_states.size(0)
+        shape = (batch_size, attention.num_attention_heads, max_length, attention.attn_head_size)
+
+        self_keys_values, encoder_keys_values = [], []
+        for layer in self.layers:
+            self_keys_values.append((encoder_states.new_empty(shape), encoder_states.new_empty(shape)))
+            encoder_keys_values.append(layer.second_sub_layer.project_keys_values(encoder_states, encoder_states))
+        return TransformerDecoderCache(self_keys_values, encoder_keys_values)
+
     def forward(
-        self, decoder_states, decoder_mask, encoder_states, encoder_mask, decoder_mems_list=None, return_mems=False
+        self,
+        decoder_states,
+        decoder_mask,
+        encoder_states,
+        encoder_mask,
+        decoder_mems_list=None,
+        return_mems=False,
+        cache=None,
     ):
         """
         Args:
@@ -94,11 +204,20 @@ class TransformerDecoder(nn.Module):
                 of decoder_states as keys and values if not None
             return_mems: bool, whether to return outputs of all decoder layers
                 or the last layer only
+            cache: TransformerDecoderCache with the keys and values of the
+                previously decoded positions for fast autoregressive
+                generation, which is updated with the positions of
+                decoder_states. Only the outputs of the last layer for
+                decoder_states are returned, and decoder_mems_list and
+                return_mems are ignored.
         """
 
         decoder_attn_mask = form_attention_mask(decoder_mask, diagonal=0)
         encoder_attn_mask = form_attention_mask(encoder_mask)
 
+        if cache is not None:
+            return self._forward_cached(decoder_states, decoder_attn_mask, encoder_attn_mask, cache)
+
         memory_states = self._get_memory_states(decoder_states, decoder_mems_list, 0)
         cached_mems_list = [memory_states]
 
@@ -111,3 +230,22 @@ class TransformerDecoder(nn.Module):
             return cached_mems_list
         else:
             return cached_mems_list[-1]
+
+    def _forward_cached(self, decoder_states, decoder_attn_mask, encoder_attn_mask, cache):
+        if cache.length > 0 and decoder_states.size(1) > 1:
+            # all cached positions are visible to the new positions
+            decoder_attn_mask = F.pad(decoder_attn_mask, (cache.length, 0))
+
+        for i, layer in enumerate(self.layers):
+            key, value = layer.first_sub_layer.project_keys_values(decoder_states, decoder_states)
+            decoder_states = layer(
+                decoder_states,
+                decoder_attn_mask,
+                None,
+                None,
+                encoder_attn_mask,
+                self_keys_values=cache.append(i, key, value),
+                encoder_keys_values=cache.encoder_keys_values[i],
+            )
+        cache.length += decoder_states.size(1)
+        return decoder_states
@@ -42,6 +42,11 @@ class GreedySequenceGenerator(nn.Module):
             source sequences plus max_delta_length
         batch_size: size of the batch of generated sequences if neither
             source nor target starting sequences are provided
+        use_cache: whether to cache the attention keys and values of the
+            decoded positions in encoder-decoder generation (requires a
+            decoder with init_cache, e.g. TransformerDecoder), otherwise
+            hidden states of all decoded positions are passed to the decoder
+            at every step
     """
 
     def __init__(
@@ -55,6 +60,7 @@ class GreedySequenceGenerator(nn.Module):
         max_sequence_length=512,
         max_delta_length=20,
         batch_size=1,
+        use_cache=True,
     ):
         super().__init__()
         self.embedding = embedding
@@ -64,6 +70,7 @@ class GreedySequenceGenerator(nn.Module):
         self.max_seq_length = max_sequence_length
         self.max_delta_len = max_delta_length
         self.batch_size = batch_size
+        self.use_cache = use_cache and hasattr(decoder, "init_cache")
         self.device = next(self.decoder.parameters()).device
 
     @torch.no_grad()
@@ -86,14 +93,25 @@ class GreedySequenceGenerator(nn.Module):
                 mode (e.g., language modeling)
             encoder_input_mask: input mask used in the encoder
             decoder_mems_list: list of size num_layers with cached activations
-                of sequence (x[1], ..., x[k-1]) for fast generation of x[k]
+                of sequence (x[1], ..., x[k-1]) for fast generation of x[k],
+                or the cache of the decoder created by _init_cache
             pos: starting position in positional encoding
         """
 
         decoder_hidden_states = self.embedding.forward(decoder_input_ids, start_pos=pos)
         decoder_input_mask = mask_padded_tokens(decoder_input_ids, self.pad).float()
 
-        if encoder_hidden_states is not None:
+        if encoder_hidden_states is not None and self.use_cache:
+            decoder_hidden_states = self.decoder.forward(
+                decoder_hidden_states,
+                decoder_input_mask,
+                encoder_hidden_states,
+                encoder_input_mask,
+                cache=decoder_mems_list,
+            )
+            log_probs = self.log_softmax.forward(decoder_hidden_states)
+            return log_probs, decoder_mems_list
+        elif encoder_hidden_states is not None:
             decoder_mems_list = self.decoder.forward(
                 decoder_hidden_states,
                 decoder_input_mask,
@@ -136,6 +154,15 @@ class GreedySequenceGenerator(nn.Module):
 
         return tgt, batch_size, max_generation_length
 
+    def _init_cache(self, encoder_hidden_states, max_length):
+        """
+        Cache of the decoder for generating up to max_length positions, or
+        None if generation does not use it.
+        """
+        if encoder_hidden_states is None or not self.use_cache:
+            return None
+        return self.decoder.init_cache(encoder_hidden_states, max_length)
+
     def forward(self, decoder_input_ids=None, encoder_hidden_states=None, encoder_input_mask=None):
 
         tgt, batch_size, max_generation_length = self._prepare_for_search(decoder_input_ids, encoder_hidden_states)
@@ -144,7 +171,7 @@ class GreedySequenceGenerator(nn.Module):
         # everything after <eos> with <pad> token
         pad_profile = torch.zeros(batch_size, 1).long().to(self.device)
 
-        decoder_mems_list = None
+        decoder_mems_list = self._init_cache(encoder_hidden_states, max_generation_length)
         for i in range(max_generation_length):
 
             log_probs, decoder_mems_list = self._forward(
@@ -213,46 +240,87 @@ class TopKSequenceGenerator(GreedySequenceGenerator):
 
 
 class BeamSearchSequenceGenerator(GreedySequenceGenerator):
-    def __init__(self, embedding, decoder, log_softmax, beam_size=1, len_pen=0, **kwargs):
+    def __init__(self, embedding, decoder, log_softmax, beam_size=1, len_pen=0, n_best=1, **kwargs):
         """
         Beam Search sequence generator based on the decoder followed by
-        log_softmax.
+        log_softmax. Hypotheses of all batch elements are searched together,
+        and batch elements are removed from the search as soon as all their
+        hypotheses are finished.
 
         Args:
             *all args of GreedySequenceGenerator class
             beam_size: size of the beam
             len_pen: length penalty parameter
+            n_best: number of best hypotheses returned for every batch
+                element, sorted by score with length penalty applied; if
+                larger than 1, the output is of size B x n_best x L instead
+                of B x L
         Kwargs:
             all remaining parameters of GreedySequenceGenerator class
         """
 
         super().__init__(embedding, decoder, log_softmax, **kwargs)
+        if n_best > beam_size:
+            raise ValueError(f"Cannot return {n_best} best hypotheses with beam size {beam_size}.")
         self.beam_size = beam_size
         self.len_pen = len_pen
+        self.n_best = n_best
+
+    def _hypotheses(self, elements, beams):
+        """
+        Indices of the hypotheses beams (len(elements) x k) of the batch
+        elements with indices elements.
+        """
+        return (elements.unsqueeze(1) * self.beam_size + beams).view(-1)
+
+    @staticmethod
+    def _select_mems(decoder_mems_list, indices, in_place=False):
+        """
+        Selects the hypotheses with indices from the cached decoder states,
+        the cache of the decoder is reordered in place if in_place.
+        """
+        if isinstance(decoder_mems_list, list):
+            return [mems.index_select(0, indices) for mems in decoder_mems_list]
+        if in_place:
+            decoder_mems_list.reorder(indices)
+        else:
+            decoder_mems_list.select(indices)
+        return decoder_mems_list
+
+    def _sort_hypotheses(self, prefixes, scores, prefixes_len):
+        """
+        Hypotheses of every batch element (B x beam_size x L) sorted by
+        decreasing score with length penalty applied.
+        """
+        scores = (scores / prefixes_len.pow(self.len_pen)).view(-1, self.beam_size)
+        order = torch.sort(scores, dim=1, descending=True)[1]
+        prefixes = prefixes.view(scores.size(0), self.beam_size, -1)
+        return prefixes.gather(1, order.unsqueeze(2).expand_as(prefixes))
 
     def forward(self, decoder_input_ids=None, encoder_hidden_states=None, encoder_input_mask=None):
 
         tgt, batch_size, max_generation_length = self._prepare_for_search(decoder_input_ids, encoder_hidden_states)
 
         # generate initial buffer of beam_size prefixes-hypotheses
-        log_probs, decoder_mems_list = self._forward(tgt, encoder_hidden_states, encoder_input_mask, None, 0)
+        use_cache = self.use_cache and encoder_hidden_states is not None
+        decoder_mems_list = self._init_cache(encoder_hidden_states, tgt.size(1) + max_generation_length)
+        log_probs, decoder_mems_list = self._forward(
+            tgt, encoder_hidden_states, encoder_input_mask, decoder_mems_list, 0
+        )
         scores, prefixes = torch.topk(log_probs.permute(0, 2, 1), self.beam_size, dim=1)
         scores, prefixes = scores.view(-1, 1), prefixes.view(-1, 1)
 
-        # repeat init target prefixes and cached memory states beam_size times
+        # repeat init target prefixes, cached memory states and source
+        # sequence beam_size times, hypotheses of a batch element are adjacent
         prefixes = torch.cat((tgt.repeat(1, self.beam_size).view(-1, 1), prefixes), dim=1)
-        for j in range(len(decoder_mems_list)):
-            decoder_mems_list[j] = decoder_mems_list[j].repeat(self.beam_size, 1, 1)
-
-        # repeat source sequence beam_size times for beam search
+        # active tracks the batch elements which are still searched
+        active = torch.arange(batch_size, device=prefixes.device)
+        beams = torch.arange(self.beam_size, device=prefixes.device)
+        hypotheses = active.repeat_interleave(self.beam_size)
+        decoder_mems_list = self._select_mems(decoder_mems_list, hypotheses)
         if encoder_hidden_states is not None:
-            _, src_length, hidden_size = encoder_hidden_states.size()
-            encoder_input_mask = encoder_input_mask.repeat(1, self.beam_size).view(-1, src_length)
-            encoder_hidden_states = encoder_hidden_states.repeat(1, self.beam_size, 1).view(
-                -1, src_length, hidden_size
-            )
-        else:
-            hidden_size = decoder_mems_list[0].size(2)
+            encoder_hidden_states = encoder_hidden_states.index_select(0, hypotheses)
+            encoder_input_mask = encoder_input_mask.index_select(0, hypotheses)
 
         # pad_profile tracks finished hypotheses to generate only <pad> tokens
         # if <eos> or <pad> has been generated
@@ -262,6 +330,11 @@ class BeamSearchSequenceGenerator(GreedySequenceGenerator):
         # length penalty correction
         prefixes_len = torch.zeros_like(scores).fill_(prefixes.size(1) + 1)
 
+        # sorted hypotheses of batch elements removed from the search
+        best_prefixes = prefixes.new_full(
+            (batch_size, self.beam_size, prefixes.size(1) + max_generation_length), self.pad
+        )
+
         for i in range(max_generation_length):
 
             # mask all finished hypotheses to exclude them from beam
@@ -283,44 +356,53 @@ class BeamSearchSequenceGenerator(GreedySequenceGenerator):
             pad_mask[:, 1:] = pad_mask[:, 1:] * NEG_INF
             scores = scores + scores_i * (1 - pad_mask).to(scores.dtype)
 
-            # choose top-k hypotheses with length penalty applied
+            # choose top-k hypotheses with length penalty applied, and
+            # remove the length penalty of the hypotheses they continue
             scores = scores / prefixes_len.pow(self.len_pen)
             scores, indices_i = torch.topk(scores.view(-1, self.beam_size ** 2), self.beam_size, dim=1)
-            scores = scores.view(-1, 1) * prefixes_len.pow(self.len_pen)
-
-            # select prefixes which correspond to the chosen hypotheses
-            prefixes = prefixes.unsqueeze(1).repeat(1, self.beam_size, 1)
-            prefixes = torch.cat((prefixes, prefixes_i.unsqueeze(2)), dim=2)
-            prefixes = prefixes.view(batch_size, self.beam_size ** 2, -1)
-            p_len = prefixes.size(2)
-            prefixes_ids = indices_i.unsqueeze(2).repeat(1, 1, p_len)
-            prefixes = prefixes.gather(1, prefixes_ids).view(-1, p_len)
-
-            # reshuffle cached decoder memory states to restore the order
-            # of hypotheses broken after top-k selection
-            mems_ids = indices_i.unsqueeze(2).unsqueeze(3).repeat(1, 1, p_len - 1, hidden_size) // self.beam_size
-            for j in range(len(decoder_mems_list)):
-                decoder_mems_list[j] = (
-                    decoder_mems_list[j]
-                    .view(-1, self.beam_size, p_len - 1, hidden_size)
-                    .gather(1, mems_ids)
-                    .view(-1, p_len - 1, hidden_size)
-                )
+            hypotheses = self._hypotheses(
+                torch.arange(indices_i.size(0), device=active.device), indices_i // self.beam_size
+            )
+            scores = scores.view(-1, 1) * prefixes_len.index_select(0, hypotheses).pow(self.len_pen)
+
+            # select prefixes which correspond to the chosen hypotheses, and
+            # reorder cached decoder memory states accordingly
+            next_tokens = prefixes_i.view(-1, self.beam_size ** 2).gather(1, indices_i).view(-1, 1)
+            prefixes = torch.cat((prefixes.index_select(0, hypotheses), next_tokens), dim=1)
+            decoder_mems_list = self._select_mems(decoder_mems_list, hypotheses, in_place=use_cache)
 
             # update prefixes_len and pad_profile
             not_eos_pad = prefixes.ne(self.eos) & prefixes.ne(self.pad)
             prefixes_len = 1 + not_eos_pad.sum(dim=1, keepdim=True).to(scores.dtype)
             pad_profile = (~not_eos_pad[:, -1:]).long()
 
-            # if all hypotheses end with <eos> or <pad>, interrupt search
-            if pad_profile.sum() == batch_size * self.beam_size:
-                break
-
-        # select best performing hypotheses in each element of the batch
-        scores = scores / prefixes_len.pow(self.len_pen)
-        best_guesses = (
-            torch.argmax(scores.view(-1, self.beam_size), dim=1, keepdim=True).repeat(1, prefixes.size(1)).unsqueeze(1)
-        )
-        tgt = prefixes.view(batch_size, self.beam_size, -1).gather(1, best_guesses)
+            # batch elements with all hypotheses finished keep their scores,
+            # write their hypotheses and remove them from the search
+            finished = pad_profile.view(-1, self.beam_size).all(dim=1)
+            if finished.any():
+                done, remaining = finished.nonzero().view(-1), (~finished).nonzero().view(-1)
+                hypotheses = self._hypotheses(done, beams)
+                best_prefixes[active[done], :, : prefixes.size(1)] = self._sort_hypotheses(
+                    *(t.index_select(0, hypotheses) for t in (prefixes, scores, prefixes_len))
+                )
 
-        return tgt.squeeze(1)
+                active = active[remaining]
+                if active.numel() == 0:
+                    break
+                hypotheses = self._hypotheses(remaining, beams)
+                prefixes, scores, prefixes_len, pad_profile = (
+                    t.index_select(0, hypotheses) for t in (prefixes, scores, prefixes_len, pad_profile)
+                )
+                decoder_mems_list = self._select_mems(decoder_mems_list, hypotheses)
+                if encoder_hidden_states is not None:
+                    encoder_hidden_states = encoder_hidden_states.index_select(0, hypotheses)
+                    encoder_input_mask = encoder_input_mask.index_select(0, hypotheses)
+
+        # write hypotheses of batch elements unfinished at maximum length
+        if active.numel() > 0:
+            best_prefixes[active, :, : prefixes.size(1)] = self._sort_hypotheses(prefixes, scores, prefixes_len)
+
+        best_prefixes = best_prefixes[:, :, : prefixes.size(1)]
+        if self.n_best == 1:
+            return best_prefixes[:, 0]
+        return best_prefixes[:, : self.n_best]
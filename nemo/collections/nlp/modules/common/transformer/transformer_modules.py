@@ -147,17 +147,28 @@ class MultiHeadAttention(nn.Module):
         x = x.view(*new_x_shape)
         return x.permute(0, 2, 1, 3)
 
-    def forward(self, queries, keys, values, attention_mask):
-
-        # attention_mask is needed to hide the tokens which correspond to [PAD]
-        # in the case of BERT, or to hide the future tokens in the case of
-        # vanilla language modeling and translation
-        query = self.query_net(queries)
+    def project_keys_values(self, keys, values):
+        """
+        Projects keys and values to the heads, the part of the attention
+        which can be cached in incremental decoding.
+
+        Returns:
+            key: B x num_heads x L x head_size, pre-divided by sqrt(sqrt(d))
+            value: B x num_heads x L x head_size
+        """
         key = self.key_net(keys)
         value = self.value_net(values)
-        query = self.transpose_for_scores(query) / self.attn_scale
         key = self.transpose_for_scores(key) / self.attn_scale
         value = self.transpose_for_scores(value)
+        return key, value
+
+    def attend(self, queries, key, value, attention_mask):
+        """
+        Attention of queries to keys and values projected by
+        project_keys_values.
+        """
+        query = self.query_net(queries)
+        query = self.transpose_for_scores(query) / self.attn_scale
 
         # for numerical stability we pre-divide query and key by sqrt(sqrt(d))
         attention_scores = torch.matmul(query, key.transpose(-1, -2))
@@ -178,6 +189,14 @@ class MultiHeadAttention(nn.Module):
 
         return output_states
 
+    def forward(self, queries, keys, values, attention_mask):
+
+        # attention_mask is needed to hide the tokens which correspond to [PAD]
+        # in the case of BERT, or to hide the future tokens in the case of
+        # vanilla language modeling and translation
+        key, value = self.project_keys_values(keys, values)
+        return self.attend(queries, key, value, attention_mask)
+
 
 class PositionWiseFF(nn.Module):
     """
@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import nemo.collections.tts.data
-import nemo.collections.tts.helpers
-import nemo.collections.tts.models
+from nemo.utils.lazy_import import lazy_attributes
+
+# Submodules are imported on first access
+__getattr__, __dir__ = lazy_attributes(__name__, dict.fromkeys(('data', 'helpers', 'losses', 'models', 'modules')))
@@ -51,6 +51,7 @@ from tqdm import tqdm
 
 from nemo.collections.asr.parts import collections, parsers
 from nemo.collections.asr.parts.segment import AudioSegment
+from nemo.collections.common.parts.collate import pad_and_stack, stack_lengths
 from nemo.core.classes import Dataset
 from nemo.core.neural_types.elements import *
 from nemo.core.neural_types.neural_type import NeuralType
@@ -119,28 +120,12 @@ class AudioDataset(Dataset):
         tensors corresponding to the audio and audio_length.
         """
 
-        def find_max_len(seq, index):
-            max_len = -1
-            for item in seq:
-                if item[index].size(0) > max_len:
-                    max_len = item[index].size(0)
-            return max_len
-
-        batch_size = len(batch)
-
         audio_signal, audio_lengths = None, None
         if batch[0][0] is not None:
-            if self.n_segments > 0:
-                max_audio_len = self.n_segments
-            else:
-                max_audio_len = find_max_len(batch, 0)
-
-            audio_signal = torch.zeros(batch_size, max_audio_len, dtype=torch.float)
-            audio_lengths = []
-            for i, sample in enumerate(batch):
-                audio_signal[i].narrow(0, 0, sample[0].size(0)).copy_(sample[0])
-                audio_lengths.append(sample[1])
-            audio_lengths = torch.tensor(audio_lengths, dtype=torch.long)
+            signals, audio_lengths = zip(*batch)
+            max_audio_len = self.n_segments if self.n_segments > 0 else None
+            audio_signal = pad_and_stack([signal.float() for signal in signals], max_len=max_audio_len)
+            audio_lengths = stack_lengths(audio_lengths)
 
         return audio_signal, audio_lengths
 
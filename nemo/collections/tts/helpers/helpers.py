@@ -12,12 +12,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Dict, Sequence
+from typing import Dict, Optional, Sequence
 
 import librosa
 import matplotlib.pylab as plt
 import numpy as np
 import torch
+import torch.nn.functional as F
 from numpy import ndarray
 from pesq import pesq
 from pystoi import stoi
@@ -52,6 +53,96 @@ def griffin_lim(magnitudes, n_iters=50, n_fft=1024):
     return signal
 
 
+def batched_griffin_lim(
+    magnitudes: torch.Tensor,
+    lengths: Optional[torch.Tensor] = None,
+    n_iters: int = 50,
+    n_fft: Optional[int] = None,
+    hop_length: Optional[int] = None,
+    window: Optional[torch.Tensor] = None,
+    momentum: float = 0.0,
+    init: Optional[str] = 'random',
+    generator: Optional[torch.Generator] = None,
+) -> torch.Tensor:
+    """
+    Griffin-Lim algorithm for a padded batch of magnitude spectrograms, on the device of the batch
+    Every utterance gets the same result as it would alone: frames are read with reflect padding at the end of
+    every utterance, and overlap-added with the window envelope of its own frames. With momentum > 0, this is
+    the fast Griffin-Lim algorithm (Perraudin et al., 2013), as in librosa.
+    Args:
+        magnitudes: Magnitude spectrograms [B, n_fft // 2 + 1, T]
+        lengths: Number of frames of every spectrogram [B], all T if None
+        n_iters: Number of iterations
+        n_fft: Size of the FFT, 2 * (magnitudes.shape[1] - 1) if None
+        hop_length: Number of samples between frames, n_fft // 4 if None
+        window: Window [n_fft], a Hann window if None
+        momentum: Momentum of the fast Griffin-Lim algorithm, 0 for the Griffin-Lim algorithm
+        init: Initial phases, 'random' or None for zero phases
+        generator: Generator of the random initial phases
+    Returns:
+        Signals [B, hop_length * (T - 1)], zero after the hop_length * (length - 1) samples of every signal
+    """
+    batch_size, n_freqs, max_frames = magnitudes.shape
+    n_fft = n_fft or 2 * (n_freqs - 1)
+    hop_length = hop_length or n_fft // 4
+    device = magnitudes.device
+    if window is None:
+        window = torch.hann_window(n_fft, device=device, dtype=magnitudes.dtype)
+    if lengths is None:
+        lengths = torch.full((batch_size,), max_frames, dtype=torch.long, device=device)
+    lengths = torch.as_tensor(lengths, device=device)
+
+    max_len = hop_length * (max_frames - 1)
+    signal_lengths = hop_length * (lengths - 1)
+    frame_mask = torch.arange(max_frames, device=device) < lengths[:, None]
+    sample_mask = torch.arange(max_len, device=device) < signal_lengths[:, None]
+    magnitudes = magnitudes * frame_mask[:, None]
+
+    # Samples read by centered frames, with reflect padding at both ends of every signal
+    positions = torch.arange(max_len + 2 * (n_fft // 2), device=device) - n_fft // 2
+    last = (signal_lengths[:, None] - 1).clamp(min=0)
+    positions = positions.abs()
+    positions = torch.where(positions > last, 2 * last - positions, positions).clamp(min=0)
+    positions = torch.min(positions, last)
+
+    # Window envelope of the frames of every signal
+    envelope = _overlap_add(window[:, None] ** 2 * frame_mask[:, None], hop_length)
+    envelope = envelope[:, n_fft // 2 : n_fft // 2 + max_len]
+    envelope = torch.where(envelope > 1e-11, envelope, torch.ones_like(envelope))
+
+    def stft(signal):
+        frames = signal.gather(1, positions).unfold(1, n_fft, hop_length)
+        return torch.fft.rfft(frames * window, n=n_fft).transpose(1, 2)
+
+    def istft(spec):
+        frames = torch.fft.irfft(spec, n=n_fft, dim=1) * window[:, None]
+        signal = _overlap_add(frames, hop_length)[:, n_fft // 2 : n_fft // 2 + max_len]
+        return signal / envelope * sample_mask
+
+    if init == 'random':
+        phase = torch.rand(magnitudes.shape, generator=generator, device=device, dtype=magnitudes.dtype)
+        angles = torch.polar(torch.ones_like(phase), 2 * np.pi * phase)
+    elif init is None:
+        angles = torch.ones_like(magnitudes, dtype=torch.promote_types(magnitudes.dtype, torch.complex64))
+    else:
+        raise ValueError(f"Unknown initialization of the phases {init}, expected 'random' or None.")
+
+    rebuilt = torch.zeros_like(angles)
+    for _ in range(n_iters):
+        previous = rebuilt
+        rebuilt = stft(istft(magnitudes * angles))
+        angles = rebuilt - previous * (momentum / (1 + momentum))
+        angles = angles / (angles.abs() + 1e-16)
+    return istft(magnitudes * angles)
+
+
+def _overlap_add(frames: torch.Tensor, hop_length: int) -> torch.Tensor:
+    """Overlap-adds frames [B, n_fft, T] to signals [B, hop_length * (T - 1) + n_fft]"""
+    batch_size, n_fft, num_frames = frames.shape
+    signal = F.fold(frames, (1, hop_length * (num_frames - 1) + n_fft), (1, n_fft), stride=(1, hop_length))
+    return signal.reshape(batch_size, -1)
+
+
 @rank_zero_only
 def log_audio_to_tb(
     swriter,
@@ -21,7 +21,7 @@ import torch
 from hydra.utils import instantiate
 from omegaconf import MISSING, DictConfig, OmegaConf
 
-from nemo.collections.tts.helpers.helpers import griffin_lim
+from nemo.collections.tts.helpers.helpers import batched_griffin_lim
 from nemo.collections.tts.models.base import LinVocoder, MelToSpec, Vocoder
 from nemo.core.classes.common import PretrainedModelInfo
 from nemo.core.neural_types.elements import AudioSignal, MelSpectrogramType
@@ -50,10 +50,12 @@ class MelPsuedoInverseModel(MelToSpec):
         mel_freq = self._cfg['mel_freq']
 
         melinv = librosa.filters.mel(sr=sampling_rate, n_fft=n_fft, fmin=mel_fmin, fmax=mel_fmax, n_mels=mel_freq)
-        self.mel_pseudo_inverse = torch.tensor(melinv, dtype=torch.float)
+        # Built once, moves with the model to any device
+        self.register_buffer('mel_pseudo_inverse', torch.tensor(melinv, dtype=torch.float), persistent=False)
 
     def convert_mel_spectrogram_to_linear(self, mel):
-        lin_spec = torch.tensordot(mel, self.mel_pseudo_inverse, dims=[[1], [0]])
+        mel_pseudo_inverse = self.mel_pseudo_inverse.to(device=mel.device, dtype=mel.dtype)
+        lin_spec = torch.tensordot(mel, mel_pseudo_inverse, dims=[[1], [0]])
         lin_spec = lin_spec.permute(0, 2, 1)
         return lin_spec
 
@@ -78,6 +80,14 @@ class GriffinLimModel(LinVocoder):
         self.n_iters = self._cfg['n_iters']
         self.n_fft = self._cfg['n_fft']
         self.l_hop = self._cfg['l_hop']
+        self.momentum = self._cfg.get('momentum', 0.0)
+        self._windows = {}
+
+    def _window(self, device, dtype):
+        key = (device, dtype)
+        if key not in self._windows:
+            self._windows[key] = torch.hann_window(self.n_fft, device=device, dtype=dtype)
+        return self._windows[key]
 
     def convert_linear_spectrogram_to_audio(self, spec, Ts=None):
         batch_size = spec.shape[0]
@@ -86,15 +96,18 @@ class GriffinLimModel(LinVocoder):
         if Ts is None:
             Ts = [T_max] * batch_size
 
-        max_size = (max(Ts) - 1) * self.l_hop
-        audios = torch.zeros(batch_size, max_size)
-        # Lazy GL implementation. Could be improved by moving to pytorch.
-        for i in range(batch_size):
-            audio = griffin_lim(spec[i, :, 0 : Ts[i]].cpu().numpy(), n_iters=self.n_iters, n_fft=self.n_fft)
-            my_len = audio.shape[0]
-            audios[i, 0:my_len] = torch.from_numpy(audio)
-
-        return audios
+        max_size = (int(max(Ts)) - 1) * self.l_hop
+        # All spectrograms at once on the device of spec, the padding frames of every spectrogram are ignored
+        audios = batched_griffin_lim(
+            spec,
+            lengths=torch.as_tensor(Ts, device=spec.device),
+            n_iters=self.n_iters,
+            n_fft=self.n_fft,
+            hop_length=self.l_hop,
+            window=self._window(spec.device, spec.dtype),
+            momentum=self.momentum,
+        )
+        return audios[:, :max_size]
 
     def setup_training_data(self, cfg):
         pass
@@ -0,0 +1,59 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Compiled kernels used on the CPU when numba is installed."""
+
+import numba
+import numpy as np
+
+
+@numba.njit(parallel=True)
+def maximum_path(value: np.ndarray, mask: np.ndarray, max_neg_val) -> np.ndarray:
+    """
+    Monotonic alignment search of `glow_tts_submodules.maximum_path`, utterances searched in parallel.
+
+    Args:
+        value: masked log-likelihoods [b, t_x, t_y].
+        mask: boolean mask [b, t_x, t_y].
+        max_neg_val: score of unreachable cells, a scalar of the dtype of value.
+
+    Returns:
+        The float32 alignment path [b, t_x, t_y].
+    """
+    b, t_x, t_y = value.shape
+    path = np.zeros(value.shape, dtype=np.float32)
+    for i in numba.prange(b):
+        direction = np.empty((t_x, t_y), dtype=np.bool_)
+        v = np.zeros(t_x, dtype=value.dtype)
+        for j in range(t_y):
+            # Descending x, so that v[x - 1] still holds the score of the previous frame
+            for x in range(t_x - 1, -1, -1):
+                v0 = v[x - 1] if x > 0 else max_neg_val
+                v1 = v[x]
+                direction[x, j] = v1 >= v0
+                if x <= j:
+                    v[x] = (v1 if v1 >= v0 else v0) + value[i, x, j]
+                else:
+                    v[x] = max_neg_val
+
+        index = -1
+        for x in range(t_x):
+            index += mask[i, x, 0]
+        for j in range(t_y - 1, -1, -1):
+            # Negative indices wrap around as in numpy
+            x = index if index >= 0 else index + t_x
+            if mask[i, x, j]:
+                path[i, x, j] = 1.0
+                index += direction[x, j] - 1
+    return path
@@ -13,4 +13,10 @@
 # limitations under the License.
 
 import nemo.core.neural_types
-from nemo.core.classes import *
+from nemo.core.classes import _CLASSES
+from nemo.utils.lazy_import import lazy_attributes
+
+__all__ = list(_CLASSES)
+__getattr__, __dir__ = lazy_attributes(
+    __name__, {**dict.fromkeys(_CLASSES, 'classes'), **dict.fromkeys(('config', 'optim'))}
+)
@@ -12,10 +12,25 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from nemo.utils.lazy_import import lazy_attributes
 
-from nemo.core.classes.common import FileIO, Model, Serialization, Typing, is_typecheck_enabled, typecheck
-from nemo.core.classes.dataset import Dataset, IterableDataset
-from nemo.core.classes.exportable import Exportable, ExportFormat
-from nemo.core.classes.loss import Loss
-from nemo.core.classes.modelPT import ModelPT
-from nemo.core.classes.module import NeuralModule
+# Classes are imported from their modules on first access, e.g. `ModelPT` imports pytorch_lightning and
+# `Exportable` imports onnx only when they are used
+_CLASSES = {
+    'FileIO': 'common',
+    'Model': 'common',
+    'Serialization': 'common',
+    'Typing': 'common',
+    'is_typecheck_enabled': 'common',
+    'typecheck': 'common',
+    'Dataset': 'dataset',
+    'IterableDataset': 'dataset',
+    'Exportable': 'exportable',
+    'ExportFormat': 'exportable',
+    'Loss': 'loss',
+    'ModelPT': 'modelPT',
+    'NeuralModule': 'module',
+}
+
+__all__ = list(_CLASSES)
+__getattr__, __dir__ = lazy_attributes(__name__, _CLASSES)
@@ -15,12 +15,14 @@
 
 """Interfaces common to all Neural Modules and Models."""
 import hashlib
+import time
+import weakref
 from abc import ABC, abstractmethod
 from contextlib import contextmanager
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
-from typing import Dict, Optional, Union
+from typing import Any, Dict, Optional, Tuple, Union
 
 import hydra
 import wrapt
@@ -31,10 +33,16 @@ from nemo.core.neural_types import NeuralType, NeuralTypeComparisonResult
 from nemo.utils import logging
 from nemo.utils.cloud import maybe_download_from_cloud
 
-__all__ = ['Typing', 'FileIO', 'Model', 'Serialization', 'typecheck']
+__all__ = ['Typing', 'FileIO', 'Model', 'Serialization', 'typecheck', 'TypecheckStats']
 
 
 _TYPECHECK_ENABLED = True
+_TYPECHECK_MODE = 'full'
+_TYPECHECK_STATS_ENABLED = False
+# Per `Class.method` statistics of typed calls, see `typecheck.get_typecheck_stats()`
+_TYPECHECK_STATS = {}
+# Bumped by `typecheck.clear_cache()` to invalidate all compiled validators
+_TYPECHECK_CACHE_VERSION = 0
 
 
 def is_typecheck_enabled():
@@ -44,6 +52,19 @@ def is_typecheck_enabled():
     return _TYPECHECK_ENABLED
 
 
+@dataclass
+class TypecheckStats:
+    """Statistics of the typed calls of a method, collected while `typecheck.set_typecheck_stats_enabled()` is on.
+
+    Attributes:
+        calls: Number of calls of the method.
+        check_time: Total time in seconds spent by the decorator, excluding the wrapped method itself.
+    """
+
+    calls: int = 0
+    check_time: float = 0.0
+
+
 class Typing(ABC):
     """
     An interface which endows module with neural types
@@ -400,6 +421,64 @@ class Model(Typing, Serialization, FileIO):
         return instance
 
 
+class _CompiledTypes:
+    """Types of a typed method of a class, resolved once, with everything the `ndim` fast path needs precomputed."""
+
+    def __init__(self, instance: Typing, type_attributes: Tuple[Any, Any], input_types, output_types):
+        if not isinstance(instance, Typing):
+            raise RuntimeError("Only classes which inherit nemo.core.Typing can use this decorator !")
+
+        if hasattr(instance, 'input_ports') or hasattr(instance, 'output_ports'):
+            raise RuntimeError(
+                "Typing requires override of `input_types()` and `output_types()`, "
+                "not `input_ports() and `output_ports()`"
+            )
+
+        self.type_attributes = type_attributes
+        self.version = _TYPECHECK_CACHE_VERSION
+        self.input_types = input_types
+        self.output_types = output_types
+        if input_types is not None:
+            self.input_ndims = {
+                key: len(type_val.axes) if type_val.axes is not None else None for key, type_val in input_types.items()
+            }
+            self.mandatory_inputs = sum(1 for type_val in input_types.values() if not type_val.optional)
+
+    def is_valid(self, type_attributes: Tuple[Any, Any]) -> bool:
+        return self.version == _TYPECHECK_CACHE_VERSION and all(
+            attribute is cached for attribute, cached in zip(type_attributes, self.type_attributes)
+        )
+
+    def validate_inputs_ndim(self, instance: Typing, kwargs: Dict[str, Any]):
+        """Checks argument names and the number of dimensions of inputs, without comparing neural types."""
+        if len(kwargs) < self.mandatory_inputs or len(kwargs) > len(self.input_ndims):
+            raise TypeError(
+                f"Number of input arguments provided ({len(kwargs)}) is not as expected. Function has "
+                f"{len(self.input_ndims)} total inputs with {self.mandatory_inputs} mandatory inputs."
+            )
+
+        for key, value in kwargs.items():
+            if key not in self.input_ndims:
+                raise TypeError(
+                    f"Input argument {key} has no corresponding input_type match. "
+                    f"Existing input_types = {self.input_ndims.keys()}"
+                )
+            ndim = self.input_ndims[key]
+            if ndim is not None:
+                self._check_ndim(instance, key, value, ndim)
+
+    def _check_ndim(self, instance: Typing, name: str, value, ndim: int):
+        if isinstance(value, (list, tuple)):
+            for elem in value:
+                self._check_ndim(instance, name, elem, ndim)
+        elif hasattr(value, 'shape') and len(value.shape) != ndim:
+            raise TypeError(
+                f"Input shape mismatch occured for {name} in module {instance.__class__.__name__} : \n"
+                f"Input shape expected = {self.input_types[name].axes} | \n"
+                f"Input shape found : {value.shape}"
+            )
+
+
 class typecheck:
     class TypeState(Enum):
         """
@@ -445,6 +524,8 @@ class typecheck:
         """
         self.input_types = input_types
         self.output_types = output_types
+        # Compiled types per class of the decorated instances, used by the `ndim` and `production` modes
+        self._compiled = weakref.WeakKeyDictionary()
 
         if input_types == self.TypeState.UNINITIALIZED:
             self.input_override = False
@@ -461,6 +542,60 @@ class typecheck:
         if instance is None:
             raise RuntimeError("Only classes which inherit nemo.core.Typing can use this decorator !")
 
+        if not _TYPECHECK_STATS_ENABLED:
+            if _TYPECHECK_MODE == 'full':
+                return self._call_full(wrapped, instance, args, kwargs)
+            return self._call_compiled(wrapped, instance, args, kwargs)
+
+        # Time spent in the decorator is the total time minus the time of the wrapped method
+        timer = [0.0]
+
+        def timed_wrapped(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return wrapped(*args, **kwargs)
+            finally:
+                timer[0] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        try:
+            if _TYPECHECK_MODE == 'full':
+                return self._call_full(timed_wrapped, instance, args, kwargs)
+            return self._call_compiled(timed_wrapped, instance, args, kwargs)
+        finally:
+            name = f"{type(instance).__name__}.{wrapped.__name__}"
+            stats = _TYPECHECK_STATS.get(name)
+            if stats is None:
+                stats = _TYPECHECK_STATS[name] = TypecheckStats()
+            stats.calls += 1
+            stats.check_time += time.perf_counter() - start - timer[0]
+
+    def _call_compiled(self, wrapped, instance: Typing, args, kwargs):
+        """`ndim` and `production` modes: types are resolved once per class of the instance."""
+        cls = type(instance)
+        type_attributes = (getattr(cls, 'input_types', None), getattr(cls, 'output_types', None))
+        compiled = self._compiled.get(cls)
+        if compiled is None or not compiled.is_valid(type_attributes):
+            input_types = self.input_types if self.input_override else instance.input_types
+            output_types = self.output_types if self.output_override else instance.output_types
+            compiled = self._compiled[cls] = _CompiledTypes(instance, type_attributes, input_types, output_types)
+
+        if _TYPECHECK_MODE == 'production' or (compiled.input_types is None and compiled.output_types is None):
+            return wrapped(*args, **kwargs)
+
+        if compiled.input_types is not None:
+            if len(args) > 0:
+                raise TypeError("All arguments must be passed by kwargs only for typed methods")
+            compiled.validate_inputs_ndim(instance, kwargs)
+
+        outputs = wrapped(*args, **kwargs)
+
+        instance._attach_and_validate_output_types(output_types=compiled.output_types, out_objects=outputs)
+
+        return outputs
+
+    def _call_full(self, wrapped, instance: Typing, args, kwargs):
+        """`full` mode: types are resolved on every call and neural types of inputs are compared."""
         if not isinstance(instance, Typing):
             raise RuntimeError("Only classes which inherit nemo.core.Typing can use this decorator !")
 
@@ -511,6 +646,62 @@ class typecheck:
         global _TYPECHECK_ENABLED
         _TYPECHECK_ENABLED = enabled
 
+    @staticmethod
+    def set_typecheck_mode(mode: str = 'full'):
+        """
+        Sets how much typed methods check, globally.
+
+        Args:
+            mode: One of
+                - `full` (default): types are resolved from the instance on every call, neural types of inputs are
+                    compared with the expected types, and the number of dimensions of inputs and outputs is checked.
+                - `ndim`: types are resolved once per class (and again if the class replaces `input_types` or
+                    `output_types`, or after `typecheck.clear_cache()`), only argument names and the number of
+                    dimensions are checked. Types which depend on the state of an instance are not re-resolved.
+                - `production`: nothing is checked and no neural types are attached to outputs, only statistics
+                    are collected if enabled.
+        """
+        global _TYPECHECK_MODE
+        if mode not in ('full', 'ndim', 'production'):
+            raise ValueError(f"Typecheck mode must be one of `full`, `ndim` or `production`, got `{mode}`")
+        _TYPECHECK_MODE = mode
+
+    @staticmethod
+    def get_typecheck_mode() -> str:
+        return _TYPECHECK_MODE
+
+    @staticmethod
+    @contextmanager
+    def typecheck_mode(mode: str):
+        previous_mode = typecheck.get_typecheck_mode()
+        typecheck.set_typecheck_mode(mode)
+        try:
+            yield
+        finally:
+            typecheck.set_typecheck_mode(previous_mode)
+
+    @staticmethod
+    def clear_cache():
+        """Invalidates the types resolved by the `ndim` and `production` modes."""
+        global _TYPECHECK_CACHE_VERSION
+        _TYPECHECK_CACHE_VERSION += 1
+
+    @staticmethod
+    def set_typecheck_stats_enabled(enabled: bool = True):
+        """Enables collection of per method statistics of typed calls, see `typecheck.get_typecheck_stats()`."""
+        global _TYPECHECK_STATS_ENABLED
+        _TYPECHECK_STATS_ENABLED = enabled
+
+    @staticmethod
+    def get_typecheck_stats() -> Dict[str, TypecheckStats]:
+        """Statistics of typed calls by `Class.method`, collected since the last
+        `typecheck.reset_typecheck_stats()`."""
+        return dict(_TYPECHECK_STATS)
+
+    @staticmethod
+    def reset_typecheck_stats():
+        _TYPECHECK_STATS.clear()
+
     @staticmethod
     @contextmanager
     def disable_checks():
@@ -17,7 +17,6 @@ from collections import defaultdict
 from enum import Enum
 from typing import Dict
 
-import onnx
 import torch
 
 from nemo.core.classes import typecheck
@@ -152,7 +151,9 @@ class Exportable(ABC):
                         example_outputs=_out_example,
                     )
 
-                    # Verify the model can be read, and is valid
+                    # Verify the model can be read, and is valid, onnx is only imported for export
+                    import onnx
+
                     onnx_model = onnx.load(output)
                     onnx.checker.check_model(onnx_model, full_check=True)
 
@@ -14,6 +14,7 @@
 
 import copy
 import inspect
+import json
 import os
 import shutil
 import tarfile
@@ -23,6 +24,7 @@ from os import path
 from typing import Callable, Dict, List, Optional, Union
 
 import hydra
+import numpy as np
 import torch
 from omegaconf import DictConfig, OmegaConf
 from pytorch_lightning import LightningModule, Trainer
@@ -37,6 +39,10 @@ __all__ = ['ModelPT']
 
 _MODEL_CONFIG_YAML = "model_config.yaml"
 _MODEL_WEIGHTS = "model_weights.ckpt"
+# Uncompressed .nemo files store weights as raw tensor data, described by a json index
+_MODEL_WEIGHTS_RAW = "model_weights.bin"
+_MODEL_WEIGHTS_INDEX = "model_weights_index.json"
+_MODEL_WEIGHTS_ALIGNMENT = 64
 _MODEL_IS_RESTORED = False
 
 
@@ -158,7 +164,7 @@ class ModelPT(LightningModule, Model):
         else:
             return src
 
-    def save_to(self, save_path: str):
+    def save_to(self, save_path: str, compress: bool = True):
         """
         Saves model instance (weights and configuration) into .nemo file. You can use "restore_from" method to fully
         restore instance from .nemo file.
@@ -167,8 +173,16 @@ class ModelPT(LightningModule, Model):
             model_config.yaml - model configuration in .yaml format. You can deserialize this into cfg argument for model's constructor
             model_wights.chpt - model checkpoint
 
+        With compress=False, .nemo file is an uncompressed tar in which weights are stored as raw tensor data:
+            model_weights.bin - tensors of the state dict, each aligned to 64 bytes
+            model_weights_index.json - name, dtype, shape and offset in model_weights.bin of every tensor
+        `restore_from` reads such files without extracting the weights and memory maps them, which makes restoring
+        large models much faster. Tensors which numpy does not support (e.g. bfloat16) are stored in
+        model_weights.ckpt instead.
+
         Args:
             save_path: Path to .nemo file where model instance should be saved
+            compress: Whether to write a tar.gz archive, or an uncompressed archive with raw weights.
         """
         with tempfile.TemporaryDirectory() as tmpdir:
             config_yaml = path.join(tmpdir, _MODEL_CONFIG_YAML)
@@ -182,15 +196,19 @@ class ModelPT(LightningModule, Model):
                         logging.error(f"Could not copy artifact {src} used in {conf_path}")
 
             self.to_config_file(path2yaml_file=config_yaml)
-            torch.save(self.state_dict(), model_weights)
-            self.__make_nemo_file_from_folder(filename=save_path, source_dir=tmpdir)
+            if compress or not self.__save_raw_state_dict(self.state_dict(), tmpdir):
+                torch.save(self.state_dict(), model_weights)
+            self.__make_nemo_file_from_folder(filename=save_path, source_dir=tmpdir, compress=compress)
 
     @classmethod
     def restore_from(
         cls, restore_path: str, override_config_path: Optional[str] = None, map_location: Optional[torch.device] = None
     ):
         """
-        Restores model instance (weights and configuration) into .nemo file
+        Restores model instance (weights and configuration) into .nemo file.
+        Weights of uncompressed .nemo files (see `save_to`) are memory mapped instead of extracted. On CPU, the
+        parameters of the restored model then share the (copy-on-write) mapped memory.
+
         Args:
             restore_path: path to .nemo file from which model should be instantiated
             override_config_path: path to a yaml config that will override the internal
@@ -221,7 +239,8 @@ class ModelPT(LightningModule, Model):
         with tempfile.TemporaryDirectory() as tmpdir:
             try:
                 cls.__set_model_restore_state(is_being_restored=True)
-                cls.__unpack_nemo_file(path2file=restore_path, out_folder=tmpdir)
+                compressed = cls.__is_compressed_nemo_file(restore_path)
+                cls.__unpack_nemo_file(path2file=restore_path, out_folder=tmpdir, extract_weights=compressed)
                 os.chdir(tmpdir)
                 if override_config_path is None:
                     config_yaml = path.join(tmpdir, _MODEL_CONFIG_YAML)
@@ -239,7 +258,10 @@ class ModelPT(LightningModule, Model):
                 OmegaConf.set_struct(conf, True)
                 instance = cls.from_config_dict(config=conf)
                 instance = instance.to(map_location)
-                instance.load_state_dict(torch.load(model_weights, map_location=map_location))
+                if compressed:
+                    instance.load_state_dict(torch.load(model_weights, map_location=map_location))
+                else:
+                    cls.__load_uncompressed_state_dict(instance, restore_path, map_location)
 
                 logging.info(f'Model {cls.__name__} was successfully restored from {restore_path}.')
             finally:
@@ -302,8 +324,10 @@ class ModelPT(LightningModule, Model):
             try:
                 cls.__unpack_nemo_file(path2file=restore_path, out_folder=tmpdir)
                 os.chdir(tmpdir)
-                model_weights = path.join(tmpdir, _MODEL_WEIGHTS)
-                state_dict = torch.load(model_weights)
+                if cls.__is_compressed_nemo_file(restore_path):
+                    state_dict = torch.load(path.join(tmpdir, _MODEL_WEIGHTS))
+                else:
+                    state_dict = cls.__read_uncompressed_state_dict(restore_path, map_location='cpu')
 
                 if not split_by_module:
                     filepath = os.path.join(save_dir, _MODEL_WEIGHTS)
@@ -943,20 +967,107 @@ class ModelPT(LightningModule, Model):
         self._set_hparams(cfg)
 
     @staticmethod
-    def __make_nemo_file_from_folder(filename, source_dir):
-        with tarfile.open(filename, "w:gz") as tar:
-            # tar.add(source_dir, arcname=path.basename(source_dir))
-            tar.add(source_dir, arcname="./")
+    def __make_nemo_file_from_folder(filename, source_dir, compress=True):
+        # Write to a new file and replace the target, as models restored from an uncompressed target map its memory
+        fd, tmp_filename = tempfile.mkstemp(dir=path.dirname(path.abspath(filename)), suffix='.nemo.tmp')
+        os.close(fd)
+        try:
+            with tarfile.open(tmp_filename, "w:gz" if compress else "w") as tar:
+                # tar.add(source_dir, arcname=path.basename(source_dir))
+                tar.add(source_dir, arcname="./")
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(tmp_filename, 0o666 & ~umask)
+            os.replace(tmp_filename, filename)
+        finally:
+            if path.exists(tmp_filename):
+                os.remove(tmp_filename)
 
     @staticmethod
-    def __unpack_nemo_file(path2file: str, out_folder: str) -> str:
+    def __unpack_nemo_file(path2file: str, out_folder: str, extract_weights: bool = True) -> str:
         if not path.exists(path2file):
             raise FileNotFoundError(f"{path2file} does not exist")
-        tar = tarfile.open(path2file, "r:gz")
-        tar.extractall(path=out_folder)
-        tar.close()
+        with tarfile.open(path2file, "r:*") as tar:
+            members = tar.getmembers()
+            if not extract_weights:
+                weights = (_MODEL_WEIGHTS, _MODEL_WEIGHTS_RAW)
+                members = [member for member in members if path.basename(member.name) not in weights]
+            tar.extractall(path=out_folder, members=members)
         return out_folder
 
+    @staticmethod
+    def __is_compressed_nemo_file(path2file: str) -> bool:
+        with open(path2file, 'rb') as f:
+            return f.read(2) == b'\x1f\x8b'
+
+    @staticmethod
+    def __save_raw_state_dict(state_dict: Dict[str, torch.Tensor], folder: str) -> bool:
+        """Writes a state dict as raw tensor data with an index into folder, returns False if that is not possible."""
+        try:
+            arrays = {key: value.detach().cpu().contiguous().numpy() for key, value in state_dict.items()}
+        except (AttributeError, TypeError):
+            # Not a tensor, or a dtype numpy does not support
+            return False
+
+        index = {}
+        offset = 0
+        with open(path.join(folder, _MODEL_WEIGHTS_RAW), 'wb') as f:
+            for key, array in arrays.items():
+                padding = -offset % _MODEL_WEIGHTS_ALIGNMENT
+                f.write(b'\0' * padding)
+                offset += padding
+                index[key] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+                f.write(array.tobytes())
+                offset += array.nbytes
+
+        with open(path.join(folder, _MODEL_WEIGHTS_INDEX), 'w') as f:
+            json.dump({'version': 1, 'tensors': index}, f)
+        return True
+
+    @staticmethod
+    def __read_uncompressed_state_dict(path2file: str, map_location) -> Dict[str, torch.Tensor]:
+        """State dict of an uncompressed .nemo file. Raw weights are memory mapped (copy-on-write) on CPU."""
+        with tarfile.open(path2file, "r:") as tar:
+            members = {path.basename(member.name): member for member in tar.getmembers()}
+            if _MODEL_WEIGHTS_RAW not in members:
+                return torch.load(tar.extractfile(members[_MODEL_WEIGHTS]), map_location=map_location)
+            index = json.load(tar.extractfile(members[_MODEL_WEIGHTS_INDEX]))
+            raw_offset = members[_MODEL_WEIGHTS_RAW].offset_data
+            raw_size = members[_MODEL_WEIGHTS_RAW].size
+
+        state_dict = {}
+        if raw_size == 0:
+            data = np.zeros(0, dtype=np.uint8)
+        else:
+            data = np.memmap(path2file, dtype=np.uint8, mode='c', offset=raw_offset, shape=(raw_size,))
+        for key, entry in index['tensors'].items():
+            dtype = np.dtype(entry['dtype'])
+            nbytes = int(np.prod(entry['shape'])) * dtype.itemsize
+            array = data[entry['offset'] : entry['offset'] + nbytes].view(dtype).reshape(entry['shape'])
+            if not dtype.isnative:
+                array = array.astype(dtype.newbyteorder('='))
+            state_dict[key] = torch.from_numpy(array)
+        return state_dict
+
+    @classmethod
+    def __load_uncompressed_state_dict(cls, instance: 'ModelPT', path2file: str, map_location: torch.device):
+        state_dict = cls.__read_uncompressed_state_dict(path2file, map_location=map_location)
+
+        own_state = instance.state_dict(keep_vars=True)
+        shares_memory = torch.device(map_location).type == 'cpu' and own_state.keys() == state_dict.keys()
+        shares_memory = shares_memory and all(
+            own_state[key].shape == value.shape and own_state[key].dtype == value.dtype
+            for key, value in state_dict.items()
+        )
+        if not shares_memory:
+            instance.load_state_dict(state_dict)
+            return
+
+        # Replace the randomly initialized tensors of the model with the mapped ones instead of copying them
+        with torch.no_grad():
+            for key, value in state_dict.items():
+                own_state[key].data = value
+
     @staticmethod
     def __is_model_being_restored() -> bool:
         global _MODEL_IS_RESTORED
@@ -191,6 +191,8 @@ class NovogradParams(OptimizerParams):
         weight_decay (float, optional): weight decay (L2 penalty) (default: 0)
         amsgrad (boolean, optional): whether to use the AMSGrad variant of this
             algorithm from the paper "On the Convergence of Adam and Beyond"
+        foreach (boolean, optional): whether to use multi-tensor operations
+            (default: None, if supported by the torch version)
     """
 
     betas: Tuple[float, float] = (0.95, 0.98)
@@ -201,6 +203,7 @@ class NovogradParams(OptimizerParams):
     luc: bool = False
     luc_trust: float = 1e-3
     luc_eps: float = 1e-8
+    foreach: Optional[bool] = None
 
 
 def register_optimizer_params(name: str, optimizer_params: OptimizerParams):
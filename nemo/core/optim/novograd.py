@@ -27,6 +27,13 @@ def _check_valid_opt_params(lr, eps, betas):
         raise ValueError(f"Betas have to be between 0 and 1: {betas}")
 
 
+_FOREACH_OPS = ('_foreach_norm', '_foreach_add_', '_foreach_mul_', '_foreach_div_', '_foreach_zero_')
+
+
+def _has_foreach_ops():
+    return all(hasattr(torch, op) for op in _FOREACH_OPS)
+
+
 class Novograd(Optimizer):
     """Implements Novograd algorithm.
     It has been proposed  in "Stochastic Gradient Methods with Layer-wise
@@ -43,6 +50,11 @@ class Novograd(Optimizer):
         weight_decay (float, optional): weight decay (L2 penalty) (default: 0)
         amsgrad (boolean, optional): whether to use the AMSGrad variant of this
             algorithm from the paper "On the Convergence of Adam and Beyond"
+        foreach (boolean, optional): whether to update all parameters of a group
+            on the same device together with multi-tensor (torch._foreach_*)
+            operations, instead of one parameter at a time. Neither
+            implementation synchronizes with the device.
+            (default: None, multi-tensor if supported by the torch version)
     """
 
     def __init__(
@@ -57,21 +69,42 @@ class Novograd(Optimizer):
         luc=False,
         luc_trust=1e-3,
         luc_eps=1e-8,
+        foreach=None,
     ):
         _check_valid_opt_params(lr, eps, betas)
+        if foreach and not _has_foreach_ops():
+            raise ValueError("foreach=True needs a torch version with multi-tensor (torch._foreach_*) operations.")
         defaults = dict(
             lr=lr, betas=betas, eps=eps, weight_decay=weight_decay, grad_averaging=grad_averaging, amsgrad=amsgrad,
         )
         self.luc = luc
         self.luc_trust = luc_trust
         self.luc_eps = luc_eps
+        self.foreach = _has_foreach_ops() if foreach is None else foreach
         super(Novograd, self).__init__(params, defaults)
 
     def __setstate__(self, state):
         super(Novograd, self).__setstate__(state)
         for group in self.param_groups:
             group.setdefault("amsgrad", False)
-
+        if not hasattr(self, "foreach"):
+            self.foreach = _has_foreach_ops()
+
+    def _init_state(self, p, amsgrad):
+        state = self.state[p]
+        if not state:
+            state["step"] = 0
+            # Exponential moving average of gradient values
+            state["exp_avg"] = torch.zeros_like(p.data)
+            # Exponential moving average of squared gradient values
+            state["exp_avg_sq"] = torch.zeros([]).to(state["exp_avg"].device)
+            if amsgrad:
+                # Maintains max of all exp moving avg of squared grad
+                state["max_exp_avg_sq"] = torch.zeros([]).to(state["exp_avg"].device)
+        state["step"] += 1
+        return state
+
+    @torch.no_grad()
     def step(self, closure=None):
         """Performs a single optimization step.
         Arguments:
@@ -80,66 +113,110 @@ class Novograd(Optimizer):
         """
         loss = None
         if closure is not None:
-            loss = closure()
+            with torch.enable_grad():
+                loss = closure()
 
         for group in self.param_groups:
+            params = []
             for p in group["params"]:
                 if p.grad is None:
                     continue
-                grad = p.grad.data
-                if grad.is_sparse:
+                if p.grad.is_sparse:
                     raise RuntimeError("Sparse gradients are not supported.")
-                amsgrad = group["amsgrad"]
-                state = self.state[p]
-
-                # State initialization
-                if not state:
-                    state["step"] = 0
-                    # Exponential moving average of gradient values
-                    state["exp_avg"] = torch.zeros_like(p.data)
-                    # Exponential moving average of squared gradient values
-                    state["exp_avg_sq"] = torch.zeros([]).to(state["exp_avg"].device)
-                    if amsgrad:
-                        # Maintains max of all exp moving avg of squared grad
-                        state["max_exp_avg_sq"] = torch.zeros([]).to(state["exp_avg"].device)
-
-                exp_avg, exp_avg_sq = state["exp_avg"], state["exp_avg_sq"]
-                if amsgrad:
-                    max_exp_avg_sq = state["max_exp_avg_sq"]
-                beta1, beta2 = group["betas"]
-
-                state["step"] += 1
-
-                norm = grad.norm().pow(2)
-
-                if exp_avg_sq == 0:
-                    exp_avg_sq.copy_(norm)
-                else:
-                    exp_avg_sq.mul_(beta2).add_(norm, alpha=1.0 - beta2)
-
-                if amsgrad:
-                    # Maintains max of all 2nd moment running avg till now
-                    torch.max(max_exp_avg_sq, exp_avg_sq, out=max_exp_avg_sq)
-                    # Use the max for normalizing running avg. of gradient
-                    denom = max_exp_avg_sq.sqrt().add_(group["eps"])
-                else:
-                    denom = exp_avg_sq.sqrt().add_(group["eps"])
-
-                grad.div_(denom)
-                if group["weight_decay"] != 0:
-                    grad.add_(p.data, alpha=group["weight_decay"])
-                if group["grad_averaging"]:
-                    grad.mul_(1 - beta1)
-                exp_avg.mul_(beta1).add_(grad)
-
-                if self.luc:
-                    # Clip update so that updates are less than eta*weights
-                    data_norm = torch.norm(p.data)
-                    grad_norm = torch.norm(exp_avg.data)
-                    luc_factor = self.luc_trust * data_norm / (grad_norm + self.luc_eps)
-                    luc_factor = min(luc_factor, group["lr"])
-                    p.data.add_(exp_avg, alpha=-luc_factor)
-                else:
-                    p.data.add_(exp_avg, alpha=-group["lr"])
+                params.append(p)
+
+            if self.foreach:
+                devices = {}
+                for p in params:
+                    devices.setdefault(p.device, []).append(p)
+                for device_params in devices.values():
+                    self._multi_tensor_step(group, device_params)
+            else:
+                for p in params:
+                    self._single_tensor_step(group, p)
 
         return loss
+
+    def _single_tensor_step(self, group, p):
+        grad = p.grad.data
+        amsgrad = group["amsgrad"]
+        state = self._init_state(p, amsgrad)
+
+        exp_avg, exp_avg_sq = state["exp_avg"], state["exp_avg_sq"]
+        beta1, beta2 = group["betas"]
+
+        norm = grad.norm().pow(2)
+
+        # The second moment starts at the first norm, selected on the device instead of branching on its value
+        exp_avg_sq.copy_(torch.where(exp_avg_sq == 0, norm, exp_avg_sq * beta2 + norm * (1.0 - beta2)))
+
+        if amsgrad:
+            max_exp_avg_sq = state["max_exp_avg_sq"]
+            # Maintains max of all 2nd moment running avg till now
+            torch.max(max_exp_avg_sq, exp_avg_sq, out=max_exp_avg_sq)
+            # Use the max for normalizing running avg. of gradient
+            denom = max_exp_avg_sq.sqrt().add_(group["eps"])
+        else:
+            denom = exp_avg_sq.sqrt().add_(group["eps"])
+
+        grad.div_(denom)
+        if group["weight_decay"] != 0:
+            grad.add_(p.data, alpha=group["weight_decay"])
+        if group["grad_averaging"]:
+            grad.mul_(1 - beta1)
+        exp_avg.mul_(beta1).add_(grad)
+
+        if self.luc:
+            # Clip update so that updates are less than eta*weights
+            data_norm = torch.norm(p.data)
+            grad_norm = torch.norm(exp_avg.data)
+            luc_factor = self.luc_trust * data_norm / (grad_norm + self.luc_eps)
+            luc_factor = luc_factor.clamp(max=group["lr"])
+            p.data.sub_(exp_avg * luc_factor)
+        else:
+            p.data.add_(exp_avg, alpha=-group["lr"])
+
+    def _multi_tensor_step(self, group, params):
+        """Same update as `_single_tensor_step` for all `params` (on one device) with multi-tensor operations,
+        with the per-parameter scalars (norms and second moments) stacked into vectors."""
+        amsgrad = group["amsgrad"]
+        beta1, beta2 = group["betas"]
+        states = [self._init_state(p, amsgrad) for p in params]
+        grads = [p.grad.data for p in params]
+        params = [p.data for p in params]
+        exp_avgs = [state["exp_avg"] for state in states]
+        exp_avg_sqs = [state["exp_avg_sq"] for state in states]
+
+        norms = torch.stack(torch._foreach_norm(grads)).pow(2)
+        exp_avg_sq = torch.stack(exp_avg_sqs)
+        exp_avg_sq = torch.where(exp_avg_sq == 0, norms, exp_avg_sq * beta2 + norms * (1.0 - beta2))
+        self._copy_scalars(exp_avg_sqs, exp_avg_sq)
+
+        if amsgrad:
+            max_exp_avg_sqs = [state["max_exp_avg_sq"] for state in states]
+            exp_avg_sq = torch.max(torch.stack(max_exp_avg_sqs), exp_avg_sq)
+            self._copy_scalars(max_exp_avg_sqs, exp_avg_sq)
+        denom = exp_avg_sq.sqrt().add_(group["eps"])
+
+        torch._foreach_div_(grads, list(denom.unbind()))
+        if group["weight_decay"] != 0:
+            torch._foreach_add_(grads, params, alpha=group["weight_decay"])
+        if group["grad_averaging"]:
+            torch._foreach_mul_(grads, 1 - beta1)
+        torch._foreach_mul_(exp_avgs, beta1)
+        torch._foreach_add_(exp_avgs, grads)
+
+        if self.luc:
+            # Clip update so that updates are less than eta*weights
+            data_norm = torch.stack(torch._foreach_norm(params))
+            grad_norm = torch.stack(torch._foreach_norm(exp_avgs))
+            luc_factor = (self.luc_trust * data_norm / (grad_norm + self.luc_eps)).clamp(max=group["lr"])
+            torch._foreach_add_(params, torch._foreach_mul(exp_avgs, list((-luc_factor).unbind())))
+        else:
+            torch._foreach_add_(params, exp_avgs, alpha=-group["lr"])
+
+    @staticmethod
+    def _copy_scalars(scalars, values):
+        """Copies a vector of values into a list of 0-d state tensors."""
+        torch._foreach_zero_(scalars)
+        torch._foreach_add_(scalars, list(values.unbind()))
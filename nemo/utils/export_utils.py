@@ -102,6 +102,95 @@ def expand_BatchNorm1d(bn1d: nn.Module) -> Optional[nn.BatchNorm2d]:
     return mod
 
 
+def fuse_conv_bn_1d(conv: nn.Conv1d, bn: nn.BatchNorm1d) -> nn.Conv1d:
+    """
+    Folds a BatchNorm1d in evaluation mode into the preceding Conv1d.
+    Args:
+        conv: the Conv1d pytorch module whose outputs are normalized by bn
+        bn: the BatchNorm1d pytorch module to fold, with running statistics
+    Returns:
+        Conv1D module with bias computing bn(conv(x)) of evaluation mode
+    """
+    if bn.running_mean is None or bn.running_var is None:
+        raise ValueError("Unable to fold a BatchNorm1d without running statistics")
+    fused = nn.Conv1d(
+        conv.in_channels,
+        conv.out_channels,
+        kernel_size=conv.kernel_size,
+        stride=conv.stride,
+        padding=conv.padding,
+        dilation=conv.dilation,
+        groups=conv.groups,
+        bias=True,
+        padding_mode=conv.padding_mode,
+    ).to(device=conv.weight.device, dtype=conv.weight.dtype)
+
+    with torch.no_grad():
+        scale = (bn.running_var.double() + bn.eps).rsqrt()
+        shift = -bn.running_mean.double() * scale
+        if bn.affine:
+            scale = scale * bn.weight.double()
+            shift = shift * bn.weight.double() + bn.bias.double()
+        bias = conv.bias.double() if conv.bias is not None else torch.zeros_like(scale)
+        fused.weight.copy_(conv.weight.double() * scale.view(-1, 1, 1))
+        fused.bias.copy_(bias * scale + shift)
+    return fused
+
+
+def fuse_depthwise_pointwise_1d(depthwise: nn.Conv1d, pointwise: nn.Conv1d) -> Optional[nn.Conv1d]:
+    """
+    Merges a depthwise Conv1d and the following pointwise Conv1d into a single Conv1d. The merged convolution
+    takes kernel_size times more multiply-adds than the pair, so it only pays off when kernel launches dominate.
+    Args:
+        depthwise: the depthwise Conv1d pytorch module
+        pointwise: the pointwise (kernel size 1, single group) Conv1d pytorch module applied to its outputs
+    Returns:
+        Conv1D module computing pointwise(depthwise(x)), or None if the modules are not such a pair
+    """
+    if not isinstance(depthwise, nn.Conv1d) or not isinstance(pointwise, nn.Conv1d):
+        return None
+    if not (depthwise.groups == depthwise.in_channels == depthwise.out_channels == pointwise.in_channels):
+        return None
+    if pointwise.kernel_size[0] != 1 or pointwise.stride[0] != 1 or pointwise.padding[0] != 0 or pointwise.groups != 1:
+        return None
+    if depthwise.padding_mode != 'zeros':
+        return None
+
+    has_bias = depthwise.bias is not None or pointwise.bias is not None
+    fused = nn.Conv1d(
+        depthwise.in_channels,
+        pointwise.out_channels,
+        kernel_size=depthwise.kernel_size,
+        stride=depthwise.stride,
+        padding=depthwise.padding,
+        dilation=depthwise.dilation,
+        bias=has_bias,
+    ).to(device=depthwise.weight.device, dtype=depthwise.weight.dtype)
+
+    with torch.no_grad():
+        # [C_out, C_in, 1] * [1, C_in, K]
+        fused.weight.copy_(pointwise.weight * depthwise.weight.transpose(0, 1))
+        if has_bias:
+            bias = pointwise.bias.clone() if pointwise.bias is not None else fused.bias.new_zeros(fused.out_channels)
+            if depthwise.bias is not None:
+                bias += pointwise.weight[:, :, 0] @ depthwise.bias
+            fused.bias.copy_(bias)
+    return fused
+
+
+def remove_Dropout(dropout: nn.Module) -> Optional[nn.Identity]:
+    """
+    Replaces a Dropout with an Identity, which is what dropout computes in evaluation mode.
+    Args:
+        dropout: the Dropout pytorch module to remove
+    Returns:
+        Identity module
+    """
+    if not isinstance(dropout, nn.Dropout):
+        return None
+    return nn.Identity()
+
+
 def simple_replace(BaseT: Type[nn.Module], DestT: Type[nn.Module]) -> Callable[[nn.Module], Optional[nn.Module]]:
     """
     Generic function generator to replace BaseT module with DestT. BaseT and DestT should have same atrributes. No weights are copied.
@@ -172,6 +261,11 @@ default_1D_2D_replacements = {
 }
 
 
+default_inference_replacements = {
+    "Dropout": remove_Dropout,
+}
+
+
 def replace_for_export(model: nn.Module, replace_1D_2D: bool = False) -> nn.Module:
     """
     Top-level function to replace default set of modules in model
@@ -0,0 +1,83 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Lazy attributes of packages (PEP 562), so that importing a package does not import all of its submodules and
+their dependencies until they are used."""
+
+import importlib
+import subprocess
+import sys
+from typing import Callable, Dict, List, Optional, Tuple
+
+__all__ = ['import_times', 'lazy_attributes']
+
+
+def lazy_attributes(
+    package: str, attributes: Dict[str, Optional[str]]
+) -> Tuple[Callable[[str], object], Callable[[], List[str]]]:
+    """
+    Module `__getattr__` and `__dir__` functions of a package importing its attributes on first access.
+
+    Args:
+        package: Name of the package, its `__name__`.
+        attributes: Maps every lazy attribute to the submodule of `package` it is imported from, or to None if the
+            attribute is the submodule of the same name itself.
+
+    Returns:
+        `__getattr__` and `__dir__`, to be assigned in the namespace of the package.
+    """
+
+    def __getattr__(name: str):
+        if name not in attributes:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        submodule = attributes[name]
+        if submodule is None:
+            # Importing a submodule sets it as attribute of the package
+            return importlib.import_module(f'{package}.{name}')
+        value = getattr(importlib.import_module(f'{package}.{submodule}'), name)
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(sys.modules[package])) | set(attributes))
+
+    return __getattr__, __dir__
+
+
+def import_times(statement: str) -> Dict[str, float]:
+    """
+    Runs `statement` in a new interpreter with `-X importtime` and returns the cumulative import time in seconds of
+    every module it imported, including the modules they imported.
+
+    Args:
+        statement: Python code, e.g. "import nemo.collections.asr".
+
+    Returns:
+        Cumulative import time of every imported module, by module name.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement], stderr=subprocess.PIPE, universal_newlines=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"`{statement}` failed:\n{result.stderr}")
+
+    times = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line[len('import time:') :].split('|')
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative) / 1e6
+    return times
@@ -15,11 +15,12 @@
 import logging as _logging
 from logging.handlers import MemoryHandler
 
-import pytorch_lightning as pl
-
 HANDLERS = {}
 PATCHED = False
 
+# Name of `pytorch_lightning._logger`, handlers are added by name so that pytorch_lightning is not imported with nemo
+PL_LOGGER_NAME = "lightning"
+
 
 def add_memory_handlers_to_pl_logger():
     """
@@ -31,8 +32,8 @@ def add_memory_handlers_to_pl_logger():
         HANDLERS["memory_err"] = MemoryHandler(-1)
         HANDLERS["memory_err"].addFilter(lambda record: record.levelno > _logging.INFO)
         HANDLERS["memory_all"] = MemoryHandler(-1)
-        pl._logger.addHandler(HANDLERS["memory_err"])
-        pl._logger.addHandler(HANDLERS["memory_all"])
+        _logging.getLogger(PL_LOGGER_NAME).addHandler(HANDLERS["memory_err"])
+        _logging.getLogger(PL_LOGGER_NAME).addHandler(HANDLERS["memory_all"])
 
 
 def add_filehandlers_to_pl_logger(all_log_file, err_log_file):
@@ -42,11 +43,12 @@ def add_filehandlers_to_pl_logger(all_log_file, err_log_file):
     If "memory_err" and "memory_all" exist in HANDLERS, then those buffers are flushed to err_log_file and all_log_file
     respectively, and then closed.
     """
+    pl_logger = _logging.getLogger(PL_LOGGER_NAME)
     HANDLERS["file"] = _logging.FileHandler(all_log_file)
-    pl._logger.addHandler(HANDLERS["file"])
+    pl_logger.addHandler(HANDLERS["file"])
     HANDLERS["file_err"] = _logging.FileHandler(err_log_file)
     HANDLERS["file_err"].addFilter(lambda record: record.levelno > _logging.INFO)
-    pl._logger.addHandler(HANDLERS["file_err"])
+    pl_logger.addHandler(HANDLERS["file_err"])
 
     if HANDLERS.get("memory_all", None):
         HANDLERS["memory_all"].setTarget(HANDLERS["file"])
@@ -0,0 +1,168 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Decoding latency of `BeamSearchSequenceGenerator` for several batch sizes, against the previous beam search, which
+# passed the hidden states of all decoded positions to the decoder every step, gathered their whole history to
+# reorder hypotheses and decoded every batch element until all were finished. The model has random weights, the bias
+# of <eos> in the output layer is raised by --eos_bias so that sequences end after a varying number of steps.
+#
+# USAGE: python beam_search_benchmark.py --batch_sizes 1 4 16 64 --beam_size=4 --max_length=64 [--cuda]
+
+import argparse
+import time
+
+import torch
+
+from nemo.collections.common.parts import NEG_INF
+from nemo.collections.nlp.modules.common.transformer import (
+    BeamSearchSequenceGenerator,
+    TransformerDecoder,
+    TransformerEmbedding,
+)
+
+parser = argparse.ArgumentParser(description="Benchmark beam search decoding latency.")
+parser.add_argument("--batch_sizes", default=[1, 4, 16, 64], type=int, nargs='+')
+parser.add_argument("--beam_size", default=4, type=int)
+parser.add_argument("--len_pen", default=0.6, type=float)
+parser.add_argument("--max_length", default=64, type=int, help="Maximum number of generated tokens.")
+parser.add_argument("--eos_bias", default=1.0, type=float)
+parser.add_argument("--num_layers", default=6, type=int)
+parser.add_argument("--hidden_size", default=512, type=int)
+parser.add_argument("--num_heads", default=8, type=int)
+parser.add_argument("--vocab_size", default=8000, type=int)
+parser.add_argument("--src_length", default=32, type=int)
+parser.add_argument("--repeats", default=3, type=int)
+parser.add_argument("--cuda", action='store_true')
+args = parser.parse_args()
+
+
+class PreviousBeamSearchSequenceGenerator(BeamSearchSequenceGenerator):
+    """Beam search as before batched search with cache reordering and removal of finished batch elements."""
+
+    def forward(self, decoder_input_ids=None, encoder_hidden_states=None, encoder_input_mask=None):
+        tgt, batch_size, max_generation_length = self._prepare_for_search(decoder_input_ids, encoder_hidden_states)
+
+        log_probs, decoder_mems_list = self._forward(tgt, encoder_hidden_states, encoder_input_mask, None, 0)
+        scores, prefixes = torch.topk(log_probs.permute(0, 2, 1), self.beam_size, dim=1)
+        scores, prefixes = scores.view(-1, 1), prefixes.view(-1, 1)
+
+        prefixes = torch.cat((tgt.repeat(1, self.beam_size).view(-1, 1), prefixes), dim=1)
+        for j in range(len(decoder_mems_list)):
+            decoder_mems_list[j] = decoder_mems_list[j].repeat_interleave(self.beam_size, dim=0)
+
+        _, src_length, hidden_size = encoder_hidden_states.size()
+        encoder_input_mask = encoder_input_mask.repeat(1, self.beam_size).view(-1, src_length)
+        encoder_hidden_states = encoder_hidden_states.repeat(1, self.beam_size, 1).view(-1, src_length, hidden_size)
+
+        pad_profile = torch.zeros_like(scores).long()
+        prefixes_len = torch.zeros_like(scores).fill_(prefixes.size(1) + 1)
+
+        for i in range(max_generation_length):
+            pad_mask = pad_profile.repeat(1, self.beam_size)
+            log_probs, decoder_mems_list = self._forward(
+                prefixes[:, -1:], encoder_hidden_states, encoder_input_mask, decoder_mems_list, i + 1
+            )
+            scores_i, prefixes_i = torch.topk(log_probs[:, -1, :], self.beam_size, dim=-1)
+            prefixes_i = self.pad * pad_mask + prefixes_i * (1 - pad_mask)
+            pad_mask[:, 1:] = pad_mask[:, 1:] * NEG_INF
+            scores = scores + scores_i * (1 - pad_mask).to(scores.dtype)
+
+            scores = scores / prefixes_len.pow(self.len_pen)
+            scores, indices_i = torch.topk(scores.view(-1, self.beam_size ** 2), self.beam_size, dim=1)
+            scores = scores.view(-1, 1) * prefixes_len.pow(self.len_pen)
+
+            prefixes = prefixes.unsqueeze(1).repeat(1, self.beam_size, 1)
+            prefixes = torch.cat((prefixes, prefixes_i.unsqueeze(2)), dim=2)
+            prefixes = prefixes.view(batch_size, self.beam_size ** 2, -1)
+            p_len = prefixes.size(2)
+            prefixes_ids = indices_i.unsqueeze(2).repeat(1, 1, p_len)
+            prefixes = prefixes.gather(1, prefixes_ids).view(-1, p_len)
+
+            mems_ids = indices_i.unsqueeze(2).unsqueeze(3).repeat(1, 1, p_len - 1, hidden_size) // self.beam_size
+            for j in range(len(decoder_mems_list)):
+                decoder_mems_list[j] = (
+                    decoder_mems_list[j]
+                    .view(-1, self.beam_size, p_len - 1, hidden_size)
+                    .gather(1, mems_ids)
+                    .view(-1, p_len - 1, hidden_size)
+                )
+
+            not_eos_pad = prefixes.ne(self.eos) & prefixes.ne(self.pad)
+            prefixes_len = 1 + not_eos_pad.sum(dim=1, keepdim=True).to(scores.dtype)
+            pad_profile = (~not_eos_pad[:, -1:]).long()
+            if pad_profile.sum() == batch_size * self.beam_size:
+                break
+
+        scores = scores / prefixes_len.pow(self.len_pen)
+        best_guesses = (
+            torch.argmax(scores.view(-1, self.beam_size), dim=1, keepdim=True).repeat(1, prefixes.size(1)).unsqueeze(1)
+        )
+        return prefixes.view(batch_size, self.beam_size, -1).gather(1, best_guesses).squeeze(1)
+
+
+def main():
+    device = torch.device('cuda' if args.cuda else 'cpu')
+    sync = torch.cuda.synchronize if args.cuda else (lambda: None)
+    torch.manual_seed(0)
+
+    embedding = TransformerEmbedding(args.vocab_size, args.hidden_size, max_sequence_length=args.max_length + 2)
+    decoder = TransformerDecoder(
+        args.num_layers, args.hidden_size, inner_size=4 * args.hidden_size, num_attention_heads=args.num_heads
+    )
+    log_softmax = torch.nn.Sequential(torch.nn.Linear(args.hidden_size, args.vocab_size), torch.nn.LogSoftmax(dim=-1))
+    with torch.no_grad():
+        log_softmax[0].bias[2] += args.eos_bias
+    for module in (embedding, decoder, log_softmax):
+        module.to(device).eval()
+
+    generators = [
+        ('previous', PreviousBeamSearchSequenceGenerator, False),
+        ('no cache', BeamSearchSequenceGenerator, False),
+        ('cache', BeamSearchSequenceGenerator, True),
+    ]
+    for batch_size in args.batch_sizes:
+        encoder_states = torch.randn(batch_size, args.src_length, args.hidden_size, device=device)
+        encoder_mask = torch.ones(batch_size, args.src_length, device=device)
+
+        latencies = []
+        for _, generator_class, use_cache in generators:
+            generator = generator_class(
+                embedding,
+                decoder,
+                log_softmax,
+                eos=2,
+                beam_size=args.beam_size,
+                len_pen=args.len_pen,
+                max_sequence_length=args.max_length + 1,
+                max_delta_length=args.max_length,
+                use_cache=use_cache,
+            )
+            generator(encoder_hidden_states=encoder_states, encoder_input_mask=encoder_mask)
+            sync()
+            start = time.perf_counter()
+            for _ in range(args.repeats):
+                output = generator(encoder_hidden_states=encoder_states, encoder_input_mask=encoder_mask)
+            sync()
+            latencies.append((time.perf_counter() - start) / args.repeats)
+
+        lengths = (output != 0).sum(dim=1).float()
+        print(
+            f"batch {batch_size:3d} (lengths {lengths.min():.0f}-{lengths.max():.0f}): "
+            + ", ".join(f"{name} {latency * 1000:8.1f}ms" for (name, _, _), latency in zip(generators, latencies))
+            + f" ({latencies[0] / latencies[-1]:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Microbenchmark of `collate_audio_tokens` (used by the ASR datasets) against the previous per-sample
+# pad-and-stack collate function, on random batches of 1d audio and token tensors.
+#
+# USAGE: python collate_benchmark.py --batch_size=256 --max_seconds=16 [--pin_memory]
+
+import argparse
+import time
+
+import torch
+
+from nemo.collections.common.parts.collate import collate_audio_tokens
+
+parser = argparse.ArgumentParser(description="Benchmark ASR batch collation.")
+parser.add_argument("--batch_size", default=256, type=int)
+parser.add_argument("--sample_rate", default=16000, type=int)
+parser.add_argument("--min_seconds", default=1.0, type=float)
+parser.add_argument("--max_seconds", default=16.0, type=float)
+parser.add_argument("--max_tokens", default=200, type=int)
+parser.add_argument("--iters", default=20, type=int)
+parser.add_argument("--pin_memory", action='store_true', help="Collate into pinned memory (requires CUDA).")
+args = parser.parse_args()
+
+
+def reference_speech_collate_fn(batch, pad_id):
+    """The previous `_speech_collate_fn`: pads every sample into a new tensor, then stacks them."""
+    _, audio_lengths, _, tokens_lengths = zip(*batch)
+    max_audio_len = 0
+    has_audio = audio_lengths[0] is not None
+    if has_audio:
+        max_audio_len = max(audio_lengths).item()
+    max_tokens_len = max(tokens_lengths).item()
+
+    audio_signal, tokens = [], []
+    for sig, sig_len, tokens_i, tokens_i_len in batch:
+        if has_audio:
+            sig_len = sig_len.item()
+            if sig_len < max_audio_len:
+                pad = (0, max_audio_len - sig_len)
+                sig = torch.nn.functional.pad(sig, pad)
+            audio_signal.append(sig)
+        tokens_i_len = tokens_i_len.item()
+        if tokens_i_len < max_tokens_len:
+            pad = (0, max_tokens_len - tokens_i_len)
+            tokens_i = torch.nn.functional.pad(tokens_i, pad, value=pad_id)
+        tokens.append(tokens_i)
+
+    if has_audio:
+        audio_signal = torch.stack(audio_signal)
+        audio_lengths = torch.stack(audio_lengths)
+    else:
+        audio_signal, audio_lengths = None, None
+    tokens = torch.stack(tokens)
+    tokens_lengths = torch.stack(tokens_lengths)
+
+    return audio_signal, audio_lengths, tokens, tokens_lengths
+
+
+def make_batch():
+    batch = []
+    for _ in range(args.batch_size):
+        seconds = torch.empty(1).uniform_(args.min_seconds, args.max_seconds).item()
+        num_samples = int(seconds * args.sample_rate)
+        num_tokens = int(torch.randint(1, args.max_tokens, (1,)))
+        batch.append(
+            (
+                torch.randn(num_samples),
+                torch.tensor(num_samples).long(),
+                torch.randint(0, 28, (num_tokens,)).long(),
+                torch.tensor(num_tokens).long(),
+            )
+        )
+    return batch
+
+
+def benchmark(name, fn, batches):
+    fn(batches[0])  # warmup
+    start = time.perf_counter()
+    for batch in batches:
+        fn(batch)
+    elapsed = (time.perf_counter() - start) / len(batches)
+    print(f"{name:>24}: {elapsed * 1000:8.2f} ms / batch")
+    return elapsed
+
+
+def main():
+    torch.manual_seed(0)
+    batches = [make_batch() for _ in range(args.iters)]
+
+    expected, actual = reference_speech_collate_fn(batches[0], 0), collate_audio_tokens(batches[0], 0)
+    assert all(torch.equal(x, y) for x, y in zip(expected, actual)), "Collate outputs differ."
+
+    print(f"batch_size={args.batch_size}, audio {args.min_seconds}-{args.max_seconds}s @ {args.sample_rate}Hz")
+    reference = benchmark("pad + stack (previous)", lambda b: reference_speech_collate_fn(b, 0), batches)
+    current = benchmark("collate_audio_tokens", lambda b: collate_audio_tokens(b, 0), batches)
+    print(f"{'speedup':>24}: {reference / current:8.2f}x")
+    if args.pin_memory:
+        benchmark("collate_audio_tokens pin", lambda b: collate_audio_tokens(b, 0, pin_memory=True), batches)
+
+
+if __name__ == "__main__":
+    main()
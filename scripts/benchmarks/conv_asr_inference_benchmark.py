@@ -0,0 +1,82 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# CPU latency of the encoder and decoder of a CTC model (built from a model config with random weights) per second
+# of audio, before and after `ConvASREncoder.prepare_for_inference`, with and without merged separable convolutions.
+#
+# USAGE: python conv_asr_inference_benchmark.py --config=examples/asr/conf/quartznet_15x5.yaml --batch_size=1 \
+#            --seconds=10 --steps=10 [--threads=1]
+
+import argparse
+import copy
+import time
+
+import torch
+from omegaconf import OmegaConf
+
+from nemo.collections.asr.modules import ConvASRDecoder, ConvASREncoder
+
+parser = argparse.ArgumentParser(description="Benchmark ConvASREncoder.prepare_for_inference on CPU.")
+parser.add_argument("--config", default="examples/asr/conf/quartznet_15x5.yaml", type=str)
+parser.add_argument("--batch_size", default=1, type=int)
+parser.add_argument("--seconds", default=10.0, type=float, help="Duration of every utterance.")
+parser.add_argument("--steps", default=10, type=int)
+parser.add_argument("--threads", default=None, type=int, help="Number of intra-op threads.")
+args = parser.parse_args()
+
+
+def main():
+    if args.threads is not None:
+        torch.set_num_threads(args.threads)
+
+    cfg = OmegaConf.load(args.config).model
+    encoder = ConvASREncoder(**OmegaConf.to_container(cfg.encoder.params, resolve=True)).eval()
+    decoder = ConvASRDecoder(**OmegaConf.to_container(cfg.decoder.params, resolve=True)).eval()
+    for module in encoder.modules():
+        if isinstance(module, torch.nn.BatchNorm1d):
+            module.running_mean.normal_(std=0.1)
+            module.running_var.uniform_(0.5, 2.0)
+
+    window_stride = cfg.preprocessor.params.get('window_stride', 0.01)
+    frames = int(args.seconds / window_stride)
+    features = torch.randn(args.batch_size, cfg.encoder.params.feat_in, frames)
+    length = torch.full((args.batch_size,), frames, dtype=torch.long)
+
+    variants = [
+        ('original', encoder),
+        ('folded', copy.deepcopy(encoder).prepare_for_inference()),
+        ('fused', copy.deepcopy(encoder).prepare_for_inference(fuse_separable=True)),
+    ]
+    expected = None
+    for name, model in variants:
+        with torch.no_grad():
+            encoded, encoded_len = model(audio_signal=features, length=length)
+            log_probs = decoder(encoder_output=encoded)
+            start = time.perf_counter()
+            for _ in range(args.steps):
+                encoded, encoded_len = model(audio_signal=features, length=length)
+                log_probs = decoder(encoder_output=encoded)
+            elapsed = (time.perf_counter() - start) / args.steps
+
+        if expected is None:
+            expected = log_probs
+        error = (log_probs - expected).abs().max().item()
+        print(
+            f"{name:>10}: {elapsed * 1000 / (args.batch_size * args.seconds):8.2f}ms per second of audio, "
+            f"max log prob difference {error:.2e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
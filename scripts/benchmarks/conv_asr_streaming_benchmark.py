@@ -0,0 +1,93 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Latency and throughput of `ConvASREncoder.forward_streaming` at different chunk sizes, compared with offline
+# encoding of the whole utterance. The encoder is built from a model config with random weights.
+#
+# Reported per chunk size:
+#   - algorithmic latency: chunk duration plus the encoder lookahead,
+#   - compute latency: mean and p95 time to encode one chunk,
+#   - RTFx: seconds of audio encoded per second of compute.
+#
+# USAGE: python conv_asr_streaming_benchmark.py --config=examples/asr/conf/quartznet_15x5.yaml --seconds=60 \
+#            --chunk_sizes 16 32 64 128 [--cuda]
+
+import argparse
+import time
+
+import numpy as np
+import torch
+from omegaconf import OmegaConf
+
+from nemo.collections.asr.modules import ConvASREncoder
+
+parser = argparse.ArgumentParser(description="Benchmark streaming inference of ConvASREncoder.")
+parser.add_argument("--config", default="examples/asr/conf/quartznet_15x5.yaml", type=str)
+parser.add_argument("--seconds", default=60.0, type=float, help="Duration of the streamed utterance.")
+parser.add_argument("--chunk_sizes", default=[16, 32, 64, 128, 256], type=int, nargs='+', help="In feature frames.")
+parser.add_argument("--cuda", action='store_true')
+args = parser.parse_args()
+
+
+def timed(fn, device):
+    if device.type == 'cuda':
+        torch.cuda.synchronize()
+    start = time.perf_counter()
+    result = fn()
+    if device.type == 'cuda':
+        torch.cuda.synchronize()
+    return result, time.perf_counter() - start
+
+
+def main():
+    device = torch.device('cuda' if args.cuda else 'cpu')
+    cfg = OmegaConf.load(args.config).model
+    frame_shift = cfg.preprocessor.params.get('window_stride', 0.01)
+    encoder = ConvASREncoder(**OmegaConf.to_container(cfg.encoder.params, resolve=True)).eval().to(device)
+
+    num_frames = int(args.seconds / frame_shift)
+    features = torch.randn(1, cfg.encoder.params.feat_in, num_frames, device=device)
+    lookahead = encoder.streaming_lookahead
+    print(f"{args.seconds}s of audio ({num_frames} frames), encoder lookahead {lookahead * frame_shift * 1000:.0f}ms")
+
+    with torch.no_grad():
+        timed(lambda: encoder(audio_signal=features[..., :256], length=torch.tensor([256], device=device)), device)
+        (offline, _), elapsed = timed(
+            lambda: encoder(audio_signal=features, length=torch.tensor([num_frames], device=device)), device
+        )
+        print(f"{'offline':>8}: RTFx {args.seconds / elapsed:8.1f}")
+
+        for chunk_size in args.chunk_sizes:
+            state, chunks, latencies = None, [], []
+            for start in range(0, num_frames, chunk_size):
+                (chunk, state), elapsed = timed(
+                    lambda: encoder.forward_streaming(features[..., start : start + chunk_size], state), device
+                )
+                chunks.append(chunk)
+                latencies.append(elapsed)
+            (chunk, _), elapsed = timed(lambda: encoder.forward_streaming(features[..., :0], state, True), device)
+            chunks.append(chunk)
+            latencies.append(elapsed)
+
+            max_error = (torch.cat(chunks, dim=-1) - offline).abs().max().item()
+            algorithmic = (chunk_size + lookahead) * frame_shift * 1000
+            print(
+                f"{chunk_size:>8}: algorithmic latency {algorithmic:7.0f}ms, "
+                f"compute {np.mean(latencies) * 1000:7.2f}ms mean / {np.percentile(latencies, 95) * 1000:7.2f}ms p95, "
+                f"RTFx {args.seconds / sum(latencies):8.1f}, max abs diff to offline {max_error:.2e}"
+            )
+
+
+if __name__ == "__main__":
+    main()
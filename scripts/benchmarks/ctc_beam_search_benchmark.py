@@ -0,0 +1,91 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Throughput of `CTCBeamSearchDecoder` in utterances/sec and utterances/sec per core, on synthetic CTC log
+# probabilities shaped like the output of a character QuartzNet (peaky, mostly blank frames).
+#
+# USAGE: python ctc_beam_search_benchmark.py --num_utterances=64 --seconds=10 --beam_width=16 --num_workers=4 \
+#            [--lm_path=<word-level ARPA file>]
+
+import argparse
+import time
+
+import torch
+
+from nemo.collections.asr.parts.ctc_beam_search import CTCBeamSearchDecoder
+
+parser = argparse.ArgumentParser(description="Benchmark CTC prefix beam search decoding.")
+parser.add_argument("--num_utterances", default=64, type=int)
+parser.add_argument("--seconds", default=10.0, type=float, help="Duration of every utterance.")
+parser.add_argument("--frame_rate", default=50, type=int, help="Encoder frames per second.")
+parser.add_argument("--beam_width", default=16, type=int)
+parser.add_argument("--cutoff_prob", default=0.99, type=float)
+parser.add_argument("--cutoff_top_n", default=40, type=int)
+parser.add_argument("--lm_path", default=None, type=str)
+parser.add_argument("--alpha", default=0.5, type=float)
+parser.add_argument("--beta", default=1.0, type=float)
+parser.add_argument("--num_workers", default=4, type=int)
+args = parser.parse_args()
+
+VOCABULARY = list(" abcdefghijklmnopqrstuvwxyz'")
+
+
+def make_log_probs():
+    num_frames = int(args.seconds * args.frame_rate)
+    logits = torch.randn(args.num_utterances, num_frames, len(VOCABULARY) + 1)
+    # Make roughly two thirds of the frames blank dominated, the rest dominated by a random label
+    peaks = torch.randint(0, len(VOCABULARY) + 1, (args.num_utterances, num_frames))
+    peaks[torch.rand(peaks.shape) < 0.66] = len(VOCABULARY)
+    logits.scatter_add_(2, peaks.unsqueeze(-1), torch.full(peaks.unsqueeze(-1).shape, 6.0))
+    return logits.log_softmax(dim=-1)
+
+
+def benchmark(num_workers, log_probs):
+    decoder = CTCBeamSearchDecoder(
+        VOCABULARY,
+        beam_width=args.beam_width,
+        cutoff_prob=args.cutoff_prob,
+        cutoff_top_n=args.cutoff_top_n,
+        lm_path=args.lm_path,
+        alpha=args.alpha,
+        beta=args.beta,
+        num_workers=num_workers,
+    )
+    try:
+        decoder.decode_batch(log_probs[: max(num_workers, 1)])  # warmup, starts the worker pool
+        start = time.perf_counter()
+        decoder.decode_batch(log_probs)
+        elapsed = time.perf_counter() - start
+    finally:
+        decoder.close()
+
+    cores = max(num_workers, 1)
+    throughput = args.num_utterances / elapsed
+    print(f"{cores:>3} core(s): {throughput:8.2f} utt/s, {throughput / cores:8.2f} utt/s/core")
+
+
+def main():
+    torch.manual_seed(0)
+    log_probs = make_log_probs()
+    print(
+        f"{args.num_utterances} utterances of {args.seconds}s ({log_probs.shape[1]} frames), "
+        f"beam_width={args.beam_width}, lm={args.lm_path}"
+    )
+    benchmark(0, log_probs)
+    if args.num_workers > 1:
+        benchmark(args.num_workers, log_probs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# GlowTTS training step time with the previous monotonic alignment search, which copies the log-likelihoods to the
+# host and searches them with numpy (`maximum_path_numpy`), against `maximum_path`, which searches on the device of
+# the model (or with numba on the CPU). Random batches of text and spectrograms with random lengths are trained on
+# with the encoder and decoder of a GlowTTS config, the time of the search alone is reported as well.
+#
+# USAGE: python glow_tts_alignment_benchmark.py --config=examples/tts/conf/glow_tts.yaml --batch_size=32 \
+#            --max_text_length=150 --frames_per_token=6 --steps=10 [--cuda]
+
+import argparse
+import time
+
+import torch
+from hydra.utils import instantiate
+from omegaconf import OmegaConf
+
+from nemo.collections.tts.losses.glow_tts_loss import GlowTTSLoss
+from nemo.collections.tts.modules import GlowTTSModule, glow_tts_submodules
+
+parser = argparse.ArgumentParser(description="Benchmark GlowTTS training steps with both alignment searches.")
+parser.add_argument("--config", default="examples/tts/conf/glow_tts.yaml", type=str)
+parser.add_argument("--batch_size", default=32, type=int)
+parser.add_argument("--max_text_length", default=150, type=int)
+parser.add_argument("--frames_per_token", default=6, type=int)
+parser.add_argument("--steps", default=10, type=int)
+parser.add_argument("--cuda", action='store_true')
+args = parser.parse_args()
+
+
+def main():
+    device = torch.device('cuda' if args.cuda else 'cpu')
+    sync = torch.cuda.synchronize if args.cuda else (lambda: None)
+    torch.manual_seed(0)
+
+    cfg = OmegaConf.load(args.config).model
+    model = GlowTTSModule(instantiate(cfg.encoder), instantiate(cfg.decoder), n_speakers=1, gin_channels=0)
+    model.to(device).train()
+    loss_fn = GlowTTSLoss()
+    optimizer = torch.optim.Adam(model.parameters(), lr=1e-4)
+
+    n_vocab = cfg.encoder.params.n_vocab
+    text_lengths = torch.randint(args.max_text_length // 2, args.max_text_length + 1, (args.batch_size,))
+    text_lengths[0] = args.max_text_length
+    spect_lengths = text_lengths * args.frames_per_token
+    text = torch.randint(1, n_vocab, (args.batch_size, args.max_text_length))
+    spect = torch.randn(args.batch_size, cfg.decoder.params.in_channels, int(spect_lengths.max()))
+    batch = [t.to(device) for t in (text, text_lengths, spect, spect_lengths)]
+
+    search_times = []
+
+    def timed(search):
+        def timed_search(value, mask, *args):
+            sync()
+            start = time.perf_counter()
+            path = search(value, mask, *args)
+            sync()
+            search_times.append(time.perf_counter() - start)
+            return path
+
+        return timed_search
+
+    maximum_path = glow_tts_submodules.maximum_path
+    for name, search in (('numpy', glow_tts_submodules.maximum_path_numpy), ('batched', maximum_path)):
+        glow_tts_submodules.maximum_path = timed(search)
+        step_times = []
+        for step in range(args.steps + 1):
+            text, text_lengths, spect, spect_lengths = batch
+            sync()
+            start = time.perf_counter()
+            z, y_m, y_logs, logdet, logw, logw_, y_lengths, _ = model(
+                text=text, text_lengths=text_lengths, spect=spect, spect_lengths=spect_lengths
+            )
+            l_mle, l_length, _ = loss_fn(
+                z=z,
+                y_m=y_m,
+                y_logs=y_logs,
+                logdet=logdet,
+                logw=logw,
+                logw_=logw_,
+                x_lengths=text_lengths,
+                y_lengths=y_lengths,
+            )
+            optimizer.zero_grad()
+            (l_mle + l_length).backward()
+            optimizer.step()
+            sync()
+            if step > 0:
+                step_times.append(time.perf_counter() - start)
+
+        search_time = sum(search_times[1:]) / args.steps
+        search_times.clear()
+        print(
+            f"{name:>8}: {sum(step_times) / args.steps * 1000:8.1f}ms per training step, "
+            f"{search_time * 1000:8.1f}ms alignment search"
+        )
+    glow_tts_submodules.maximum_path = maximum_path
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Quality and throughput of `griffin_lim`, which runs the Griffin-Lim algorithm with librosa on the host one
+# spectrogram at a time, against `batched_griffin_lim` on a padded batch (with and without the momentum of the fast
+# Griffin-Lim algorithm). Magnitude spectrograms of random harmonic signals with random durations are vocoded,
+# quality is the spectral convergence ||S - |STFT(x)||| / ||S|| of the audio x to the magnitudes S (lower is better).
+#
+# USAGE: python griffin_lim_benchmark.py --batch_size=32 --min_duration=1.0 --max_duration=8.0 --n_iters=32 \
+#            --momentum=0.99 [--cuda]
+
+import argparse
+import time
+
+import numpy as np
+import torch
+
+from nemo.collections.tts.helpers.helpers import batched_griffin_lim, griffin_lim
+
+parser = argparse.ArgumentParser(description="Benchmark the Griffin-Lim algorithm on batches of spectrograms.")
+parser.add_argument("--batch_size", default=32, type=int)
+parser.add_argument("--min_duration", default=1.0, type=float)
+parser.add_argument("--max_duration", default=8.0, type=float)
+parser.add_argument("--sample_rate", default=22050, type=int)
+parser.add_argument("--n_fft", default=1024, type=int)
+parser.add_argument("--n_iters", default=32, type=int)
+parser.add_argument("--momentum", default=0.99, type=float)
+parser.add_argument("--cuda", action='store_true')
+args = parser.parse_args()
+
+
+def harmonic_signals(durations):
+    """Signals with a gliding fundamental frequency and decaying harmonics, with some noise"""
+    signals = []
+    for duration in durations:
+        t = np.arange(int(duration * args.sample_rate)) / args.sample_rate
+        f0 = np.random.uniform(100, 250) * (1 + 0.2 * np.sin(2 * np.pi * np.random.uniform(0.2, 2) * t))
+        phase = 2 * np.pi * np.cumsum(f0) / args.sample_rate
+        signal = sum(np.sin(k * phase) / k for k in range(1, 16)) + 0.01 * np.random.randn(len(t))
+        signals.append(torch.from_numpy(signal).float())
+    return signals
+
+
+def spectral_convergence(magnitudes, audio, length):
+    window = torch.hann_window(args.n_fft, device=audio.device)
+    rebuilt = torch.stft(audio, args.n_fft, args.n_fft // 4, window=window, return_complex=True).abs()
+    magnitudes, rebuilt = magnitudes[:, :length], rebuilt[:, :length]
+    return (torch.norm(magnitudes - rebuilt) / torch.norm(magnitudes)).item()
+
+
+def report(name, elapsed, total_duration, quality):
+    print(f"{name:>16}: {elapsed:7.2f}s, {total_duration / elapsed:8.1f}s of audio/s, convergence {quality:.4f}")
+
+
+def main():
+    device = torch.device('cuda' if args.cuda else 'cpu')
+    sync = torch.cuda.synchronize if args.cuda else (lambda: None)
+    np.random.seed(0)
+    torch.manual_seed(0)
+
+    durations = np.random.uniform(args.min_duration, args.max_duration, args.batch_size)
+    window = torch.hann_window(args.n_fft)
+    spectrograms = [
+        torch.stft(signal, args.n_fft, args.n_fft // 4, window=window, return_complex=True).abs()
+        for signal in harmonic_signals(durations)
+    ]
+    lengths = torch.tensor([spec.shape[1] for spec in spectrograms])
+    magnitudes = torch.zeros(args.batch_size, args.n_fft // 2 + 1, int(lengths.max()))
+    for i, spec in enumerate(spectrograms):
+        magnitudes[i, :, : spec.shape[1]] = spec
+    total_duration = float(durations.sum())
+
+    start = time.perf_counter()
+    audios = [griffin_lim(spec.numpy(), n_iters=args.n_iters, n_fft=args.n_fft) for spec in spectrograms]
+    elapsed = time.perf_counter() - start
+    quality = np.mean(
+        [
+            spectral_convergence(spec, torch.from_numpy(audio).float(), spec.shape[1])
+            for spec, audio in zip(spectrograms, audios)
+        ]
+    )
+    report('librosa', elapsed, total_duration, quality)
+
+    magnitudes, lengths = magnitudes.to(device), lengths.to(device)
+    for name, momentum in (('batched', 0.0), ('batched fast', args.momentum)):
+        batched_griffin_lim(magnitudes[:, :, :16], n_iters=1, momentum=momentum)
+        sync()
+        start = time.perf_counter()
+        audio = batched_griffin_lim(magnitudes, lengths, n_iters=args.n_iters, momentum=momentum)
+        sync()
+        elapsed = time.perf_counter() - start
+        quality = np.mean(
+            [
+                spectral_convergence(magnitudes[i], audio[i, : args.n_fft // 4 * (length - 1)], length)
+                for i, length in enumerate(lengths.tolist())
+            ]
+        )
+        report(name, elapsed, total_duration, quality)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Startup time of NeMo: wall time of `import nemo`, `import nemo.collections.asr` and of importing the ASR models,
+# and with --nemo_file of `ModelPT.restore_from` including the imports it needs. Every statement runs in a fresh
+# interpreter, then the modules with the largest cumulative import time (python -X importtime) are listed.
+# With --check, the cumulative import time of the main packages is also compared with its budget, and the script
+# fails if one is exceeded. Budgets can be scaled on slow machines with --budget_scale.
+#
+# USAGE: python import_time_benchmark.py --repeats=5 --top=15 [--nemo_file=<model.nemo>] [--check] \
+#         [--budget_scale=1.0]
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+from nemo.utils.lazy_import import import_times
+
+parser = argparse.ArgumentParser(description="Report the import and restore time of NeMo.")
+parser.add_argument("--repeats", default=5, type=int)
+parser.add_argument("--top", default=15, type=int, help="Number of slowest imported modules listed per statement.")
+parser.add_argument("--nemo_file", default=None, type=str, help="Also time ModelPT.restore_from of this file.")
+parser.add_argument("--check", action='store_true', help="Fail if an import exceeds its time budget.")
+parser.add_argument("--budget_scale", default=1.0, type=float, help="Scale of the import time budgets.")
+args = parser.parse_args()
+
+# Budgets of the cumulative import time in seconds checked with --check
+IMPORT_TIME_BUDGETS = {
+    'nemo': 0.1,
+    'nemo.core': 0.5,
+    'nemo.collections.asr': 0.5,
+    'nemo.collections.nlp': 0.5,
+    'nemo.collections.tts': 0.5,
+}
+
+
+def statements():
+    yield 'import nemo'
+    yield 'import nemo.collections.asr'
+    yield 'from nemo.collections.asr.models import EncDecCTCModel'
+    if args.nemo_file is not None:
+        yield (
+            'import torch\n'
+            'from nemo.core import ModelPT\n'
+            f'ModelPT.restore_from({args.nemo_file!r}, map_location=torch.device("cpu"))'
+        )
+
+
+def wall_time(statement):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', statement], check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def main():
+    baseline = statistics.median(wall_time('pass') for _ in range(args.repeats))
+    startup_modules = set(import_times('pass'))
+    print(f"Interpreter startup: {baseline * 1000:.0f}ms, subtracted from the times below\n")
+
+    for statement in statements():
+        times = [wall_time(statement) - baseline for _ in range(args.repeats)]
+        print(f"{statement.splitlines()[-1]}")
+        print(f"    median {statistics.median(times) * 1000:.0f}ms, min {min(times) * 1000:.0f}ms")
+
+        modules = {name: t for name, t in import_times(statement).items() if name not in startup_modules}
+        top_level = {name: t for name, t in modules.items() if '.' not in name}
+        print(f"    imports {len(modules)} modules, slowest packages:")
+        for name, cumulative in sorted(top_level.items(), key=lambda item: item[1], reverse=True)[: args.top]:
+            print(f"    {cumulative * 1000:10.1f}ms  {name}")
+        print()
+
+    if args.check and not check_budgets():
+        sys.exit(1)
+
+
+def check_budgets() -> bool:
+    """Compares the fastest of `repeats` cumulative import times of every module with its budget."""
+    within_budget = True
+    for module, budget in IMPORT_TIME_BUDGETS.items():
+        budget *= args.budget_scale
+        elapsed = min(import_times(f'import {module}')[module] for _ in range(args.repeats))
+        status = 'ok' if elapsed < budget else 'OVER BUDGET'
+        print(f"import {module}: {elapsed * 1000:.0f}ms, budget {budget * 1000:.0f}ms, {status}")
+        within_budget &= elapsed < budget
+    return within_budget
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Restore time and peak memory of `ModelPT.restore_from` for compressed (tar.gz) and uncompressed .nemo files.
+# A CTC model is built from the `preprocessor`, `encoder` and `decoder` of a model config with random weights and
+# saved in both formats, then every restore runs in a fresh process, so peak RSS is measured per restore. Pass
+# --drop_caches (root only) to measure cold starts from disk rather than from the page cache.
+#
+# USAGE: python nemo_restore_benchmark.py --config=examples/asr/conf/quartznet_15x5.yaml --repeats=3 [--drop_caches]
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+parser = argparse.ArgumentParser(description="Benchmark restoring compressed and uncompressed .nemo files.")
+parser.add_argument("--config", default="examples/asr/conf/quartznet_15x5.yaml", type=str)
+parser.add_argument("--repeats", default=3, type=int)
+parser.add_argument("--drop_caches", action='store_true', help="Drop the page cache before every restore.")
+parser.add_argument("--restore", default=None, type=str, help=argparse.SUPPRESS)
+args = parser.parse_args()
+
+
+def restore(nemo_file):
+    import torch
+
+    from nemo.collections.asr.models import EncDecCTCModel
+
+    start = time.perf_counter()
+    model = EncDecCTCModel.restore_from(nemo_file, map_location=torch.device('cpu'))
+    elapsed = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{elapsed} {peak_rss} {model.num_weights}")
+
+
+def main():
+    from omegaconf import OmegaConf
+
+    from nemo.collections.asr.models import EncDecCTCModel
+
+    cfg = OmegaConf.load(args.config).model
+    cfg = OmegaConf.create({'preprocessor': cfg.preprocessor, 'encoder': cfg.encoder, 'decoder': cfg.decoder})
+    model = EncDecCTCModel(cfg=cfg)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for compress in (True, False):
+            nemo_file = os.path.join(tmpdir, f"model_{'compressed' if compress else 'uncompressed'}.nemo")
+            start = time.perf_counter()
+            model.save_to(nemo_file, compress=compress)
+            save_time = time.perf_counter() - start
+            size = os.path.getsize(nemo_file) / 2 ** 20
+            print(f"{os.path.basename(nemo_file)}: {size:.1f}MB, saved in {save_time:.2f}s")
+
+            times, peaks = [], []
+            for _ in range(args.repeats):
+                if args.drop_caches:
+                    subprocess.run(['sync'], check=True)
+                    with open('/proc/sys/vm/drop_caches', 'w') as f:
+                        f.write('3\n')
+                output = subprocess.run(
+                    [sys.executable, __file__, '--restore', nemo_file], check=True, stdout=subprocess.PIPE, text=True
+                ).stdout
+                elapsed, peak_rss, num_weights = output.split()[-3:]
+                times.append(float(elapsed))
+                peaks.append(float(peak_rss))
+            print(
+                f"    restore {min(times):.2f}s best / {sum(times) / len(times):.2f}s mean, "
+                f"peak RSS {max(peaks):.0f}MB ({int(num_weights) / 1e6:.1f}M weights)"
+            )
+
+
+if __name__ == "__main__":
+    if args.restore is not None:
+        restore(args.restore)
+    else:
+        main()
@@ -0,0 +1,79 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Step time of `Novograd` updating one parameter at a time against the multi-tensor (foreach) implementation, on
+# parameters shaped like those of a QuartzNet encoder: per block and repeat a depthwise convolution, a pointwise
+# convolution and a batch norm weight and bias.
+#
+# USAGE: python novograd_benchmark.py --blocks=15 --repeats=5 --channels=256 --kernel=33 --steps=50 \
+#            [--amsgrad] [--cuda]
+
+import argparse
+import time
+
+import torch
+
+from nemo.core.optim import Novograd
+
+parser = argparse.ArgumentParser(description="Benchmark the per-parameter and multi-tensor Novograd steps.")
+parser.add_argument("--blocks", default=15, type=int)
+parser.add_argument("--repeats", default=5, type=int)
+parser.add_argument("--channels", default=256, type=int)
+parser.add_argument("--kernel", default=33, type=int)
+parser.add_argument("--steps", default=50, type=int)
+parser.add_argument("--amsgrad", action='store_true')
+parser.add_argument("--cuda", action='store_true')
+args = parser.parse_args()
+
+
+def make_params(device):
+    torch.manual_seed(0)
+    shapes = []
+    for _ in range(args.blocks * args.repeats):
+        shapes.extend(
+            [(args.channels, 1, args.kernel), (args.channels, args.channels, 1), (args.channels,), (args.channels,)]
+        )
+    params = [torch.nn.Parameter(torch.randn(shape, device=device)) for shape in shapes]
+    for param in params:
+        param.grad = torch.randn_like(param)
+    return params
+
+
+def main():
+    device = torch.device('cuda' if args.cuda else 'cpu')
+    sync = torch.cuda.synchronize if args.cuda else (lambda: None)
+
+    for foreach in (False, True):
+        params = make_params(device)
+        grads = [param.grad.clone() for param in params]
+        optimizer = Novograd(params, lr=1e-3, weight_decay=1e-3, amsgrad=args.amsgrad, foreach=foreach)
+
+        elapsed = 0.0
+        for step in range(args.steps + 1):
+            # Novograd normalizes gradients in place, restore them outside of the timed region
+            for param, grad in zip(params, grads):
+                param.grad.copy_(grad)
+            sync()
+            start = time.perf_counter()
+            optimizer.step()
+            sync()
+            if step > 0:
+                elapsed += time.perf_counter() - start
+
+        name = 'foreach' if foreach else 'loop'
+        print(f"{name:>8}: {len(params)} parameters, {elapsed / args.steps * 1000:8.2f}ms per step")
+
+
+if __name__ == "__main__":
+    main()
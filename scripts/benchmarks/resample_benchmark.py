@@ -0,0 +1,103 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Resampling time per second of audio of the `AudioSegment` resampling methods from common source rates to the
+# target rate, with the error relative to `kaiser_best`, then the time per utterance of `WaveformFeaturizer` loading
+# wav files at the first source rate for a few epochs, without and with an `AudioCache`.
+#
+# USAGE: python resample_benchmark.py --source_rates=44100,48000,8000 --sample_rate=16000 --seconds=10 \
+#            --utterances=20 --epochs=3
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+from nemo.collections.asr.parts.feature_cache import AudioCache
+from nemo.collections.asr.parts.features import WaveformFeaturizer
+from nemo.collections.asr.parts.segment import AudioSegment
+
+parser = argparse.ArgumentParser(description="Benchmark resampling methods and the audio cache.")
+parser.add_argument("--source_rates", default="44100,48000,8000", type=str)
+parser.add_argument("--sample_rate", default=16000, type=int)
+parser.add_argument("--seconds", default=10.0, type=float, help="Duration of every utterance.")
+parser.add_argument("--utterances", default=20, type=int)
+parser.add_argument("--epochs", default=3, type=int)
+args = parser.parse_args()
+
+RESAMPLE_TYPES = ['kaiser_best', 'kaiser_fast', 'polyphase']
+
+
+def benchmark_resampling():
+    rng = np.random.RandomState(0)
+    for source_rate in map(int, args.source_rates.split(',')):
+        samples = (0.1 * rng.randn(int(args.seconds * source_rate))).astype(np.float32)
+        reference = None
+        for resample_type in RESAMPLE_TYPES:
+            start = time.perf_counter()
+            resampled = AudioSegment(
+                samples, source_rate, target_sr=args.sample_rate, resample_type=resample_type
+            ).samples
+            elapsed = time.perf_counter() - start
+            if reference is None:
+                reference = resampled
+            length = min(len(reference), len(resampled))
+            error = np.abs(resampled[:length] - reference[:length]).max() / np.abs(reference).max()
+            print(
+                f"{source_rate:>6} -> {args.sample_rate}, {resample_type:>12}: "
+                f"{elapsed / args.seconds * 1000:7.2f}ms per second of audio, relative error {error:.1e}"
+            )
+
+
+def benchmark_cache(resample_type):
+    source_rate = int(args.source_rates.split(',')[0])
+    rng = np.random.RandomState(0)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        files = []
+        for i in range(args.utterances):
+            path = os.path.join(tmpdir, f"{i}.wav")
+            sf.write(path, (0.1 * rng.randn(int(args.seconds * source_rate))).astype(np.float32), source_rate)
+            files.append(path)
+
+        cache = AudioCache(os.path.join(tmpdir, 'cache'), args.sample_rate, resample_type=resample_type)
+        for audio_cache in (None, cache):
+            featurizer = WaveformFeaturizer(
+                sample_rate=args.sample_rate, resample_type=resample_type, audio_cache=audio_cache
+            )
+            start = time.perf_counter()
+            for _ in range(args.epochs):
+                for path in files:
+                    featurizer.process(path)
+            elapsed = (time.perf_counter() - start) / (args.epochs * len(files))
+            name = 'cached' if audio_cache is not None else 'uncached'
+            print(f"{resample_type:>12}, {name:>8}: {elapsed * 1000:7.2f}ms per utterance")
+
+        stats = cache.stats
+        print(
+            f"{'':>12}  cache hit rate {stats['hit_rate'] * 100:.1f}%, {stats['load_time'] * 1000:.2f}ms per hit, "
+            f"{stats['decode_time'] * 1000:.2f}ms per miss"
+        )
+
+
+def main():
+    benchmark_resampling()
+    for resample_type in RESAMPLE_TYPES:
+        benchmark_cache(resample_type)
+
+
+if __name__ == "__main__":
+    main()
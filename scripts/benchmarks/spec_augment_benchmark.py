@@ -0,0 +1,71 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Step time of `SpectrogramAugmentation` with the batched, on-device masks (BatchedSpecAugment, BatchedSpecCutout)
+# against the loop based ones (SpecAugment, SpecCutout), on a batch of random log-mel features.
+#
+# USAGE: python spec_augment_benchmark.py --batch_size=32 --features=64 --frames=1600 --steps=50 [--cuda]
+
+import argparse
+import time
+
+import torch
+
+from nemo.collections.asr.modules import SpectrogramAugmentation
+
+parser = argparse.ArgumentParser(description="Benchmark batched against loop based SpecAugment and SpecCutout.")
+parser.add_argument("--batch_size", default=32, type=int)
+parser.add_argument("--features", default=64, type=int)
+parser.add_argument("--frames", default=1600, type=int)
+parser.add_argument("--steps", default=50, type=int)
+parser.add_argument("--freq_masks", default=2, type=int)
+parser.add_argument("--time_masks", default=10, type=int)
+parser.add_argument("--freq_width", default=27, type=int)
+parser.add_argument("--time_width", default=0.05, type=float)
+parser.add_argument("--rect_masks", default=5, type=int)
+parser.add_argument("--cuda", action='store_true')
+args = parser.parse_args()
+
+
+def main():
+    device = torch.device('cuda' if args.cuda else 'cpu')
+    spec = torch.randn(args.batch_size, args.features, args.frames, device=device)
+
+    for batched in (False, True):
+        augmentation = SpectrogramAugmentation(
+            freq_masks=args.freq_masks,
+            time_masks=args.time_masks,
+            freq_width=args.freq_width,
+            time_width=args.time_width,
+            rect_masks=args.rect_masks,
+            batched=batched,
+        ).to(device)
+
+        augmentation(input_spec=spec)
+        if device.type == 'cuda':
+            torch.cuda.synchronize()
+        start = time.perf_counter()
+        for _ in range(args.steps):
+            augmented = augmentation(input_spec=spec)
+        if device.type == 'cuda':
+            torch.cuda.synchronize()
+        elapsed = (time.perf_counter() - start) / args.steps
+
+        masked = (augmented == 0).float().mean().item()
+        name = 'batched' if batched else 'loops'
+        print(f"{name:>8}: {elapsed * 1000:8.2f}ms per batch, {masked * 100:5.1f}% of the bins masked")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Time per batch of speed perturbation and time stretching of random utterances, with the per-utterance librosa
+# implementations (SpeedPerturbation, TimeStretchPerturbation) against the batched torch ones
+# (BatchedSpeedPerturbation, BatchedTimeStretchPerturbation), on the host or with --cuda on the GPU.
+#
+# USAGE: python speed_perturb_benchmark.py --batch_size=32 --seconds=15 --steps=5 [--cuda]
+
+import argparse
+import random
+import time
+
+import numpy as np
+import torch
+
+from nemo.collections.asr.parts.batched_perturb import BatchedSpeedPerturbation, BatchedTimeStretchPerturbation
+from nemo.collections.asr.parts.perturb import SpeedPerturbation, TimeStretchPerturbation
+from nemo.collections.asr.parts.segment import AudioSegment
+
+parser = argparse.ArgumentParser(description="Benchmark librosa against batched torch speed perturbation.")
+parser.add_argument("--batch_size", default=32, type=int)
+parser.add_argument("--sample_rate", default=16000, type=int)
+parser.add_argument("--seconds", default=15.0, type=float, help="Maximum duration of an utterance.")
+parser.add_argument("--steps", default=5, type=int)
+parser.add_argument("--resample_type", default='kaiser_fast', choices=['kaiser_best', 'kaiser_fast', 'fft'])
+parser.add_argument("--cuda", action='store_true')
+args = parser.parse_args()
+
+
+def time_per_step(step, sync):
+    step()
+    sync()
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        step()
+    sync()
+    return (time.perf_counter() - start) / args.steps
+
+
+def main():
+    device = torch.device('cuda' if args.cuda else 'cpu')
+    sync = torch.cuda.synchronize if args.cuda else (lambda: None)
+
+    rng = np.random.RandomState(0)
+    max_len = int(args.seconds * args.sample_rate)
+    length = torch.from_numpy(rng.randint(max_len // 2, max_len + 1, args.batch_size))
+    signal = torch.from_numpy((0.1 * rng.randn(args.batch_size, max_len)).astype(np.float32))
+    signal[torch.arange(max_len) >= length[:, None]] = 0.0
+    utterances = [signal[i, : length[i]].numpy() for i in range(args.batch_size)]
+    signal, length = signal.to(device), length.to(device)
+
+    perturbations = [
+        (
+            'speed',
+            SpeedPerturbation(args.sample_rate, args.resample_type, rng=random.Random(0)),
+            BatchedSpeedPerturbation(args.sample_rate, seed=0),
+        ),
+        ('time_stretch', TimeStretchPerturbation(rng=random.Random(0)), BatchedTimeStretchPerturbation(seed=0)),
+    ]
+    for name, perturbation, batched in perturbations:
+
+        def loops():
+            for samples in utterances:
+                perturbation.perturb(AudioSegment(samples.copy(), args.sample_rate))
+
+        loops_time = time_per_step(loops, lambda: None)
+        batched_time = time_per_step(lambda: batched(signal, length), sync)
+        print(
+            f"{name:>12}: librosa {loops_time * 1000:9.2f}ms, batched {batched_time * 1000:8.2f}ms per batch "
+            f"({loops_time / batched_time:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
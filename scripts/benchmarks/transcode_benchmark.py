@@ -0,0 +1,61 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Throughput in audio samples per second of `TranscodePerturbation` with the G.711 codec, through the in-process
+# telephone channel and through sox subprocesses (skipped if sox is not installed), on random utterances.
+#
+# USAGE: python transcode_benchmark.py --sample_rate=16000 --seconds=10 --utterances=20
+
+import argparse
+import shutil
+import time
+
+import numpy as np
+
+from nemo.collections.asr.parts.perturb import TranscodePerturbation
+from nemo.collections.asr.parts.segment import AudioSegment
+
+parser = argparse.ArgumentParser(description="Benchmark in-process against sox codec augmentation.")
+parser.add_argument("--sample_rate", default=16000, type=int)
+parser.add_argument("--seconds", default=10.0, type=float, help="Duration of every utterance.")
+parser.add_argument("--utterances", default=20, type=int)
+args = parser.parse_args()
+
+
+def main():
+    rng = np.random.RandomState(0)
+    utterances = [
+        (0.1 * rng.randn(int(args.seconds * args.sample_rate))).astype(np.float32) for _ in range(args.utterances)
+    ]
+
+    for use_sox in (False, True):
+        name = 'sox' if use_sox else 'in-process'
+        if use_sox and shutil.which('sox') is None:
+            print(f"{name:>10}: skipped, sox is not installed")
+            continue
+
+        perturbation = TranscodePerturbation(rng=np.random.RandomState(0), codecs=['g711'], use_sox=use_sox)
+        start = time.perf_counter()
+        for samples in utterances:
+            perturbation.perturb(AudioSegment(samples.copy(), args.sample_rate))
+        elapsed = time.perf_counter() - start
+        num_samples = sum(len(samples) for samples in utterances)
+        print(
+            f"{name:>10}: {num_samples / elapsed / 1e6:8.2f}M samples/s, "
+            f"{elapsed / len(utterances) * 1000:8.2f}ms per utterance"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Decoding speed in generated tokens per second of the transformer sequence generators with the key/value cache of
+# `TransformerDecoder` against passing the hidden states of all decoded positions every step, for several output
+# lengths. The model has random weights and <eos> is never generated, so all sequences have the requested length.
+#
+# USAGE: python transformer_decoding_benchmark.py --lengths 16 64 256 --batch_size=8 --beam_size=4 \
+#            [--num_layers=6 --hidden_size=512 --num_heads=8] [--cuda]
+
+import argparse
+import time
+
+import torch
+
+from nemo.collections.nlp.modules.common.transformer import (
+    BeamSearchSequenceGenerator,
+    GreedySequenceGenerator,
+    TransformerDecoder,
+    TransformerEmbedding,
+)
+
+parser = argparse.ArgumentParser(description="Benchmark transformer decoding with and without key/value cache.")
+parser.add_argument("--lengths", default=[16, 64, 256], type=int, nargs='+')
+parser.add_argument("--batch_size", default=8, type=int)
+parser.add_argument("--beam_size", default=4, type=int)
+parser.add_argument("--num_layers", default=6, type=int)
+parser.add_argument("--hidden_size", default=512, type=int)
+parser.add_argument("--num_heads", default=8, type=int)
+parser.add_argument("--vocab_size", default=8000, type=int)
+parser.add_argument("--src_length", default=32, type=int)
+parser.add_argument("--repeats", default=3, type=int)
+parser.add_argument("--cuda", action='store_true')
+args = parser.parse_args()
+
+
+def main():
+    device = torch.device('cuda' if args.cuda else 'cpu')
+    sync = torch.cuda.synchronize if args.cuda else (lambda: None)
+    torch.manual_seed(0)
+
+    max_length = max(args.lengths) + 1
+    embedding = TransformerEmbedding(args.vocab_size, args.hidden_size, max_sequence_length=max_length)
+    decoder = TransformerDecoder(
+        args.num_layers, args.hidden_size, inner_size=4 * args.hidden_size, num_attention_heads=args.num_heads
+    )
+    log_softmax = torch.nn.Sequential(torch.nn.Linear(args.hidden_size, args.vocab_size), torch.nn.LogSoftmax(dim=-1))
+    for module in (embedding, decoder, log_softmax):
+        module.to(device).eval()
+
+    encoder_states = torch.randn(args.batch_size, args.src_length, args.hidden_size, device=device)
+    encoder_mask = torch.ones(args.batch_size, args.src_length, device=device)
+
+    for name, generator_class, kwargs in [
+        ('greedy', GreedySequenceGenerator, {}),
+        (f'beam {args.beam_size}', BeamSearchSequenceGenerator, {'beam_size': args.beam_size}),
+    ]:
+        for length in args.lengths:
+            speeds = []
+            for use_cache in (False, True):
+                generator = generator_class(
+                    embedding,
+                    decoder,
+                    log_softmax,
+                    eos=args.vocab_size,
+                    max_sequence_length=length + 1,
+                    max_delta_length=length,
+                    use_cache=use_cache,
+                    **kwargs,
+                )
+                generator(encoder_hidden_states=encoder_states, encoder_input_mask=encoder_mask)
+                sync()
+                start = time.perf_counter()
+                for _ in range(args.repeats):
+                    output = generator(encoder_hidden_states=encoder_states, encoder_input_mask=encoder_mask)
+                sync()
+                elapsed = (time.perf_counter() - start) / args.repeats
+                speeds.append(output.numel() / elapsed)
+            print(
+                f"{name:>8}, {length:4d} tokens: {speeds[0]:10.0f} tokens/s without cache, "
+                f"{speeds[1]:10.0f} tokens/s with cache ({speeds[1] / speeds[0]:.1f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
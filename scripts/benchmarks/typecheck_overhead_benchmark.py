@@ -0,0 +1,92 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Overhead of the @typecheck decorator on a training step of a CTC model (preprocessor, encoder, decoder and loss
+# built from a model config with random weights), in each typecheck mode. The time spent in the decorator by every
+# typed method is reported for the `full` mode.
+#
+# USAGE: python typecheck_overhead_benchmark.py --config=examples/asr/conf/quartznet_15x5.yaml --batch_size=4 \
+#            --seconds=2 --steps=10 [--cuda]
+
+import argparse
+import time
+
+import torch
+from omegaconf import OmegaConf
+
+from nemo.collections.asr.losses.ctc import CTCLoss
+from nemo.collections.asr.modules import AudioToMelSpectrogramPreprocessor, ConvASRDecoder, ConvASREncoder
+from nemo.core import typecheck
+
+parser = argparse.ArgumentParser(description="Benchmark the overhead of @typecheck on a training step.")
+parser.add_argument("--config", default="examples/asr/conf/quartznet_15x5.yaml", type=str)
+parser.add_argument("--batch_size", default=4, type=int)
+parser.add_argument("--seconds", default=2.0, type=float, help="Duration of every utterance.")
+parser.add_argument("--steps", default=10, type=int)
+parser.add_argument("--cuda", action='store_true')
+args = parser.parse_args()
+
+
+def main():
+    device = torch.device('cuda' if args.cuda else 'cpu')
+    cfg = OmegaConf.load(args.config).model
+    preprocessor = AudioToMelSpectrogramPreprocessor(**OmegaConf.to_container(cfg.preprocessor.params, resolve=True))
+    encoder = ConvASREncoder(**OmegaConf.to_container(cfg.encoder.params, resolve=True))
+    decoder = ConvASRDecoder(**OmegaConf.to_container(cfg.decoder.params, resolve=True))
+    loss = CTCLoss(num_classes=decoder.num_classes_with_blank - 1)
+    preprocessor, encoder, decoder = preprocessor.to(device), encoder.to(device), decoder.to(device)
+
+    sample_rate = cfg.preprocessor.params.get('sample_rate', 16000)
+    audio = torch.randn(args.batch_size, int(args.seconds * sample_rate), device=device)
+    audio_len = torch.full((args.batch_size,), audio.size(1), dtype=torch.long, device=device)
+    targets = torch.randint(0, decoder.num_classes_with_blank - 1, (args.batch_size, 10), device=device)
+    targets_len = torch.full((args.batch_size,), 10, dtype=torch.long, device=device)
+
+    def step():
+        features, features_len = preprocessor(input_signal=audio, length=audio_len)
+        encoded, encoded_len = encoder(audio_signal=features, length=features_len)
+        log_probs = decoder(encoder_output=encoded)
+        loss_value = loss(log_probs=log_probs, targets=targets, input_lengths=encoded_len, target_lengths=targets_len)
+        loss_value.backward()
+
+    def timed_steps():
+        step()
+        if device.type == 'cuda':
+            torch.cuda.synchronize()
+        start = time.perf_counter()
+        for _ in range(args.steps):
+            step()
+        if device.type == 'cuda':
+            torch.cuda.synchronize()
+        return (time.perf_counter() - start) / args.steps
+
+    for mode in ('full', 'ndim', 'production'):
+        with typecheck.typecheck_mode(mode):
+            print(f"{mode:>10}: {timed_steps() * 1000:8.2f}ms per step")
+
+    typecheck.reset_typecheck_stats()
+    typecheck.set_typecheck_stats_enabled(True)
+    try:
+        for _ in range(args.steps):
+            step()
+    finally:
+        typecheck.set_typecheck_stats_enabled(False)
+
+    print("Time spent in @typecheck per step, `full` mode:")
+    for name, stats in sorted(typecheck.get_typecheck_stats().items(), key=lambda item: -item[1].check_time):
+        print(f"{name:>40}: {stats.calls // args.steps:4d} call(s), {stats.check_time / args.steps * 1e6:8.1f}us")
+
+
+if __name__ == "__main__":
+    main()
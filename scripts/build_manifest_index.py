@@ -0,0 +1,87 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# This script compiles json manifests into a memory-mapped manifest index which can be passed to the ASR datasets
+# via `manifest_index` (e.g. `model.train_ds.manifest_index=<index_dir>`). The index is only used while it is up to
+# date with the manifests, so it has to be rebuilt whenever they change.
+#
+# USAGE: python build_manifest_index.py --manifest=<comma separated manifests> --index_dir=<output directory> \
+#         [--kind audio_text|speech_label] [--labels="<model labels as json list or file>"] [--parser en]
+#
+# Passing the model's character labels pre-tokenizes the transcripts. They are only used by datasets whose parser
+# has the same labels and settings, otherwise transcripts are tokenized on access.
+
+import argparse
+import json
+import os
+
+from nemo.collections.asr.parts import manifest_index, parsers
+
+parser = argparse.ArgumentParser(description="Compile ASR json manifests into a memory-mapped manifest index.")
+parser.add_argument(
+    "--manifest", required=True, type=str, help="Comma separated manifests, in the same order as the dataset config."
+)
+parser.add_argument("--index_dir", required=True, type=str, help="Output directory of the index.")
+parser.add_argument(
+    "--kind",
+    default="audio_text",
+    choices=list(manifest_index.KINDS),
+    help="`audio_text` for ASR datasets, `speech_label` for AudioToSpeechLabelDataSet.",
+)
+parser.add_argument(
+    "--labels",
+    default=None,
+    type=str,
+    help="Character labels to pre-tokenize transcripts with, as a json list or a path to a json file holding one.",
+)
+parser.add_argument("--parser", default="en", type=str, help="Parser name, as in the dataset config.")
+parser.add_argument("--unk_index", default=-1, type=int, help="Unknown character index.")
+parser.add_argument("--blank_index", default=-1, type=int, help="Blank character index.")
+parser.add_argument(
+    "--normalize_transcripts", action='store_true', help="Normalize transcripts, as in the dataset config."
+)
+parser.add_argument("--force", action='store_true', help="Rebuild the index even if it is up to date.")
+args = parser.parse_args()
+
+
+def main():
+    manifests = args.manifest.split(',')
+
+    if not args.force and os.path.exists(os.path.join(args.index_dir, 'meta.json')):
+        index = manifest_index.ManifestIndex(args.index_dir)
+        if index.kind == args.kind and index.is_valid_for(manifests):
+            print(f"Manifest index {args.index_dir} is up to date, pass --force to rebuild it.")
+            return
+
+    text_parser = None
+    if args.labels is not None:
+        if os.path.exists(args.labels):
+            with open(args.labels, 'r') as f:
+                labels = json.load(f)
+        else:
+            labels = json.loads(args.labels)
+
+        text_parser = parsers.make_parser(
+            labels=labels,
+            name=args.parser,
+            unk_id=args.unk_index,
+            blank_id=args.blank_index,
+            do_normalize=args.normalize_transcripts,
+        )
+
+    manifest_index.build_manifest_index(manifests, args.index_dir, kind=args.kind, parser=text_parser)
+
+
+if __name__ == "__main__":
+    main()
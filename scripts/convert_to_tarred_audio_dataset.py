@@ -14,13 +14,38 @@
 #
 # This script converts an existing audio dataset with a manifest to
 # a tarred and sharded audio dataset that can be read by the
-# TarredAudioToTextDataLayer.
+# TarredAudioToTextDataLayer. Next to the tarred manifest, it writes
+# the sample index of the shards (tarred_audio_shard_index.json) with
+# the offset of every member, which balances shards between ranks when
+# set as `tarred_shard_index`.
+#
+# Shards are written in parallel by --num_workers processes. By default
+# every shard gets the same number of utterances and the remainder is
+# discarded, as required by tarred datasets used without a shard index;
+# --balance=duration distributes utterances so that all shards hold about
+# the same duration of audio instead, which needs the shard index (see
+# `tarred_shard_index`) for balanced training. With --target_sr, audio
+# is decoded, resampled and stored as 16-bit mono wav files. With
+# --append, the utterances of the manifest that are not in the tarred
+# dataset of --target_dir yet are written to new shards, and the
+# manifest and shard index are extended, existing shards are unchanged.
+#
+# USAGE: python convert_to_tarred_audio_dataset.py --manifest_path=<manifest> --target_dir=<directory> \
+#         --num_shards=64 [--num_workers=8] [--target_sr=16000] [--shuffle --shuffle_seed=1] [--append]
 
 import argparse
+import io
 import json
 import os
 import random
 import tarfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from nemo.collections.asr.parts.shard_index import ShardInfo, balance_shards, load_shard_index, write_shard_index
+
+MANIFEST_NAME = 'tarred_audio_manifest.json'
+SHARD_INDEX_NAME = 'tarred_audio_shard_index.json'
 
 parser = argparse.ArgumentParser(
     description="Convert an existing ASR dataset to tarballs compatible with TarredAudioToTextDataLayer."
@@ -54,32 +79,98 @@ parser.add_argument(
     help="Whether or not to randomly shuffle the samples in the manifest before tarring/sharding.",
 )
 parser.add_argument("--shuffle_seed", type=int, help="Random seed for use if shuffling is enabled.")
+parser.add_argument("--num_workers", default=1, type=int, help="Number of processes writing shards.")
+parser.add_argument(
+    "--balance",
+    default='count',
+    choices=['count', 'duration'],
+    help="Balance shards by number of utterances (discarding the remainder), or by total duration. Datasets "
+    "balanced by duration have shards of different sizes and should be read with `tarred_shard_index`.",
+)
+parser.add_argument(
+    "--target_sr", default=None, type=int, help="If set, audio is resampled and stored as 16-bit mono wav files."
+)
+parser.add_argument(
+    "--resample_type",
+    default='kaiser_best',
+    choices=['kaiser_best', 'kaiser_fast', 'polyphase'],
+    help="Resampling method used with --target_sr.",
+)
+parser.add_argument(
+    "--append", action='store_true', help="Add the new utterances of the manifest to an existing tarred dataset."
+)
 args = parser.parse_args()
 
 
-def create_shard(entries, target_dir, new_entries, shard_id):
-    """Creates a tarball containing the audio files from `entries`.
+def squash_filename(audio_filepath):
+    """Name of an audio file in the tarballs, since the directory structure of audio files is not preserved."""
+    base, ext = os.path.splitext(audio_filepath)
+    base = base.replace('/', '_')
+    # Need the following replacement as long as WebDataset splits on first period
+    base = base.replace('.', '_')
+    return base, ext
+
+
+def transcode(audio_filepath):
+    """Decodes and resamples an audio file to `--target_sr`, returns the wav file bytes and the duration."""
+    import soundfile as sf
+
+    from nemo.collections.asr.parts.segment import AudioSegment
+
+    segment = AudioSegment.from_file(audio_filepath, target_sr=args.target_sr, resample_type=args.resample_type)
+    buffer = io.BytesIO()
+    sf.write(buffer, segment.samples, args.target_sr, format='WAV', subtype='PCM_16')
+    return buffer.getvalue(), segment.duration
+
+
+def create_shard(entries, target_dir, shard_id):
+    """Creates a tarball containing the audio files from `entries`, returns its manifest entries and sample index.
     """
-    tar = tarfile.open(os.path.join(target_dir, f'audio_{shard_id}.tar'), mode='w')
+    shard_path = os.path.join(target_dir, f'audio_{shard_id}.tar')
+    shard = ShardInfo(shard_path, [], [], [], [])
+    new_entries = []
+
+    with tarfile.open(shard_path, mode='w') as tar:
+        for entry in entries:
+            base, ext = squash_filename(entry['audio_filepath'])
+            duration = entry['duration']
+            if args.target_sr is not None:
+                data, duration = transcode(entry['audio_filepath'])
+                ext = '.wav'
+            else:
+                with open(entry['audio_filepath'], 'rb') as f:
+                    data = f.read()
+
+            squashed_filename = f'{base}{ext}'
+            tarinfo = tarfile.TarInfo(squashed_filename)
+            tarinfo.size = len(data)
+            tarinfo.mtime = os.path.getmtime(entry['audio_filepath'])
+            header_size = len(tarinfo.tobuf(tar.format, tar.encoding, tar.errors))
+            shard.offsets.append(tar.offset + header_size)
+            shard.sizes.append(len(data))
+            tar.addfile(tarinfo, io.BytesIO(data))
+
+            shard.file_ids.append(base)
+            shard.durations.append(duration)
+            new_entries.append(
+                {
+                    'audio_filepath': squashed_filename,
+                    'duration': duration,
+                    'text': entry['text'],
+                    'shard_id': shard_id,  # Keep shard ID for recordkeeping
+                }
+            )
 
-    for entry in entries:
-        # We squash the filename since we do not preserve directory structure of audio files in the tarball.
-        base, ext = os.path.splitext(entry['audio_filepath'])
-        base = base.replace('/', '_')
-        # Need the following replacement as long as WebDataset splits on first period
-        base = base.replace('.', '_')
-        squashed_filename = f'{base}{ext}'
-        tar.add(entry['audio_filepath'], arcname=squashed_filename)
+    return new_entries, shard
 
-        new_entry = {
-            'audio_filepath': squashed_filename,
-            'duration': entry['duration'],
-            'text': entry['text'],
-            'shard_id': shard_id,  # Keep shard ID for recordkeeping
-        }
-        new_entries.append(new_entry)
 
-    tar.close()
+def _create_shard(task):
+    return create_shard(*task)
+
+
+def read_manifest(path):
+    with open(path, 'r') as m:
+        return [json.loads(line) for line in m]
 
 
 def main():
@@ -93,45 +184,83 @@ def main():
     if not os.path.exists(target_dir):
         os.makedirs(target_dir)
 
+    # Existing tarred dataset to append to
+    old_entries, old_shards = [], []
+    new_manifest_path = os.path.join(target_dir, MANIFEST_NAME)
+    shard_index_path = os.path.join(target_dir, SHARD_INDEX_NAME)
+    if args.append:
+        if not os.path.exists(shard_index_path):
+            raise ValueError(f"Cannot append to {target_dir}, it has no shard index ({SHARD_INDEX_NAME}).")
+        old_entries = read_manifest(new_manifest_path)
+        old_shards = list(load_shard_index(shard_index_path).values())
+        old_shards = [shard._replace(path=os.path.join(target_dir, shard.path)) for shard in old_shards]
+    existing = {os.path.splitext(entry['audio_filepath'])[0] for entry in old_entries}
+    first_shard_id = max((entry['shard_id'] for entry in old_entries), default=-1) + 1
+
     # Read the existing manifest
     entries = []
     filtered_entries = 0
-    with open(manifest_path, 'r') as m:
-        for line in m:
-            entry = json.loads(line)
-            if max_duration is not None and entry['duration'] < max_duration:
-                entries.append(entry)
-            else:
-                filtered_entries += 1
+    skipped_entries = 0
+    for entry in read_manifest(manifest_path):
+        if max_duration is not None and entry['duration'] >= max_duration:
+            filtered_entries += 1
+        elif squash_filename(entry['audio_filepath'])[0] in existing:
+            skipped_entries += 1
+        else:
+            entries.append(entry)
 
     if filtered_entries > 0:
         print(f"Filtered {filtered_entries} files with maximum duration > {max_duration} seconds.")
+    if skipped_entries > 0:
+        print(f"Skipped {skipped_entries} files already in the tarred dataset.")
 
     if shuffle:
         random.seed(seed)
         print("Shuffling...")
         random.shuffle(entries)
 
+    # Assign entries to shards
+    if args.balance == 'duration':
+        if len(entries) < num_shards:
+            raise ValueError(f"Cannot balance {num_shards} shards by duration with {len(entries)} files.")
+        shard_entries = [
+            [entries[i] for i in shard] for shard in balance_shards([e['duration'] for e in entries], num_shards)
+        ]
+    else:
+        print(f"Remainder: {len(entries) % num_shards}")
+        shard_size = len(entries) // num_shards
+        shard_entries = [entries[i * shard_size : (i + 1) * shard_size] for i in range(num_shards)]
+        # We discard in order to have the same number of entries per shard.
+        print(f"Have {len(entries) - shard_size * num_shards} entries left over that will be discarded.")
+
     # Create shards and updated manifest entries
-    new_entries = []
-    print(f"Remainder: {len(entries) % num_shards}")
-    for i in range(num_shards):
-        start_idx = (len(entries) // num_shards) * i
-        end_idx = start_idx + (len(entries) // num_shards)
-        print(f"Shard {i} has entries {start_idx} ~ {end_idx}")
-        if i == num_shards - 1:
-            # We discard in order to have the same number of entries per shard.
-            print(f"Have {len(entries) - end_idx} entries left over that will be discarded.")
+    start = time.time()
+    tasks = [(shard, target_dir, first_shard_id + i) for i, shard in enumerate(shard_entries)]
+    if args.num_workers > 1:
+        with ProcessPoolExecutor(args.num_workers) as pool:
+            results = list(pool.map(_create_shard, tasks))
+    else:
+        results = list(map(_create_shard, tasks))
 
-        create_shard(entries[start_idx:end_idx], target_dir, new_entries, i)
+    new_entries, new_shards = [], []
+    for entries_of_shard, shard in results:
+        new_entries.extend(entries_of_shard)
+        new_shards.append(shard)
+        print(
+            f"Shard {os.path.basename(shard.path)} has {len(shard.file_ids)} entries, "
+            f"{sum(shard.durations) / 3600:.2f} hours"
+        )
+    print(f"Created {len(new_shards)} shards in {time.time() - start:.1f}s")
 
     # Write manifest
-    new_manifest_path = os.path.join(target_dir, 'tarred_audio_manifest.json')
     with open(new_manifest_path, 'w') as m2:
-        for entry in new_entries:
+        for entry in old_entries + new_entries:
             json.dump(entry, m2)
             m2.write('\n')
 
+    # Write sample index of the shards
+    write_shard_index(shard_index_path, old_shards + new_shards)
+
 
 if __name__ == "__main__":
     main()
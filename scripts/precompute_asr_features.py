@@ -0,0 +1,130 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# This script fills a persistent feature cache with the log-mel features of every utterance of json manifests, so
+# that training with `feature_cache_dir` set in the dataset config does not decode any audio. The cache is keyed by
+# the preprocessor config of the model and the audio loading settings, which have to match the dataset config. If
+# the dataset config sets `audio_cache_dir`, pass it as --audio_cache_dir, features are then computed from the cached
+# audio as during training.
+#
+# USAGE: python precompute_asr_features.py --manifest=<comma separated manifests> \
+#         --config=examples/asr/conf/quartznet_15x5.yaml --cache_dir=<cache directory> [--num_workers=8] \
+#         [--sample_rate=16000] [--int_values] [--no_trim] [--resample_type=kaiser_best] \
+#         [--audio_cache_dir=<audio cache directory>] [--audio_cache_dtype=int16]
+
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import torch
+from omegaconf import OmegaConf
+
+from nemo.collections.asr.parts import manifest
+from nemo.collections.asr.parts.feature_cache import AudioCache, FeatureCache
+from nemo.collections.asr.parts.features import WaveformFeaturizer
+
+parser = argparse.ArgumentParser(description="Precompute log-mel features of ASR manifests into a feature cache.")
+parser.add_argument("--manifest", required=True, type=str, help="Comma separated manifests.")
+parser.add_argument(
+    "--config", required=True, type=str, help="Model config, features are computed with `model.preprocessor.params`."
+)
+parser.add_argument("--cache_dir", required=True, type=str, help="Cache directory, as `feature_cache_dir`.")
+parser.add_argument("--num_workers", default=4, type=int, help="Number of worker processes.")
+parser.add_argument("--sample_rate", default=16000, type=int, help="Sample rate, as in the dataset config.")
+parser.add_argument("--int_values", action='store_true', help="Load audio as integers, as in the dataset config.")
+parser.add_argument("--no_trim", action='store_true', help="Do not trim silence (`trim_silence: False`).")
+parser.add_argument(
+    "--resample_type",
+    default='kaiser_best',
+    choices=['kaiser_best', 'kaiser_fast', 'polyphase'],
+    help="Resampling method, as in the dataset config.",
+)
+parser.add_argument("--audio_cache_dir", default=None, type=str, help="`audio_cache_dir` of the dataset config.")
+parser.add_argument(
+    "--audio_cache_dtype", default='int16', choices=['int16', 'float16'], help="As in the dataset config."
+)
+args = parser.parse_args()
+
+_cache = None
+_featurizer = None
+
+
+def _feature_cache(preprocessor_params):
+    return FeatureCache(
+        args.cache_dir,
+        preprocessor_params,
+        args.sample_rate,
+        int_values=args.int_values,
+        trim=not args.no_trim,
+        resample_type=args.resample_type,
+        audio_dtype=args.audio_cache_dtype if args.audio_cache_dir is not None else None,
+    )
+
+
+def _init_worker(preprocessor_params):
+    global _cache, _featurizer
+    torch.set_num_threads(1)
+    _cache = _feature_cache(preprocessor_params)
+    audio_cache = None
+    if args.audio_cache_dir is not None:
+        audio_cache = AudioCache(
+            args.audio_cache_dir,
+            args.sample_rate,
+            int_values=args.int_values,
+            resample_type=args.resample_type,
+            dtype=args.audio_cache_dtype,
+        )
+    _featurizer = WaveformFeaturizer(
+        sample_rate=args.sample_rate,
+        int_values=args.int_values,
+        resample_type=args.resample_type,
+        audio_cache=audio_cache,
+    )
+
+
+def _process(item):
+    audio_file, offset, duration = item['audio_file'], item.get('offset', None) or 0, item['duration']
+    if _cache.load(audio_file, offset, duration) is not None:
+        return 0
+    _cache.get(
+        audio_file,
+        offset,
+        duration,
+        lambda: _featurizer.process(audio_file, offset=offset, duration=duration, trim=not args.no_trim),
+    )
+    return 1
+
+
+def main():
+    cfg = OmegaConf.load(args.config)
+    preprocessor_params = OmegaConf.to_container(cfg.model.preprocessor.params, resolve=True)
+    items = list(manifest.item_iter(args.manifest.split(',')))
+
+    start = time.time()
+    if args.num_workers > 1:
+        with ProcessPoolExecutor(args.num_workers, initializer=_init_worker, initargs=(preprocessor_params,)) as pool:
+            computed = sum(pool.map(_process, items, chunksize=16))
+    else:
+        _init_worker(preprocessor_params)
+        computed = sum(map(_process, items))
+
+    cache_dir = _feature_cache(preprocessor_params).cache_dir
+    print(
+        f"Computed features of {computed} utterances ({len(items) - computed} already cached) in "
+        f"{time.time() - start:.1f}s, cache: {cache_dir}"
+    )
+
+
+if __name__ == "__main__":
+    main()
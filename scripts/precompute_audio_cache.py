@@ -0,0 +1,98 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# This script decodes and resamples every utterance of json manifests with a process pool and stores the audio in a
+# persistent audio cache, so that training with `audio_cache_dir` set in the dataset config neither decodes nor
+# resamples any audio. The cache is keyed by the audio loading settings, which have to match the dataset config.
+#
+# USAGE: python precompute_audio_cache.py --manifest=<comma separated manifests> --cache_dir=<cache directory> \
+#         [--num_workers=8] [--sample_rate=16000] [--int_values] [--resample_type=kaiser_best] [--dtype=int16]
+
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from nemo.collections.asr.parts import manifest
+from nemo.collections.asr.parts.feature_cache import AudioCache
+from nemo.collections.asr.parts.segment import AudioSegment
+
+parser = argparse.ArgumentParser(description="Decode and resample the audio of ASR manifests into an audio cache.")
+parser.add_argument("--manifest", required=True, type=str, help="Comma separated manifests.")
+parser.add_argument("--cache_dir", required=True, type=str, help="Cache directory, as `audio_cache_dir`.")
+parser.add_argument("--num_workers", default=4, type=int, help="Number of worker processes.")
+parser.add_argument("--sample_rate", default=16000, type=int, help="Sample rate, as in the dataset config.")
+parser.add_argument("--int_values", action='store_true', help="Load audio as integers, as in the dataset config.")
+parser.add_argument(
+    "--resample_type",
+    default='kaiser_best',
+    choices=['kaiser_best', 'kaiser_fast', 'polyphase'],
+    help="Resampling method, as in the dataset config.",
+)
+parser.add_argument("--dtype", default='int16', choices=['int16', 'float16'], help="As `audio_cache_dtype`.")
+args = parser.parse_args()
+
+_cache = None
+
+
+def _init_worker():
+    global _cache
+    _cache = AudioCache(
+        args.cache_dir,
+        args.sample_rate,
+        int_values=args.int_values,
+        resample_type=args.resample_type,
+        dtype=args.dtype,
+    )
+
+
+def _process(item):
+    audio_file, offset, duration = item['audio_file'], item.get('offset', None) or 0, item['duration']
+    misses, decode_time = _cache.misses, _cache.decode_time
+    _cache.get(
+        audio_file,
+        offset,
+        duration,
+        lambda: AudioSegment.from_file(
+            audio_file,
+            target_sr=args.sample_rate,
+            int_values=args.int_values,
+            offset=offset,
+            duration=duration,
+            resample_type=args.resample_type,
+        ).samples,
+    )
+    return _cache.misses - misses, _cache.decode_time - decode_time
+
+
+def main():
+    items = list(manifest.item_iter(args.manifest.split(',')))
+
+    start = time.time()
+    if args.num_workers > 1:
+        with ProcessPoolExecutor(args.num_workers, initializer=_init_worker) as pool:
+            stats = list(pool.map(_process, items, chunksize=16))
+    else:
+        _init_worker()
+        stats = list(map(_process, items))
+
+    misses = sum(missed for missed, _ in stats)
+    decode_time = sum(elapsed for _, elapsed in stats)
+    print(
+        f"Decoded {misses} utterances ({len(items) - misses} already cached) in {time.time() - start:.1f}s, "
+        f"{decode_time / max(misses, 1) * 1000:.1f}ms per utterance and worker"
+    )
+
+
+if __name__ == "__main__":
+    main()
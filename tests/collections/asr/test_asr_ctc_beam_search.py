@@ -0,0 +1,121 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import itertools
+import math
+import os
+import tempfile
+
+import numpy as np
+import pytest
+import torch
+
+from nemo.collections.asr.parts.ctc_beam_search import CTCBeamSearchDecoder, CTCPrefixBeamSearch, NGramLanguageModel
+
+ARPA = """
+\\data\\
+ngram 1=5
+ngram 2=3
+
+\\1-grams:
+-1.0\t<unk>
+-0.5\t<s>\t-0.3
+-0.6\t</s>
+-0.7\tab\t-0.2
+-0.9\tba\t-0.4
+
+\\2-grams:
+-0.1\t<s> ab
+-0.2\tab </s>
+-0.3\tab ba
+
+\\end\\
+"""
+
+
+def _collapse(alignment, blank_id):
+    labels = [label for label, _ in itertools.groupby(alignment)]
+    return tuple(label for label in labels if label != blank_id)
+
+
+class TestCTCBeamSearch:
+    @pytest.mark.unit
+    def test_prefix_probabilities_are_exact(self):
+        torch.manual_seed(0)
+        log_probs = torch.randn(4, 3).log_softmax(dim=-1).numpy()
+
+        expected = {}
+        for alignment in itertools.product(range(3), repeat=4):
+            prefix = _collapse(alignment, blank_id=2)
+            logprob = sum(log_probs[t, label] for t, label in enumerate(alignment))
+            expected[prefix] = np.logaddexp(expected.get(prefix, -np.inf), logprob)
+
+        hypotheses = CTCPrefixBeamSearch(['a', 'b'], beam_width=100).decode(log_probs)
+
+        assert len(hypotheses) == len(expected)
+        for labels, score in hypotheses:
+            assert math.isclose(score, expected[tuple(labels)], rel_tol=1e-5)
+        assert tuple(hypotheses[0][0]) == max(expected, key=expected.get)
+
+    @pytest.mark.unit
+    def test_ngram_lm_backoff(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            arpa_path = os.path.join(tmpdir, 'lm.arpa')
+            with open(arpa_path, 'w') as f:
+                f.write(ARPA)
+            lm = NGramLanguageModel(arpa_path)
+
+        ab, ba = lm.word_id('ab'), lm.word_id('ba')
+        state = lm.initial_state()
+
+        logprob, state = lm.score(state, ab)
+        assert math.isclose(logprob, -0.1 * math.log(10), rel_tol=1e-5)
+        # "ab ab" backs off from the bigram context "ab" to the unigram
+        logprob, _ = lm.score(state, ab)
+        assert math.isclose(logprob, (-0.2 - 0.7) * math.log(10), rel_tol=1e-5)
+        assert math.isclose(lm.final_score(state), -0.2 * math.log(10), rel_tol=1e-5)
+        assert math.isclose(lm.score(state, lm.word_id('oov'))[0], -1.0 * math.log(10), rel_tol=1e-5)
+
+    @pytest.mark.unit
+    def test_lm_rescoring_changes_hypothesis(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            arpa_path = os.path.join(tmpdir, 'lm.arpa')
+            with open(arpa_path, 'w') as f:
+                f.write(ARPA)
+            lm = NGramLanguageModel(arpa_path)
+
+        # Acoustics slightly prefer "ba" over "ab", the LM strongly prefers "ab".
+        probs = np.array([[0.45, 0.55, 1e-6, 1e-6], [0.55, 0.45, 1e-6, 1e-6]])
+        log_probs = np.log(probs / probs.sum(axis=-1, keepdims=True))
+        vocabulary = ['a', 'b', ' ']
+
+        without_lm = CTCPrefixBeamSearch(vocabulary, beam_width=8).decode(log_probs)
+        with_lm = CTCPrefixBeamSearch(vocabulary, beam_width=8, language_model=lm, alpha=2.0, beta=0.0)
+        with_lm = with_lm.decode(log_probs)
+
+        assert without_lm[0][0] == [1, 0]
+        assert with_lm[0][0] == [0, 1]
+
+    @pytest.mark.unit
+    def test_decode_batch_with_workers(self):
+        torch.manual_seed(0)
+        log_probs = torch.randn(6, 20, 5).log_softmax(dim=-1)
+        lengths = torch.tensor([20, 15, 10, 20, 5, 1])
+
+        serial = CTCBeamSearchDecoder(['a', 'b', 'c', 'd'], beam_width=4, cutoff_prob=0.99)
+        pooled = CTCBeamSearchDecoder(['a', 'b', 'c', 'd'], beam_width=4, cutoff_prob=0.99, num_workers=2)
+        try:
+            assert serial.decode_batch(log_probs, lengths) == pooled.decode_batch(log_probs, lengths)
+        finally:
+            pooled.close()
@@ -12,8 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import copy
+import os
+import tempfile
 
+import numpy as np
 import pytest
+import soundfile
 from omegaconf import DictConfig
 
 from nemo.collections.asr.models import EncDecCTCModel
@@ -114,3 +118,23 @@ class TestEncDecCTCModel:
         asr_model.change_vocabulary(new_vocabulary=new_vocab)
         # fully connected + bias
         assert asr_model.num_weights == nw1 + 3 * (asr_model.decoder._feat_in + 1)
+
+    @pytest.mark.unit
+    def test_transcribe_in_memory(self, asr_model):
+        rng = np.random.RandomState(0)
+        # Lengths in a different order than sorted by transcribe, so that batches are reordered and padded
+        audio = [rng.uniform(-0.5, 0.5, size=size).astype(np.float32) for size in (8000, 16000, 4000)]
+        audio.append((rng.uniform(-0.5, 0.5, size=12000) * 32767).astype('<i2').tobytes())
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            audio_path = os.path.join(tmpdir, 'audio.wav')
+            soundfile.write(audio_path, rng.uniform(-0.5, 0.5, size=10000), 16000, subtype='PCM_16')
+            audio.append(audio_path)
+
+            expected = [asr_model.transcribe([item], batch_size=1)[0] for item in audio]
+            hypotheses = asr_model.transcribe(audio, batch_size=2)
+            assert hypotheses == expected
+            assert any(expected)
+
+            generator = asr_model.transcribe_generator(iter(audio), batch_size=2, sort_window=1)
+            assert list(generator) == expected
@@ -12,13 +12,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import json
 import os
+import tarfile
+import tempfile
 
 import pytest
 import torch
 
 from nemo.collections.asr.data.audio_to_text import TarredAudioToBPEDataset, TarredAudioToCharDataset
 from nemo.collections.asr.parts.features import WaveformFeaturizer
+from nemo.collections.asr.parts.shard_index import ShardInfo, balance_shards, write_shard_index
 from nemo.collections.common import tokenizers
 
 
@@ -106,3 +110,57 @@ class TestASRDatasets:
         for _ in ds_list_load:
             count += 1
         assert count == 32
+
+    @pytest.mark.unit
+    def test_balance_shards(self):
+        durations = [10.0, 1.0, 7.0, 3.0, 3.0, 6.0]
+        slots = balance_shards(durations, 3)
+        assert sorted(i for slot in slots for i in slot) == list(range(6))
+        assert [sum(durations[i] for i in slot) for slot in slots] == [10.0, 10.0, 10.0]
+        assert balance_shards(durations, 3) == slots
+
+        with pytest.raises(ValueError):
+            balance_shards(durations, 7)
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize('shard_equalize', ['drop', 'pad'])
+    def test_tarred_dataset_shard_index(self, test_data_dir, shard_equalize):
+        manifest_path = os.path.abspath(os.path.join(test_data_dir, 'asr/tarred_an4/tarred_audio_manifest.json'))
+        tarpath = os.path.abspath(os.path.join(test_data_dir, 'asr/tarred_an4/audio_{0..1}.tar'))
+
+        durations = {}
+        with open(manifest_path, 'r') as f:
+            for line in f:
+                entry = json.loads(line)
+                durations[os.path.splitext(entry['audio_filepath'])[0]] = entry['duration']
+        shards = []
+        for i in range(2):
+            with tarfile.open(os.path.join(test_data_dir, f'asr/tarred_an4/audio_{i}.tar'), 'r') as tar:
+                file_ids = [os.path.splitext(name)[0] for name in tar.getnames()]
+            shards.append(ShardInfo(f'audio_{i}.tar', file_ids, [durations[file_id] for file_id in file_ids]))
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            index_path = os.path.join(tmpdir, 'tarred_audio_shard_index.json')
+            write_shard_index(index_path, shards)
+
+            # Filtering by duration leaves shards of different sizes
+            num_samples = []
+            for rank in range(2):
+                dataset = TarredAudioToCharDataset(
+                    audio_tar_filepaths=tarpath,
+                    manifest_filepath=manifest_path,
+                    labels=self.labels,
+                    sample_rate=16000,
+                    max_duration=4.0,
+                    global_rank=rank,
+                    world_size=2,
+                    shard_index=index_path,
+                    shard_equalize=shard_equalize,
+                )
+                count = sum(1 for _ in dataset)
+                assert count == len(dataset)
+                num_samples.append(count)
+
+        assert num_samples[0] == num_samples[1]
+        kept = [sum(1 for d in shard.durations if d <= 4.0) for shard in shards]
+        assert num_samples[0] == (min(kept) if shard_equalize == 'drop' else max(kept))
@@ -0,0 +1,116 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+
+import numpy as np
+import pytest
+import scipy.signal
+import torch
+
+from nemo.collections.asr.modules import AudioToMelSpectrogramPreprocessor
+from nemo.collections.asr.parts.feature_cache import AudioCache, FeatureCache
+from nemo.collections.asr.parts.segment import AudioSegment, resample_polyphase
+
+
+class TestFeatureCache:
+    @pytest.mark.unit
+    def test_save_load_and_config_keys(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = FeatureCache(tmpdir, {'features': 64, 'dither': 1e-5}, sample_rate=16000)
+            assert os.path.exists(os.path.join(cache.cache_dir, 'config.json'))
+            assert cache.load('a.wav', None, 1.0) is None
+
+            features = torch.randn(10, 64)
+            cache.save('a.wav', None, 1.0, features)
+            loaded = cache.load('a.wav', 0.0, 1.0)
+            assert loaded.dtype == torch.float16
+            assert torch.allclose(loaded.float(), features, atol=1e-2)
+            assert cache.load('a.wav', 0.5, 1.0) is None
+
+            # Dither is not applied to cached features, other parameters select a different cache
+            same = FeatureCache(tmpdir, {'features': 64, 'dither': 0.0}, sample_rate=16000)
+            other = FeatureCache(tmpdir, {'features': 80}, sample_rate=16000)
+            assert same.cache_dir == cache.cache_dir
+            assert other.cache_dir != cache.cache_dir
+            assert other.load('a.wav', None, 1.0) is None
+
+            # So do the resampling method and the storage type of an audio cache features are computed from
+            params = {'features': 64}
+            keys = {
+                FeatureCache(tmpdir, params, 16000).cache_dir,
+                FeatureCache(tmpdir, params, 16000, resample_type='polyphase').cache_dir,
+                FeatureCache(tmpdir, params, 16000, audio_dtype='int16').cache_dir,
+                FeatureCache(tmpdir, params, 16000, audio_dtype='float16').cache_dir,
+            }
+            assert len(keys) == 4
+
+            calls = []
+            assert torch.equal(cache.get('a.wav', None, 1.0, lambda: calls.append(1)), loaded)
+            assert not calls
+
+    @pytest.mark.unit
+    def test_compute_matches_preprocessor(self):
+        params = {'features': 64, 'normalize': 'per_feature'}
+        preprocessor = AudioToMelSpectrogramPreprocessor(dither=0.0, **params).eval()
+        samples = torch.randn(16000)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = FeatureCache(tmpdir, params, sample_rate=16000)
+            features = cache.get('a.wav', None, 1.0, lambda: samples)
+            assert torch.equal(cache.load('a.wav', None, 1.0), features)
+
+        with torch.no_grad():
+            expected, length = preprocessor.get_features(samples.unsqueeze(0), torch.tensor([16000]))
+        expected = expected[0, :, : int(length[0])].t()
+        assert features.shape == expected.shape
+        assert torch.allclose(features.float(), expected, atol=1e-2, rtol=1e-2)
+
+
+class TestAudioCache:
+    @pytest.mark.unit
+    @pytest.mark.parametrize('dtype', ['int16', 'float16'])
+    def test_get_and_stats(self, dtype):
+        samples = np.random.RandomState(0).uniform(-1.0, 1.0, 16000).astype(np.float32)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = AudioCache(tmpdir, sample_rate=16000, dtype=dtype)
+            assert cache.load('a.wav', 0.0, 1.0) is None
+
+            missed = cache.get('a.wav', 0.0, 1.0, lambda: samples)
+            hit = cache.get('a.wav', None, 1.0, lambda: pytest.fail("Audio decoded on a cache hit"))
+            assert missed.dtype == np.float32
+            assert np.array_equal(missed, hit)
+            assert np.allclose(hit, samples, atol=1e-3)
+
+            stats = cache.stats
+            assert stats['hits'] == 1 and stats['misses'] == 1
+            assert stats['hit_rate'] == 0.5
+
+            other = AudioCache(tmpdir, sample_rate=8000, dtype=dtype)
+            assert other.cache_dir != cache.cache_dir
+            assert other.load('a.wav', 0.0, 1.0) is None
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize('orig_sr', [8000, 44100, 48000])
+    def test_polyphase_resampling(self, orig_sr):
+        samples = np.random.RandomState(0).randn(orig_sr).astype(np.float32)
+        resampled = resample_polyphase(samples, orig_sr, 16000)
+        assert resampled.dtype == np.float32
+        assert resampled.shape == (16000,)
+        assert np.allclose(resampled, scipy.signal.resample_poly(samples, 16000, orig_sr), atol=1e-4)
+
+        segment = AudioSegment(samples, orig_sr, target_sr=16000, resample_type='polyphase')
+        assert segment.sample_rate == 16000
+        assert np.array_equal(segment.samples, resampled)
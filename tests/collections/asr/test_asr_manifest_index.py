@@ -0,0 +1,191 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import pickle
+
+import pytest
+
+from nemo.collections.asr.parts import collections, manifest_index, parsers
+
+
+def _write_manifest(path, num_entries=50):
+    with open(path, 'w') as f:
+        for i in range(num_entries):
+            entry = {
+                'audio_filepath': f'/data/audio_{i % 40}.wav',
+                'duration': (i * 7 % 23) * 0.5,
+                'text': ['hello world', 'nemo', 'a b c'][i % 3],
+                'label': ['yes', 'no'][i % 2],
+            }
+            if i % 3 == 0:
+                entry['offset'] = 1.5
+            if i % 5 == 0:
+                entry['speaker'] = i
+            if i % 7 == 0:
+                entry['orig_sample_rate'] = 8000
+            f.write(json.dumps(entry) + '\n')
+
+
+class TestManifestIndex:
+    labels = list(" abcdefghijklmnopqrstuvwxyz'")
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize(
+        "kwargs",
+        [
+            {},
+            {'min_duration': 1.0, 'max_duration': 8.0},
+            {'min_duration': 2.0, 'max_number': 7},
+            {'do_sort_by_duration': True},
+            {'index_by_file_id': True, 'max_duration': 9.0},
+        ],
+    )
+    def test_audio_text_matches_manifest(self, tmpdir, kwargs):
+        manifest_path = os.path.join(tmpdir, 'manifest.json')
+        _write_manifest(manifest_path)
+        parser = parsers.make_parser(labels=self.labels, name='base')
+        index_dir = manifest_index.build_manifest_index(manifest_path, os.path.join(tmpdir, 'index'), parser=parser)
+
+        expected = collections.ASRAudioText(manifest_path, parser=parser, **kwargs)
+        indexed = collections.make_audio_text_collection(manifest_path, index_dir, parser=parser, **kwargs)
+
+        assert isinstance(indexed, collections.IndexedAudioText)
+        assert list(indexed) == list(expected)
+        assert list(pickle.loads(pickle.dumps(indexed))) == list(expected)
+        if kwargs.get('index_by_file_id', False):
+            for file_id, position in expected.mapping.items():
+                assert indexed.mapping[file_id] == position
+            assert 'missing' not in indexed.mapping
+
+    @pytest.mark.unit
+    def test_audio_text_other_parser_tokenizes_on_access(self, tmpdir):
+        manifest_path = os.path.join(tmpdir, 'manifest.json')
+        _write_manifest(manifest_path)
+        index_dir = manifest_index.build_manifest_index(
+            manifest_path, os.path.join(tmpdir, 'index'), parser=parsers.make_parser(labels=self.labels)
+        )
+
+        parser = parsers.make_parser(labels=list("abc "), name='base')
+        expected = collections.ASRAudioText(manifest_path, parser=parser)
+        indexed = collections.make_audio_text_collection(manifest_path, index_dir, parser=parser)
+
+        assert isinstance(indexed, collections.IndexedAudioText)
+        assert list(indexed) == list(expected)
+
+    @pytest.mark.unit
+    def test_audio_text_without_index_tokens_filters_failed_parses(self, tmpdir):
+        manifest_path = os.path.join(tmpdir, 'manifest.json')
+        _write_manifest(manifest_path)
+        index_dir = manifest_index.build_manifest_index(manifest_path, os.path.join(tmpdir, 'index'))
+
+        def parser(text):
+            return None if text == 'nemo' else [len(text)]
+
+        expected = collections.ASRAudioText(manifest_path, parser=parser, max_number=20)
+        indexed = collections.make_audio_text_collection(manifest_path, index_dir, parser=parser, max_number=20)
+
+        assert isinstance(indexed, collections.IndexedAudioText)
+        assert list(indexed) == list(expected)
+        assert all(entry.text_raw != 'nemo' for entry in indexed)
+
+    @pytest.mark.unit
+    def test_audio_text_does_not_pretokenize_with_parser_which_cannot_fail(self, tmpdir):
+        manifest_path = os.path.join(tmpdir, 'manifest.json')
+        _write_manifest(manifest_path)
+        index_dir = manifest_index.build_manifest_index(manifest_path, os.path.join(tmpdir, 'index'))
+
+        class Parser:
+            can_fail = False
+
+            def __init__(self):
+                self.calls = 0
+
+            def __call__(self, text):
+                self.calls += 1
+                return [len(text)]
+
+        parser = Parser()
+        expected = collections.ASRAudioText(manifest_path, parser=Parser(), max_number=20)
+        indexed = collections.make_audio_text_collection(manifest_path, index_dir, parser=parser, max_number=20)
+
+        assert parser.calls == 0
+        assert list(indexed) == list(expected)
+        assert parser.calls == len(expected)
+
+    @pytest.mark.unit
+    def test_interrupted_rebuild_is_not_valid(self, tmpdir, monkeypatch):
+        manifest_path = os.path.join(tmpdir, 'manifest.json')
+        index_dir = os.path.join(tmpdir, 'index')
+        parser = parsers.make_parser(labels=self.labels)
+        _write_manifest(manifest_path)
+        manifest_index.build_manifest_index(manifest_path, index_dir, parser=parser)
+
+        # Interrupt the rebuild after the first file of the new index was moved into place
+        _write_manifest(manifest_path, num_entries=51)
+        replace = os.replace
+
+        def interrupted_replace(src, dst):
+            replace(src, dst)
+            raise KeyboardInterrupt()
+
+        monkeypatch.setattr(manifest_index.os, 'replace', interrupted_replace)
+        with pytest.raises(KeyboardInterrupt):
+            manifest_index.build_manifest_index(manifest_path, index_dir, parser=parser)
+        monkeypatch.setattr(manifest_index.os, 'replace', replace)
+
+        assert manifest_index.open_manifest_index(index_dir, manifest_path) is None
+        _write_manifest(manifest_path)
+        assert manifest_index.open_manifest_index(index_dir, manifest_path) is None
+
+        manifest_index.build_manifest_index(manifest_path, index_dir, parser=parser)
+        index = manifest_index.open_manifest_index(index_dir, manifest_path)
+        assert index is not None and len(index) == 50
+
+    @pytest.mark.unit
+    def test_stale_index_falls_back_to_manifest(self, tmpdir):
+        manifest_path = os.path.join(tmpdir, 'manifest.json')
+        _write_manifest(manifest_path)
+        parser = parsers.make_parser(labels=self.labels)
+        index_dir = manifest_index.build_manifest_index(manifest_path, os.path.join(tmpdir, 'index'), parser=parser)
+
+        # Touching the manifest keeps the index valid since its content hash is unchanged.
+        os.utime(manifest_path, (0, 0))
+        collection = collections.make_audio_text_collection(manifest_path, index_dir, parser=parser)
+        assert isinstance(collection, collections.IndexedAudioText)
+
+        _write_manifest(manifest_path, num_entries=51)
+        collection = collections.make_audio_text_collection(manifest_path, index_dir, parser=parser)
+        assert isinstance(collection, collections.ASRAudioText)
+        assert len(collection) == 51
+
+    @pytest.mark.unit
+    def test_speech_label_matches_manifest(self, tmpdir):
+        manifest_path = os.path.join(tmpdir, 'manifest.json')
+        _write_manifest(manifest_path)
+        index_dir = manifest_index.build_manifest_index(
+            manifest_path, os.path.join(tmpdir, 'index'), kind='speech_label'
+        )
+
+        expected = collections.ASRSpeechLabel(manifest_path, min_duration=1.0)
+        indexed = collections.make_speech_label_collection(manifest_path, index_dir, min_duration=1.0)
+
+        assert isinstance(indexed, collections.IndexedSpeechLabel)
+        assert list(indexed) == list(expected)
+        assert indexed.uniq_labels == expected.uniq_labels
+
+        # An index of the wrong kind is ignored.
+        collection = collections.make_audio_text_collection(manifest_path, index_dir, parser=parsers.make_parser())
+        assert isinstance(collection, collections.ASRAudioText)
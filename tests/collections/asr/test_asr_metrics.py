@@ -19,7 +19,7 @@ import string
 import pytest
 import torch
 
-from nemo.collections.asr.metrics.wer import WER, word_error_rate
+from nemo.collections.asr.metrics.wer import WER, ctc_greedy_decode, word_error_rate
 from nemo.utils import logging
 
 
@@ -127,3 +127,18 @@ class TestWordErrorRate:
             s2 = __randomString(n2)
             # Floating-point math doesn't seem to be an issue here. Leaving as ==
             assert self.get_wer(wer, prediction=s1, reference=s2) == word_error_rate(hypotheses=[s1], references=[s2])
+
+    @pytest.mark.unit
+    def test_ctc_greedy_decode_batch(self):
+        blank_id = len(self.vocabulary)
+        predictions = torch.tensor(
+            [[1, 1, blank_id, 1, 2, 2, blank_id, 3], [blank_id, 4, 4, 4, blank_id, blank_id, 5, 5]]
+        )
+
+        assert ctc_greedy_decode(predictions, blank_id) == [[1, 1, 2, 3], [4, 5]]
+        # Frames past the given lengths are padding and must not be decoded.
+        assert ctc_greedy_decode(predictions, blank_id, predictions_len=torch.tensor([5, 3])) == [[1, 1, 2], [4]]
+
+        wer = WER(vocabulary=self.vocabulary, batch_dim_index=0, use_cer=False, ctc_decode=True)
+        hypotheses = wer.ctc_decoder_predictions_tensor(predictions, predictions_len=torch.tensor([8, 8]))
+        assert hypotheses == ['aabc', 'de']
@@ -12,10 +12,33 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import copy
+import json
+import math
+import os
+
+import numpy as np
 import pytest
 import torch
+from scipy import signal as signal_lib
 
 from nemo.collections.asr import modules
+from nemo.collections.asr.parts.batched_perturb import (
+    BatchedSpeedPerturbation,
+    BatchedTimeStretchPerturbation,
+    resample_sinc,
+)
+from nemo.collections.asr.parts.spectr_augment import BatchedSpecAugment, BatchedSpecCutout, SpecAugment, SpecCutout
+
+
+class _ReplayRandom:
+    """Feeds pre-drawn uniform samples to the loop based augmentations, in the order they draw them."""
+
+    def __init__(self, samples):
+        self._samples = iter(samples.flatten().tolist())
+
+    def uniform(self, a, b):
+        return a + (b - a) * next(self._samples)
 
 
 class TestASRModulesBasicTests:
@@ -78,6 +101,41 @@ class TestASRModulesBasicTests:
 
         assert res.shape == res0[0].shape
 
+    @pytest.mark.unit
+    def test_batched_spec_augment_matches_loops(self):
+        x = torch.randn(8, 64, 200)
+
+        for time_width in (25, 0.1):
+            batched = BatchedSpecAugment(freq_masks=2, time_masks=5, freq_width=27, time_width=time_width, seed=0)
+            samples = torch.rand(8, 7, 2, generator=torch.Generator().manual_seed(0))
+            loops = SpecAugment(
+                freq_masks=2, time_masks=5, freq_width=27, time_width=time_width, rng=_ReplayRandom(samples)
+            )
+            expected = loops(x)
+            assert torch.equal(batched(x), expected)
+            assert (expected == 0).any()
+
+        batched = BatchedSpecCutout(rect_masks=5, rect_time=40, rect_freq=20, seed=0)
+        samples = torch.rand(8, 5, 4, generator=torch.Generator().manual_seed(0))
+        loops = SpecCutout(rect_masks=5, rect_time=40, rect_freq=20, rng=_ReplayRandom(samples))
+        expected = loops(x)
+        assert torch.equal(batched(x), expected)
+        assert (expected == 0).any()
+
+        # Seeded generators make masks reproducible, also for copies of the module
+        assert torch.equal(copy.deepcopy(BatchedSpecCutout(rect_masks=5, seed=1))(x), BatchedSpecCutout(5, seed=1)(x))
+
+    @pytest.mark.unit
+    def test_batched_spec_augment_inputs_shorter_than_masks(self):
+        # Masks wider than the input are skipped
+        x = torch.randn(8, 64, 20)
+        assert torch.equal(BatchedSpecAugment(time_masks=5, time_width=25, seed=0)(x), x)
+        assert torch.equal(BatchedSpecCutout(rect_masks=5, rect_time=40, rect_freq=20, seed=0)(x), x)
+
+        masked = BatchedSpecAugment(freq_masks=2, time_masks=5, freq_width=27, time_width=25, seed=0)(x)
+        assert (masked == 0).any()
+        assert torch.equal((masked == 0).all(dim=2), (masked == 0).any(dim=2))
+
     @pytest.mark.unit
     def test_CropOrPadSpectrogramAugmentation(self):
         # Make sure constructor works
@@ -94,3 +152,167 @@ class TestASRModulesBasicTests:
 
         assert res.shape == torch.Size([4, 64, audio_length])
         assert all(new_length == torch.tensor([128] * 4))
+
+    @pytest.mark.unit
+    def test_ConvASREncoder_streaming(self):
+        jasper = [
+            {'filters': 64, 'repeat': 1, 'kernel': [11], 'stride': [2], 'dilation': [1], 'dropout': 0.0},
+            {'filters': 64, 'repeat': 2, 'kernel': [7], 'stride': [1], 'dilation': [1], 'dropout': 0.0},
+            {'filters': 96, 'repeat': 1, 'kernel': [5], 'stride': [1], 'dilation': [2], 'dropout': 0.0},
+        ]
+        for i, block in enumerate(jasper):
+            block.update({'residual': i == 1, 'separable': True})
+        encoder = modules.ConvASREncoder(jasper=jasper, activation='relu', feat_in=64).eval()
+        preprocessor = modules.AudioToMelSpectrogramPreprocessor(dither=0)
+
+        input_signal = torch.randn(size=(1, 16000))
+        features, features_len = preprocessor(input_signal=input_signal, length=torch.tensor([16000]))
+        features = features[..., : features_len[0]]
+
+        with torch.no_grad():
+            offline, offline_len = encoder(audio_signal=features, length=features_len)
+            offline = offline[..., : offline_len[0]]
+
+            for chunk_size in [1, 16, 37]:
+                state, chunks = None, []
+                for start in range(0, features.size(-1), chunk_size):
+                    chunk, state = encoder.forward_streaming(features[..., start : start + chunk_size], state)
+                    chunks.append(chunk)
+                chunk, _ = encoder.forward_streaming(features[..., :0], state, flush=True)
+                streamed = torch.cat(chunks + [chunk], dim=-1)
+
+                assert streamed.shape == offline.shape
+                assert torch.allclose(streamed, offline, atol=1e-5)
+
+        assert encoder.streaming_lookahead == 5 + 2 * (3 + 3 + 4)
+
+    @pytest.mark.unit
+    def test_ConvASREncoder_shared_conv_mask(self):
+        jasper = [
+            {'filters': 64, 'repeat': 1, 'kernel': [11], 'stride': [2], 'dilation': [1], 'dropout': 0.0},
+            {'filters': 64, 'repeat': 3, 'kernel': [7], 'stride': [1], 'dilation': [1], 'dropout': 0.0},
+            {'filters': 96, 'repeat': 1, 'kernel': [5], 'stride': [2], 'dilation': [1], 'dropout': 0.0},
+            {'filters': 96, 'repeat': 1, 'kernel': [1], 'stride': [1], 'dilation': [1], 'dropout': 0.0},
+        ]
+        for i, block in enumerate(jasper):
+            block.update({'residual': i in (1, 2), 'residual_mode': 'stride_add', 'separable': True, 'se': True})
+        encoder = modules.ConvASREncoder(jasper=jasper, activation='relu', feat_in=64)
+
+        features = torch.randn(4, 64, 101)
+        for length in (torch.tensor([101, 80, 33, 5]), torch.tensor([101, 101, 101, 101])):
+            for training in (True, False):
+                encoder.train(training)
+                encoder.share_conv_mask = False
+                expected, expected_len = encoder(audio_signal=features, length=length)
+                encoder.share_conv_mask = True
+                encoded, encoded_len = encoder(audio_signal=features, length=length)
+
+                assert torch.equal(encoded, expected)
+                assert torch.equal(encoded_len, expected_len)
+
+    @pytest.mark.unit
+    def test_ConvASREncoder_prepare_for_inference(self):
+        jasper = [
+            {'filters': 64, 'repeat': 1, 'kernel': [11], 'stride': [2], 'dilation': [1], 'dropout': 0.2},
+            {'filters': 64, 'repeat': 3, 'kernel': [7], 'stride': [1], 'dilation': [1], 'dropout': 0.2},
+            {'filters': 96, 'repeat': 1, 'kernel': [1], 'stride': [1], 'dilation': [1], 'dropout': 0.2},
+        ]
+        for i, block in enumerate(jasper):
+            block.update({'residual': i == 1, 'separable': True, 'se': True})
+        encoder = modules.ConvASREncoder(jasper=jasper, activation='relu', feat_in=64)
+        for module in encoder.modules():
+            if isinstance(module, torch.nn.BatchNorm1d):
+                module.running_mean.normal_()
+                module.running_var.uniform_(0.5, 2.0)
+                module.weight.data.normal_()
+                module.bias.data.normal_()
+        encoder.eval()
+
+        features = torch.randn(4, 64, 101)
+        length = torch.tensor([101, 80, 33, 5])
+        full_length = torch.full((4,), 101)
+        with torch.no_grad():
+            expected, expected_len = encoder(audio_signal=features, length=length)
+            expected_full, _ = encoder(audio_signal=features, length=full_length)
+
+        optimized = copy.deepcopy(encoder).prepare_for_inference()
+        fused = copy.deepcopy(encoder).prepare_for_inference(fuse_separable=True)
+        for module in optimized.modules():
+            assert not isinstance(module, (torch.nn.BatchNorm1d, torch.nn.Dropout))
+
+        with torch.no_grad():
+            encoded, encoded_len = optimized(audio_signal=features, length=length)
+            fused_full, _ = fused(audio_signal=features, length=full_length)
+        assert torch.equal(encoded_len, expected_len)
+        assert torch.allclose(encoded, expected, atol=1e-4)
+        assert torch.allclose(fused_full, expected_full, atol=1e-4)
+
+    @pytest.mark.unit
+    def test_AudioAugmentation(self, tmp_path):
+        import soundfile as sf
+
+        noise_manifest, rir_manifest = tmp_path / 'noise.json', tmp_path / 'rir.json'
+        with open(noise_manifest, 'w') as f:
+            for i, duration in enumerate([0.05, 0.2]):
+                path = str(tmp_path / f'noise_{i}.wav')
+                sf.write(path, np.random.uniform(-0.5, 0.5, int(16000 * duration)), 16000)
+                f.write(json.dumps({'audio_filepath': path, 'duration': duration, 'text': ''}) + '\n')
+        with open(rir_manifest, 'w') as f:
+            # A unit impulse after a short delay, which is removed by shifting the response to its peak
+            path = str(tmp_path / 'rir.wav')
+            sf.write(path, np.eye(1, 100, 10)[0], 16000, subtype='FLOAT')
+            f.write(json.dumps({'audio_filepath': path, 'duration': 100 / 16000, 'text': ''}) + '\n')
+
+        signal = torch.randn(4, 4000)
+        length = torch.tensor([4000, 3000, 1000, 1])
+        signal[torch.arange(4000) >= length[:, None]] = 0.0
+
+        kwargs = dict(min_snr_db=20, max_snr_db=20, rir_prob=1.0, bank_dir=str(tmp_path / 'bank'), seed=0)
+        augmentation = modules.AudioAugmentation(
+            noise_manifest=str(noise_manifest), rir_manifest=str(rir_manifest), **kwargs
+        )
+        noisy, noisy_length = augmentation(input_signal=signal, length=length)
+        assert augmentation.noise_perturbation.bank.max_length == 3200
+        assert len(os.listdir(tmp_path / 'bank')) == 4
+
+        # The unit impulse response leaves the signal unchanged, the noise is added at 20 dB SNR
+        assert torch.equal(noisy_length, length)
+        noise = noisy - signal
+        assert torch.all(noise[torch.arange(4000) >= length[:, None]] == 0)
+        snr_db = 10 * torch.log10(signal[:3].pow(2).sum(dim=1) / noise[:3].pow(2).sum(dim=1))
+        assert torch.allclose(snr_db, torch.full((3,), 20.0), atol=1e-2)
+
+        # Banks are memory-mapped by other instances, with the same seeded draws
+        reloaded = modules.AudioAugmentation(
+            noise_manifest=str(noise_manifest), rir_manifest=str(rir_manifest), **kwargs
+        )
+        assert torch.equal(reloaded(input_signal=signal, length=length)[0], noisy)
+
+    @pytest.mark.unit
+    def test_batched_speed_and_time_stretch(self):
+        signal = torch.randn(4, 4000)
+        length = torch.tensor([4000, 3000, 1000, 1])
+        signal[torch.arange(4000) >= length[:, None]] = 0.0
+
+        speed = BatchedSpeedPerturbation(16000, min_speed_rate=0.9, max_speed_rate=1.1, num_rates=3, seed=0)
+        stretch = BatchedTimeStretchPerturbation(min_speed_rate=0.9, max_speed_rate=1.1, num_rates=3, seed=0)
+        new_lengths = (
+            (speed, lambda n, r: math.ceil(n * int(16000 * r) / 16000)),
+            (stretch, lambda n, r: round(n / r)),
+        )
+        for perturbation, new_length in new_lengths:
+            perturbed, perturbed_length = perturbation(signal, length)
+            rates = type(perturbation)(**({'sr': 16000} if perturbation is speed else {}), num_rates=3, seed=0)
+            expected = [new_length(int(n), rate) for n, rate in zip(length, rates._draw_rates(4))]
+            assert perturbed_length.tolist() == expected
+            assert perturbed.shape[1] == max(new_length(4000, rate) for rate in perturbation.rates)
+            assert torch.all(perturbed[torch.arange(perturbed.shape[1]) >= perturbed_length[:, None]] == 0)
+
+        # Sinc resampling of a band-limited signal matches polyphase resampling
+        sine = torch.sin(2 * math.pi * 440 * torch.arange(16000) / 16000).unsqueeze(0)
+        resampled = resample_sinc(sine, 16000, 14400)[0, 200:-200].numpy()
+        expected = signal_lib.resample_poly(sine[0].numpy(), 9, 10)[200:-200]
+        assert np.abs(resampled - expected).max() < 1e-2
+
+        unchanged, unchanged_length = BatchedSpeedPerturbation(16000, prob=0.0)(signal, length)
+        assert torch.equal(unchanged, signal) and torch.equal(unchanged_length, length)
@@ -0,0 +1,50 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+
+from nemo.collections.asr.parts.perturb import TranscodePerturbation, g711_companding
+from nemo.collections.asr.parts.segment import AudioSegment
+
+
+class TestTranscodePerturbation:
+    @pytest.mark.unit
+    def test_g711_companding(self):
+        samples = np.linspace(-1, 1, 20001, dtype=np.float32)
+        for law in ('alaw', 'ulaw'):
+            companded = g711_companding(samples, law)
+            assert len(np.unique(companded)) <= 256
+            assert np.all(np.diff(companded) >= 0)
+            # Logarithmic quantization keeps the relative error small for all but the smallest samples
+            large = np.abs(samples) > 0.01
+            assert np.all(np.abs(companded - samples)[large] <= 0.06 * np.abs(samples)[large])
+
+        with pytest.raises(ValueError):
+            g711_companding(samples, 'amr-nb')
+
+    @pytest.mark.unit
+    def test_transcode_in_process(self):
+        samples = 0.1 * np.random.RandomState(0).randn(16000).astype(np.float32)
+        for codec in ('g711', 'g711_ulaw'):
+            segment = AudioSegment(samples.copy(), 16000)
+            TranscodePerturbation(rng=np.random.RandomState(0), codecs=[codec], bit_depth=8).perturb(segment)
+            assert segment.samples.shape == samples.shape
+
+            # The telephone channel removes the content above 4 kHz
+            spectrum = np.abs(np.fft.rfft(segment.samples)) ** 2
+            assert spectrum[len(spectrum) // 2 + 400 :].sum() < 1e-3 * spectrum.sum()
+
+        with pytest.raises(ValueError):
+            TranscodePerturbation(codecs=['amr-nb'])
@@ -0,0 +1,94 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+
+from nemo.collections.asr.data.samplers import DurationBucketBatchSampler, padding_efficiency
+
+
+class TestDurationBucketBatchSampler:
+    durations = np.random.RandomState(0).uniform(0.5, 16.0, size=1000)
+
+    @pytest.mark.unit
+    def test_batches_cover_dataset_within_budget(self):
+        sampler = DurationBucketBatchSampler(self.durations, max_batch_duration=64.0, batch_size=32)
+        batches = list(sampler)
+
+        assert sorted(index for batch in batches for index in batch) == list(range(len(self.durations)))
+        for batch in batches:
+            assert len(batch) <= 32
+            assert len(batch) == 1 or len(batch) * self.durations[batch].max() <= 64.0
+
+        random_batches = np.array_split(np.random.RandomState(0).permutation(len(self.durations)), len(batches))
+        assert padding_efficiency(batches, self.durations) > padding_efficiency(random_batches, self.durations)
+
+    def make_sampler(self, **kwargs):
+        return DurationBucketBatchSampler(
+            self.durations, max_batch_duration=64.0, bucket_boundaries=[2, 4, 8], seed=3, **kwargs
+        )
+
+    @pytest.mark.unit
+    def test_deterministic_per_epoch(self):
+        first, second = self.make_sampler(), self.make_sampler()
+
+        epoch_0 = list(first)
+        assert list(first) == epoch_0
+        first.set_epoch(1)
+        epoch_1 = list(first)
+        assert epoch_0 != epoch_1
+        assert list(second) == epoch_0
+
+        second.set_epoch(1)
+        assert len(second) == len(epoch_1)
+        assert list(second) == epoch_1
+
+    @pytest.mark.unit
+    def test_set_epoch_is_reproducible(self):
+        fresh, used = self.make_sampler(), self.make_sampler()
+        for epoch in range(3):
+            used.set_epoch(epoch)
+            list(used)
+
+        # The order only depends on the epoch set, not on earlier iterations
+        fresh.set_epoch(5)
+        used.set_epoch(5)
+        expected = list(fresh)
+        assert list(used) == expected
+        assert list(used) == expected
+        assert list(fresh) == expected
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("drop_last", [True, False])
+    def test_distributed_ranks_are_balanced(self, drop_last):
+        world_size = 3
+        ranks = [
+            list(
+                DurationBucketBatchSampler(
+                    self.durations,
+                    max_batch_duration=50.0,
+                    drop_last=drop_last,
+                    global_rank=rank,
+                    world_size=world_size,
+                )
+            )
+            for rank in range(world_size)
+        ]
+
+        assert len(set(len(batches) for batches in ranks)) == 1
+        seen = [index for batches in ranks for batch in batches for index in batch]
+        if drop_last:
+            assert len(seen) == len(set(seen))
+        else:
+            assert set(seen) == set(range(len(self.durations)))
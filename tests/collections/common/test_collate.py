@@ -0,0 +1,56 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+import torch
+
+from nemo.collections.common.parts.collate import collate_audio_tokens, pad_and_stack
+
+
+class TestCollate:
+    @pytest.mark.unit
+    def test_pad_and_stack(self):
+        tensors = [torch.arange(3.0), torch.arange(5.0), torch.arange(1.0)]
+
+        padded = pad_and_stack(tensors, pad_value=-1.0)
+        expected = torch.stack([torch.nn.functional.pad(t, (0, 5 - t.size(0)), value=-1.0) for t in tensors])
+        assert torch.equal(padded, expected)
+
+        truncated = pad_and_stack(tensors, max_len=2)
+        assert torch.equal(truncated, torch.tensor([[0.0, 1.0], [0.0, 1.0], [0.0, 0.0]]))
+
+    @pytest.mark.unit
+    def test_collate_audio_tokens(self):
+        batch = [
+            (torch.randn(10), torch.tensor(10), torch.tensor([1, 2, 3]), torch.tensor(3)),
+            (torch.randn(4), torch.tensor(4), torch.tensor([4]), torch.tensor(1)),
+        ]
+
+        audio, audio_lengths, tokens, tokens_lengths = collate_audio_tokens(batch, pad_id=9)
+
+        assert audio.shape == (2, 10)
+        assert torch.equal(audio[1, :4], batch[1][0]) and torch.all(audio[1, 4:] == 0)
+        assert torch.equal(audio_lengths, torch.tensor([10, 4]))
+        assert torch.equal(tokens, torch.tensor([[1, 2, 3], [4, 9, 9]]))
+        assert torch.equal(tokens_lengths, torch.tensor([3, 1]))
+
+    @pytest.mark.unit
+    def test_collate_labels_without_audio(self):
+        batch = [(None, None, torch.tensor(2), torch.tensor(1)), (None, None, torch.tensor(0), torch.tensor(1))]
+
+        audio, audio_lengths, labels, labels_lengths = collate_audio_tokens(batch, pad_id=0)
+
+        assert audio is None and audio_lengths is None
+        assert torch.equal(labels, torch.tensor([2, 0]))
+        assert torch.equal(labels_lengths, torch.tensor([1, 1]))
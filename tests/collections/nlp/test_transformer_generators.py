@@ -0,0 +1,111 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+import torch
+
+from nemo.collections.nlp.modules.common.transformer import (
+    BeamSearchSequenceGenerator,
+    GreedySequenceGenerator,
+    TopKSequenceGenerator,
+    TransformerDecoder,
+    TransformerEmbedding,
+)
+
+
+class TestTransformerGenerators:
+    hidden_size = 32
+    vocab_size = 20
+
+    def setup_method(self, method):
+        torch.manual_seed(0)
+        self.embedding = TransformerEmbedding(self.vocab_size, self.hidden_size).eval()
+        self.decoder = TransformerDecoder(3, self.hidden_size, inner_size=64, num_attention_heads=4).eval()
+        self.log_softmax = torch.nn.Sequential(
+            torch.nn.Linear(self.hidden_size, self.vocab_size), torch.nn.LogSoftmax(dim=-1)
+        ).eval()
+        self.encoder_states = torch.randn(3, 7, self.hidden_size)
+        self.encoder_mask = torch.ones(3, 7)
+        self.encoder_mask[1, 5:] = 0
+
+    def generate(self, generator_class, use_cache, eos=None, **kwargs):
+        # by default <eos> is never generated, so that all sequences have the maximum length
+        generator = generator_class(
+            self.embedding,
+            self.decoder,
+            self.log_softmax,
+            eos=self.vocab_size if eos is None else eos,
+            max_delta_length=10,
+            use_cache=use_cache,
+            **kwargs,
+        )
+        return generator(encoder_hidden_states=self.encoder_states, encoder_input_mask=self.encoder_mask)
+
+    @pytest.mark.unit
+    def test_decoder_cache_matches_mems(self):
+        tokens = torch.randint(3, self.vocab_size, (3, 9))
+        cache = self.decoder.init_cache(self.encoder_states, max_length=9)
+        mems = None
+        for i in range(tokens.size(1)):
+            states = self.embedding(tokens[:, i : i + 1], start_pos=i)
+            mask = torch.ones(3, 1)
+            mems = self.decoder(states, mask, self.encoder_states, self.encoder_mask, mems, return_mems=True)
+            cached = self.decoder(states, mask, self.encoder_states, self.encoder_mask, cache=cache)
+            assert cached.shape == (3, 1, self.hidden_size)
+            assert torch.allclose(cached, mems[-1][:, -1:], atol=1e-6)
+        assert cache.length == 9
+        with pytest.raises(ValueError):
+            self.decoder(states, mask, self.encoder_states, self.encoder_mask, cache=cache)
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize(
+        "generator_class, kwargs",
+        [
+            (GreedySequenceGenerator, {}),
+            (TopKSequenceGenerator, {'beam_size': 1}),
+            (BeamSearchSequenceGenerator, {'beam_size': 4, 'len_pen': 0.6}),
+        ],
+    )
+    def test_cached_generation_matches_uncached(self, generator_class, kwargs):
+        uncached = self.generate(generator_class, use_cache=False, **kwargs)
+        cached = self.generate(generator_class, use_cache=True, **kwargs)
+        assert torch.equal(cached, uncached)
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("use_cache", [False, True])
+    def test_beam_search_removes_finished_batch_elements(self, use_cache):
+        # make <eos> likely, so that batch elements finish at different steps
+        with torch.no_grad():
+            self.log_softmax[0].bias[2] += 1.5
+        kwargs = {'beam_size': 4, 'len_pen': 0.6, 'eos': 2, 'use_cache': use_cache}
+        batch = self.generate(BeamSearchSequenceGenerator, **kwargs)
+
+        encoder_states, encoder_mask = self.encoder_states, self.encoder_mask
+        lengths = []
+        for i in range(encoder_states.size(0)):
+            self.encoder_states, self.encoder_mask = encoder_states[i : i + 1], encoder_mask[i : i + 1]
+            single = self.generate(BeamSearchSequenceGenerator, **kwargs)[0]
+            assert torch.equal(batch[i, : single.size(0)], single)
+            assert (batch[i, single.size(0) :] == 0).all()
+            lengths.append(single.size(0))
+        assert batch.size(1) == max(lengths) and min(lengths) < max(lengths)
+
+    @pytest.mark.unit
+    def test_beam_search_n_best(self):
+        best = self.generate(BeamSearchSequenceGenerator, use_cache=True, beam_size=4, len_pen=0.6)
+        n_best = self.generate(BeamSearchSequenceGenerator, use_cache=True, beam_size=4, len_pen=0.6, n_best=3)
+        assert n_best.shape == (3, 3, best.size(1))
+        assert torch.equal(n_best[:, 0], best)
+        with pytest.raises(ValueError):
+            BeamSearchSequenceGenerator(self.embedding, self.decoder, self.log_softmax, beam_size=2, n_best=3)
@@ -0,0 +1,58 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+import torch
+
+from nemo.collections.tts.modules import glow_tts_submodules
+
+
+def random_alignment_inputs(batch_size=5, max_text_len=17, max_spect_len=61):
+    torch.manual_seed(0)
+    text_lengths = torch.randint(1, max_text_len + 1, (batch_size,))
+    spect_lengths = torch.randint(1, max_spect_len + 1, (batch_size,))
+    text_lengths[0], spect_lengths[0] = max_text_len, max_spect_len
+    x_mask = glow_tts_submodules.sequence_mask(text_lengths, max_text_len).float()
+    y_mask = glow_tts_submodules.sequence_mask(spect_lengths, max_spect_len).float()
+    mask = x_mask.unsqueeze(2) * y_mask.unsqueeze(1)
+    # Rounded log-likelihoods, so that ties between paths are searched too
+    value = torch.round(torch.randn(batch_size, max_text_len, max_spect_len) * 4) / 4
+    return value, mask
+
+
+class TestGlowTTSSubmodules:
+    @pytest.mark.unit
+    @pytest.mark.parametrize("use_numba", [False, True])
+    def test_maximum_path_matches_numpy(self, use_numba, monkeypatch):
+        if use_numba and not glow_tts_submodules.HAVE_NUMBA:
+            pytest.skip("numba is not installed")
+        monkeypatch.setattr(glow_tts_submodules, 'HAVE_NUMBA', use_numba)
+
+        value, mask = random_alignment_inputs()
+        expected = glow_tts_submodules.maximum_path_numpy(value, mask)
+        path = glow_tts_submodules.maximum_path(value, mask)
+        assert path.dtype == expected.dtype
+        assert torch.equal(path, expected)
+
+        # Every frame of an utterance is aligned to exactly one token
+        assert torch.equal(path.sum(1), mask[:, 0])
+
+    @pytest.mark.unit
+    @pytest.mark.run_only_on('GPU')
+    def test_maximum_path_on_gpu(self):
+        value, mask = random_alignment_inputs()
+        expected = glow_tts_submodules.maximum_path_numpy(value, mask)
+        path = glow_tts_submodules.maximum_path(value.cuda(), mask.cuda())
+        assert path.is_cuda
+        assert torch.equal(path.cpu(), expected)
@@ -0,0 +1,70 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+import torch
+
+from nemo.collections.tts.helpers.helpers import batched_griffin_lim
+
+
+def griffin_lim_reference(magnitudes, n_iters, n_fft, hop_length, momentum):
+    """Griffin-Lim algorithm of a single spectrogram with torch.stft and torch.istft, from zero phases"""
+    window = torch.hann_window(n_fft, dtype=magnitudes.dtype)
+    length = hop_length * (magnitudes.shape[1] - 1)
+    angles = torch.ones_like(magnitudes, dtype=torch.complex128)
+    rebuilt = torch.zeros_like(angles)
+    for _ in range(n_iters):
+        previous = rebuilt
+        signal = torch.istft(magnitudes * angles, n_fft, hop_length, window=window, length=length)
+        rebuilt = torch.stft(signal, n_fft, hop_length, window=window, pad_mode='reflect', return_complex=True)
+        angles = rebuilt - previous * (momentum / (1 + momentum))
+        angles = angles / (angles.abs() + 1e-16)
+    return torch.istft(magnitudes * angles, n_fft, hop_length, window=window, length=length)
+
+
+class TestHelpers:
+    @pytest.mark.unit
+    @pytest.mark.parametrize("momentum", [0.0, 0.99])
+    def test_batched_griffin_lim_matches_single_spectrograms(self, momentum):
+        torch.manual_seed(0)
+        n_fft, hop_length = 256, 64
+        lengths = torch.tensor([40, 23, 31, 5])
+        magnitudes = torch.rand(len(lengths), n_fft // 2 + 1, 40, dtype=torch.float64)
+
+        audio = batched_griffin_lim(magnitudes, lengths, n_iters=8, momentum=momentum, init=None)
+        assert audio.shape == (len(lengths), hop_length * 39)
+        for i, length in enumerate(lengths.tolist()):
+            num_samples = hop_length * (length - 1)
+            expected = griffin_lim_reference(magnitudes[i, :, :length], 8, n_fft, hop_length, momentum)
+            assert torch.allclose(audio[i, :num_samples], expected, atol=1e-10)
+            assert torch.all(audio[i, num_samples:] == 0)
+
+    @pytest.mark.unit
+    def test_batched_griffin_lim_random_phases(self):
+        magnitudes = torch.rand(2, 129, 20)
+        first = batched_griffin_lim(magnitudes, n_iters=2, generator=torch.Generator().manual_seed(1))
+        second = batched_griffin_lim(magnitudes, n_iters=2, generator=torch.Generator().manual_seed(1))
+        assert torch.equal(first, second)
+        with pytest.raises(ValueError):
+            batched_griffin_lim(magnitudes, init='zeros')
+
+    @pytest.mark.unit
+    @pytest.mark.run_only_on('GPU')
+    def test_batched_griffin_lim_on_gpu(self):
+        magnitudes = torch.rand(3, 129, 30)
+        lengths = torch.tensor([30, 12, 21])
+        expected = batched_griffin_lim(magnitudes, lengths, n_iters=4, init=None)
+        audio = batched_griffin_lim(magnitudes.cuda(), lengths.cuda(), n_iters=4, init=None)
+        assert audio.is_cuda
+        assert torch.allclose(audio.cpu(), expected, atol=1e-4)
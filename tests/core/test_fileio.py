@@ -243,3 +243,36 @@ class TestFileIO:
             w2 = asr_model2.encoder.encoder[0].mconv[0].conv.weight.data.detach().cpu().numpy()
 
             assert np.array_equal(w1, w2)
+
+    @pytest.mark.unit
+    def test_save_restore_uncompressed_nemo_file(self, asr_model):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            nemo_file = os.path.join(tmpdir, 'asr.nemo')
+
+            # Save model (with random artifact).
+            with tempfile.NamedTemporaryFile() as artifact:
+                asr_model.register_artifact(config_path=None, src=artifact.name)
+                asr_model.save_to(nemo_file, compress=False)
+
+            # Restore the model, weights are memory mapped.
+            asr_model2 = EncDecCTCModel.restore_from(restore_path=nemo_file, map_location=torch.device('cpu'))
+
+            assert len(asr_model.decoder.vocabulary) == len(asr_model2.decoder.vocabulary)
+            assert asr_model.num_weights == asr_model2.num_weights
+            for key, value in asr_model.state_dict().items():
+                assert torch.equal(value.cpu(), asr_model2.state_dict()[key])
+
+            # Mapped weights are copy-on-write, saving over the restored file does not affect them.
+            asr_model2.encoder.encoder[0].mconv[0].conv.weight.data += 1.0
+            w2 = asr_model2.encoder.encoder[0].mconv[0].conv.weight.data.detach().cpu().numpy()
+            asr_model2.save_to(nemo_file, compress=False)
+            assert np.array_equal(asr_model2.encoder.encoder[0].mconv[0].conv.weight.data.numpy(), w2)
+
+            asr_model3 = EncDecCTCModel.restore_from(restore_path=nemo_file, map_location=torch.device('cpu'))
+            w3 = asr_model3.encoder.encoder[0].mconv[0].conv.weight.data.detach().cpu().numpy()
+            assert np.array_equal(w2, w3)
+
+            # Model level PT checkpoint
+            asr_model.extract_state_dict_from(nemo_file, tmpdir)
+            state_dict = torch.load(os.path.join(tmpdir, 'model_weights.ckpt'))
+            assert np.array_equal(state_dict['encoder.encoder.0.mconv.0.conv.weight'].numpy(), w2)
@@ -0,0 +1,43 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from nemo.utils.lazy_import import import_times
+
+# Dependencies that must only be imported when the modules that need them are used. Import times are checked by
+# scripts/benchmarks/import_time_benchmark.py --check, as wall-clock budgets are too noisy for unit tests.
+HEAVY_MODULES = ('torch', 'pytorch_lightning', 'hydra', 'omegaconf', 'onnx', 'librosa', 'transformers', 'webdataset')
+
+LAZY_MODULES = ('nemo', 'nemo.collections.asr', 'nemo.collections.nlp', 'nemo.collections.tts', 'nemo.core')
+
+
+class TestImportTime:
+    @pytest.mark.unit
+    @pytest.mark.parametrize('module', LAZY_MODULES)
+    def test_import_is_lazy(self, module):
+        times = import_times(f'import {module}')
+        imported = [name for name in HEAVY_MODULES if name in times]
+        assert not imported, f"`import {module}` imports {imported}"
+
+    @pytest.mark.unit
+    def test_lazy_attributes(self):
+        import nemo.collections.asr as nemo_asr
+        import nemo.core
+
+        assert 'models' in dir(nemo_asr)
+        assert 'ModelPT' in dir(nemo.core)
+        assert nemo.core.neural_types.NeuralType is not None
+        with pytest.raises(AttributeError):
+            nemo.core.NotAClass
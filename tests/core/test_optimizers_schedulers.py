@@ -118,6 +118,38 @@ class TestOptimizersSchedulers:
         assert set(output_config.keys()) != set(sgd_config.keys())
         assert set(output_config.keys()) == set(novograd_config)
 
+    @pytest.mark.unit
+    @pytest.mark.parametrize(
+        'options',
+        [{}, {'amsgrad': True}, {'grad_averaging': True, 'weight_decay': 0.01}, {'luc': True, 'weight_decay': 0.01}],
+    )
+    def test_novograd_foreach_matches_loop(self, options):
+        if not optim.novograd._has_foreach_ops():
+            pytest.skip("torch has no multi-tensor operations")
+
+        torch.manual_seed(0)
+        inputs = [torch.randn(8, 5) for _ in range(4)]
+        models = []
+        for foreach in (False, True):
+            torch.manual_seed(1)
+            model = torch.nn.Sequential(torch.nn.Linear(5, 7), torch.nn.Tanh(), torch.nn.Linear(7, 1))
+            optimizer = optim.Novograd(model.parameters(), lr=self.INITIAL_LR, foreach=foreach, **options)
+            for step, x in enumerate(inputs):
+                optimizer.zero_grad()
+                model(x).pow(2).mean().backward()
+                if step == 1:
+                    # Parameters without gradient are skipped
+                    model[2].bias.grad = None
+                first_norm = model[0].weight.grad.norm().pow(2)
+                optimizer.step()
+                if step == 0:
+                    # The second moment starts at the squared norm of the first gradient
+                    assert torch.allclose(optimizer.state[model[0].weight]['exp_avg_sq'], first_norm)
+            models.append(model)
+
+        for loop_param, foreach_param in zip(models[0].parameters(), models[1].parameters()):
+            assert torch.allclose(loop_param, foreach_param, atol=1e-6)
+
     def test_get_scheduler(self):
         model = TempModel()
         optimizer = optim.Novograd(model.parameters(), lr=self.INITIAL_LR)
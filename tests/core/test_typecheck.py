@@ -702,3 +702,82 @@ class TestNeuralTypeCheckSystem:
         data = [[[bb(), bb(), bb()]], [[bb()], [bb(), bb()]]]
         # TODO> THIS FINAL CHECK SHOULD FAIL !
         result = obj(x=data)
+
+    @pytest.mark.unit
+    def test_ndim_and_production_modes(self):
+        class InputOutputTypes(Typing):
+            @property
+            def input_types(self):
+                return {"x": NeuralType(('B', 'T'), ElementType())}
+
+            @property
+            def output_types(self):
+                return {"y": NeuralType(('B', 'T'), ElementType())}
+
+            @typecheck()
+            def __call__(self, x):
+                return x + 1
+
+        obj = InputOutputTypes()
+        wrong_type = torch.zeros(2, 3)
+        wrong_type.neural_type = NeuralType(('B', 'T'), ChannelType())
+
+        with typecheck.typecheck_mode('ndim'):
+            result = obj(x=torch.zeros(2, 3))
+            assert result.neural_type.compare(NeuralType(('B', 'T'), ElementType())) == NeuralTypeComparisonResult.SAME
+
+            # Only the number of dimensions and argument names are checked
+            _ = obj(x=wrong_type)
+            with pytest.raises(TypeError):
+                _ = obj(x=torch.zeros(2))
+            with pytest.raises(TypeError):
+                _ = obj(a=torch.zeros(2, 3))
+
+            # Types are re-resolved if the class replaces them
+            InputOutputTypes.input_types = property(lambda self: {"x": NeuralType(('B',), ElementType())})
+            InputOutputTypes.output_types = property(lambda self: {"y": NeuralType(('B',), ElementType())})
+            _ = obj(x=torch.zeros(2))
+            with pytest.raises(TypeError):
+                _ = obj(x=torch.zeros(2, 3))
+
+        with typecheck.typecheck_mode('production'):
+            result = obj(x=torch.zeros(2, 3, 4))
+            assert not hasattr(result, 'neural_type')
+
+        assert typecheck.get_typecheck_mode() == 'full'
+        with pytest.raises(TypeError):
+            _ = obj(x=torch.zeros(2, 3))
+
+    @pytest.mark.unit
+    def test_typecheck_stats(self):
+        class InputOutputTypes(Typing):
+            @property
+            def input_types(self):
+                return {"x": NeuralType(('B',), ElementType())}
+
+            @property
+            def output_types(self):
+                return {"y": NeuralType(('B',), ElementType())}
+
+            @typecheck()
+            def __call__(self, x):
+                return x + 1
+
+        obj = InputOutputTypes()
+        typecheck.reset_typecheck_stats()
+        typecheck.set_typecheck_stats_enabled(True)
+        try:
+            for mode in ('full', 'ndim', 'production'):
+                with typecheck.typecheck_mode(mode):
+                    _ = obj(x=torch.zeros(10))
+            with pytest.raises(TypeError):
+                _ = obj(x=torch.zeros(10, 10))
+        finally:
+            typecheck.set_typecheck_stats_enabled(False)
+
+        _ = obj(x=torch.zeros(10))
+        stats = typecheck.get_typecheck_stats()['InputOutputTypes.__call__']
+        assert stats.calls == 4
+        assert stats.check_time > 0.0
+        typecheck.reset_typecheck_stats()
+        assert typecheck.get_typecheck_stats() == {}